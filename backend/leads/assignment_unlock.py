@@ -17,17 +17,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from backend.users.models import LeadUnlock, Wallet, WalletTransaction
-from backend.users.wallet_views import get_full_contact_info, get_lead_credits_cost
+from backend.users.wallet_views import get_full_contact_info
 
+from .lead_pricing import lead_credits
 from .models import Lead, LeadAccess, LeadAssignment
 
 logger = logging.getLogger(__name__)
 
 
 def _credits_required_for_unlock(lead, user) -> int:
-    """Same ML-based pricing as POST /api/auth/leads/<lead_id>/unlock/ (wallet_views.unlock_lead)."""
-    n = get_lead_credits_cost(str(lead.id), user)
-    return max(1, int(round(float(n))))
+    """Stored lead price, same as POST /api/auth/leads/<lead_id>/unlock/ (wallet_views.unlock_lead)."""
+    return lead_credits(lead, user)
 
 
 def _lead_is_expired(lead: Lead) -> bool:
@@ -190,6 +190,8 @@ def unlock_lead_by_assignment(request, assignment_id):
                 LeadAccess.objects.filter(lead=lead, provider=user).update(
                     is_active=True, credit_cost=credits_needed
                 )
+                from .feed_version import bump_category
+                bump_category(lead.service_category_id)
 
             assignment.status = "purchased"
             assignment.purchased_at = timezone.now()
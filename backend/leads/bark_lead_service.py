@@ -5,8 +5,9 @@ Implements 3-provider limit per lead with real-time updates
 from django.db import transaction
 from django.utils import timezone
 from django.core.cache import cache
+from .lead_pricing import lead_credits, tier_bucket
 from .models import Lead, LeadAssignment
-from .ml_services import DynamicPricingMLService, LeadAccessControlMLService
+from .ml_services import LeadAccessControlMLService
 from backend.users.models import ProviderProfile
 from backend.payments.models import Transaction
 import logging
@@ -19,7 +20,6 @@ class BarkLeadService:
     """Service for managing Bark-style lead flow with 3-provider limits"""
     
     def __init__(self):
-        self.pricing_ml = DynamicPricingMLService()
         self.access_control = LeadAccessControlMLService()
     
     def get_available_leads(self, provider, limit=20):
@@ -54,14 +54,11 @@ class BarkLeadService:
             # Apply ordering and limit after filtering
             available_leads = available_leads.order_by('-created_at')[:limit]
             
-            # Batch calculate pricing for all leads at once (much faster)
+            # Prices are stored on the lead (lead_pricing.py); only the discount bucket is per provider
             leads_with_pricing = []
-            pricing_results = self.pricing_ml.calculate_batch_pricing(available_leads, provider)
+            bucket = tier_bucket(provider)
             
-            for i, lead in enumerate(available_leads):
-                # Use pre-calculated pricing result
-                pricing_result = pricing_results[i] if i < len(pricing_results) else {'price': 5, 'reasoning': 'Default pricing'}
-                
+            for lead in available_leads:
                 # Get claim status
                 claim_status = lead.get_claim_status()
                 remaining_slots = lead.get_remaining_slots()
@@ -76,8 +73,8 @@ class BarkLeadService:
                     'urgency': lead.get_urgency_display(),
                     'verification_score': lead.verification_score,
                     'created_at': lead.created_at,
-                    'credit_cost': pricing_result['price'],
-                    'pricing_reasoning': pricing_result['reasoning'],
+                    'credit_cost': lead_credits(lead, bucket=bucket),
+                    'pricing_reasoning': f"Stored lead price ({bucket} tier)",
                     'claim_status': claim_status,
                     'remaining_slots': remaining_slots,
                     'assigned_count': lead.assigned_providers_count,
@@ -145,9 +142,8 @@ class BarkLeadService:
                         'error': access_result['reason']
                     }
                 
-                # Calculate credit cost
-                pricing_result = self.pricing_ml.calculate_dynamic_lead_price(lead, provider)
-                credit_cost = pricing_result['price']
+                # Stored lead price (see lead_pricing.py)
+                credit_cost = lead_credits(lead, provider)
                 
                 # Check if provider has enough credits
                 if profile.credit_balance < credit_cost:
@@ -211,8 +207,9 @@ class BarkLeadService:
         try:
             lead = Lead.objects.get(id=lead_id)
             
-            # Calculate pricing
-            pricing_result = self.pricing_ml.calculate_dynamic_lead_price(lead, provider)
+            # Stored lead price (see lead_pricing.py)
+            bucket = tier_bucket(provider)
+            credit_cost = lead_credits(lead, bucket=bucket)
             
             # Check if provider can claim this lead
             can_claim = (
@@ -241,8 +238,8 @@ class BarkLeadService:
                     'hiring_timeline': lead.get_hiring_timeline_display(),
                     'additional_requirements': lead.additional_requirements,
                     'created_at': lead.created_at,
-                    'credit_cost': pricing_result['price'],
-                    'pricing_reasoning': pricing_result['reasoning'],
+                    'credit_cost': credit_cost,
+                    'pricing_reasoning': f"Stored lead price ({bucket} tier)",
                     'claim_status': lead.get_claim_status(),
                     'remaining_slots': lead.get_remaining_slots(),
                     'assigned_count': lead.assigned_providers_count,
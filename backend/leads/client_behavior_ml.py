@@ -16,7 +16,10 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, precision_recall_curve
 import joblib
 import logging
+from itertools import groupby, islice
+from operator import itemgetter
 
+from backend.leads import lead_features as feature_store
 from backend.leads.models import Lead, LeadAssignment
 from backend.users.models import User, ProviderProfile
 
@@ -31,56 +34,120 @@ class ClientBehaviorML:
         self.feature_columns = []
         self.is_trained = False
         
-    def collect_training_data(self, days_back: int = 90) -> pd.DataFrame:
-        """Collect training data from the last N days"""
+    def collect_training_data(self, days_back: int = 90, chunk_size: int = 1000) -> pd.DataFrame:
+        """
+        Collect training data from the last N days.
+        
+        Columnar: client history and assignment outcomes are read up front with
+        grouped / streamed queries (each client once, however many leads they
+        posted), then leads are streamed with iterator() chunk_size at a time with
+        their stored features, so the query count does not grow with the leads.
+        """
         logger.info(f"Collecting training data from last {days_back} days")
         
-        cutoff_date = timezone.now() - timedelta(days=days_back)
+        now = timezone.now()
+        cutoff_date = now - timedelta(days=days_back)
         
         # Get all leads from the period
-        leads = Lead.objects.filter(
-            created_at__gte=cutoff_date
-        ).select_related('client', 'service_category').prefetch_related(
-            'assignments__provider__provider_profile'
-        )
+        leads = Lead.objects.filter(created_at__gte=cutoff_date)
+        
+        client_features = self._bulk_client_features(leads.values('client_id'), now)
+        interactions = self._bulk_interactions(leads)
         
         training_data = []
+        rows = leads.select_related('service_category').iterator(chunk_size=chunk_size)
         
-        for lead in leads:
-            # Basic lead features
-            lead_features = self._extract_lead_features(lead)
-            
-            # Client engagement features
-            client_features = self._extract_client_features(lead.client)
-            
-            # Provider interaction features
-            interaction_features = self._extract_interaction_features(lead)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            stored = feature_store.bulk_for([lead.pk for lead in chunk])
             
-            # Outcome (converted or not)
-            outcome = self._determine_conversion(lead)
-            
-            # Combine all features
-            features = {
-                **lead_features,
-                **client_features,
-                **interaction_features,
-                'converted': outcome
-            }
-            
-            training_data.append(features)
+            for lead in chunk:
+                interaction = interactions.pop(lead.pk, None) or {**self._interaction_features([], []), 'won': False}
+                
+                # Outcome (converted or not): any assignment won
+                outcome = 1 if interaction.pop('won') else 0
+                
+                # Lead, client engagement and provider interaction features
+                training_data.append({
+                    **self._extract_lead_features(lead, stored.get(lead.pk)),
+                    **client_features[lead.client_id],
+                    **interaction,
+                    'converted': outcome
+                })
         
         df = pd.DataFrame(training_data)
         logger.info(f"Collected {len(df)} training samples")
         return df
     
-    def _extract_lead_features(self, lead: Lead) -> Dict:
-        """Extract features from lead data"""
+    def _bulk_client_features(self, client_ids, now) -> Dict:
+        """{client id: client features} for many clients from two grouped queries"""
+        requests = Lead.objects.filter(client_id__in=client_ids).values('client_id').annotate(
+            total_requests=Count('id'),
+            last_request_at=Max('created_at'),
+        ).order_by()
+        outcomes = {
+            row['lead__client_id']: row
+            for row in LeadAssignment.objects.filter(lead__client_id__in=client_ids).values('lead__client_id').annotate(
+                completed_jobs=Count('id', filter=Q(status='accepted')),
+                won_jobs=Count('id', filter=Q(status='won')),
+            ).order_by()
+        }
+        features = {}
+        for row in requests:
+            outcome = outcomes.get(row['client_id'], {})
+            features[row['client_id']] = self._client_features(
+                row['total_requests'],
+                outcome.get('completed_jobs', 0),
+                outcome.get('won_jobs', 0),
+                row['last_request_at'],
+                now,
+            )
+        return features
+    
+    def _bulk_interactions(self, leads) -> Dict:
+        """
+        {lead id: interaction features plus 'won'} for the leads with assignments,
+        from one query streamed in lead order
+        """
+        rows = LeadAssignment.objects.filter(lead__in=leads).order_by('lead_id', '-assigned_at').values_list(
+            'lead_id', 'status', 'assigned_at', 'viewed_at',
+            'lead__latitude', 'lead__longitude',
+            'provider__provider_profile__id', 'provider__latitude', 'provider__longitude',
+        )
+        
+        interactions = {}
+        for lead_id, group in groupby(rows.iterator(chunk_size=2000), key=itemgetter(0)):
+            response_times = []
+            distances = []
+            won = False
+            count = 0
+            for _, status, assigned_at, viewed_at, lead_lat, lead_lng, profile_id, provider_lat, provider_lng in group:
+                count += 1
+                won = won or status == 'won'
+                if assigned_at and viewed_at:
+                    response_times.append((viewed_at - assigned_at).total_seconds() / 3600)
+                if profile_id and lead_lat and lead_lng:
+                    distances.append(self._calculate_distance(lead_lat, lead_lng, provider_lat or 0, provider_lng or 0))
+            interactions[lead_id] = {**self._interaction_features(response_times, distances, count), 'won': won}
+        return interactions
+    
+    def _extract_lead_features(self, lead: Lead, stored=None) -> Dict:
+        """Extract features from lead data (text / location from the feature store)"""
+        stored = stored or feature_store.for_lead(lead)
+        if stored is not None:
+            description_length = stored.derived['description_word_count']
+            has_location = stored.derived['has_coordinates']
+        else:
+            description_length = len(lead.description.split()) if lead.description else 0
+            has_location = 1 if lead.latitude and lead.longitude else 0
         return {
             'category_id': lead.service_category.id,
-            'description_length': len(lead.description.split()) if lead.description else 0,
+            'description_length': description_length,
             'budget_range_numeric': self._budget_to_numeric(lead.budget_range),
             'urgency_numeric': self._urgency_to_numeric(lead.urgency),
-            'has_location': 1 if lead.latitude and lead.longitude else 0,
+            'has_location': has_location,
             'time_of_day': lead.created_at.hour,
             'day_of_week': lead.created_at.weekday(),
             'is_weekend': 1 if lead.created_at.weekday() >= 5 else 0,
@@ -90,27 +157,36 @@ class ClientBehaviorML:
     
     def _extract_client_features(self, client: User) -> Dict:
         """Extract client engagement features"""
-        # Count previous requests
-        total_requests = Lead.objects.filter(client=client).count()
-        
-        # Count completed jobs (leads that were accepted)
-        completed_jobs = LeadAssignment.objects.filter(
-            lead__client=client,
-            status='accepted'
-        ).count()
+        # Count previous requests and time since the last one
+        requests = Lead.objects.filter(client=client).aggregate(
+            total_requests=Count('id'),
+            last_request_at=Max('created_at'),
+        )
         
-        # Calculate engagement score
-        engagement_score = self._calculate_engagement_score(client)
+        # Completed jobs (leads that were accepted) and won jobs
+        outcomes = LeadAssignment.objects.filter(lead__client=client).aggregate(
+            completed_jobs=Count('id', filter=Q(status='accepted')),
+            won_jobs=Count('id', filter=Q(status='won')),
+        )
         
-        # Time since last request
-        last_request = Lead.objects.filter(client=client).order_by('-created_at').first()
-        days_since_last = (timezone.now() - last_request.created_at).days if last_request else 999
+        return self._client_features(
+            requests['total_requests'],
+            outcomes['completed_jobs'],
+            outcomes['won_jobs'],
+            requests['last_request_at'],
+            timezone.now(),
+        )
+    
+    def _client_features(self, total_requests: int, completed_jobs: int, won_jobs: int,
+                         last_request_at, now) -> Dict:
+        """Client engagement features from a client's request / outcome counts"""
+        days_since_last = (now - last_request_at).days if last_request_at else 999
         
         return {
             'total_requests': total_requests,
             'completed_jobs': completed_jobs,
             'conversion_rate': completed_jobs / max(total_requests, 1),
-            'engagement_score': engagement_score,
+            'engagement_score': self._engagement_score(total_requests, won_jobs),
             'days_since_last_request': days_since_last,
             'is_new_client': 1 if total_requests <= 1 else 0,
         }
@@ -119,15 +195,6 @@ class ClientBehaviorML:
         """Extract provider interaction features"""
         assignments = lead.assignments.all()
         
-        if not assignments.exists():
-            return {
-                'num_providers_assigned': 0,
-                'avg_response_time_hours': 999,
-                'min_distance_km': 999,
-                'max_distance_km': 999,
-                'providers_within_25km': 0,
-            }
-        
         # Calculate response times
         response_times = []
         distances = []
@@ -145,34 +212,37 @@ class ClientBehaviorML:
                 )
                 distances.append(distance)
         
+        return self._interaction_features(response_times, distances, len(assignments))
+    
+    def _interaction_features(self, response_times: List[float], distances: List[float], count: int = 0) -> Dict:
+        """Provider interaction features from assignment response times and distances"""
+        if not count:
+            return {
+                'num_providers_assigned': 0,
+                'avg_response_time_hours': 999,
+                'min_distance_km': 999,
+                'max_distance_km': 999,
+                'providers_within_25km': 0,
+            }
+        
         return {
-            'num_providers_assigned': len(assignments),
+            'num_providers_assigned': count,
             'avg_response_time_hours': np.mean(response_times) if response_times else 999,
             'min_distance_km': min(distances) if distances else 999,
             'max_distance_km': max(distances) if distances else 999,
             'providers_within_25km': sum(1 for d in distances if d <= 25),
         }
     
-    def _determine_conversion(self, lead: Lead) -> int:
-        """Determine if a lead was converted (client hired a provider)"""
-        # A lead is converted if any assignment was won
-        return 1 if lead.assignments.filter(status='won').exists() else 0
-    
-    def _calculate_engagement_score(self, client: User) -> float:
-        """Calculate client engagement score (0-100)"""
+    def _engagement_score(self, total_requests: int, won_jobs: int) -> float:
+        """Client engagement score (0-100) from request and won-job counts"""
         # Base score
         score = 50.0
         
         # Factor in total requests
-        total_requests = Lead.objects.filter(client=client).count()
         score += min(total_requests * 5, 30)  # Max 30 points for request frequency
         
         # Factor in completion rate
-        completed = LeadAssignment.objects.filter(
-            lead__client=client,
-            status='won'
-        ).count()
-        completion_rate = completed / max(total_requests, 1)
+        completion_rate = won_jobs / max(total_requests, 1)
         score += completion_rate * 20  # Max 20 points for completion rate
         
         return min(score, 100.0)
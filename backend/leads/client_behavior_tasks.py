@@ -30,8 +30,9 @@ def train_client_behavior_ml_model():
         result = ml_service.train_model(training_data)
         
         # Save model
-        model_path = '/home/paas/work_platform/backend/models/client_behavior_model.pkl'
-        ml_service.save_model(model_path)
+        from backend.leads.ml_registry import client_behavior_model_path, ml_registry
+        ml_service.save_model(client_behavior_model_path())
+        ml_registry.reload('client_behavior')
         
         logger.info(f"Client behavior ML model training completed: {result}")
         return result
@@ -48,11 +49,10 @@ def predict_lead_conversion_probability(lead_id):
         from backend.leads.models import Lead
         
         lead = Lead.objects.get(id=lead_id)
-        ml_service = ClientBehaviorML()
+        from backend.leads.ml_registry import ml_registry
         
-        # Try to load existing model
-        model_path = '/home/paas/work_platform/backend/models/client_behavior_model.pkl'
-        ml_service.load_model(model_path)
+        # Shared instance, model loaded once per process
+        ml_service = ml_registry.get('client_behavior')
         
         if not ml_service.is_trained:
             logger.warning("Client behavior ML model not trained, returning default probability")
@@ -0,0 +1,130 @@
+"""
+Feed versions for conditional GET on /api/leads/wallet/available/.
+
+A provider's feed page is fully determined by:
+
+    lead_feed:version                        everything (bumped by reprice_leads)
+    lead_feed:category:<category id>:version leads in a category changed (save /
+                                             delete, unlocks changing purchase counts)
+    lead_feed:provider:<user id>:version     this provider's wallet, assignments or unlocks
+    match_profile:<profile id>:version       categories / areas / tier (users/match_profile.py)
+
+plus the request's query string and a LEAD_FEED_ETAG_SECONDS clock bucket
+(time-derived fields such as timeAgo and lead expiry). feed_etag() hashes those
+stamps; after a full render the provider's profile id and category ids are kept
+under lead_feed:provider:<user id>:state so the next poll can build its ETag from
+the cache alone and answer 304 without touching the database.
+
+Stamps are bumped from signals in leads/signals.py (Lead, LeadAssignment,
+LeadAccess, Wallet) and by the writers that bypass save(): the routing quality
+gate, the unlock IntegrityError path and lead repricing. Like match_profile,
+missing stamps start from the clock so an evicted stamp never revives an old ETag.
+
+Design principles:
+- Never raises; cache problems only mean no 304
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.procompare.tiered_cache import bump_stamp
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_VERSION_KEY = 'lead_feed:version'
+
+
+def _category_key(category_id):
+    return f'lead_feed:category:{category_id}:version'
+
+
+def _provider_key(user_id):
+    return f'lead_feed:provider:{user_id}:version'
+
+
+def _state_key(user_id):
+    return f'lead_feed:provider:{user_id}:state'
+
+
+def _bump(key):
+    try:
+        bump_stamp(cache, key)
+    except Exception as e:
+        logger.warning(f"[LeadFeed] Failed to bump {key}: {e}")
+
+
+def bump_category(category_id):
+    """Leads in a category changed (new, status, availability, purchase counts)."""
+    if category_id is not None:
+        _bump(_category_key(category_id))
+
+
+def bump_provider(user_id):
+    """Something only this provider sees changed (wallet, assignments, unlocks)."""
+    if user_id is not None:
+        _bump(_provider_key(user_id))
+
+
+def bump_all():
+    """Every feed changed (e.g. leads repriced)."""
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def remember_feed_state(user_id, profile_id, category_ids):
+    """Keep what feed_etag() needs to build this provider's ETag from the cache alone."""
+    state = {'profile_id': profile_id, 'category_ids': sorted(category_ids)}
+    try:
+        if cache.get(_state_key(user_id)) != state:
+            cache.set(_state_key(user_id), state, timeout=getattr(settings, 'MATCH_PROFILE_CACHE_SECONDS', 3600))
+    except Exception as e:
+        logger.warning(f"[LeadFeed] Failed to store feed state for provider {user_id}: {e}")
+
+
+def _stamp(key, stamps):
+    value = stamps.get(key)
+    if value is None:
+        # Start missing stamps from the clock, as match_profile does
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def feed_etag(user_id, variant=''):
+    """
+    Quoted ETag for a provider's feed page, or None when it can't be built
+    (no stored feed state yet, cache unavailable). Never raises.
+    """
+    try:
+        state = cache.get(_state_key(user_id))
+        if state is None:
+            return None
+        keys = [
+            GLOBAL_VERSION_KEY,
+            _provider_key(user_id),
+            f"match_profile:{state['profile_id']}:version",
+            *(_category_key(category_id) for category_id in state['category_ids']),
+        ]
+        stamps = cache.get_many(keys)
+        parts = [f'{key}={_stamp(key, stamps)}' for key in keys]
+        bucket = int(time.time() // getattr(settings, 'LEAD_FEED_ETAG_SECONDS', 60))
+        parts.append(f'bucket={bucket}')
+        parts.append(f'q={variant}')
+        digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:32]
+        return f'"{digest}"'
+    except Exception as e:
+        logger.warning(f"[LeadFeed] Failed to build feed ETag for provider {user_id}: {e}")
+        return None
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match covers etag."""
+    if not etag:
+        return False
+    header = request.headers.get('If-None-Match', '')
+    if header.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in header.split(',')]
+    return etag in tags or f'W/{etag}' in tags
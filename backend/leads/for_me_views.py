@@ -4,9 +4,9 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Lead, LeadAssignment
+from .models import LeadAssignment
+from .provider_inbox import distances_km_for_leads
 from .serializers import ProviderForMeAssignmentSerializer
-from .test_lead_utils import exclude_test_leads
 
 
 class ForMePagination(PageNumberPagination):
@@ -22,19 +22,22 @@ def leads_for_me(request):
     if not user.is_provider:
         return Response({"detail": "Only providers can access this endpoint."}, status=403)
 
-    valid_ids = exclude_test_leads(Lead.objects.all()).values_list("id", flat=True)
     qs = (
-        LeadAssignment.objects.filter(provider=user, lead_id__in=valid_ids)
+        LeadAssignment.objects.filter(provider=user, lead__is_test=False)
         .select_related("lead", "lead__service_category", "lead__client")
         .order_by("-assigned_at")
     )
 
     paginator = ForMePagination()
     page = paginator.paginate_queryset(qs, request)
+    rows = page if page is not None else list(qs)
     ser = ProviderForMeAssignmentSerializer(
-        page if page is not None else qs,
+        rows,
         many=True,
-        context={"request": request},
+        context={
+            "request": request,
+            "distances_km": distances_km_for_leads(user, [a.lead for a in rows]),
+        },
     )
     if page is not None:
         return paginator.get_paginated_response(ser.data)
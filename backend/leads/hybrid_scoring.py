@@ -44,28 +44,8 @@ class HybridLeadScorer:
         # If ML is available, blend scores based on confidence
         if self.ml_services['quality'] and getattr(settings, 'ML_ENABLED', True):
             try:
-                # Prepare lead data for ML
-                lead_data = {
-                    'title': lead.title,
-                    'description': lead.description,
-                    'location_address': lead.location_address,
-                    'location_suburb': lead.location_suburb,
-                    'location_city': lead.location_city,
-                    'budget_range': lead.budget_range,
-                    'urgency': lead.urgency,
-                    'hiring_intent': getattr(lead, 'hiring_intent', 'researching'),
-                    'hiring_timeline': getattr(lead, 'hiring_timeline', 'flexible'),
-                    'additional_requirements': getattr(lead, 'additional_requirements', ''),
-                    'research_purpose': getattr(lead, 'research_purpose', ''),
-                    'verification_score': getattr(lead, 'verification_score', 50),
-                    'assigned_providers_count': getattr(lead, 'assigned_providers_count', 0),
-                    'total_provider_contacts': getattr(lead, 'total_provider_contacts', 0),
-                    'status': lead.status,
-                    'client__phone': getattr(lead.client, 'phone', '') if hasattr(lead, 'client') and lead.client else '',
-                    'client__email': getattr(lead.client, 'email', '') if hasattr(lead, 'client') and lead.client else ''
-                }
-                
-                ml_score = self.ml_services['quality'].predict_lead_quality(lead_data)
+                # Features come from the per-lead feature store (lead_features.py)
+                ml_score = self.ml_services['quality'].predict_for_lead(lead)
                 confidence = self._get_ml_confidence('LeadQualityMLService')
                 
                 # Blend rule and ML scores based on confidence
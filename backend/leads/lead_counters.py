@@ -0,0 +1,295 @@
+"""
+Lead engagement counters (views_count, responses_count, total_provider_contacts).
+
+When the shared cache has an atomic incr (Redis / memcached, see batching()),
+increments never touch the lead row. record() adds to one of
+LEAD_COUNTER_SHARDS delta keys in the shared cache, and registers the lead in a
+dirty set the first time it is touched since the last flush:
+
+    lead_counter:<lead id>:<field>:<shard>   pending delta
+    lead_counter:<lead id>:dirty             marker: lead is in the dirty set
+    lead_counter:dirty:seq                   last dirty-set slot handed out
+    lead_counter:dirty:<n>                   slot n -> lead id
+    lead_counter:dirty:flushed               last slot already flushed
+
+flush_lead_counters() walks the new slots, takes every pending delta with an
+atomic decr, and adds them to the leads in one bulk UPDATE per FLUSH_BATCH_SIZE
+leads (UPDATE ... FROM (VALUES ...) on PostgreSQL, a CASE update elsewhere).
+Deltas are handed back if the write fails. Every server process runs it every
+LEAD_COUNTER_FLUSH_SECONDS (start_flush_timer, started from wsgi.py; the flush
+lock keeps it to one at a time), and `manage.py flush_lead_counters` runs it
+on demand or as a worker.
+
+Without an atomic cache incr, concurrent read-modify-write increments would
+drop deltas, so record() issues a relative F() UPDATE on the lead instead.
+
+The marker is deleted before the deltas are read, so an increment racing a
+flush is either included in it or re-registers the lead for the next one.
+Database counts lag increments by at most one flush interval; pending_counts()
+adds the unflushed part for endpoints that show a live number.
+
+Design principles:
+- record() / flush never raise on cache or database errors
+- No row locks: the flush is a single relative UPDATE
+"""
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+
+from backend.procompare.tiered_cache import has_atomic_incr
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views_count', 'responses_count', 'total_provider_contacts')
+
+SEQ_KEY = 'lead_counter:dirty:seq'
+FLUSHED_KEY = 'lead_counter:dirty:flushed'
+FLUSH_LOCK_KEY = 'lead_counter:flushing'
+# Pending deltas and dirty slots outlive any reasonable flush outage
+COUNTER_TIMEOUT = 7 * 24 * 3600
+FLUSH_BATCH_SIZE = 1000
+
+_flush_lock = threading.Lock()
+_flush_thread = None
+_flush_stop = threading.Event()
+_flush_fork_hook = False
+
+
+def batching():
+    """True when increments are batched in the shared cache (its incr is atomic across workers)."""
+    return has_atomic_incr(cache)
+
+
+def _shards():
+    return max(1, getattr(settings, 'LEAD_COUNTER_SHARDS', 8))
+
+
+def _delta_key(lead_id, field, shard):
+    return f'lead_counter:{lead_id}:{field}:{shard}'
+
+
+def _marker_key(lead_id):
+    return f'lead_counter:{lead_id}:dirty'
+
+
+def _slot_key(n):
+    return f'lead_counter:dirty:{n}'
+
+
+def _incr(key, delta):
+    cache.add(key, 0, timeout=COUNTER_TIMEOUT)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Expired / evicted between add() and incr()
+        cache.add(key, 0, timeout=COUNTER_TIMEOUT)
+        return cache.incr(key, delta)
+
+
+def _mark_dirty(lead_id):
+    if cache.add(_marker_key(lead_id), 1, timeout=COUNTER_TIMEOUT):
+        slot = _incr(SEQ_KEY, 1)
+        cache.set(_slot_key(slot), str(lead_id), timeout=COUNTER_TIMEOUT)
+
+
+def record(lead_id, field, delta=1):
+    """
+    Add delta to a lead counter: batched in the shared cache and flushed to the
+    row later, or a direct relative UPDATE (see batching()). Errors are logged, not raised.
+    """
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f'Unknown lead counter: {field}')
+    try:
+        if not batching():
+            from .models import Lead
+            Lead.objects.filter(pk=lead_id).update(**{field: F(field) + delta})
+            return
+        _incr(_delta_key(lead_id, field, random.randrange(_shards())), delta)
+        _mark_dirty(lead_id)
+    except Exception as e:
+        logger.error(f"[LeadCounters] Failed to record {field} for lead {lead_id}: {e}")
+
+
+def pending_counts(lead_id):
+    """{field: unflushed delta} for a lead. Never raises."""
+    if not batching():
+        return dict.fromkeys(COUNTER_FIELDS, 0)
+    keys = {
+        _delta_key(lead_id, field, shard): field
+        for field in COUNTER_FIELDS
+        for shard in range(_shards())
+    }
+    counts = dict.fromkeys(COUNTER_FIELDS, 0)
+    try:
+        for key, value in cache.get_many(list(keys)).items():
+            counts[keys[key]] += value or 0
+    except Exception as e:
+        logger.warning(f"[LeadCounters] Failed to read pending counts for lead {lead_id}: {e}")
+    return counts
+
+
+def _take_deltas(lead_ids):
+    """Atomically move pending deltas out of the cache: {lead id: {field: delta}}."""
+    for lead_id in lead_ids:
+        cache.delete(_marker_key(lead_id))
+    keys = [
+        (lead_id, field, _delta_key(lead_id, field, shard))
+        for lead_id in lead_ids
+        for field in COUNTER_FIELDS
+        for shard in range(_shards())
+    ]
+    values = cache.get_many([key for _, _, key in keys])
+    deltas = {}
+    for lead_id, field, key in keys:
+        value = values.get(key)
+        if not value:
+            continue
+        # decr (not delete) keeps increments that land after the get_many
+        cache.decr(key, value)
+        deltas.setdefault(lead_id, dict.fromkeys(COUNTER_FIELDS, 0))[field] += value
+    return deltas
+
+
+def _give_back(deltas):
+    for lead_id, fields in deltas.items():
+        for field, value in fields.items():
+            if value:
+                record(lead_id, field, value)
+
+
+def _write_postgresql(table, columns, rows):
+    placeholders = ', '.join(['(%s::uuid' + ', %s::integer' * len(columns) + ')'] * len(rows))
+    assignments = ', '.join(f'{column} = {table}.{column} + v.{column}' for column in columns)
+    sql = (
+        f'UPDATE {table} SET {assignments} '
+        f'FROM (VALUES {placeholders}) AS v(id, {", ".join(columns)}) '
+        f'WHERE {table}.id = v.id'
+    )
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _write_case(model, rows):
+    from django.db.models import Case, F, IntegerField, Value, When
+
+    updates = {}
+    for index, field in enumerate(COUNTER_FIELDS, 1):
+        whens = [When(pk=row[0], then=Value(row[index])) for row in rows if row[index]]
+        if whens:
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+    return model.objects.filter(pk__in=[row[0] for row in rows]).update(**updates)
+
+
+def _write(deltas):
+    from .models import Lead
+
+    rows = [
+        (uuid.UUID(str(lead_id)), *(fields[field] for field in COUNTER_FIELDS))
+        for lead_id, fields in deltas.items()
+    ]
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            columns = [Lead._meta.get_field(field).column for field in COUNTER_FIELDS]
+            return _write_postgresql(Lead._meta.db_table, columns, [(str(row[0]), *row[1:]) for row in rows])
+        return _write_case(Lead, rows)
+
+
+def flush_lead_counters():
+    """
+    Write pending counter deltas to their leads. Returns {'leads', 'rows',
+    'increments'}, or None when another flush is running.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, True, timeout=300):
+        return None
+    started = time.monotonic()
+    result = {'leads': 0, 'rows': 0, 'increments': 0}
+    try:
+        seq = cache.get(SEQ_KEY) or 0
+        flushed = cache.get(FLUSHED_KEY) or 0
+        if seq < flushed:
+            # Sequence key was evicted and restarted
+            flushed = 0
+        while flushed < seq:
+            upto = min(seq, flushed + FLUSH_BATCH_SIZE)
+            slots = [_slot_key(n) for n in range(flushed + 1, upto + 1)]
+            lead_ids = list(dict.fromkeys(cache.get_many(slots).values()))
+            deltas = _take_deltas(lead_ids)
+            if deltas:
+                try:
+                    result['rows'] += _write(deltas)
+                except Exception as e:
+                    # Handed-back deltas are re-registered in new slots; retry next run
+                    logger.error(f"[LeadCounters] Flush of {len(deltas)} lead(s) failed, deltas kept: {e}")
+                    _give_back(deltas)
+                    break
+                result['leads'] += len(deltas)
+                result['increments'] += sum(sum(fields.values()) for fields in deltas.values())
+            cache.delete_many(slots)
+            cache.set(FLUSHED_KEY, upto, timeout=None)
+            flushed = upto
+    except Exception as e:
+        logger.error(f"[LeadCounters] Flush failed: {e}")
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    if result['leads']:
+        logger.info(
+            f"[LeadCounters] Flushed {result['increments']} increment(s) to {result['leads']} lead(s) "
+            f"in {(time.monotonic() - started) * 1000:.1f}ms"
+        )
+    return result
+
+
+def start_flush_timer():
+    """
+    Run flush_lead_counters every LEAD_COUNTER_FLUSH_SECONDS in a daemon thread
+    of this process while increments are batched. One thread per process
+    (re-started in forked workers). Returns True if a thread was started.
+    """
+    global _flush_thread, _flush_fork_hook
+    interval = getattr(settings, 'LEAD_COUNTER_FLUSH_SECONDS', 10)
+    if not interval or not batching():
+        return False
+    with _flush_lock:
+        if _flush_thread is not None and _flush_thread.is_alive():
+            return False
+        if not _flush_fork_hook and hasattr(os, 'register_at_fork'):
+            # Threads do not survive fork (gunicorn --preload): start a fresh one in the child
+            os.register_at_fork(after_in_child=start_flush_timer)
+            _flush_fork_hook = True
+        _flush_stop.clear()
+        _flush_thread = threading.Thread(
+            target=_flush_loop, args=(interval,), name='lead-counter-flush', daemon=True,
+        )
+        _flush_thread.start()
+    logger.info(f"[LeadCounters] Flush timer started in process {os.getpid()} (every {interval}s)")
+    return True
+
+
+def stop_flush_timer(timeout=None):
+    """Stop this process's flush thread (waits up to `timeout` seconds for it to exit)."""
+    with _flush_lock:
+        thread = _flush_thread
+        _flush_stop.set()
+    if thread is not None:
+        thread.join(timeout)
+
+
+def _flush_loop(interval):
+    while not _flush_stop.wait(interval):
+        close_old_connections()
+        try:
+            flush_lead_counters()
+        except Exception as e:
+            logger.error(f"[LeadCounters] Scheduled flush failed: {e}")
+        finally:
+            close_old_connections()
@@ -0,0 +1,281 @@
+"""
+Per-lead feature store (LeadFeatures rows).
+
+Lead features are derived once, when a lead is created or edited (signals.py),
+instead of being rebuilt as ad-hoc dicts by every scorer:
+
+    vector        float32, VECTOR_FEATURES order (the lead quality model's input
+                  without its last column, tfidf_norm)
+    derived       the same values by name, plus has_coordinates (client behaviour)
+    tfidf_norm    TF-IDF richness under the quality model version in tfidf_version;
+                  filled by the quality service on first use of a new version
+
+for_lead() / bulk_for() return stored rows, computing (and saving) missing or
+out-of-date ones. Bump FEATURE_SCHEMA_VERSION when a feature changes;
+`manage.py rebuild_lead_features` (run on deploy) recomputes stale rows in bulk.
+
+Time features come from the lead's created_at (local time). The quality model
+used to read them from the clock at prediction time; they were constant while
+it trained, so trained models never split on them.
+
+Design principles:
+- One definition of each feature, shared by training and scoring
+- Reads never raise: a failed save still returns computed features
+"""
+import logging
+import re
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FEATURE_SCHEMA_VERSION = 1
+BATCH_SIZE = 500
+
+# Lead fields the features are derived from (saves touching none of them skip the refresh)
+SOURCE_FIELDS = frozenset({
+    'title', 'description', 'location_address', 'location_suburb', 'location_city',
+    'budget_range', 'urgency', 'hiring_intent', 'hiring_timeline', 'additional_requirements',
+    'research_purpose', 'latitude', 'longitude', 'client', 'client_id',
+})
+
+# Column order of the lead quality model (LeadQualityMLService.extract_features)
+QUALITY_FEATURES = (
+    'title_length', 'description_length', 'title_word_count', 'description_word_count',
+    'has_phone', 'has_email', 'phone_length', 'email_has_domain',
+    'has_address', 'has_suburb', 'has_city', 'address_length',
+    'budget_value', 'has_budget', 'urgency_score', 'intent_score', 'timeline_score',
+    'has_special_requirements', 'has_research_purpose', 'special_requirements_length',
+    'hour_of_day', 'day_of_week', 'is_weekend',
+    'title_has_question', 'title_has_caps', 'description_has_question', 'description_has_caps',
+    'title_spam_score', 'description_spam_score',
+    'tfidf_norm',
+)
+VECTOR_FEATURES = QUALITY_FEATURES[:-1]
+
+BUDGET_VALUES = {
+    'under_1000': 500,
+    '1000_5000': 3000,
+    '5000_15000': 10000,
+    '15000_50000': 32500,
+    'over_50000': 75000,
+    'no_budget': 0
+}
+URGENCY_SCORES = {'urgent': 4, 'this_week': 3, 'this_month': 2, 'flexible': 1}
+INTENT_SCORES = {'ready_to_hire': 4, 'planning_to_hire': 3, 'comparing_quotes': 2, 'researching': 1}
+TIMELINE_SCORES = {'asap': 4, 'this_month': 3, 'next_month': 2, 'flexible': 1}
+
+# Matched against lowercased text (so the capitals pattern never fires, as before)
+SPAM_PATTERNS = [re.compile(pattern) for pattern in (
+    r'\b(urgent|asap|immediately|right now)\b',
+    r'\b(cheap|affordable|budget)\b',
+    r'\b(guaranteed|promise|sure)\b',
+    r'[!]{2,}',
+    r'[A-Z]{3,}',
+    r'\b(free|no cost|gratis)\b'
+)]
+
+
+def spam_score(text):
+    """0-100: five points per spam indicator match."""
+    if not text:
+        return 0
+    lowered = text.lower()
+    score = sum(len(pattern.findall(lowered)) * 5 for pattern in SPAM_PATTERNS)
+    return min(score, 100)
+
+
+def lead_data(lead):
+    """The lead_data dict LeadQualityMLService.extract_features takes, for a Lead."""
+    client = getattr(lead, 'client', None)
+    return {
+        'title': lead.title or '',
+        'description': lead.description or '',
+        'location_address': lead.location_address or '',
+        'location_suburb': lead.location_suburb or '',
+        'location_city': lead.location_city or '',
+        'budget_range': lead.budget_range or 'no_budget',
+        'urgency': lead.urgency or 'flexible',
+        'hiring_intent': lead.hiring_intent or 'researching',
+        'hiring_timeline': lead.hiring_timeline or 'flexible',
+        'additional_requirements': lead.additional_requirements or '',
+        'research_purpose': lead.research_purpose or '',
+        'contact_phone': (getattr(client, 'phone', '') or '') if client else '',
+        'contact_email': (getattr(client, 'email', '') or '') if client else '',
+        'created_at': lead.created_at,
+    }
+
+
+def derive(data):
+    """Quality features (without tfidf_norm) from a lead_data dict; the clock stands in for a missing created_at."""
+    title = data.get('title', '') or ''
+    description = data.get('description', '') or ''
+    phone = data.get('contact_phone', '') or ''
+    email = data.get('contact_email', '') or ''
+    address = data.get('location_address', '') or ''
+    requirements = data.get('additional_requirements', '') or ''
+    budget_range = data.get('budget_range', 'no_budget')
+    created = data.get('created_at')
+    created = timezone.localtime(created) if created else timezone.localtime()
+
+    return {
+        'title_length': len(title),
+        'description_length': len(description),
+        'title_word_count': len(title.split()),
+        'description_word_count': len(description.split()),
+        'has_phone': 1 if phone else 0,
+        'has_email': 1 if email else 0,
+        'phone_length': len(phone),
+        'email_has_domain': 1 if '@' in email else 0,
+        'has_address': 1 if address else 0,
+        'has_suburb': 1 if data.get('location_suburb') else 0,
+        'has_city': 1 if data.get('location_city') else 0,
+        'address_length': len(address),
+        'budget_value': BUDGET_VALUES.get(budget_range, 0),
+        'has_budget': 1 if budget_range != 'no_budget' else 0,
+        'urgency_score': URGENCY_SCORES.get(data.get('urgency', 'flexible'), 1),
+        'intent_score': INTENT_SCORES.get(data.get('hiring_intent', 'researching'), 1),
+        'timeline_score': TIMELINE_SCORES.get(data.get('hiring_timeline', 'flexible'), 1),
+        'has_special_requirements': 1 if requirements else 0,
+        'has_research_purpose': 1 if data.get('research_purpose') else 0,
+        'special_requirements_length': len(requirements),
+        'hour_of_day': created.hour,
+        'day_of_week': created.weekday(),
+        'is_weekend': 1 if created.weekday() >= 5 else 0,
+        'title_has_question': 1 if '?' in title else 0,
+        'title_has_caps': 1 if any(c.isupper() for c in title) else 0,
+        'description_has_question': 1 if '?' in description else 0,
+        'description_has_caps': 1 if any(c.isupper() for c in description) else 0,
+        'title_spam_score': spam_score(title),
+        'description_spam_score': spam_score(description),
+    }
+
+
+def compute(lead):
+    """Unsaved LeadFeatures for a lead."""
+    import numpy as np
+
+    from .models import LeadFeatures
+
+    derived = derive(lead_data(lead))
+    vector = np.array([derived[name] for name in VECTOR_FEATURES], dtype=np.float32)
+    derived['has_coordinates'] = 1 if lead.latitude and lead.longitude else 0
+    return LeadFeatures(
+        lead_id=lead.pk,
+        schema_version=FEATURE_SCHEMA_VERSION,
+        vector=vector.tobytes(),
+        derived=derived,
+    )
+
+
+def _save(rows):
+    from .models import LeadFeatures
+
+    # Recomputed rows drop tfidf_norm (blank tfidf_version): the quality service refills it on use
+    LeadFeatures.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['lead'],
+        update_fields=['schema_version', 'vector', 'derived', 'tfidf_norm', 'tfidf_version', 'computed_at'],
+    )
+
+
+def refresh(lead):
+    """Recompute and store a lead's features. Returns them (saved or not); never raises."""
+    try:
+        features = compute(lead)
+    except Exception as e:
+        logger.error(f"[LeadFeatures] Failed to compute features for lead {lead.pk}: {e}")
+        return None
+    try:
+        _save([features])
+    except Exception as e:
+        logger.error(f"[LeadFeatures] Failed to store features for lead {lead.pk}: {e}")
+    return features
+
+
+def for_lead(lead):
+    """Current stored features of a lead, computing them if missing or stale. None if they cannot be computed."""
+    from .models import LeadFeatures
+
+    try:
+        features = LeadFeatures.objects.get(lead_id=lead.pk, schema_version=FEATURE_SCHEMA_VERSION)
+    except LeadFeatures.DoesNotExist:
+        return refresh(lead)
+    except Exception as e:
+        logger.warning(f"[LeadFeatures] Failed to read features for lead {lead.pk}: {e}")
+        return refresh(lead)
+    features.lead = lead
+    return features
+
+
+def bulk_for(lead_ids):
+    """{lead id: LeadFeatures} for many leads; missing / stale rows are computed and stored in bulk."""
+    from .models import Lead, LeadFeatures
+
+    lead_ids = list(lead_ids)
+    result = {}
+    for start in range(0, len(lead_ids), BATCH_SIZE):
+        batch = lead_ids[start:start + BATCH_SIZE]
+        for features in LeadFeatures.objects.filter(lead_id__in=batch, schema_version=FEATURE_SCHEMA_VERSION):
+            result[features.lead_id] = features
+        missing = [lead_id for lead_id in batch if lead_id not in result]
+        if not missing:
+            continue
+        computed = []
+        for lead in Lead.objects.filter(pk__in=missing).select_related('client'):
+            try:
+                computed.append(compute(lead))
+            except Exception as e:
+                logger.error(f"[LeadFeatures] Failed to compute features for lead {lead.pk}: {e}")
+        try:
+            _save(computed)
+        except Exception as e:
+            logger.error(f"[LeadFeatures] Failed to store features for {len(computed)} lead(s): {e}")
+        result.update((features.lead_id, features) for features in computed)
+    return result
+
+
+def refresh_many(leads):
+    """Recompute and store features for a queryset of leads, BATCH_SIZE at a time. Returns the count."""
+    count = 0
+    batch = []
+    for lead in leads.select_related('client').iterator(chunk_size=BATCH_SIZE):
+        try:
+            batch.append(compute(lead))
+        except Exception as e:
+            logger.error(f"[LeadFeatures] Failed to compute features for lead {lead.pk}: {e}")
+        if len(batch) >= BATCH_SIZE:
+            _save(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        _save(batch)
+        count += len(batch)
+    return count
+
+
+def rebuild_stale():
+    """Compute features for every lead without current ones (after a schema bump). Returns the count."""
+    from .models import Lead
+
+    current = Lead.objects.filter(features__schema_version=FEATURE_SCHEMA_VERSION)
+    return refresh_many(Lead.objects.exclude(pk__in=current.values('pk')))
+
+
+def store_tfidf(values, version):
+    """Persist {lead id: tfidf_norm} computed under quality model `version`."""
+    from django.db.models import Case, FloatField, Value, When
+
+    from .models import LeadFeatures
+
+    items = list(values.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = items[start:start + BATCH_SIZE]
+        LeadFeatures.objects.filter(lead_id__in=[lead_id for lead_id, _ in batch]).update(
+            tfidf_norm=Case(
+                *[When(lead_id=lead_id, then=Value(norm)) for lead_id, norm in batch],
+                output_field=FloatField(),
+            ),
+            tfidf_version=version,
+        )
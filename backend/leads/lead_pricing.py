@@ -0,0 +1,190 @@
+"""
+Stored lead prices.
+
+A lead's unlock price is computed once by DynamicPricingMLService and kept on
+the lead, so every endpoint (wallet feed, lead serializers, unlock, claim,
+payments) charges and shows the same number and none of them run pricing per
+request:
+
+    Lead.price_map        {'default': 8, 'pro': 7, 'enterprise': 6}  (credits)
+    Lead.pricing_version  PRICING_VERSION the map was computed with
+    Lead.credit_cost      default price in Rands (credits x CREDIT_PRICE_RANDS)
+
+Only the provider's subscription tier changes the price for a given lead
+(calculate_optimal_credit_cost applies the enterprise / pro discount), so one
+entry per discount bucket covers every provider. Price maps are computed with
+the vectorized pricing_engine, which gives the same credits as
+DynamicPricingMLService.calculate_dynamic_lead_price.
+
+Lead.save() reprices when a pricing input changed since the lead was loaded
+(or is listed in update_fields), or the stored price is missing / outdated.
+After changing pricing
+rules, bump PRICING_VERSION and run `manage.py reprice_leads`; leads still on
+an old version are repriced (and written back) on first read.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever DynamicPricingMLService rules change, then run reprice_leads
+PRICING_VERSION = 1
+
+# Lead fields the price depends on
+PRICING_INPUT_FIELDS = {
+    'urgency',
+    'verification_score',
+    'budget_range',
+    'property_type',
+    'hiring_intent',
+    'service_category',
+    'service_category_id',
+}
+# Column attnames of PRICING_INPUT_FIELDS, compared by Lead.save() against their loaded values
+PRICING_INPUT_ATTNAMES = (
+    'urgency',
+    'verification_score',
+    'budget_range',
+    'property_type',
+    'hiring_intent',
+    'service_category_id',
+)
+
+DEFAULT_BUCKET = 'default'
+# subscription tier -> discount bucket; every other tier pays the default price
+TIER_BUCKETS = {
+    'enterprise': 'enterprise',
+    'pro': 'pro',
+}
+BUCKETS = (DEFAULT_BUCKET, *TIER_BUCKETS.values())
+PRICE_FIELDS = ['price_map', 'pricing_version', 'credit_cost']
+
+CREDIT_PRICE_RANDS = 50
+DEFAULT_CREDITS = 4
+
+
+def tier_bucket(provider):
+    """Discount bucket for a provider user (or None). Never raises."""
+    try:
+        tier = provider.provider_profile.subscription_tier
+    except Exception:
+        return DEFAULT_BUCKET
+    return TIER_BUCKETS.get(tier, DEFAULT_BUCKET)
+
+
+def pricing_inputs(lead):
+    """Current values of PRICING_INPUT_ATTNAMES, or None if any is deferred (not loaded)."""
+    values = lead.__dict__
+    if any(attname not in values for attname in PRICING_INPUT_ATTNAMES):
+        return None
+    return tuple(values[attname] for attname in PRICING_INPUT_ATTNAMES)
+
+
+def compute_price_maps(leads):
+    """Price maps for a list of leads (service_category loaded), one engine pass per bucket."""
+    from .pricing_engine import encode, price_credits, tier_code
+
+    codes = encode(leads)
+    by_bucket = {bucket: price_credits(codes, tier_code(bucket)) for bucket in BUCKETS}
+    return [
+        {bucket: max(1, int(credits[i])) for bucket, credits in by_bucket.items()}
+        for i in range(len(leads))
+    ]
+
+
+def compute_price_map(lead):
+    """Credits per discount bucket for one lead."""
+    return compute_price_maps([lead])[0]
+
+
+def _set_price(lead, price_map):
+    lead.price_map = price_map
+    lead.pricing_version = PRICING_VERSION
+    lead.credit_cost = price_map[DEFAULT_BUCKET] * CREDIT_PRICE_RANDS
+
+
+def apply_price(lead):
+    """
+    Set price_map / pricing_version / credit_cost on a lead instance without
+    saving. Returns the list of fields set (empty if pricing failed).
+    """
+    try:
+        price_map = compute_price_map(lead)
+    except Exception as e:
+        logger.error(f"[LeadPricing] Failed to price lead {lead.pk}: {e}")
+        return []
+    _set_price(lead, price_map)
+    return list(PRICE_FIELDS)
+
+
+def price_missing(leads):
+    """
+    Price (and write back, in one bulk_update) the leads in a list that have no
+    current price, so lead_credits() on them is a dictionary read. Never raises.
+    """
+    stale = [lead for lead in leads if not is_priced(lead)]
+    if not stale:
+        return 0
+    try:
+        for lead, price_map in zip(stale, compute_price_maps(stale)):
+            _set_price(lead, price_map)
+        type(stale[0]).objects.bulk_update(stale, PRICE_FIELDS)
+    except Exception as e:
+        logger.error(f"[LeadPricing] Failed to price {len(stale)} lead(s): {e}")
+        return 0
+    from .feed_version import bump_category
+    for category_id in {lead.service_category_id for lead in stale}:
+        bump_category(category_id)
+    return len(stale)
+
+
+def is_priced(lead):
+    return bool(lead.price_map) and lead.pricing_version == PRICING_VERSION
+
+
+def lead_credits(lead, provider=None, bucket=None):
+    """
+    Credits a provider pays to unlock a lead, read from the stored price map.
+    Leads without a current price are priced and written back first. Never raises.
+    """
+    if bucket is None:
+        bucket = tier_bucket(provider)
+    if not is_priced(lead):
+        fields = apply_price(lead)
+        if fields and lead.pk:
+            # update() so a read never triggers Lead.save() side effects
+            type(lead).objects.filter(pk=lead.pk).update(
+                **{field: getattr(lead, field) for field in fields}
+            )
+    price_map = lead.price_map or {}
+    return price_map.get(bucket, price_map.get(DEFAULT_BUCKET, DEFAULT_CREDITS))
+
+
+def reprice_leads(queryset, batch_size=2000, force=False):
+    """
+    Price the leads in a queryset that have no price for the current
+    PRICING_VERSION (every lead when force=True). Returns the number of leads written.
+    """
+    from django.db.models import Q
+
+    if not force:
+        queryset = queryset.filter(Q(pricing_version__isnull=True) | ~Q(pricing_version=PRICING_VERSION))
+    updated = 0
+    batch = []
+    for lead in queryset.select_related('service_category').iterator(chunk_size=batch_size):
+        batch.append(lead)
+        if len(batch) >= batch_size:
+            updated += _reprice_batch(queryset.model, batch)
+            batch = []
+    if batch:
+        updated += _reprice_batch(queryset.model, batch)
+    if updated:
+        from .feed_version import bump_all
+        bump_all()
+    return updated
+
+
+def _reprice_batch(model, leads):
+    for lead, price_map in zip(leads, compute_price_maps(leads)):
+        _set_price(lead, price_map)
+    model.objects.bulk_update(leads, PRICE_FIELDS)
+    return len(leads)
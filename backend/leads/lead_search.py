@@ -0,0 +1,103 @@
+"""
+Keyword search over leads (GET /api/leads/search/, search_views.py).
+
+On PostgreSQL Lead.search_vector holds a weighted tsvector, maintained by the
+trigger from migration 0024 and served by a GIN index:
+
+    A  title
+    B  category name, suburb + city
+    C  description
+
+search_leads() matches it with a websearch_to_tsquery query and orders by
+ts_rank decayed by age (SEARCH_RECENCY_DAYS), so a strong old match and a
+weaker fresh one both surface. The caller's queryset supplies eligibility
+(provider categories / areas from marketplace_feed, or everything for admins).
+
+Other databases (local SQLite) have no search_vector; there every term must
+appear in one of the same fields (icontains) and the rank is the sum of the
+same weights for the fields each term hits, newest first on ties.
+"""
+import logging
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Extract, Now
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+# A match loses half its rank after this many days
+SEARCH_RECENCY_DAYS = 30
+MAX_QUERY_LENGTH = 200
+MAX_FALLBACK_TERMS = 8
+
+# PostgreSQL's default ts_rank weights for the A / B / C labels above
+FALLBACK_WEIGHTS = (
+    (1.0, ('title',)),
+    (0.4, ('service_category__name', 'location_suburb', 'location_city')),
+    (0.2, ('description',)),
+)
+
+
+def full_text_enabled():
+    """Whether search_vector is maintained (PostgreSQL only)."""
+    return connection.vendor == 'postgresql'
+
+
+def search_leads(queryset, text):
+    """
+    Leads in queryset matching text, annotated with search_rank and ordered
+    best first. An empty query matches nothing.
+    """
+    text = (text or '').strip()[:MAX_QUERY_LENGTH]
+    if not text:
+        return queryset.none()
+    if full_text_enabled():
+        return _full_text_search(queryset, text)
+    return _fallback_search(queryset, text)
+
+
+def _full_text_search(queryset, text):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    age_days = Extract(Now() - F('created_at'), 'epoch') / Value(86400.0)
+    return queryset.filter(search_vector=query).annotate(
+        text_rank=SearchRank(F('search_vector'), query),
+    ).annotate(
+        search_rank=F('text_rank') / (Value(1.0) + age_days / Value(float(SEARCH_RECENCY_DAYS))),
+    ).order_by('-search_rank', '-created_at', '-id')
+
+
+def _fallback_search(queryset, text):
+    terms = text.split()[:MAX_FALLBACK_TERMS]
+    rank = Value(0.0)
+    for term in terms:
+        matches = Q()
+        whens = []
+        for weight, fields in FALLBACK_WEIGHTS:
+            field_q = Q()
+            for field in fields:
+                field_q |= Q(**{f'{field}__icontains': term})
+            matches |= field_q
+            whens.append(When(field_q, then=Value(weight)))
+        queryset = queryset.filter(matches)
+        rank = rank + Case(*whens, default=Value(0.0), output_field=FloatField())
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', '-created_at', '-id')
+
+
+def refresh_search_vectors(category_id):
+    """
+    Recompute search_vector for a category's leads (after the category is
+    renamed). No-op without full-text search. Never raises.
+    """
+    if not full_text_enabled():
+        return 0
+    try:
+        from .models import Lead
+
+        # The trigger fires on writes to title
+        return Lead.objects.filter(service_category_id=category_id).update(title=F('title'))
+    except Exception as e:
+        logger.error(f"[LeadSearch] Failed to refresh search vectors for category {category_id}: {e}")
+        return 0
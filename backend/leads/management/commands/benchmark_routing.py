@@ -0,0 +1,468 @@
+"""
+Routing benchmark on a synthetic marketplace.
+
+Generates (or tops up) a synthetic marketplace with bulk_create - providers with
+skewed category/area coverage, clients and leads in the seed cities used by
+create_seed_leads - then times the routing entry points end to end:
+
+    match_providers           lead_router.match_providers
+    find_matching_providers   LeadAssignmentService.find_matching_providers
+    route_lead                lead_router.route_lead (creates assignments; emails go to locmem)
+    available_leads           GET wallet/available/ as a provider
+
+Reports p50/p95/p99 latency and DB query counts per stage and writes the
+results as JSON so runs can be compared between commits (--compare).
+
+Run against a scratch database: synthetic rows are tagged (bench_* usernames,
+source='benchmark') but are not deleted.
+"""
+import contextlib
+import json
+import logging
+import os
+import random
+import subprocess
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+BENCH_PREFIX = 'bench_'
+BENCH_EMAIL_DOMAIN = 'bench.proconnectsa.invalid'
+BENCH_SOURCE = 'benchmark'
+
+STAGES = ('match_providers', 'find_matching_providers', 'route_lead', 'available_leads')
+
+# Fallback categories when the database has none (same set as load_test_data)
+DEFAULT_CATEGORIES = [
+    ('cleaning', 'Cleaning Services'),
+    ('plumbing', 'Plumbing'),
+    ('electrical', 'Electrical'),
+    ('handyman', 'Handyman'),
+    ('painting', 'Painting'),
+    ('landscaping', 'Landscaping'),
+    ('building', 'Building & Construction'),
+]
+
+SUBSCRIPTION_TIERS = [('basic', 0.45), ('advanced', 0.2), ('pro', 0.2), ('enterprise', 0.05), ('pay_as_you_go', 0.1)]
+PROVINCE_BY_CITY = {
+    'Cape Town': 'Western Cape',
+    'Johannesburg': 'Gauteng',
+    'Pretoria': 'Gauteng',
+    'Durban': 'KwaZulu-Natal',
+    'Port Elizabeth': 'Eastern Cape',
+    'Bloemfontein': 'Free State',
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples):
+    """Latency/query summary for one stage's [(ms, queries)] samples."""
+    latencies = sorted(ms for ms, _ in samples)
+    queries = sorted(q for _, q in samples)
+    if not latencies:
+        return {'n': 0}
+    return {
+        'n': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'max_ms': round(latencies[-1], 2),
+        'queries_p50': percentile(queries, 50),
+        'queries_p95': percentile(queries, 95),
+        'queries_max': queries[-1],
+        'queries_mean': round(sum(queries) / len(queries), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def weighted_choice(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+class Command(BaseCommand):
+    help = "Benchmark lead routing (match/find/route/available_leads) on a synthetic marketplace. Use a scratch database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=1000, help='Synthetic providers to have (default: 1000)')
+        parser.add_argument('--leads', type=int, default=10000, help='Synthetic leads to have (default: 10000)')
+        parser.add_argument('--samples', type=int, default=200, help='Timed calls per stage (default: 200)')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed calls per stage first (default: 5)')
+        parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for data and sampling')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for category popularity (default: 1.1)')
+        parser.add_argument('--output', help='JSON results path (default: routing_benchmark_<timestamp>.json)')
+        parser.add_argument('--compare', help='Previous results JSON to diff against')
+        parser.add_argument(
+            '--fail-threshold', type=float, default=None,
+            help='With --compare: exit non-zero when any stage p95 regresses by more than this percent',
+        )
+        parser.add_argument('--no-generate', action='store_true', help='Use existing synthetic data as-is')
+        parser.add_argument('--force', action='store_true', help='Allow running with DEBUG=False')
+        parser.add_argument('--verbose', action='store_true', help='Keep routing logs and prints during timing')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('benchmark_routing writes synthetic data; run it on a scratch database (or pass --force).')
+
+        stages = [s.strip() for s in options['stages'].split(',') if s.strip()]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise CommandError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+        rng = random.Random(options['seed'])
+        if not options['no_generate']:
+            self.generate(rng, options['providers'], options['leads'], options['skew'])
+
+        from backend.leads.services.provider_index import provider_index
+        provider_index.rebuild()
+
+        dataset = self.dataset_counts()
+        self.stdout.write(
+            f"📦 Dataset: {dataset['providers']} providers, {dataset['leads']} leads, "
+            f"{dataset['categories']} categories ({connection.vendor})"
+        )
+
+        results = {}
+        previous_level = logging.root.manager.disable
+        if not options['verbose']:
+            logging.disable(logging.INFO)  # Routing code logs every candidate at INFO
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                LEAD_ROUTING_MODE='inline',
+            ):
+                for stage in stages:
+                    if options['verbose']:
+                        results[stage] = self.run_stage(stage, rng, options['samples'], options['warmup'])
+                    else:
+                        # Notification helpers print() per send; keep the report readable
+                        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                            results[stage] = self.run_stage(stage, rng, options['samples'], options['warmup'])
+                    self.stdout.write(self.format_row(stage, results[stage]))
+        finally:
+            logging.disable(previous_level)
+
+        report = {
+            'benchmark': 'routing',
+            'created_at': timezone.now().isoformat(),
+            'git_commit': git_commit(),
+            'database': connection.vendor,
+            'params': {
+                key: options[key] for key in ('providers', 'leads', 'samples', 'warmup', 'seed', 'skew')
+            },
+            'dataset': dataset,
+            'stages': results,
+        }
+        output = options['output'] or f"routing_benchmark_{timezone.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"✅ Results written to {os.path.abspath(output)}"))
+
+        if options['compare']:
+            self.compare(options['compare'], report, options['fail_threshold'])
+
+    # ------------------------------------------------------------ generation
+
+    def generate(self, rng, provider_count, lead_count, skew):
+        from django.contrib.auth.hashers import make_password
+        from backend.leads.gazetteer import resolve, resolve_location
+        from backend.leads.models import Lead, ServiceCategory
+        from backend.leads.seed_data import SEED_CITIES, SEED_CITY_CENTRES, SEED_CITY_WEIGHTS
+        from backend.users.coverage import coverage_area_keys
+        from backend.users.models import ProviderCoverage, ProviderProfile, User
+
+        started = time.monotonic()
+        categories = list(ServiceCategory.objects.filter(is_active=True).order_by('id'))
+        if not categories:
+            for slug, name in DEFAULT_CATEGORIES:
+                ServiceCategory.objects.get_or_create(slug=slug, defaults={'name': name})
+            categories = list(ServiceCategory.objects.filter(is_active=True).order_by('id'))
+        # Zipf-like popularity: a few categories carry most of the demand
+        category_weights = [1.0 / (rank + 1) ** skew for rank in range(len(categories))]
+        city_weights = [(c, SEED_CITY_WEIGHTS.get(c['city'], 0.02)) for c in SEED_CITIES]
+        password = make_password(None)
+        now = timezone.now()
+
+        def jitter(city_name, spread):
+            lat, lon = SEED_CITY_CENTRES.get(city_name, (-29.0, 25.0))
+            return lat + rng.uniform(-spread, spread), lon + rng.uniform(-spread, spread)
+
+        # Providers
+        existing = User.objects.filter(username__startswith=f'{BENCH_PREFIX}p_').count()
+        to_create = max(0, provider_count - existing)
+        for batch_start in range(existing, existing + to_create, 1000):
+            batch_end = min(batch_start + 1000, existing + to_create)
+            users, profiles_data = [], []
+            for i in range(batch_start, batch_end):
+                home = weighted_choice(rng, city_weights)
+                has_coords = rng.random() < 0.6
+                lat, lon = jitter(home['city'], 0.15) if has_coords else (None, None)
+                users.append(User(
+                    username=f'{BENCH_PREFIX}p_{i}',
+                    email=f'{BENCH_PREFIX}p_{i}@{BENCH_EMAIL_DOMAIN}',
+                    password=password,
+                    first_name='Bench',
+                    last_name=f'Provider{i}',
+                    user_type='provider',
+                    city=home['city'],
+                    latitude=lat,
+                    longitude=lon,
+                ))
+                profiles_data.append((home, has_coords))
+            User.objects.bulk_create(users, batch_size=1000)
+            created_users = User.objects.filter(
+                username__in=[u.username for u in users]
+            ).only('id', 'username')
+            user_ids = {u.username: u.id for u in created_users}
+
+            profiles = []
+            for user, (home, has_coords) in zip(users, profiles_data):
+                picked = rng.choices(categories, weights=category_weights, k=rng.randint(1, 3))
+                areas = self.provider_areas(rng, home)
+                tier = weighted_choice(rng, SUBSCRIPTION_TIERS)
+                roll = rng.random()
+                profiles.append(ProviderProfile(
+                    user_id=user_ids[user.username],
+                    business_name=f'Bench Services {user.username}',
+                    business_address=f"1 Main Road, {home['city']}",
+                    service_categories=sorted({c.slug for c in picked}),
+                    service_areas=areas,
+                    max_travel_distance=rng.choice([0, 10, 25, 50]) if has_coords else 0,
+                    subscription_tier=tier,
+                    subscription_end_date=now + timedelta(days=30) if roll < 0.85 else now - timedelta(days=5),
+                    is_premium_listing=roll > 0.92,
+                    premium_listing_started_at=now - timedelta(days=10) if roll > 0.92 else None,
+                    verification_status=weighted_choice(rng, [('verified', 0.8), ('pending', 0.17), ('rejected', 0.03)]),
+                ))
+            ProviderProfile.objects.bulk_create(profiles, batch_size=1000)
+
+            # bulk_create skips the coverage signal: write coverage rows directly
+            slug_ids = {c.slug: c.id for c in categories}
+            coverage = []
+            for profile in ProviderProfile.objects.filter(
+                user_id__in=user_ids.values()
+            ).only('id', 'service_categories', 'service_areas'):
+                for slug in profile.service_categories:
+                    for area_key in coverage_area_keys(profile.service_areas):
+                        coverage.append(ProviderCoverage(
+                            provider_id=profile.id,
+                            category_id=slug_ids[slug],
+                            area_key=area_key,
+                            location_gid=resolve(area_key) if area_key else None,
+                        ))
+            ProviderCoverage.objects.bulk_create(coverage, batch_size=2000, ignore_conflicts=True)
+
+        # Clients (one per ~20 leads)
+        client_count = max(1, lead_count // 20)
+        existing_clients = User.objects.filter(username__startswith=f'{BENCH_PREFIX}c_').count()
+        User.objects.bulk_create([
+            User(
+                username=f'{BENCH_PREFIX}c_{i}',
+                email=f'{BENCH_PREFIX}c_{i}@{BENCH_EMAIL_DOMAIN}',
+                password=password,
+                first_name='Bench',
+                last_name=f'Client{i}',
+                user_type='client',
+                phone=f'+2789{i:07d}',
+            )
+            for i in range(existing_clients, client_count)
+        ], batch_size=1000)
+        client_ids = list(User.objects.filter(username__startswith=f'{BENCH_PREFIX}c_').values_list('id', flat=True))
+
+        # Leads
+        existing_leads = Lead.objects.filter(source=BENCH_SOURCE).count()
+        for batch_start in range(existing_leads, lead_count, 2000):
+            leads = []
+            for i in range(batch_start, min(batch_start + 2000, lead_count)):
+                city = weighted_choice(rng, city_weights)
+                suburb = rng.choice(city['suburbs'])
+                category = rng.choices(categories, weights=category_weights, k=1)[0]
+                lat, lon = jitter(city['city'], 0.1) if rng.random() < 0.5 else (None, None)
+                status = weighted_choice(rng, [('verified', 0.7), ('assigned', 0.2), ('pending', 0.1)])
+                leads.append(Lead(
+                    client_id=rng.choice(client_ids),
+                    service_category=category,
+                    title=f'Need {category.name} service in {suburb}',
+                    description=f'Looking for a reliable {category.name} professional in {suburb}, {city["city"]}.',
+                    location_address=f'{rng.randint(1, 200)} Main Road, {suburb}, {city["city"]}',
+                    location_suburb=suburb,
+                    location_city=city['city'],
+                    location_gid=resolve_location(suburb.lower(), city['city'].lower()),
+                    latitude=lat,
+                    longitude=lon,
+                    budget_range=rng.choice(['1000_5000', '5000_15000', '15000_50000', 'no_budget']),
+                    urgency=rng.choice(['urgent', 'this_week', 'this_month', 'flexible']),
+                    verification_score=rng.randint(40, 95),
+                    is_sms_verified=True,
+                    status=status,
+                    source=BENCH_SOURCE,
+                    is_available=True,
+                    max_providers=rng.randint(3, 5),
+                    expires_at=now + timedelta(days=rng.randint(7, 30)),
+                ))
+            Lead.objects.bulk_create(leads, batch_size=2000)
+
+        self.stdout.write(f"🏗️  Synthetic marketplace ready in {time.monotonic() - started:.1f}s")
+
+    @staticmethod
+    def provider_areas(rng, home):
+        """1-4 service areas: mostly the home city or its suburbs, some provinces, a few unusual."""
+        areas = []
+        for _ in range(rng.randint(1, 4)):
+            roll = rng.random()
+            if roll < 0.55:
+                area = home['city']
+            elif roll < 0.8:
+                area = rng.choice(home['suburbs'])
+            elif roll < 0.9:
+                area = PROVINCE_BY_CITY.get(home['city'], home['city'])
+            elif roll < 0.95:
+                area = rng.choice(list(PROVINCE_BY_CITY))
+            elif roll < 0.97:
+                area = 'Nationwide'
+            else:
+                area = f"{home['city']} surrounds"
+            if area not in areas:
+                areas.append(area)
+        return areas
+
+    def dataset_counts(self):
+        from backend.leads.models import Lead, ServiceCategory
+        from backend.users.models import User
+
+        return {
+            'providers': User.objects.filter(username__startswith=f'{BENCH_PREFIX}p_').count(),
+            'leads': Lead.objects.filter(source=BENCH_SOURCE).count(),
+            'categories': ServiceCategory.objects.filter(is_active=True).count(),
+        }
+
+    # --------------------------------------------------------------- timing
+
+    def run_stage(self, stage, rng, samples, warmup):
+        targets = self.stage_targets(stage, rng, samples + warmup)
+        if not targets:
+            self.stdout.write(self.style.WARNING(f"⚠️ No synthetic data for {stage}; skipped"))
+            return {'n': 0}
+        call = getattr(self, f'call_{stage}')
+        measured, errors = [], 0
+        for index, target in enumerate(targets):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                try:
+                    call(target)
+                except Exception:
+                    errors += 1
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            if index >= warmup:
+                measured.append((elapsed_ms, len(ctx.captured_queries)))
+        summary = summarize(measured)
+        summary['errors'] = errors
+        return summary
+
+    def stage_targets(self, stage, rng, count):
+        from backend.leads.models import Lead
+        from backend.users.models import User
+
+        if stage == 'available_leads':
+            ids = list(User.objects.filter(
+                username__startswith=f'{BENCH_PREFIX}p_', provider_profile__isnull=False,
+            ).values_list('id', flat=True))
+            model = User
+        else:
+            leads = Lead.objects.filter(source=BENCH_SOURCE)
+            if stage == 'route_lead':
+                # Routing is idempotent per lead: only unrouted verified leads do real work
+                leads = leads.filter(status='verified', providers_routed_at__isnull=True)
+            ids = list(leads.values_list('id', flat=True))
+            model = Lead
+        if not ids:
+            return []
+        picked = rng.sample(ids, min(count, len(ids)))
+        related = ('service_category',) if model is Lead else ('provider_profile',)
+        by_id = model.objects.select_related(*related).in_bulk(picked)
+        return [by_id[i] for i in picked if i in by_id]
+
+    @staticmethod
+    def call_match_providers(lead):
+        from backend.leads.services.lead_router import match_providers
+        return match_providers(lead)
+
+    @staticmethod
+    def call_find_matching_providers(lead):
+        from backend.leads.services import LeadAssignmentService
+        return LeadAssignmentService().find_matching_providers(lead)
+
+    @staticmethod
+    def call_route_lead(lead):
+        from backend.leads.services.lead_router import route_lead
+        return route_lead(lead)
+
+    @staticmethod
+    def call_available_leads(provider):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from backend.leads.wallet_api import available_leads
+
+        request = APIRequestFactory().get('/api/leads/wallet/available/')
+        force_authenticate(request, user=provider)
+        response = available_leads(request)
+        response.render()
+        if response.status_code >= 400:
+            raise RuntimeError(f"available_leads returned {response.status_code}")
+        return response
+
+    # -------------------------------------------------------------- report
+
+    @staticmethod
+    def format_row(stage, summary):
+        if not summary.get('n'):
+            return f"  {stage:<26} (no samples)"
+        return (
+            f"  {stage:<26} n={summary['n']:<5} p50={summary['p50_ms']:>8.2f}ms "
+            f"p95={summary['p95_ms']:>8.2f}ms p99={summary['p99_ms']:>8.2f}ms "
+            f"queries p50={summary['queries_p50']} max={summary['queries_max']} errors={summary['errors']}"
+        )
+
+    def compare(self, path, report, fail_threshold):
+        with open(path) as fh:
+            baseline = json.load(fh)
+        self.stdout.write(f"\n📊 Compared with {path} (commit {baseline.get('git_commit') or '?'})")
+        regressions = []
+        for stage, current in report['stages'].items():
+            before = baseline.get('stages', {}).get(stage)
+            if not before or not before.get('n') or not current.get('n'):
+                self.stdout.write(f"  {stage:<26} (not in both runs)")
+                continue
+            deltas = {}
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                deltas[key] = (current[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            query_delta = current['queries_p50'] - before['queries_p50']
+            self.stdout.write(
+                f"  {stage:<26} p50 {deltas['p50_ms']:+6.1f}%  p95 {deltas['p95_ms']:+6.1f}%  "
+                f"p99 {deltas['p99_ms']:+6.1f}%  queries p50 {query_delta:+d}"
+            )
+            if fail_threshold is not None and deltas['p95_ms'] > fail_threshold:
+                regressions.append(stage)
+        if regressions:
+            raise CommandError(f"p95 regression over {fail_threshold}% in: {', '.join(regressions)}")
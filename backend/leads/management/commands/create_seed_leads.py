@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from backend.leads.models import Lead, ServiceCategory
+from backend.leads.seed_data import SEED_CITIES
 from django.utils import timezone
 from datetime import timedelta
 import random
@@ -51,15 +52,7 @@ class Command(BaseCommand):
             ))
             return
         
-        # South African cities and suburbs
-        cities_data = [
-            {'city': 'Cape Town', 'suburbs': ['Camps Bay', 'Sea Point', 'Rondebosch', 'Newlands', 'Constantia', 'Hout Bay', 'Green Point', 'Claremont']},
-            {'city': 'Johannesburg', 'suburbs': ['Sandton', 'Rosebank', 'Parktown', 'Melrose', 'Illovo', 'Bryanston', 'Randburg', 'Midrand']},
-            {'city': 'Durban', 'suburbs': ['Umhlanga', 'Ballito', 'Westville', 'Berea', 'Glenwood', 'Morningside', 'Florida Road']},
-            {'city': 'Pretoria', 'suburbs': ['Hatfield', 'Brooklyn', 'Menlyn', 'Centurion', 'Waterkloof', 'Arcadia']},
-            {'city': 'Port Elizabeth', 'suburbs': ['Summerstrand', 'Richmond Hill', 'Humbleton', 'Greenacres', 'Mill Park']},
-            {'city': 'Bloemfontein', 'suburbs': ['Westdene', 'Fichardt Park', 'Bayswater', 'Langenhoven Park']},
-        ]
+        cities_data = SEED_CITIES
         
         # Realistic lead templates with variety
         lead_templates = [
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from backend.leads.models import Lead
+from backend.leads.test_lead_utils import refresh_test_flags
+
+
+class Command(BaseCommand):
+    help = "Re-evaluate Lead.is_test with is_test_lead() after pattern changes or bulk updates that bypass Lead.save()."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows written per bulk_update',
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_test_flags(Lead.objects.all(), batch_size=options['batch_size'])
+        flagged = Lead.objects.filter(is_test=True).count()
+        self.stdout.write(self.style.SUCCESS(f"✅ Updated test flag for {updated} lead(s); {flagged} lead(s) flagged as test"))
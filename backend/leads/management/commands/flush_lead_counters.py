@@ -0,0 +1,44 @@
+"""
+Write pending lead counter increments (views_count, responses_count,
+total_provider_contacts) from the shared cache to the leads table in bulk.
+
+Server processes already flush on a timer (lead_counters.start_flush_timer);
+run this from cron or with --loop as a dedicated worker, or once before a
+deploy. See backend/leads/lead_counters.py.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.leads.lead_counters import flush_lead_counters
+
+
+class Command(BaseCommand):
+    help = 'Flush batched lead counters (views / responses / provider contacts) to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep flushing instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'LEAD_COUNTER_FLUSH_SECONDS', 10),
+            help='Seconds between flushes with --loop (default: LEAD_COUNTER_FLUSH_SECONDS)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = flush_lead_counters()
+            if result is None:
+                self.stdout.write("Another flush is running")
+            elif result['leads'] or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Lead counters flushed: {result['increments']} increment(s) to {result['leads']} lead(s)"
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,80 @@
+"""
+Inspect and manage versioned ML models (backend/leads/model_store.py).
+
+    manage.py ml_models list [--model lead_quality]
+    manage.py ml_models promote --model lead_quality --model-version 20261017120000
+    manage.py ml_models prune [--model support] [--keep 3] [--legacy]
+
+Promoting an older version is the rollback path; every process picks it up on
+its next ML registry check (ML_REGISTRY_CHECK_SECONDS).
+"""
+import glob
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.leads import model_store
+
+# Timestamped files the services wrote before the model store (the unversioned
+# "latest" copies are kept: they are still the fallback until a version is promoted)
+LEGACY_VERSIONED_PATTERNS = (
+    'lead_quality_model_*.pkl',
+    'lead_quality_scaler_*.pkl',
+    'lead_quality_tfidf_*.pkl',
+    'conversion_model_*.pkl',
+    'geographical_model_*.joblib',
+)
+
+
+class Command(BaseCommand):
+    help = 'List, promote or prune versions of stored ML models'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['list', 'promote', 'prune'])
+        parser.add_argument('--model', help='Model name (default: every stored model)')
+        parser.add_argument('--model-version', help='Version to promote')
+        parser.add_argument(
+            '--keep',
+            type=int,
+            help='Versions to keep when pruning (default: ML_MODEL_RETENTION)',
+        )
+        parser.add_argument(
+            '--legacy',
+            action='store_true',
+            help='Also delete timestamped model files written before the model store',
+        )
+
+    def handle(self, *args, **options):
+        names = [options['model']] if options['model'] else model_store.model_names()
+        action = options['action']
+
+        if action == 'promote':
+            if not options['model'] or not options['model_version']:
+                raise CommandError('promote needs --model and --model-version')
+            if not model_store.promote_version(options['model'], options['model_version']):
+                raise CommandError(f"Cannot promote {options['model']} {options['model_version']} (see log)")
+            self.stdout.write(self.style.SUCCESS(f"Promoted {options['model']} {options['model_version']}"))
+            return
+
+        if action == 'list':
+            for name in names:
+                current = model_store.current_version(name)
+                self.stdout.write(self.style.SUCCESS(name))
+                for manifest in model_store.versions(name):
+                    marker = '*' if manifest['version'] == current else ' '
+                    size = sum(entry['size'] for entry in manifest['files'].values())
+                    self.stdout.write(
+                        f"  {marker} {manifest['version']}  {size / 1024:.0f} KB  {manifest['metrics']}"
+                    )
+            return
+
+        for name in names:
+            pruned = model_store.prune(name, keep=options['keep'])
+            self.stdout.write(f"{name}: pruned {len(pruned)} version(s)")
+        if options['legacy']:
+            removed = 0
+            for pattern in LEGACY_VERSIONED_PATTERNS:
+                for path in glob.glob(os.path.join(model_store.models_root(), pattern)):
+                    os.remove(path)
+                    removed += 1
+            self.stdout.write(f"Removed {removed} legacy timestamped model file(s)")
@@ -0,0 +1,59 @@
+"""
+Drain the lead routing outbox (LeadRoutingJob).
+
+Run with --loop as a worker process when LEAD_ROUTING_MODE='worker', or from
+cron in any mode to pick up retries and jobs left behind by a restarted process.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.leads.services.routing_pipeline import get_outbox_metrics, process_due_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process due lead routing jobs (quality gate -> match -> assign -> fan-out)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Maximum jobs claimed per pass (default: 50)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the outbox is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Print outbox metrics and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            metrics = get_outbox_metrics()
+            self.stdout.write(f"Jobs by status: {metrics['by_status']}")
+            self.stdout.write(f"Oldest due job: {metrics['oldest_due_seconds']:.0f}s")
+            for stage, entry in metrics['stages_last_hour'].items():
+                self.stdout.write(
+                    f"  {stage}: {entry['count']} runs, avg {entry['avg_ms']}ms, {entry['failures']} failures"
+                )
+            return
+
+        while True:
+            processed = process_due_jobs(limit=options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {processed} routing job(s)")
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
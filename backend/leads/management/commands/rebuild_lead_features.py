@@ -0,0 +1,31 @@
+"""
+Recompute stored lead features (backend/leads/lead_features.py).
+
+By default only leads without features for the current FEATURE_SCHEMA_VERSION
+are computed, so running it on every deploy is cheap; --all recomputes every
+lead.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.leads import lead_features
+from backend.leads.models import Lead
+
+
+class Command(BaseCommand):
+    help = 'Compute missing or stale per-lead features in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute features for every lead, not only stale ones',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            count = lead_features.refresh_many(Lead.objects.all())
+        else:
+            count = lead_features.rebuild_stale()
+        self.stdout.write(self.style.SUCCESS(
+            f"Lead features (schema v{lead_features.FEATURE_SCHEMA_VERSION}) computed for {count} lead(s)"
+        ))
@@ -0,0 +1,22 @@
+"""
+Rebuild the in-memory provider eligibility index used by lead routing.
+
+Running this also bumps the shared index version, so every worker process
+rebuilds its own copy on its next routing call.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.leads.services.provider_index import provider_index, _bump_shared_version
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the provider eligibility index and signal other workers to refresh'
+
+    def handle(self, *args, **options):
+        _bump_shared_version()
+        provider_index.rebuild()
+        stats = provider_index.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Provider index rebuilt: {stats['providers']} providers, "
+            f"{stats['categories']} categories, {stats['area_tokens']} area tokens"
+        ))
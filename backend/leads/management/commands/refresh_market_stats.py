@@ -0,0 +1,40 @@
+"""
+Rebuild the MarketStats table (lead demand / provider supply per category x city)
+used by pricing and lead access scoring.
+
+Run from cron, or with --loop as a worker. Other processes reload their
+in-memory copy on their next lookup.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.leads.market_stats import refresh_market_stats
+
+
+class Command(BaseCommand):
+    help = 'Refresh market demand and competition stats (MarketStats)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep refreshing instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=900.0,
+            help='Seconds between refreshes with --loop (default: 900)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = refresh_market_stats()
+            self.stdout.write(self.style.SUCCESS(
+                f"Market stats refreshed: {result['created']} created, {result['updated']} updated, "
+                f"{result['deleted']} deleted, {result['unchanged']} unchanged"
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+"""
+Recompute the MLMetricsDaily rollup (backend/leads/ml_metrics.py) behind the
+admin ML metrics endpoint.
+
+Run from cron, or with --loop as a worker. Each pass recomputes the whole
+window, so late status changes and newly promoted quality models show up.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.leads.ml_metrics import WINDOW_DAYS, refresh_ml_metrics
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily ML metrics rollup (MLMetricsDaily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=WINDOW_DAYS,
+            help=f'Days to recompute, today included (default: {WINDOW_DAYS})',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep refreshing instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600.0,
+            help='Seconds between refreshes with --loop (default: 3600)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = refresh_ml_metrics(options['days'])
+            self.stdout.write(self.style.SUCCESS(f"ML metrics refreshed for {count} day(s)"))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
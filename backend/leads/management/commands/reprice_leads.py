@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from backend.leads.lead_pricing import PRICING_VERSION, reprice_leads
+from backend.leads.models import Lead
+
+
+class Command(BaseCommand):
+    help = "Store lead prices for the current PRICING_VERSION (run after changing pricing rules)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Reprice every lead, not only leads priced with an older PRICING_VERSION',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows written per bulk_update',
+        )
+
+    def handle(self, *args, **options):
+        updated = reprice_leads(Lead.objects.all(), batch_size=options['batch_size'], force=options['all'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Repriced {updated} lead(s) at pricing version {PRICING_VERSION}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from backend.leads.gazetteer import resolve_location
+from backend.leads.models import Lead
+
+
+class Command(BaseCommand):
+    help = "Re-resolve Lead.location_gid from suburb/city after gazetteer changes or bulk updates that bypass Lead.save(). Run rebuild_provider_coverage for provider areas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows written per bulk_update',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        changed = []
+        updated = unresolved = 0
+        for lead in Lead.objects.only('id', 'location_suburb', 'location_city', 'location_gid').iterator(chunk_size=batch_size):
+            location_gid = resolve_location(
+                (lead.location_suburb or '').strip().lower(),
+                (lead.location_city or '').strip().lower(),
+            )
+            if location_gid is None:
+                unresolved += 1
+            if location_gid != lead.location_gid:
+                lead.location_gid = location_gid
+                changed.append(lead)
+            if len(changed) >= batch_size:
+                Lead.objects.bulk_update(changed, ['location_gid'])
+                updated += len(changed)
+                changed = []
+        if changed:
+            Lead.objects.bulk_update(changed, ['location_gid'])
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Updated location ids for {updated} lead(s)"))
+        if unresolved:
+            self.stdout.write(self.style.WARNING(f"⚠️ {unresolved} lead(s) have a location the gazetteer does not know"))
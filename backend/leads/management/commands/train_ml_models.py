@@ -50,12 +50,13 @@ class Command(BaseCommand):
         try:
             quality_service = LeadQualityMLService()
             
-            # Check if model already exists
+            # Check if model already exists (promoted version, or the flat file it replaced)
             import os
             from django.conf import settings
+            from backend.leads import model_store
             model_path = os.path.join(settings.BASE_DIR, 'ml_models', 'lead_quality_model.pkl')
             
-            if os.path.exists(model_path) and not force:
+            if (model_store.current_version('lead_quality') or os.path.exists(model_path)) and not force:
                 self.stdout.write(
                     self.style.WARNING('Quality model already exists. Use --force to retrain.')
                 )
@@ -84,12 +85,13 @@ class Command(BaseCommand):
         try:
             conversion_service = LeadConversionMLService()
             
-            # Check if model already exists
+            # Check if model already exists (promoted version, or the flat file it replaced)
             import os
             from django.conf import settings
+            from backend.leads import model_store
             model_path = os.path.join(settings.BASE_DIR, 'ml_models', 'conversion_model.pkl')
             
-            if os.path.exists(model_path) and not force:
+            if (model_store.current_version('lead_conversion') or os.path.exists(model_path)) and not force:
                 self.stdout.write(
                     self.style.WARNING('Conversion model already exists. Use --force to retrain.')
                 )
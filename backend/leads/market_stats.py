@@ -0,0 +1,250 @@
+"""
+Market demand and competition statistics.
+
+DynamicPricingMLService and LeadAccessControlMLService read lead demand and
+provider supply per category x city. Instead of COUNT(*) / icontains queries per
+priced lead, the numbers live in MarketStats rows:
+
+    (category, city)   leads_7d / leads_30d / leads_12w / active_providers
+    (category, '')     all cities of a category
+    (None, city)       all categories in a city (providers counted once)
+    (None, '')         market-wide totals
+
+Lead counts group non-test leads by category and lowercased location_city.
+Providers are counted from ProviderCoverage (users/coverage.py) for routable
+providers (active provider users, not rejected / suspended); a city counts the
+providers with that exact service area key.
+
+refresh_market_stats() recomputes everything with a handful of grouped queries
+and writes only the rows that changed. It runs from `manage.py
+refresh_market_stats` (cron, or --loop as a worker) and, as a safety net, on read
+once the table is older than MARKET_STATS_REFRESH_SECONDS.
+
+Each process keeps the table in memory (market_stats below) and reloads it after
+MARKET_STATS_RELOAD_SECONDS or when a refresh bumps the shared version stamp, so
+every lookup is a dictionary get.
+
+Design principles:
+- Never raises; lookups fall back to empty stats
+- Only changed rows are written on refresh
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from backend.procompare.tiered_cache import bump_stamp
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'market_stats:version'
+REFRESH_LOCK_KEY = 'market_stats:refreshing'
+
+MarketStat = namedtuple('MarketStat', ['leads_7d', 'leads_30d', 'leads_12w', 'active_providers'])
+EMPTY_STAT = MarketStat(0, 0, 0, 0)
+
+ROUTABLE_COVERAGE = Q(
+    provider__user__user_type='provider',
+    provider__user__is_active=True,
+) & ~Q(provider__verification_status__in=('rejected', 'suspended'))
+
+
+def _rollup_keys(category_id, city):
+    return {(category_id, city), (category_id, ''), (None, city), (None, '')}
+
+
+def compute_market_stats(now=None):
+    """{(category id or None, city or ''): MarketStat} from the database."""
+    from backend.users.coverage import normalize_area_key
+    from backend.users.models import ProviderCoverage
+    from .models import Lead
+
+    now = now or timezone.now()
+    since_7d = now - timedelta(days=7)
+    since_30d = now - timedelta(days=30)
+
+    leads = {}
+    rows = Lead.objects.filter(
+        created_at__gte=now - timedelta(weeks=12),
+        is_test=False,
+    ).values('service_category_id', 'location_city').annotate(
+        leads_7d=Count('id', filter=Q(created_at__gte=since_7d)),
+        leads_30d=Count('id', filter=Q(created_at__gte=since_30d)),
+        leads_12w=Count('id'),
+    ).order_by()
+    for row in rows:
+        counts = (row['leads_7d'], row['leads_30d'], row['leads_12w'])
+        for key in _rollup_keys(row['service_category_id'], normalize_area_key(row['location_city'])):
+            current = leads.get(key, (0, 0, 0))
+            leads[key] = tuple(a + b for a, b in zip(current, counts))
+
+    # Provider counts don't roll up by summing (one provider covers many
+    # categories / areas), so each level is its own distinct count
+    coverage = ProviderCoverage.objects.filter(ROUTABLE_COVERAGE).order_by()
+    in_area = coverage.exclude(area_key='')
+    providers = {}
+    for row in in_area.values('category_id', 'area_key').annotate(n=Count('provider_id', distinct=True)):
+        providers[(row['category_id'], row['area_key'])] = row['n']
+    for row in in_area.values('area_key').annotate(n=Count('provider_id', distinct=True)):
+        providers[(None, row['area_key'])] = row['n']
+    for row in coverage.values('category_id').annotate(n=Count('provider_id', distinct=True)):
+        providers[(row['category_id'], '')] = row['n']
+    providers[(None, '')] = coverage.aggregate(n=Count('provider_id', distinct=True))['n']
+
+    return {
+        key: MarketStat(*leads.get(key, (0, 0, 0)), providers.get(key, 0))
+        for key in set(leads) | set(providers)
+    }
+
+
+def refresh_market_stats():
+    """
+    Rewrite MarketStats to match the database, writing only changed rows.
+    Returns {'created', 'updated', 'deleted', 'unchanged'}.
+    """
+    from .models import MarketStats
+
+    started = time.monotonic()
+    fresh = compute_market_stats()
+    fresh.setdefault((None, ''), EMPTY_STAT)
+    existing = {(row.category_id, row.city): row for row in MarketStats.objects.all()}
+
+    to_create = []
+    to_update = []
+    for key, stat in fresh.items():
+        row = existing.pop(key, None)
+        if row is None:
+            to_create.append(MarketStats(category_id=key[0], city=key[1], **stat._asdict()))
+        elif MarketStat(row.leads_7d, row.leads_30d, row.leads_12w, row.active_providers) != stat:
+            for field, value in stat._asdict().items():
+                setattr(row, field, value)
+            to_update.append(row)
+
+    with transaction.atomic():
+        if existing:
+            MarketStats.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+        MarketStats.objects.bulk_create(to_create, batch_size=1000)
+        MarketStats.objects.bulk_update(to_update, list(MarketStat._fields), batch_size=1000)
+        # The market-wide row carries the refresh time for staleness checks
+        MarketStats.objects.filter(category__isnull=True, city='').update(refreshed_at=timezone.now())
+    _bump_shared_version()
+
+    result = {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': len(existing),
+        'unchanged': len(fresh) - len(to_create) - len(to_update),
+    }
+    logger.info(
+        f"[MarketStats] Refreshed {len(fresh)} rows in {(time.monotonic() - started) * 1000:.1f}ms: {result}"
+    )
+    return result
+
+
+class MarketStatsSnapshot:
+    """Thread-safe in-process copy of the MarketStats table."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._category_ids = {}
+        self._loaded_at = None
+        self._refreshed_at = None
+        self._version = None
+
+    def load(self):
+        """Reload from the table, refreshing the table first when it is missing or stale."""
+        from .models import MarketStats, ServiceCategory
+
+        refresh_seconds = getattr(settings, 'MARKET_STATS_REFRESH_SECONDS', 900)
+        market = MarketStats.objects.filter(category__isnull=True, city='').first()
+        stale = market is None or (
+            refresh_seconds and timezone.now() - market.refreshed_at > timedelta(seconds=refresh_seconds)
+        )
+        if stale and cache.add(REFRESH_LOCK_KEY, True, timeout=300):
+            try:
+                refresh_market_stats()
+            except Exception as e:
+                logger.error(f"[MarketStats] Refresh failed, serving the last snapshot: {e}")
+            finally:
+                cache.delete(REFRESH_LOCK_KEY)
+
+        version = cache.get(VERSION_CACHE_KEY)
+        stats = {}
+        refreshed_at = None
+        for row in MarketStats.objects.all():
+            stats[(row.category_id, row.city)] = MarketStat(
+                row.leads_7d, row.leads_30d, row.leads_12w, row.active_providers
+            )
+            if row.category_id is None and row.city == '':
+                refreshed_at = row.refreshed_at
+        category_ids = dict(ServiceCategory.objects.values_list('slug', 'id'))
+
+        with self._lock:
+            self._stats = stats
+            self._category_ids = category_ids
+            self._loaded_at = time.monotonic()
+            self._refreshed_at = refreshed_at
+            self._version = version
+
+    def _ensure_fresh(self):
+        reload_seconds = getattr(settings, 'MARKET_STATS_RELOAD_SECONDS', 300)
+        with self._lock:
+            loaded_at = self._loaded_at
+            version = self._version
+        if (
+            loaded_at is None
+            or time.monotonic() - loaded_at > reload_seconds
+            or cache.get(VERSION_CACHE_KEY) != version
+        ):
+            self.load()
+
+    def get(self, category_id=None, city=''):
+        """MarketStat for a category id (None = all) and city ('' = all). Never raises."""
+        from backend.users.coverage import normalize_area_key
+
+        try:
+            self._ensure_fresh()
+        except Exception as e:
+            logger.warning(f"[MarketStats] Failed to load market stats: {e}")
+        with self._lock:
+            return self._stats.get((category_id, normalize_area_key(city)), EMPTY_STAT)
+
+    def category_id(self, slug):
+        """ServiceCategory id for a slug (None if unknown), from the snapshot."""
+        try:
+            self._ensure_fresh()
+        except Exception as e:
+            logger.warning(f"[MarketStats] Failed to load market stats: {e}")
+        with self._lock:
+            return self._category_ids.get(slug)
+
+    def invalidate(self):
+        """Drop the local copy; the next lookup reloads it."""
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': len(self._stats),
+                'loaded': self._loaded_at is not None,
+                'refreshed_at': self._refreshed_at.isoformat() if self._refreshed_at else None,
+                'version': self._version,
+            }
+
+
+def _bump_shared_version():
+    """Advance the cross-process version stamp; returns the new value."""
+    return bump_stamp(cache, VERSION_CACHE_KEY)
+
+
+# Global snapshot (one per process)
+market_stats = MarketStatsSnapshot()
@@ -0,0 +1,168 @@
+"""
+Marketplace feed query for /api/leads/wallet/available/ (wallet_api.available_leads).
+
+The whole feed page is one SQL statement:
+
+- category ids and service areas come from the provider's cached match
+  profile (users/match_profile.py), not from Service / JSON resolution per call
+- leads ever routed to the provider are an Exists(LeadAssignment) condition
+- the service-area filter keeps its "no local leads -> show every matching lead"
+  fallback as an uncorrelated NOT EXISTS instead of a separate exists() probe
+- is_unlocked / current_responses are Exists / Subquery annotations
+- only() loads the lead, category and client columns the lead card reads
+
+so the number of queries per request does not grow with the provider's
+assignment or unlock history.
+
+Pages are keyset-paginated on FEED_ORDER (verification_score, created_at, id,
+all descending): a cursor holds the last row's sort key and the next page is
+"rows after it" on the same index, so deep pages cost what the first page does
+and a lead arriving between polls doesn't shift the next page.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+FEED_LIMIT = 100
+
+FEED_ORDER = ('-verification_score', '-created_at', '-id')
+
+# Everything the lead card and the stored price (lead_pricing.py) read; anything
+# else would be a deferred-field query per lead
+CARD_FIELDS = (
+    'id',
+    'title',
+    'description',
+    'location_address',
+    'location_suburb',
+    'location_city',
+    'budget_range',
+    'urgency',
+    'property_type',
+    'hiring_intent',
+    'hiring_timeline',
+    'verification_score',
+    'is_sms_verified',
+    'views_count',
+    'responses_count',
+    'max_providers',
+    'created_at',
+    'price_map',
+    'pricing_version',
+    'credit_cost',
+    'service_category__id',
+    'service_category__name',
+    'service_category__slug',
+    'client__id',
+    'client__first_name',
+    'client__last_name',
+    'client__email',
+    'client__phone',
+)
+
+MARKET_STATUSES = ('verified', 'assigned')
+
+
+def feed_queryset(provider, profile):
+    """
+    Leads a provider may see in the marketplace (unsliced, unannotated):
+    open verified/assigned leads in a covered category, plus any lead ever
+    assigned to them, narrowed to their service areas when any lead matches.
+    """
+    from backend.users.match_profile import get_match_profile
+    from .gazetteer import lead_area_q
+    from .models import Lead, LeadAssignment
+
+    match = get_match_profile(profile)
+    open_market = Q(
+        status__in=MARKET_STATUSES,
+        service_category_id__in=match.category_ids,
+        is_available=True,
+        expires_at__gt=timezone.now(),
+    )
+    # Any lead ever assigned to this provider stays visible even if categories drift,
+    # the marketplace window expired, or assignment status changed (contacted, quoted, etc.)
+    routed_to_me = Exists(LeadAssignment.objects.filter(provider=provider, lead_id=OuterRef('pk')))
+    leads = Lead.objects.filter(open_market | routed_to_me)
+
+    if match.service_areas:
+        area_filter = lead_area_q(match.service_areas)
+        if area_filter is not None:
+            # No lead in the provider's areas: show all matching category leads (better UX than 0 leads)
+            leads = leads.filter(area_filter | ~Exists(leads.filter(area_filter)))
+
+    return leads.order_by(*FEED_ORDER)
+
+
+def encode_cursor(lead):
+    """Opaque cursor for the page after a lead (its FEED_ORDER sort key)."""
+    key = [lead.verification_score, lead.created_at.isoformat(), str(lead.id)]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(verification_score, created_at, id) from encode_cursor(); ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, created_at, lead_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(score), datetime.fromisoformat(created_at), str(lead_id)
+    except Exception as e:
+        raise ValueError('Invalid feed cursor') from e
+
+
+def after_cursor_q(cursor):
+    """Rows strictly after a decoded cursor in FEED_ORDER."""
+    score, created_at, lead_id = cursor
+    return (
+        Q(verification_score__lt=score)
+        | Q(verification_score=score, created_at__lt=created_at)
+        | Q(verification_score=score, created_at=created_at, id__lt=lead_id)
+    )
+
+
+def card_state(leads, provider, compact=False):
+    """
+    Annotate is_unlocked / current_responses, drop leads this provider already
+    unlocked and test leads, and restrict columns to CARD_FIELDS (without the
+    description when compact). Unordered and unsliced.
+    """
+    from .models import LeadAccess
+    from .test_lead_utils import exclude_test_leads
+
+    active_access = LeadAccess.objects.filter(lead_id=OuterRef('pk'), is_active=True)
+    current_responses = (
+        active_access.order_by().values('lead_id').annotate(n=Count('pk')).values('n')[:1]
+    )
+    leads = leads.annotate(
+        is_unlocked=Exists(active_access.filter(provider=provider)),
+        current_responses=Coalesce(Subquery(current_responses, output_field=IntegerField()), Value(0)),
+    ).filter(is_unlocked=False)
+
+    leads = exclude_test_leads(leads)
+    leads = leads.select_related('service_category', 'client').only(*CARD_FIELDS)
+    if compact:
+        leads = leads.defer('description')
+    return leads
+
+
+def with_card_state(leads, provider, limit=FEED_LIMIT, after=None, compact=False):
+    """card_state() ordered by FEED_ORDER, starting after a decoded cursor, limited."""
+    leads = card_state(leads, provider, compact=compact)
+    if after is not None:
+        leads = leads.filter(after_cursor_q(after))
+    return leads.order_by(*FEED_ORDER)[:limit]
+
+
+def has_feed_sources(provider, profile):
+    """Whether the provider covers any category or has ever been assigned a lead."""
+    from backend.users.match_profile import get_match_profile
+    from .models import LeadAssignment
+
+    return (
+        bool(get_match_profile(profile).category_ids)
+        or LeadAssignment.objects.filter(provider=provider).exists()
+    )
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0017_leadreservation_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadRoutingJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('stage', models.CharField(choices=[('gate', 'Quality Gate'), ('match', 'Match Providers'), ('assign', 'Create Assignments'), ('fanout', 'Notify Providers'), ('done', 'Done')], default='gate', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('blocked', 'Blocked by Quality Gate'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Failed attempts on the current stage')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Worker lease expiry while running', null=True)),
+                ('provider_ids', models.JSONField(blank=True, default=list, help_text='Matched provider user ids, in rank order')),
+                ('via_assignments', models.BooleanField(default=False, help_text='Providers came from LeadAssignments (in-app already created)')),
+                ('notify_client', models.BooleanField(default=False, help_text='Send the lead-received email to the client when routing finishes')),
+                ('stage_metrics', models.JSONField(blank=True, default=dict, help_text='Per-stage duration_ms / runs / ok')),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='routing_job', to='leads.lead')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='leads_leadr_status_1996c9_idx')],
+            },
+        ),
+    ]
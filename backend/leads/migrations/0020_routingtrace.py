@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0019_lead_location_gid"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoutingTrace",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("root", models.CharField(help_text="Entry point: route_lead or routing_job", max_length=50)),
+                ("total_ms", models.FloatField(default=0)),
+                ("queries", models.PositiveIntegerField(default=0)),
+                ("counts", models.JSONField(blank=True, default=dict, help_text="providers_matched / providers_assigned / providers_notified")),
+                ("spans", models.JSONField(blank=True, default=list, help_text="[{name, calls, ms, queries}] keyed by span path")),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("lead", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="routing_traces", to="leads.lead")),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["created_at"], name="leads_routi_created_0f6b8d_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:30
+# Flags existing test leads once (backend/leads/test_lead_utils.py) so feeds filter on is_test.
+
+from django.db import migrations, models
+
+
+def backfill_is_test(apps, schema_editor):
+    from backend.leads.test_lead_utils import refresh_test_flags
+
+    Lead = apps.get_model("leads", "Lead")
+    refresh_test_flags(Lead.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0020_routingtrace"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lead",
+            name="is_test",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                editable=False,
+                help_text="Set on save from test_lead_utils.is_test_lead(); test leads are hidden from providers",
+            ),
+        ),
+        migrations.RunPython(backfill_is_test, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="lead",
+            index=models.Index(
+                condition=models.Q(("is_available", True), ("is_test", False), ("status__in", ["verified", "assigned"])),
+                fields=["service_category", "-verification_score", "-created_at"],
+                name="leads_lead_market_idx",
+            ),
+        ),
+    ]
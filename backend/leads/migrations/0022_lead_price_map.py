@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:05
+# Prices existing leads once (backend/leads/lead_pricing.py) so read paths use the stored price map.
+
+from django.db import migrations, models
+
+
+def backfill_prices(apps, schema_editor):
+    from backend.leads.lead_pricing import reprice_leads
+
+    Lead = apps.get_model("leads", "Lead")
+    reprice_leads(Lead.objects.all(), force=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0021_lead_is_test"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lead",
+            name="price_map",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Unlock price in credits per tier discount bucket (see lead_pricing.py)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="lead",
+            name="pricing_version",
+            field=models.PositiveIntegerField(
+                blank=True,
+                editable=False,
+                help_text="lead_pricing.PRICING_VERSION the price map was computed with",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
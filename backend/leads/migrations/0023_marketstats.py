@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0022_lead_price_map"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MarketStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("city", models.CharField(blank=True, default="", help_text="Lowercased lead city / provider service area", max_length=200)),
+                ("leads_7d", models.PositiveIntegerField(default=0)),
+                ("leads_30d", models.PositiveIntegerField(default=0)),
+                ("leads_12w", models.PositiveIntegerField(default=0)),
+                ("active_providers", models.PositiveIntegerField(default=0, help_text="Routable providers covering the category in this city")),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                ("category", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="market_stats", to="leads.servicecategory")),
+            ],
+            options={
+                "unique_together": {("category", "city")},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:10
+# Full-text search over leads (backend/leads/lead_search.py). On PostgreSQL a trigger keeps
+# search_vector current (including queryset .update() and bulk writes) and a GIN index serves
+# @@ queries; other databases leave the column empty and search falls back to icontains.
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION leads_lead_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT name FROM leads_servicecategory WHERE id = NEW.service_category_id), ''
+        )), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.location_suburb, '') || ' ' || coalesce(NEW.location_city, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leads_lead_search_vector_trigger ON leads_lead;
+CREATE TRIGGER leads_lead_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, location_suburb, location_city, service_category_id
+    ON leads_lead
+    FOR EACH ROW EXECUTE PROCEDURE leads_lead_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS leads_lead_search_idx ON leads_lead USING GIN (search_vector);
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP INDEX IF EXISTS leads_lead_search_idx;
+DROP TRIGGER IF EXISTS leads_lead_search_vector_trigger ON leads_lead;
+DROP FUNCTION IF EXISTS leads_lead_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_SEARCH_TRIGGER)
+    # Fire the trigger once for existing rows
+    schema_editor.execute("UPDATE leads_lead SET title = title")
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_SEARCH_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0023_marketstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lead",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                help_text="Weighted title / category / location / description vector, kept by a trigger on PostgreSQL (see lead_search.py)",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:30
+# Per-lead feature store (backend/leads/lead_features.py). Existing leads get their rows from
+# `manage.py rebuild_lead_features`, or lazily on first use.
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0024_lead_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeadFeatures",
+            fields=[
+                ("lead", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="features", serialize=False, to="leads.lead")),
+                ("schema_version", models.PositiveSmallIntegerField(db_index=True)),
+                ("vector", models.BinaryField(help_text="float32 values in lead_features.VECTOR_FEATURES order")),
+                ("derived", models.JSONField(blank=True, default=dict, help_text="Feature values by name, plus rule inputs")),
+                ("tfidf_norm", models.FloatField(blank=True, null=True)),
+                ("tfidf_version", models.CharField(blank=True, default="", help_text="Quality model version tfidf_norm was computed with", max_length=32)),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:10
+# Daily rollup behind the admin ML metrics endpoint (backend/leads/ml_metrics.py). Rows are
+# filled by `manage.py refresh_ml_metrics`, or on the first read of a missing day.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0025_leadfeatures"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MLMetricsDaily",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(unique=True)),
+                ("leads", models.PositiveIntegerField(default=0)),
+                ("cancelled_leads", models.PositiveIntegerField(default=0)),
+                ("quality_score_sum", models.FloatField(default=0)),
+                ("price_sum", models.FloatField(default=0, help_text="Default-tier credits of the day's leads")),
+                ("assignments", models.PositiveIntegerField(default=0)),
+                ("contacted_assignments", models.PositiveIntegerField(default=0, help_text="Contacted, won or lost")),
+                ("won_assignments", models.PositiveIntegerField(default=0)),
+                ("quality_model_version", models.CharField(blank=True, default="", max_length=32)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+    ]
@@ -0,0 +1,156 @@
+"""
+Daily rollup behind the admin ML metrics endpoint (ml_views.ml_metrics_view).
+
+The endpoint reports 30-day lead quality, conversion, cancellation, matching
+and pricing figures. Instead of scoring every recent lead per request, each
+local date has an MLMetricsDaily row of sums and counts:
+
+    leads, cancelled_leads              leads created that day
+    quality_score_sum                   LeadQualityMLService.predict_many() over them
+    price_sum                           default-tier credits (pricing_engine.price_leads)
+    assignments, contacted / won        assignments made that day (assigned_at)
+
+metrics_window() sums the last WINDOW_DAYS rows, so the endpoint costs the same
+whatever the lead volume. Past days change slowly (statuses and assignment
+outcomes settle, a new quality model is promoted): `manage.py
+refresh_ml_metrics` recomputes the whole window (cron, or --loop as a worker).
+As a safety net, metrics_window() computes missing days and refreshes today's
+row once it is older than ML_METRICS_REFRESH_SECONDS.
+
+Design principles:
+- Never raises; the endpoint serves whatever rows exist
+- One aggregate query per table per day; quality scores in chunked batches
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+WINDOW_DAYS = 30
+REFRESH_LOCK_KEY = 'ml_metrics:refreshing'
+
+TOTAL_FIELDS = (
+    'leads', 'cancelled_leads', 'quality_score_sum', 'price_sum',
+    'assignments', 'contacted_assignments', 'won_assignments',
+)
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+
+def window_dates(days=WINDOW_DAYS):
+    """The last `days` local dates, today first."""
+    today = timezone.localdate()
+    return [today - timedelta(days=n) for n in range(days)]
+
+
+def compute_day(day, quality_service=None):
+    """MLMetricsDaily field values for one local date."""
+    from . import model_store
+    from .ml_registry import ml_registry
+    from .models import Lead, LeadAssignment
+    from .pricing_engine import PRICING_VALUE_FIELDS, price_leads
+
+    quality_service = quality_service or ml_registry.get('quality')
+    start, end = _day_range(day)
+    leads = Lead.objects.filter(created_at__gte=start, created_at__lt=end)
+
+    counts = leads.aggregate(
+        leads=Count('id'),
+        cancelled_leads=Count('id', filter=Q(status='cancelled')),
+    )
+    assignments = LeadAssignment.objects.filter(assigned_at__gte=start, assigned_at__lt=end).aggregate(
+        assignments=Count('id'),
+        contacted_assignments=Count('id', filter=Q(status__in=['contacted', 'won', 'lost'])),
+        won_assignments=Count('id', filter=Q(status='won')),
+    )
+    quality_score_sum = price_sum = 0.0
+    if counts['leads']:
+        quality_score_sum = float(sum(quality_service.predict_many(leads).values()))
+        prices = price_leads(list(leads.values(*PRICING_VALUE_FIELDS)))
+        price_sum = float(prices.sum())
+    return {
+        **counts,
+        **assignments,
+        'quality_score_sum': quality_score_sum,
+        'price_sum': price_sum,
+        'quality_model_version': model_store.current_version('lead_quality') or '',
+    }
+
+
+def refresh_days(days):
+    """Recompute the MLMetricsDaily rows of some local dates. Returns the number written."""
+    from .ml_registry import ml_registry
+    from .models import MLMetricsDaily
+
+    started = time.monotonic()
+    quality_service = ml_registry.get('quality')
+    rows = []
+    for day in days:
+        try:
+            rows.append(MLMetricsDaily(date=day, **compute_day(day, quality_service)))
+        except Exception as e:
+            logger.error(f"[MLMetrics] Failed to compute metrics for {day}: {e}")
+    MLMetricsDaily.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=[*TOTAL_FIELDS, 'quality_model_version', 'refreshed_at'],
+    )
+    logger.info(f"[MLMetrics] Refreshed {len(rows)} day(s) in {(time.monotonic() - started) * 1000:.1f}ms")
+    return len(rows)
+
+
+def refresh_ml_metrics(days=WINDOW_DAYS):
+    """Recompute the last `days` days (today included). Returns the number of rows written."""
+    return refresh_days(window_dates(days))
+
+
+def _ensure_window(dates):
+    from .models import MLMetricsDaily
+
+    refresh_seconds = getattr(settings, 'ML_METRICS_REFRESH_SECONDS', 900)
+    refreshed = dict(MLMetricsDaily.objects.filter(date__in=dates).values_list('date', 'refreshed_at'))
+    stale = [day for day in dates if day not in refreshed]
+    today = dates[0]
+    if today in refreshed and timezone.now() - refreshed[today] > timedelta(seconds=refresh_seconds):
+        stale.append(today)
+    if stale and cache.add(REFRESH_LOCK_KEY, True, timeout=300):
+        try:
+            refresh_days(stale)
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+
+
+def metrics_window(days=WINDOW_DAYS):
+    """
+    Totals of TOTAL_FIELDS over the last `days` days, plus 'days' (rows found)
+    and 'refreshed_at' (oldest row). Never raises.
+    """
+    from .models import MLMetricsDaily
+
+    dates = window_dates(days)
+    try:
+        _ensure_window(dates)
+    except Exception as e:
+        logger.error(f"[MLMetrics] Refresh failed, serving stored rows: {e}")
+    totals = dict.fromkeys(TOTAL_FIELDS, 0)
+    totals.update(days=0, refreshed_at=None)
+    try:
+        aggregate = MLMetricsDaily.objects.filter(date__in=dates).aggregate(
+            **{field: Sum(field) for field in TOTAL_FIELDS},
+            days=Count('id'),
+            refreshed_at=Min('refreshed_at'),
+        )
+        totals.update((key, value) for key, value in aggregate.items() if value is not None)
+    except Exception as e:
+        logger.error(f"[MLMetrics] Failed to read metrics rollup: {e}")
+    return totals
@@ -0,0 +1,241 @@
+"""
+Process-wide registry of ML services.
+
+Each service is constructed (and its models loaded from disk) once per process
+and shared by every caller. The registry re-checks model files at most every
+ML_REGISTRY_CHECK_SECONDS; when a file's mtime/size changes (new model trained)
+a fresh instance is built outside the lock and swapped in atomically, so
+in-flight callers keep the instance they already hold. Models kept in the
+versioned model store (model_store.py) are watched through their CURRENT
+pointer, so promoting a version reloads it everywhere.
+
+Usage:
+    from backend.leads.ml_registry import ml_registry
+    quality_ml = ml_registry.get('quality')
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Legacy location used by client_behavior_tasks
+DEFAULT_CLIENT_BEHAVIOR_MODEL_PATH = '/home/paas/work_platform/backend/models/client_behavior_model.pkl'
+
+
+def client_behavior_model_path():
+    return getattr(settings, 'CLIENT_BEHAVIOR_MODEL_PATH', DEFAULT_CLIENT_BEHAVIOR_MODEL_PATH)
+
+
+def _ml_models_dir():
+    return os.path.join(settings.BASE_DIR, 'ml_models')
+
+
+# ------------------------------------------------------------------ factories
+
+def _build_quality():
+    from .ml_services import LeadQualityMLService
+    service = LeadQualityMLService()
+    service.load_models()
+    return service
+
+
+def _build_conversion():
+    from .ml_services import LeadConversionMLService
+    service = LeadConversionMLService()
+    service.load_conversion_model()
+    return service
+
+
+def _build_pricing():
+    from .ml_services import DynamicPricingMLService
+    return DynamicPricingMLService()
+
+
+def _build_access_control():
+    from .ml_services import LeadAccessControlMLService
+    return LeadAccessControlMLService()
+
+
+def _build_hybrid():
+    from .hybrid_scoring import HybridLeadScorer
+    return HybridLeadScorer()
+
+
+def _build_enhanced():
+    from .ab_testing import EnhancedLeadScorer
+    scorer = EnhancedLeadScorer.__new__(EnhancedLeadScorer)
+    scorer.hybrid_scorer = ml_registry.get('hybrid')
+    return scorer
+
+
+def _build_geographical():
+    from .ml_services import GeographicalMLService
+    service = GeographicalMLService()
+    service.load_geographical_model()
+    return service
+
+
+def _build_support():
+    from backend.support.ml_services import SupportTicketMLService
+    return SupportTicketMLService()
+
+
+def _build_client_behavior():
+    from .client_behavior_ml import ClientBehaviorML
+    service = ClientBehaviorML()
+    path = client_behavior_model_path()
+    if os.path.exists(path):
+        service.load_model(path)
+    return service
+
+
+def _quality_files():
+    from .model_store import pointer_path
+    base = _ml_models_dir()
+    return [
+        pointer_path('lead_quality'),
+        os.path.join(base, 'lead_quality_model.pkl'),
+        os.path.join(base, 'lead_quality_scaler.pkl'),
+        os.path.join(base, 'lead_quality_tfidf.pkl'),
+    ]
+
+
+def _conversion_files():
+    from .model_store import pointer_path
+    return [pointer_path('lead_conversion'), os.path.join(_ml_models_dir(), 'conversion_model.pkl')]
+
+
+def _geographical_files():
+    from .model_store import pointer_path
+    return [pointer_path('geographical')]
+
+
+def _support_files():
+    from .model_store import pointer_path
+    return [pointer_path('support')]
+
+
+def _client_behavior_files():
+    return [client_behavior_model_path()]
+
+
+# name -> (factory, model files callable or None, max age seconds or None)
+# Services without model files but with data-dependent setup (hybrid readiness
+# checks) are rebuilt after max age instead.
+SERVICE_SPECS = {
+    'quality': (_build_quality, _quality_files, None),
+    'conversion': (_build_conversion, _conversion_files, None),
+    'pricing': (_build_pricing, None, None),
+    'access_control': (_build_access_control, None, None),
+    'hybrid': (_build_hybrid, None, 600),
+    'enhanced': (_build_enhanced, None, 600),
+    'geographical': (_build_geographical, _geographical_files, None),
+    'support': (_build_support, _support_files, None),
+    'client_behavior': (_build_client_behavior, _client_behavior_files, None),
+}
+
+
+def _fingerprint(files):
+    stamp = []
+    for path in files:
+        try:
+            st = os.stat(path)
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((path, None, None))
+    return tuple(stamp)
+
+
+class MLServiceRegistry:
+    """Thread-safe, lazily populated, hot-swapping holder of shared ML service instances."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_locks = {name: threading.Lock() for name in SERVICE_SPECS}
+        # name -> {'instance', 'fingerprint', 'built_at', 'checked_at', 'generation'}
+        self._slots = {}
+
+    def get(self, name):
+        """Shared instance for a service name (see SERVICE_SPECS)."""
+        if name not in SERVICE_SPECS:
+            raise KeyError(f"Unknown ML service '{name}'")
+        slot = self._slots.get(name)
+        if slot is not None and not self._is_stale(name, slot):
+            return slot['instance']
+        return self._build(name, previous=slot)
+
+    def _is_stale(self, name, slot):
+        factory, files, max_age = SERVICE_SPECS[name]
+        now = time.monotonic()
+        if max_age and now - slot['built_at'] > max_age:
+            return True
+        if files is None:
+            return False
+        interval = getattr(settings, 'ML_REGISTRY_CHECK_SECONDS', 60)
+        if now - slot['checked_at'] < interval:
+            return False
+        slot['checked_at'] = now
+        return _fingerprint(files()) != slot['fingerprint']
+
+    def _build(self, name, previous=None):
+        factory, files, max_age = SERVICE_SPECS[name]
+        with self._build_locks[name]:
+            current = self._slots.get(name)
+            if current is not None and current is not previous:
+                return current['instance']  # Another thread already swapped it in
+            started = time.monotonic()
+            fingerprint = _fingerprint(files()) if files else None
+            try:
+                instance = factory()
+            except Exception as e:
+                if previous is not None:
+                    logger.error(f"[MLRegistry] Rebuilding {name} failed, keeping previous instance: {e}", exc_info=True)
+                    previous['checked_at'] = time.monotonic()
+                    return previous['instance']
+                raise
+            slot = {
+                'instance': instance,
+                'fingerprint': fingerprint,
+                'built_at': time.monotonic(),
+                'checked_at': time.monotonic(),
+                'generation': (previous['generation'] + 1) if previous else 1,
+            }
+            with self._lock:
+                self._slots[name] = slot
+            logger.info(
+                f"[MLRegistry] {'Reloaded' if previous else 'Loaded'} {name} "
+                f"(generation {slot['generation']}) in {(time.monotonic() - started) * 1000:.1f}ms"
+            )
+            return instance
+
+    def reload(self, name=None):
+        """Force a rebuild (after training) of one service, or drop all so they rebuild lazily."""
+        if name is None:
+            with self._lock:
+                self._slots.clear()
+            return None
+        return self._build(name, previous=self._slots.get(name))
+
+    def status(self):
+        with self._lock:
+            return {
+                name: {'generation': slot['generation'], 'age_seconds': round(time.monotonic() - slot['built_at'], 1)}
+                for name, slot in self._slots.items()
+            }
+
+
+# Global registry instance (one per process)
+ml_registry = MLServiceRegistry()
+
+
+def preload():
+    """Build the services named in ML_PRELOAD_SERVICES (wsgi.py). Failures are logged, not raised."""
+    for name in getattr(settings, 'ML_PRELOAD_SERVICES', ()):
+        try:
+            ml_registry.get(name)
+        except Exception as e:
+            logger.error(f"[MLRegistry] Preloading {name} failed: {e}")
@@ -10,6 +10,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error
 from django.db.models import Q
 from .models import Lead, LeadAssignment, ServiceCategory
+from . import lead_features, tree_inference
 from backend.users.models import User
 import logging
 import joblib
@@ -17,6 +18,7 @@ import os
 from django.conf import settings
 import re
 from datetime import datetime, timedelta
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
@@ -32,134 +34,75 @@ class LeadQualityMLService:
         self.label_encoders = {}
         self.model_path = os.path.join(settings.BASE_DIR, 'ml_models')
         self.model_version = datetime.now().strftime('%Y%m%d%H%M%S')
+        self._models_loaded = False  # Set once load_models() has looked on disk
+        self.vectorizer_version = None  # Model store version of text_vectorizer (keys stored tfidf_norm)
         os.makedirs(self.model_path, exist_ok=True)
     
     def extract_features(self, lead_data):
-        """Extract features for ML models"""
-        features = {}
-        
-        # Text features
-        features['title_length'] = len(lead_data.get('title', ''))
-        features['description_length'] = len(lead_data.get('description', ''))
-        features['title_word_count'] = len(lead_data.get('title', '').split())
-        features['description_word_count'] = len(lead_data.get('description', '').split())
-        
-        # Contact quality features
-        features['has_phone'] = 1 if lead_data.get('contact_phone') else 0
-        features['has_email'] = 1 if lead_data.get('contact_email') else 0
-        features['phone_length'] = len(lead_data.get('contact_phone', ''))
-        features['email_has_domain'] = 1 if '@' in lead_data.get('contact_email', '') else 0
-        
-        # Location features
-        features['has_address'] = 1 if lead_data.get('location_address') else 0
-        features['has_suburb'] = 1 if lead_data.get('location_suburb') else 0
-        features['has_city'] = 1 if lead_data.get('location_city') else 0
-        features['address_length'] = len(lead_data.get('location_address', ''))
-        
-        # Budget features
-        budget_range = lead_data.get('budget_range', 'no_budget')
-        budget_mapping = {
-            'under_1000': 500,
-            '1000_5000': 3000,
-            '5000_15000': 10000,
-            '15000_50000': 32500,
-            'over_50000': 75000,
-            'no_budget': 0
-        }
-        features['budget_value'] = budget_mapping.get(budget_range, 0)
-        features['has_budget'] = 1 if budget_range != 'no_budget' else 0
-        
-        # Urgency features
-        urgency = lead_data.get('urgency', 'flexible')
-        urgency_mapping = {
-            'urgent': 4,
-            'this_week': 3,
-            'this_month': 2,
-            'flexible': 1
-        }
-        features['urgency_score'] = urgency_mapping.get(urgency, 1)
-        
-        # Intent features
-        hiring_intent = lead_data.get('hiring_intent', 'researching')
-        intent_mapping = {
-            'ready_to_hire': 4,
-            'planning_to_hire': 3,
-            'comparing_quotes': 2,
-            'researching': 1
-        }
-        features['intent_score'] = intent_mapping.get(hiring_intent, 1)
-        
-        # Timeline features
-        hiring_timeline = lead_data.get('hiring_timeline', 'flexible')
-        timeline_mapping = {
-            'asap': 4,
-            'this_month': 3,
-            'next_month': 2,
-            'flexible': 1
-        }
-        features['timeline_score'] = timeline_mapping.get(hiring_timeline, 1)
-        
-        # Additional features
-        features['has_special_requirements'] = 1 if lead_data.get('additional_requirements') else 0
-        features['has_research_purpose'] = 1 if lead_data.get('research_purpose') else 0
-        features['special_requirements_length'] = len(lead_data.get('additional_requirements', ''))
-        
-        # Time-based features
-        now = datetime.now()
-        features['hour_of_day'] = now.hour
-        features['day_of_week'] = now.weekday()
-        features['is_weekend'] = 1 if now.weekday() >= 5 else 0
-        
-        # Text quality features
-        title = lead_data.get('title', '')
-        description = lead_data.get('description', '')
-        
-        features['title_has_question'] = 1 if '?' in title else 0
-        features['title_has_caps'] = 1 if any(c.isupper() for c in title) else 0
-        features['description_has_question'] = 1 if '?' in description else 0
-        features['description_has_caps'] = 1 if any(c.isupper() for c in description) else 0
-        
-        # Spam detection features
-        features['title_spam_score'] = self._calculate_spam_score(title)
-        features['description_spam_score'] = self._calculate_spam_score(description)
-
-        # TF-IDF richness scalar if vectorizer is available
+        """Extract features for ML models (lead_features.QUALITY_FEATURES order)"""
+        features = lead_features.derive(lead_data)
+        features['tfidf_norm'] = self._tfidf_norm(
+            f"{lead_data.get('title', '') or ''} {lead_data.get('description', '') or ''}".strip()
+        )
+        return features
+    
+    def _tfidf_norm(self, text):
+        """TF-IDF richness scalar if vectorizer is available"""
         try:
-            if self.text_vectorizer is not None:
-                text = f"{title} {description}".strip()
-                if text:
-                    vec = self.text_vectorizer.transform([text])
-                    tfidf_norm = float(np.sqrt(vec.multiply(vec).sum()))
-                else:
-                    tfidf_norm = 0.0
-                features['tfidf_norm'] = tfidf_norm
-            else:
-                features['tfidf_norm'] = 0.0
+            if self.text_vectorizer is None or not text:
+                return 0.0
+            vec = self.text_vectorizer.transform([text])
+            return float(np.sqrt(vec.multiply(vec).sum()))
         except Exception:
-            features['tfidf_norm'] = 0.0
-        
-        return features
+            return 0.0
     
     def _calculate_spam_score(self, text):
         """Calculate spam score for text"""
-        if not text:
-            return 0
-        
-        spam_indicators = [
-            r'\b(urgent|asap|immediately|right now)\b',
-            r'\b(cheap|affordable|budget)\b',
-            r'\b(guaranteed|promise|sure)\b',
-            r'[!]{2,}',
-            r'[A-Z]{3,}',
-            r'\b(free|no cost|gratis)\b'
-        ]
-        
-        score = 0
-        for pattern in spam_indicators:
-            matches = len(re.findall(pattern, text.lower()))
-            score += matches * 5
-        
-        return min(score, 100)
+        return lead_features.spam_score(text)
+    
+    def _tfidf_norms(self, texts):
+        """_tfidf_norm for many texts in one transform"""
+        if self.text_vectorizer is None or not texts:
+            return np.zeros(len(texts))
+        try:
+            vec = self.text_vectorizer.transform(texts)
+            return np.sqrt(np.asarray(vec.multiply(vec).sum(axis=1)).ravel())
+        except Exception:
+            return np.array([self._tfidf_norm(text) for text in texts])
+    
+    def _tfidf_column(self, leads, stored):
+        """
+        tfidf_norm of each lead for this model version: stored values where the
+        version matches, the rest computed in one transform and stored.
+        """
+        norms = np.zeros(len(leads))
+        stale = []
+        for i, features in enumerate(stored):
+            if features.tfidf_norm is not None and self.vectorizer_version and features.tfidf_version == self.vectorizer_version:
+                norms[i] = features.tfidf_norm
+            else:
+                stale.append(i)
+        if not stale:
+            return norms
+        norms[stale] = self._tfidf_norms(
+            [f"{leads[i].title or ''} {leads[i].description or ''}".strip() for i in stale]
+        )
+        if self.vectorizer_version:
+            try:
+                lead_features.store_tfidf({stored[i].lead_id: float(norms[i]) for i in stale}, self.vectorizer_version)
+                for i in stale:
+                    stored[i].tfidf_norm, stored[i].tfidf_version = float(norms[i]), self.vectorizer_version
+            except Exception as e:
+                logger.warning(f"Could not store tfidf_norm for {len(stale)} lead(s): {e}")
+        return norms
+    
+    def feature_row(self, features, lead=None):
+        """
+        Model input for stored LeadFeatures: the stored vector plus tfidf_norm for
+        this model version (computed and stored on first use of a version).
+        """
+        tfidf_norm = self._tfidf_column([lead or features.lead], [features])[0]
+        return np.append(features.as_array().astype(np.float64), tfidf_norm)
     
     def train_quality_model(self):
         """Train ML model for lead quality prediction"""
@@ -179,13 +122,11 @@ class LeadQualityMLService:
             else:
                 leads_qs = completed_leads.select_related('client')
             
-            # Convert to list of dicts
+            # Convert to list of dicts (features come from the feature store)
             leads = list(leads_qs.values(
-                'title', 'description', 'location_address', 'location_suburb', 
-                'location_city', 'budget_range', 'urgency', 'hiring_intent',
-                'hiring_timeline', 'additional_requirements', 'research_purpose',
+                'id', 'title', 'description',
                 'verification_score', 'assigned_providers_count', 'total_provider_contacts', 
-                'status', 'client__phone', 'client__email'
+                'status'
             ))
             
             logger.info(f"Using {len(leads)} leads for training (completed: {completed_count})")
@@ -213,37 +154,19 @@ class LeadQualityMLService:
                 self.text_vectorizer = None
 
             # Prepare data
+            stored = lead_features.bulk_for([lead['id'] for lead in leads])
             X = []
             y = []
+            tfidf_norms = {}
             
             for lead in leads:
-                # Prepare lead data for feature extraction
-                lead_data = {
-                    'title': lead['title'],
-                    'description': lead['description'],
-                    'location_address': lead['location_address'],
-                    'location_suburb': lead['location_suburb'],
-                    'location_city': lead['location_city'],
-                    'budget_range': lead['budget_range'],
-                    'urgency': lead['urgency'],
-                    'hiring_intent': lead['hiring_intent'],
-                    'hiring_timeline': lead['hiring_timeline'],
-                    'additional_requirements': lead['additional_requirements'],
-                    'research_purpose': lead['research_purpose'],
-                    'contact_phone': lead['client__phone'],
-                    'contact_email': lead['client__email'],
-                }
-                
-                try:
-                    features = self.extract_features(lead_data)
-                    if features and isinstance(features, dict):
-                        X.append(list(features.values()))
-                    else:
-                        logger.warning(f"Skipping lead with invalid features: {lead.get('title', 'unknown')}")
-                        continue
-                except Exception as e:
-                    logger.warning(f"Error extracting features for lead: {e}")
+                features = stored.get(lead['id'])
+                if features is None:
+                    logger.warning(f"Skipping lead without features: {lead.get('title', 'unknown')}")
                     continue
+                tfidf_norm = self._tfidf_norm(f"{lead['title'] or ''} {lead['description'] or ''}".strip())
+                tfidf_norms[lead['id']] = tfidf_norm
+                X.append(np.append(features.as_array().astype(np.float64), tfidf_norm))
                 
                 # Quality score based on outcomes
                 if lead['status'] == 'completed':
@@ -290,23 +213,16 @@ class LeadQualityMLService:
             mse = mean_squared_error(y_test, y_pred)
             logger.info(f"Quality model MSE: {mse}")
             
-            # Save model
-            # Versioned save
-            joblib.dump(self.quality_model, 
-                       os.path.join(self.model_path, f'lead_quality_model_{self.model_version}.pkl'))
-            joblib.dump(self.scaler, 
-                       os.path.join(self.model_path, f'lead_quality_scaler_{self.model_version}.pkl'))
-            if self.text_vectorizer is not None:
-                joblib.dump(self.text_vectorizer,
-                           os.path.join(self.model_path, f'lead_quality_tfidf_{self.model_version}.pkl'))
-            # Also update latest pointers
-            joblib.dump(self.quality_model, 
-                       os.path.join(self.model_path, 'lead_quality_model.pkl'))
-            joblib.dump(self.scaler, 
-                       os.path.join(self.model_path, 'lead_quality_scaler.pkl'))
-            if self.text_vectorizer is not None:
-                joblib.dump(self.text_vectorizer,
-                           os.path.join(self.model_path, 'lead_quality_tfidf.pkl'))
+            # Save model as a new promoted version (model_store.py)
+            from . import model_store
+            self.model_version = model_store.publish(
+                'lead_quality',
+                {'model': self.quality_model, 'scaler': self.scaler, 'tfidf': self.text_vectorizer},
+                metrics={'mse': float(mse), 'samples': len(X)},
+            )
+            self.vectorizer_version = self.model_version
+            # The norms under the new vectorizer are already known for every training lead
+            lead_features.store_tfidf(tfidf_norms, self.model_version)
             
             return True
             
@@ -317,7 +233,7 @@ class LeadQualityMLService:
     def predict_lead_quality(self, lead_data):
         """Predict lead quality score"""
         try:
-            if not self.quality_model:
+            if not self.quality_model and not self._models_loaded:
                 self.load_models()
             
             if not self.quality_model:
@@ -326,17 +242,83 @@ class LeadQualityMLService:
             
             features = self.extract_features(lead_data)
             X = np.array([list(features.values())])
+            return self._predict_row(X)
             
-            if self.scaler:
-                X = self.scaler.transform(X)
+        except Exception as e:
+            logger.error(f"Error predicting lead quality: {str(e)}")
+            return self._rule_based_quality_score(lead_data)
+    
+    def predict_for_lead(self, lead, features=None):
+        """Predict lead quality score for a Lead from its stored features (lead_features.py)"""
+        try:
+            if not self.quality_model and not self._models_loaded:
+                self.load_models()
+            
+            if not self.quality_model:
+                return self._rule_based_quality_score(lead_features.lead_data(lead))
             
-            quality_score = self.quality_model.predict(X)[0]
-            return max(0, min(100, quality_score))
+            features = features or lead_features.for_lead(lead)
+            if features is None:
+                return self.predict_lead_quality(lead_features.lead_data(lead))
+            return self._predict_row(self.feature_row(features, lead)[np.newaxis])
             
         except Exception as e:
             logger.error(f"Error predicting lead quality: {str(e)}")
-            return self._rule_based_quality_score(lead_data)
+            return self._rule_based_quality_score(lead_features.lead_data(lead))
+    
+    def predict_many(self, leads, chunk_size=lead_features.BATCH_SIZE):
+        """
+        Quality scores {lead id: score} for a queryset (read with iterator()) or
+        a list of leads, chunk_size leads at a time: one feature read, one
+        TF-IDF transform and one model call per chunk.
+        """
+        if not self.quality_model and not self._models_loaded:
+            self.load_models()
+        
+        if hasattr(leads, 'iterator'):
+            leads = leads.select_related('client').iterator(chunk_size=chunk_size)
+        leads = iter(leads)
+        scores = {}
+        while True:
+            chunk = list(islice(leads, chunk_size))
+            if not chunk:
+                return scores
+            scores.update(self._predict_chunk(chunk))
     
+    def _predict_chunk(self, leads):
+        if not self.quality_model:
+            return {lead.pk: self._rule_based_quality_score(lead_features.lead_data(lead)) for lead in leads}
+        try:
+            stored = lead_features.bulk_for([lead.pk for lead in leads])
+            scores = {}
+            # Leads whose features could not be computed take the dict path
+            for lead in [lead for lead in leads if lead.pk not in stored]:
+                scores[lead.pk] = self.predict_lead_quality(lead_features.lead_data(lead))
+            present = [lead for lead in leads if lead.pk in stored]
+            if not present:
+                return scores
+            rows = [stored[lead.pk] for lead in present]
+            X = np.column_stack([
+                np.vstack([features.as_array() for features in rows]).astype(np.float64),
+                self._tfidf_column(present, rows),
+            ])
+            if self.scaler:
+                X = self.scaler.transform(X)
+            predictions = np.clip(tree_inference.predict(self.quality_model, X), 0, 100)
+            scores.update((lead.pk, float(score)) for lead, score in zip(present, predictions))
+            return scores
+        except Exception as e:
+            logger.error(f"Error predicting lead quality for {len(leads)} lead(s): {str(e)}")
+            return {lead.pk: self._rule_based_quality_score(lead_features.lead_data(lead)) for lead in leads}
+    
+    def _predict_row(self, X):
+        """Scaled, clamped model score for one feature row"""
+        if self.scaler:
+            X = self.scaler.transform(X)
+
+        quality_score = tree_inference.predict(self.quality_model, X)[0]
+        return max(0, min(100, quality_score))
+
     def _rule_based_quality_score(self, lead_data):
         """Fallback rule-based quality scoring"""
         score = 0
@@ -380,6 +362,18 @@ class LeadQualityMLService:
     
     def load_models(self):
         """Load trained models"""
+        self._models_loaded = True
+        from . import model_store
+        stored = model_store.load('lead_quality')
+        if stored is not None:
+            artifacts, manifest = stored
+            self.quality_model = artifacts.get('model')
+            self.scaler = artifacts.get('scaler')
+            self.text_vectorizer = artifacts.get('tfidf')
+            self.model_version = manifest['version']
+            self.vectorizer_version = manifest['version']
+            return
+        # Flat files written before the model store
         try:
             quality_model_path = os.path.join(self.model_path, 'lead_quality_model.pkl')
             scaler_path = os.path.join(self.model_path, 'lead_quality_scaler.pkl')
@@ -403,55 +397,56 @@ class LeadConversionMLService:
         self.conversion_model = None
         self.model_path = os.path.join(settings.BASE_DIR, 'ml_models')
         self.model_version = datetime.now().strftime('%Y%m%d%H%M%S')
+        self._model_loaded = False  # Set once load_conversion_model() has looked on disk
     
     def train_conversion_model(self):
         """Train model to predict lead conversion probability"""
         try:
             min_assignments = getattr(settings, 'ML_MIN_CONVERSION_TRAINING_ASSIGNMENTS', 30)
-            # Get lead assignment data with outcomes
+            # Get lead assignment data with outcomes (providers without a profile have no features)
             assignments = LeadAssignment.objects.filter(
-                status__in=['won', 'lost', 'no_response']
-            ).select_related('lead', 'lead__client', 'provider', 'provider__provider_profile')
+                status__in=['won', 'lost', 'no_response'],
+                provider__provider_profile__isnull=False,
+            )
             
-            if len(assignments) < min_assignments:
+            if assignments.count() < min_assignments:
                 logger.warning("Not enough assignment data to train conversion model")
                 return False
             
             X = []
             y = []
             
-            for assignment in assignments:
-                # Lead features
-                lead = assignment.lead
-                features = {
-                    'lead_quality_score': lead.verification_score,
-                    'budget_value': self._get_budget_value(lead.budget_range),
-                    'urgency_score': self._get_urgency_score(lead.urgency),
-                    'intent_score': self._get_intent_score(lead.hiring_intent),
-                    'description_length': len(lead.description),
-                    'has_requirements': 1 if lead.additional_requirements else 0,
-                }
-                
-                # Provider features
-                provider = assignment.provider
-                profile = provider.provider_profile
-                features.update({
-                    'provider_rating': float(profile.average_rating),
-                    'provider_experience': profile.years_experience or 0,
-                    'provider_credits': profile.credit_balance,
-                    'subscription_tier': self._get_subscription_score(profile.subscription_tier),
-                    'response_time': profile.response_time_hours,
-                })
-                
-                # Assignment features
-                features.update({
-                    'assignment_hour': assignment.assigned_at.hour,
-                    'assignment_day': assignment.assigned_at.weekday(),
-                    'credit_cost': assignment.credit_cost,
-                })
-                
-                X.append(list(features.values()))
-                y.append(1 if assignment.won_job else 0)
+            # Only the columns the features need, streamed (no model instances)
+            rows = assignments.values(
+                'lead__verification_score', 'lead__budget_range', 'lead__urgency', 'lead__hiring_intent',
+                'lead__description', 'lead__additional_requirements',
+                'provider__provider_profile__average_rating', 'provider__provider_profile__years_experience',
+                'provider__provider_profile__credit_balance', 'provider__provider_profile__subscription_tier',
+                'provider__provider_profile__response_time_hours',
+                'assigned_at', 'credit_cost', 'won_job',
+            )
+            
+            for row in rows.iterator(chunk_size=2000):
+                X.append([
+                    # Lead features
+                    row['lead__verification_score'],
+                    self._get_budget_value(row['lead__budget_range']),
+                    self._get_urgency_score(row['lead__urgency']),
+                    self._get_intent_score(row['lead__hiring_intent']),
+                    len(row['lead__description']),
+                    1 if row['lead__additional_requirements'] else 0,
+                    # Provider features
+                    float(row['provider__provider_profile__average_rating']),
+                    row['provider__provider_profile__years_experience'] or 0,
+                    row['provider__provider_profile__credit_balance'],
+                    self._get_subscription_score(row['provider__provider_profile__subscription_tier']),
+                    row['provider__provider_profile__response_time_hours'],
+                    # Assignment features
+                    row['assigned_at'].hour,
+                    row['assigned_at'].weekday(),
+                    row['credit_cost'],
+                ])
+                y.append(1 if row['won_job'] else 0)
             
             X = np.array(X)
             y = np.array(y)
@@ -464,13 +459,13 @@ class LeadConversionMLService:
             )
             self.conversion_model.fit(X, y)
             
-            # Save model
-            # Versioned save
-            joblib.dump(self.conversion_model, 
-                       os.path.join(self.model_path, f'conversion_model_{self.model_version}.pkl'))
-            # Update latest pointer
-            joblib.dump(self.conversion_model, 
-                       os.path.join(self.model_path, 'conversion_model.pkl'))
+            # Save model as a new promoted version (model_store.py)
+            from . import model_store
+            self.model_version = model_store.publish(
+                'lead_conversion',
+                {'model': self.conversion_model},
+                metrics={'samples': len(y), 'positive_rate': float(y.mean()) if len(y) else 0.0},
+            )
             
             return True
             
@@ -480,48 +475,56 @@ class LeadConversionMLService:
     
     def predict_conversion_probability(self, lead, provider):
         """Predict conversion probability for lead-provider pair"""
+        return self.predict_conversion_probabilities(lead, [provider])[0]
+    
+    def predict_conversion_probabilities(self, lead, providers):
+        """
+        Predict conversion probability for one lead against many providers.
+        Builds a single feature matrix and calls predict_proba once.
+        """
+        providers = list(providers)
+        if not providers:
+            return []
         try:
-            if not self.conversion_model:
+            if not self.conversion_model and not self._model_loaded:
                 self.load_conversion_model()
             
             if not self.conversion_model:
-                return 0.5  # Default probability
-            
-            # Extract features
-            features = {
-                'lead_quality_score': lead.verification_score,
-                'budget_value': self._get_budget_value(lead.budget_range),
-                'urgency_score': self._get_urgency_score(lead.urgency),
-                'intent_score': self._get_intent_score(lead.hiring_intent),
-                'description_length': len(lead.description),
-                'has_requirements': 1 if lead.additional_requirements else 0,
-            }
+                return [0.5] * len(providers)  # Default probability
             
-            profile = provider.provider_profile
-            features.update({
-                'provider_rating': float(profile.average_rating),
-                'provider_experience': profile.years_experience or 0,
-                'provider_credits': profile.credit_balance,
-                'subscription_tier': self._get_subscription_score(profile.subscription_tier),
-                'response_time': profile.response_time_hours,
-            })
-            
-            # Current assignment features
+            # Lead and assignment features are shared by every row
             now = datetime.now()
-            features.update({
-                'assignment_hour': now.hour,
-                'assignment_day': now.weekday(),
-                'credit_cost': 1,  # Default credit cost
-            })
-            
-            X = np.array([list(features.values())])
-            probability = self.conversion_model.predict_proba(X)[0][1]
+            lead_features = [
+                lead.verification_score,
+                self._get_budget_value(lead.budget_range),
+                self._get_urgency_score(lead.urgency),
+                self._get_intent_score(lead.hiring_intent),
+                len(lead.description),
+                1 if lead.additional_requirements else 0,
+            ]
+            assignment_features = [
+                now.hour,
+                now.weekday(),
+                1,  # Default credit cost
+            ]
+            
+            rows = []
+            for provider in providers:
+                profile = provider.provider_profile
+                rows.append(lead_features + [
+                    float(profile.average_rating),
+                    profile.years_experience or 0,
+                    profile.credit_balance,
+                    self._get_subscription_score(profile.subscription_tier),
+                    profile.response_time_hours,
+                ] + assignment_features)
             
-            return probability
+            X = np.array(rows)
+            return [float(p) for p in tree_inference.predict_proba(self.conversion_model, X)[:, 1]]
             
         except Exception as e:
             logger.error(f"Error predicting conversion: {str(e)}")
-            return 0.5
+            return [0.5] * len(providers)
     
     def _get_budget_value(self, budget_range):
         mapping = {
@@ -562,6 +565,15 @@ class LeadConversionMLService:
     
     def load_conversion_model(self):
         """Load trained conversion model"""
+        self._model_loaded = True
+        from . import model_store
+        stored = model_store.load('lead_conversion')
+        if stored is not None:
+            artifacts, manifest = stored
+            self.conversion_model = artifacts.get('model')
+            self.model_version = manifest['version']
+            return
+        # Flat file written before the model store
         try:
             model_path = os.path.join(self.model_path, 'conversion_model.pkl')
             if os.path.exists(model_path):
@@ -580,15 +592,15 @@ class DynamicPricingMLService:
     
     def calculate_dynamic_lead_price(self, lead, provider):
         """Calculate dynamic lead price with ML fallback"""
-        logger.info(f"🔍 DynamicPricingMLService: use_ml={self.use_ml}, lead_urgency={lead.urgency}, lead_budget={lead.budget_range}")
+        logger.debug(f"🔍 DynamicPricingMLService: use_ml={self.use_ml}, lead_urgency={lead.urgency}, lead_budget={lead.budget_range}")
         
         if not self.use_ml:
-            logger.info("🔍 Using simple pricing (ML disabled)")
+            logger.debug("🔍 Using simple pricing (ML disabled)")
             return self._calculate_simple_price(lead, provider)
         
         try:
             # ML pricing returns credits directly
-            logger.info("🔍 Attempting ML pricing...")
+            logger.debug("🔍 Attempting ML pricing...")
             credits = self.calculate_optimal_credit_cost(lead, provider)
             result = {
                 'price': credits,
@@ -596,7 +608,7 @@ class DynamicPricingMLService:
                 'base_price': 50,
                 'multiplier': credits
             }
-            logger.info(f"🔍 ML pricing result: {result}")
+            logger.debug(f"🔍 ML pricing result: {result}")
             return result
         except Exception as e:
             logger.warning(f"ML pricing failed, using fallback: {str(e)}")
@@ -608,83 +620,62 @@ class DynamicPricingMLService:
         base_credits = 4  # 4 credits = R200 (realistic base price)
         
         multiplier = 1.0
-        logger.info(f"🔍 Simple pricing: base_credits={base_credits}, initial_multiplier={multiplier}")
+        logger.debug(f"🔍 Simple pricing: base_credits={base_credits}, initial_multiplier={multiplier}")
         
         # Urgency multipliers (based on lead urgency field) - AGGRESSIVE PRICING
         if lead.urgency == 'urgent':
             multiplier = 3.0  # 12 credits = R600 (urgent premium)
-            logger.info(f"🔍 Urgent lead: multiplier={multiplier}")
+            logger.debug(f"🔍 Urgent lead: multiplier={multiplier}")
         elif lead.urgency == 'this_week':
             multiplier = 2.0  # 8 credits = R400 (this week premium)
-            logger.info(f"🔍 This week lead: multiplier={multiplier}")
+            logger.debug(f"🔍 This week lead: multiplier={multiplier}")
         elif lead.urgency == 'this_month':
             multiplier = 1.5  # 6 credits = R300 (this month premium)
-            logger.info(f"🔍 This month lead: multiplier={multiplier}")
+            logger.debug(f"🔍 This month lead: multiplier={multiplier}")
         else:  # flexible
             multiplier = 1.0  # 4 credits = R200 (base price)
-            logger.info(f"🔍 Flexible lead: multiplier={multiplier}")
+            logger.debug(f"🔍 Flexible lead: multiplier={multiplier}")
         
         # Quality multipliers (verification score) - HIGHER PREMIUMS
         if lead.verification_score > 80:
             multiplier += 1.0  # +1.0 credits = +R50 (high quality premium)
-            logger.info(f"🔍 High quality lead: +1.0, multiplier={multiplier}")
+            logger.debug(f"🔍 High quality lead: +1.0, multiplier={multiplier}")
         elif lead.verification_score > 60:
             multiplier += 0.5  # +0.5 credits = +R25 (medium quality premium)
-            logger.info(f"🔍 Medium quality lead: +0.5, multiplier={multiplier}")
+            logger.debug(f"🔍 Medium quality lead: +0.5, multiplier={multiplier}")
         
         # Budget multipliers (higher budget = MUCH higher credit cost) - AGGRESSIVE PRICING
         if hasattr(lead, 'budget_range'):
             if 'over_50000' in str(lead.budget_range):
                 multiplier += 3.0  # +3.0 credits = +R150 (high budget premium)
-                logger.info(f"🔍 High budget lead: +3.0, multiplier={multiplier}")
+                logger.debug(f"🔍 High budget lead: +3.0, multiplier={multiplier}")
             elif '15000_50000' in str(lead.budget_range):
                 multiplier += 2.0  # +2.0 credits = +R100 (medium-high budget premium)
-                logger.info(f"🔍 Medium-high budget lead: +2.0, multiplier={multiplier}")
+                logger.debug(f"🔍 Medium-high budget lead: +2.0, multiplier={multiplier}")
             elif '5000_15000' in str(lead.budget_range):
                 multiplier += 1.0  # +1.0 credits = +R50 (medium budget premium)
-                logger.info(f"🔍 Medium budget lead: +1.0, multiplier={multiplier}")
+                logger.debug(f"🔍 Medium budget lead: +1.0, multiplier={multiplier}")
         
         # High intent multiplier (ready to hire = MUCH more valuable) - AGGRESSIVE PRICING
         if hasattr(lead, 'hiring_intent'):
             if lead.hiring_intent == 'ready_to_hire':
                 multiplier += 2.0  # +2.0 credits = +R100 (ready to hire premium)
-                logger.info(f"🔍 Ready to hire: +2.0, multiplier={multiplier}")
+                logger.debug(f"🔍 Ready to hire: +2.0, multiplier={multiplier}")
             elif lead.hiring_intent == 'planning_to_hire':
                 multiplier += 1.0  # +1.0 credits = +R50 (planning premium)
-                logger.info(f"🔍 Planning to hire: +1.0, multiplier={multiplier}")
+                logger.debug(f"🔍 Planning to hire: +1.0, multiplier={multiplier}")
         
         # Service category multipliers (different services have different values)
         if hasattr(lead, 'service_category'):
-            service_multipliers = {
-                'cleaning': 1.0,      # Base multiplier
-                'electrical': 1.5,    # Electrical is more valuable
-                'plumbing': 1.3,      # Plumbing is valuable
-                'hvac': 1.4,          # HVAC is valuable
-                'carpentry': 1.2,     # Carpentry is moderately valuable
-                'painting': 1.1,      # Painting is slightly more valuable
-                'roofing': 1.6,       # Roofing is very valuable
-                'flooring': 1.3,      # Flooring is valuable
-                'landscaping': 1.1,   # Landscaping is slightly more valuable
-                'moving': 1.2,        # Moving is moderately valuable
-                'appliance-repair': 1.3,  # Appliance repair is valuable
-                'handyman': 1.1,      # Handyman is slightly more valuable
-                'pool-maintenance': 1.4,  # Pool maintenance is valuable
-                'security': 1.5,      # Security is valuable
-                'it-support': 1.3,    # IT support is valuable
-                'web-design': 1.2,    # Web design is moderately valuable
-                'marketing': 1.1,     # Marketing is slightly more valuable
-                'accounting': 1.2,    # Accounting is moderately valuable
-                'legal': 1.8,         # Legal is very valuable
-                'consulting': 1.4,    # Consulting is valuable
-                'other': 1.0          # Other services base multiplier
-            }
+            from .pricing_engine import SIMPLE_CATEGORY_MULTIPLIERS
+            service_multipliers = SIMPLE_CATEGORY_MULTIPLIERS
             service_multiplier = service_multipliers.get(lead.service_category.slug, 1.0)
             multiplier *= service_multiplier
-            logger.info(f"🔍 Service category {lead.service_category.slug}: ×{service_multiplier}, multiplier={multiplier}")
+            logger.debug(f"🔍 Service category {lead.service_category.slug}: ×{service_multiplier}, multiplier={multiplier}")
         
         # Cap the maximum price to be reasonable but PROFITABLE (max 20 credits = R1000)
         total_credits = min(int(base_credits * multiplier), 20)  # Max 20 credits = R1000
-        logger.info(f"🔍 Final calculation: {base_credits} × {multiplier:.1f} = {total_credits} credits")
+        logger.debug(f"🔍 Final calculation: {base_credits} × {multiplier:.1f} = {total_credits} credits")
         
         result = {
             'price': total_credits,
@@ -692,7 +683,7 @@ class DynamicPricingMLService:
             'base_price': 50,  # R50 per credit
             'multiplier': multiplier
         }
-        logger.info(f"🔍 Simple pricing result: {result}")
+        logger.debug(f"🔍 Simple pricing result: {result}")
         return result
 
     def calculate_optimal_credit_cost(self, lead, provider):
@@ -753,7 +744,7 @@ class DynamicPricingMLService:
             # Clamp to realistic range: 1-20 credits (R50-R1000) for high-value projects
             final_cost = max(1, min(20, int(round(base_cost))))
             
-            logger.info(f"💰 ML Pricing: base=2, final={final_cost} credits (urgency={lead.urgency}, quality={lead.verification_score}, budget={lead.budget_range}, service={lead.service_category.slug})")
+            logger.debug(f"💰 ML Pricing: base=2, final={final_cost} credits (urgency={lead.urgency}, quality={lead.verification_score}, budget={lead.budget_range}, service={lead.service_category.slug})")
             return final_cost
             
         except Exception as e:
@@ -799,57 +790,29 @@ class DynamicPricingMLService:
     
     def _get_service_multiplier(self, category_slug):
         """Get pricing multiplier based on service category - STARTUP-FRIENDLY"""
-        multipliers = {
-            'cleaning': 1.0,      # Cleaning: 1x (base)
-            'electrical': 1.3,    # Electrical: 1.3x (moderate premium)
-            'plumbing': 1.2,      # Plumbing: 1.2x (moderate premium)
-            'hvac': 1.3,          # HVAC: 1.3x (moderate premium)
-            'carpentry': 1.1,     # Carpentry: 1.1x (slight premium)
-            'painting': 1.0,      # Painting: 1x (base)
-            'roofing': 1.4,       # Roofing: 1.4x (moderate premium)
-            'flooring': 1.2,      # Flooring: 1.2x (moderate premium)
-            'landscaping': 1.0,   # Landscaping: 1x (base)
-            'moving': 1.1,        # Moving: 1.1x (slight premium)
-            'appliance-repair': 1.2,  # Appliance repair: 1.2x (moderate premium)
-            'handyman': 1.0,      # Handyman: 1x (base)
-            'pool-maintenance': 1.2,  # Pool maintenance: 1.2x (moderate premium)
-            'security': 1.3,      # Security: 1.3x (moderate premium)
-            'it-support': 1.2,    # IT support: 1.2x (moderate premium)
-            'web-design': 1.1,    # Web design: 1.1x (slight premium)
-            'marketing': 1.0,     # Marketing: 1x (base)
-            'accounting': 1.1,    # Accounting: 1.1x (slight premium)
-            'legal': 1.5,         # Legal: 1.5x (moderate premium)
-            'consulting': 1.2,    # Consulting: 1.2x (moderate premium)
-            'other': 1.0          # Other: 1x (base)
-        }
-        return multipliers.get(category_slug, 1.0)
+        from .pricing_engine import OPTIMAL_CATEGORY_MULTIPLIERS
+        return OPTIMAL_CATEGORY_MULTIPLIERS.get(category_slug, 1.0)
     
     def _get_market_demand(self, category_slug):
-        # Live demand: leads in last 30 days vs global average
+        # Demand: category share of leads in the last 30 days (MarketStats snapshot)
         try:
-            from django.utils import timezone
-            from datetime import timedelta
-            window = timezone.now() - timedelta(days=30)
-            total = Lead.objects.filter(created_at__gte=window).count() or 1
-            cat = ServiceCategory.objects.filter(slug=category_slug).first()
-            if not cat:
+            from .market_stats import market_stats
+            category_id = market_stats.category_id(category_slug)
+            if category_id is None:
                 return 0.5
-            cat_count = Lead.objects.filter(service_category=cat, created_at__gte=window).count()
-            ratio = cat_count / total
+            total = market_stats.get().leads_30d or 1
+            ratio = market_stats.get(category_id).leads_30d / total
             # Normalize to 0.3-0.9 range for stability
             return max(0.3, min(0.9, ratio * 3))
         except Exception:
             return 0.5
     
     def _get_competition_level(self, city):
-        # Live competition: active verified providers serving the city vs global average
+        # Competition: share of active providers serving the city (MarketStats snapshot)
         try:
-            from backend.users.models import ProviderProfile
-            total_providers = ProviderProfile.objects.filter(is_verified=True).count() or 1
-            city_providers = ProviderProfile.objects.filter(
-                is_verified=True,
-                service_cities__icontains=city
-            ).count()
+            from .market_stats import market_stats
+            total_providers = market_stats.get().active_providers or 1
+            city_providers = market_stats.get(None, city).active_providers
             ratio = city_providers / total_providers
             # Normalize to 0.2-0.8 range
             return max(0.2, min(0.8, ratio * 2))
@@ -905,82 +868,46 @@ class DynamicPricingMLService:
             return 'standard'
     
     def calculate_batch_pricing(self, leads, provider=None):
-        """Calculate pricing for multiple leads in batch - MUCH FASTER than individual calls"""
+        """
+        Price many leads in one vectorized pass (pricing_engine.py). Same credits as
+        calculate_dynamic_lead_price for each lead.
+        """
         try:
             if not leads:
                 return []
             
-            # Use fast fallback pricing for batch operations to improve performance
-            # VERY AFFORDABLE SOUTH AFRICAN PRICING
-            base_prices = {
-                'basic': 5,       # R5 for basic tier
-                'advanced': 4,    # R4 for advanced tier (discount)
-                'pro': 3,         # R3 for pro tier (discount)
-                'enterprise': 2,  # R2 for enterprise tier (discount)
-                None: 5           # R5 default
-            }
-            
-            provider_tier = None
-            if provider and hasattr(provider, 'provider_profile'):
-                provider_tier = provider.provider_profile.subscription_tier
-            
-            base_price = base_prices.get(provider_tier, 50)
-            
-            # Batch calculate common multipliers (much faster than individual calculations)
-            time_multiplier = self._calculate_time_multiplier()
-            
-            results = []
-            for lead in leads:
-                # Use simplified pricing for batch operations
-                # Only calculate essential multipliers to maintain performance
-                urgency_multiplier = self._calculate_urgency_multiplier(lead)
-                quality_multiplier = self._calculate_quality_multiplier(lead)
-                
-                # Simplified multiplier calculation
-                final_multiplier = urgency_multiplier * quality_multiplier * time_multiplier
-                final_multiplier = max(0.5, min(2.0, final_multiplier))  # Clamp to reasonable range
-                
-                # More realistic minimum price for SA market
-                final_price = max(8, min(35, int(base_price * final_multiplier)))  # R8-R35 range
-                
-                results.append({
-                    'price': final_price,
-                    'currency': 'ZAR',
-                    'reasoning': f'Batch pricing: urgency={urgency_multiplier:.1f}x, quality={quality_multiplier:.1f}x',
-                    'demand_multiplier': 1.0,
-                    'quality_multiplier': round(quality_multiplier, 2),
-                    'urgency_multiplier': round(urgency_multiplier, 2),
-                    'competition_multiplier': 1.0,
-                    'final_multiplier': round(final_multiplier, 2)
-                })
-            
-            return results
+            from .lead_pricing import tier_bucket
+            from .pricing_engine import price_leads
+            
+            bucket = tier_bucket(provider)
+            mode = 'ML pricing' if self.use_ml else 'Simple pricing'
+            credits = price_leads(leads, bucket, use_ml=self.use_ml)
+            return [
+                {
+                    'price': int(price),
+                    'reasoning': f"{mode}: {int(price)} credits based on lead characteristics",
+                    'base_price': 50,  # R50 per credit
+                }
+                for price in credits
+            ]
             
         except Exception as e:
             logger.error(f"Error in batch pricing calculation: {str(e)}")
-            # Return default pricing for all leads
-            return [{'price': 50, 'reasoning': 'Default pricing (batch error)'} for _ in leads]
+            # Fall back to per-lead pricing
+            return [self.calculate_dynamic_lead_price(lead, provider) for lead in leads]
     
     def _calculate_demand_multiplier(self, lead):
         """Calculate demand-based pricing multiplier"""
         try:
-            from django.utils import timezone
-            from datetime import timedelta
+            from .market_stats import market_stats
             
-            # Get recent leads in same category
-            last_7_days = timezone.now() - timedelta(days=7)
-            recent_leads = Lead.objects.filter(
-                service_category=lead.service_category,
-                created_at__gte=last_7_days
-            ).count()
+            # Recent (7 day) and 12 week lead counts for this category
+            stat = market_stats.get(lead.service_category_id)
+            recent_leads = stat.leads_7d
             
             # Get average leads per week for this category
             total_weeks = 12  # Look back 12 weeks
-            historical_start = timezone.now() - timedelta(weeks=total_weeks)
-            historical_leads = Lead.objects.filter(
-                service_category=lead.service_category,
-                created_at__gte=historical_start
-            ).count()
+            historical_leads = stat.leads_12w
             
             avg_weekly_leads = historical_leads / total_weeks if historical_leads > 0 else 1
             
@@ -1034,14 +961,10 @@ class DynamicPricingMLService:
     def _calculate_competition_multiplier(self, lead):
         """Calculate competition-based pricing multiplier"""
         try:
-            from backend.users.models import ProviderProfile
+            from .market_stats import market_stats
             
             # Count providers serving this location and category
-            matching_providers = ProviderProfile.objects.filter(
-                is_verified=True,
-                service_categories__icontains=lead.service_category.name,
-                service_cities__icontains=lead.location_city
-            ).count()
+            matching_providers = market_stats.get(lead.service_category_id, lead.location_city).active_providers
             
             # Adjust pricing based on competition level
             if matching_providers <= 2:
@@ -1181,36 +1104,14 @@ class GeographicalMLService:
         return c * r
     
     def get_province_from_city(self, city):
-        """Get South African province from city name"""
-        city_lower = city.lower()
-        
-        province_mapping = {
-            'western cape': ['cape town', 'george', 'knysna', 'mossel bay', 'oudtshoorn', 'stellenbosch', 'paarl', 'somerset west'],
-            'gauteng': ['johannesburg', 'pretoria', 'soweto', 'sandton', 'randburg', 'centurion', 'midrand', 'benoni', 'kempton park'],
-            'kwazulu-natal': ['durban', 'pietermaritzburg', 'newcastle', 'richards bay', 'empangeni', 'ballito', 'umhlanga'],
-            'eastern cape': ['port elizabeth', 'east london', 'grahamstown', 'gqeberha', 'nelson mandela bay'],
-            'free state': ['bloemfontein', 'welkom', 'bethlehem', 'kroonstad', 'sasolburg'],
-            'mpumalanga': ['nelspruit', 'witbank', 'secunda', 'standerton', 'mbombela'],
-            'limpopo': ['polokwane', 'tzaneen', 'modimolle', 'bela-bela', 'lephalale'],
-            'northern cape': ['kimberley', 'upington', 'springbok', 'de aar', 'kathu'],
-            'north west': ['mahikeng', 'klerksdorp', 'potchefstroom', 'rustenburg', 'mafikeng']
-        }
-        
-        for province, cities in province_mapping.items():
-            if city_lower in cities:
-                return province.title()
-        
-        return None
+        """Get South African province from city name (gazetteer lookup)"""
+        from .gazetteer import province_name
+        return province_name(city)
     
     def is_major_sa_city(self, city):
-        """Check if city is a major South African city"""
-        major_cities = [
-            'cape town', 'johannesburg', 'durban', 'pretoria', 'port elizabeth',
-            'bloemfontein', 'nelspruit', 'polokwane', 'kimberley', 'mahikeng',
-            'east london', 'george', 'knysna', 'mossel bay', 'oudtshoorn',
-            'soweto', 'sandton', 'randburg', 'centurion', 'midrand'
-        ]
-        return city.lower() in major_cities
+        """Check if city is a major South African city (gazetteer lookup)"""
+        from .gazetteer import is_major_city
+        return is_major_city(city)
     
     def train_geographical_model(self):
         """Train ML model for geographical matching"""
@@ -1285,9 +1186,13 @@ class GeographicalMLService:
             
             logger.info(f"Geographical model trained with accuracy: {accuracy:.3f}")
             
-            # Save model
-            model_path = os.path.join(self.model_path, f'geographical_model_{self.model_version}.joblib')
-            joblib.dump(self.geographical_model, model_path)
+            # Save model as a new promoted version (model_store.py)
+            from . import model_store
+            self.model_version = model_store.publish(
+                'geographical',
+                {'model': self.geographical_model},
+                metrics={'accuracy': float(accuracy), 'samples': len(y)},
+            )
             
             return True
             
@@ -1310,7 +1215,7 @@ class GeographicalMLService:
             X = np.array([list(features.values())])
             
             # Get prediction probability
-            prob = self.geographical_model.predict_proba(X)[0][1]
+            prob = tree_inference.predict_proba(self.geographical_model, X)[0][1]
             
             return {
                 'is_match': prob > 0.5,
@@ -1344,7 +1249,15 @@ class GeographicalMLService:
         }
     
     def load_geographical_model(self):
-        """Load the latest geographical model"""
+        """Load the promoted geographical model"""
+        from . import model_store
+        stored = model_store.load('geographical')
+        if stored is not None:
+            artifacts, manifest = stored
+            self.geographical_model = artifacts.get('model')
+            self.model_version = manifest['version']
+            return self.geographical_model is not None
+        # Timestamped files written before the model store
         try:
             import glob
             model_files = glob.glob(os.path.join(self.model_path, 'geographical_model_*.joblib'))
@@ -1387,113 +1300,139 @@ class LeadAccessControlMLService:
     
     def can_access_lead(self, provider, lead):
         """Check if provider can access a specific lead using ML-based analysis"""
+        return self.can_access_leads([provider], lead)[provider.id]
+    
+    def can_access_leads(self, providers, lead):
+        """
+        can_access_lead for many ProviderProfiles at once: one LeadAccess query for
+        the whole set and the lead-level worth features computed once.
+        Returns {profile_id: access result}.
+        """
         try:
             from .models import LeadAccess
             
-            # Check if lead is already unlocked for this provider
-            existing_access = LeadAccess.objects.filter(
-                lead=lead, 
-                provider=provider.user, 
+            # Leads already unlocked by any of these providers
+            unlocked = set(LeadAccess.objects.filter(
+                lead=lead,
+                provider_id__in=[provider.user_id for provider in providers],
                 is_active=True
-            ).first()
-            
-            if existing_access:
-                return {
+            ).values_list('provider_id', flat=True))
+            
+            lead_worth = self._lead_worth(lead) if providers else None
+            results = {}
+            for provider in providers:
+                if provider.user_id in unlocked:
+                    results[provider.id] = {
+                        "can_access": True,
+                        "reason": "Lead already unlocked for you",
+                        "remaining_leads": 0,
+                        "additional_cost": 0,
+                        "ml_confidence": 1.0
+                    }
+                    continue
+                
+                if provider.verification_status in ("rejected", "suspended"):
+                    results[provider.id] = {
+                        "can_access": False,
+                        "reason": "Provider account is not eligible for leads",
+                        "remaining_leads": 0,
+                        "additional_cost": 0,
+                        "ml_confidence": 1.0
+                    }
+                    continue
+                
+                # NEW SYSTEM: All verified providers can SEE leads, credits only needed for UNLOCK
+                # Providers can view lead previews for free, pay 1 credit to unlock contact details
+                
+                # Use ML to predict if this lead is worth showing to this provider
+                ml_confidence = self._predict_lead_worth(provider, lead_worth)
+                
+                results[provider.id] = {
                     "can_access": True,
-                    "reason": "Lead already unlocked for you",
-                    "remaining_leads": 0,
-                    "additional_cost": 0,
-                    "ml_confidence": 1.0
+                    "reason": "Provider can view lead preview",
+                    "remaining_leads": 999,  # Unlimited viewing
+                    "additional_cost": 1,  # 1 credit to unlock contact details
+                    "ml_confidence": ml_confidence
                 }
+            logger.info(f"Access checked for {len(providers)} provider(s): lead previews are free, unlock costs 1 credit")
+            return results
             
-            if provider.verification_status in ("rejected", "suspended"):
-                return {
+        except Exception as e:
+            logger.error(f"Error checking lead access: {str(e)}")
+            return {
+                provider.id: {
                     "can_access": False,
-                    "reason": "Provider account is not eligible for leads",
+                    "reason": "System error",
                     "remaining_leads": 0,
                     "additional_cost": 0,
-                    "ml_confidence": 1.0
+                    "ml_confidence": 0.0
                 }
-            
-            # NEW SYSTEM: No subscription requirement - only verification needed
-            # Removed subscription active check as we no longer use monthly subscriptions
-            
-            # Get subscription tier limit from provider model
-            tier_limit = provider.get_monthly_lead_limit()
-            
-            # Enterprise tier is capped at 50 leads (same as Pro)
-            # No special unlimited logic - use standard monthly limit check
-            
-            # NEW SYSTEM: All verified providers can SEE leads, credits only needed for UNLOCK
-            # Providers can view lead previews for free, pay 1 credit to unlock contact details
-            
-            # Use ML to predict if this lead is worth showing to this provider
-            ml_confidence = self._predict_lead_worth(lead, provider)
-            
-            logger.info(f"Access granted: provider can view lead preview (unlock costs 1 credit)")
-            return {
-                "can_access": True,
-                "reason": "Provider can view lead preview",
-                "remaining_leads": 999,  # Unlimited viewing
-                "additional_cost": 1,  # 1 credit to unlock contact details
-                "ml_confidence": ml_confidence
+                for provider in providers
             }
-            
+    
+    def _lead_worth(self, lead):
+        """Lead-only part of the lead worth score (same for every provider); None on error"""
+        try:
+            return self._lead_worth_score(lead)
         except Exception as e:
-            logger.error(f"Error checking lead access: {str(e)}")
-            return {
-                "can_access": False,
-                "reason": "System error",
-                "remaining_leads": 0,
-                "additional_cost": 0,
-                "ml_confidence": 0.0
-            }
+            logger.error(f"Error predicting lead worth: {str(e)}")
+            return None
     
-    def _predict_lead_worth(self, lead, provider):
+    def _lead_worth_score(self, lead):
+        competition_level = self._get_competition_level(lead.location_city)
+        market_demand = self._get_market_demand(lead.service_category.slug)
+        lead_age_hours = (datetime.now() - lead.created_at.replace(tzinfo=None)).total_seconds() / 3600
+        
+        score = 0.0
+        
+        # Lead quality boost
+        if lead.verification_score > 80:
+            score += 0.2
+        elif lead.verification_score > 60:
+            score += 0.1
+        
+        # Intent boost
+        if lead.hiring_intent == "ready_to_hire":
+            score += 0.2
+        elif lead.hiring_intent == "planning_to_hire":
+            score += 0.1
+        
+        # Urgency boost
+        if lead.urgency == "urgent":
+            score += 0.15
+        elif lead.urgency == "this_week":
+            score += 0.1
+        
+        # Budget boost
+        if lead.budget_range in ["15000_50000", "over_50000"]:
+            score += 0.15
+        elif lead.budget_range == "5000_15000":
+            score += 0.1
+        
+        # Competition boost (less competition = higher worth)
+        if competition_level < 0.5:
+            score += 0.1
+        
+        # Market demand boost
+        if market_demand > 0.7:
+            score += 0.1
+        
+        # Time decay (older leads less valuable)
+        if lead_age_hours > 24:
+            score -= 0.1
+        if lead_age_hours > 72:
+            score -= 0.2
+        
+        return score
+    
+    def _predict_lead_worth(self, provider, lead_worth):
         """Use ML to predict if a lead is worth using monthly allowance or credits"""
         try:
-            # Extract features for ML prediction
-            features = {
-                "lead_quality": lead.verification_score,
-                "budget_value": self._get_budget_value(lead.budget_range),
-                "urgency": self._get_urgency_score(lead.urgency),
-                "intent": self._get_intent_score(lead.hiring_intent),
-                "provider_rating": float(provider.average_rating),
-                "provider_credits": provider.credit_balance,
-                "subscription_tier": self._get_subscription_score(provider.subscription_tier),
-                "hour_of_day": datetime.now().hour,
-                "day_of_week": datetime.now().weekday(),
-                "lead_age_hours": (datetime.now() - lead.created_at.replace(tzinfo=None)).total_seconds() / 3600,
-                "competition_level": self._get_competition_level(lead.location_city),
-                "market_demand": self._get_market_demand(lead.service_category.slug)
-            }
+            if lead_worth is None:
+                return 0.5
             
             # Simple ML-based scoring (can be enhanced with trained models)
-            score = 0.5  # Base score
-            
-            # Lead quality boost
-            if lead.verification_score > 80:
-                score += 0.2
-            elif lead.verification_score > 60:
-                score += 0.1
-            
-            # Intent boost
-            if lead.hiring_intent == "ready_to_hire":
-                score += 0.2
-            elif lead.hiring_intent == "planning_to_hire":
-                score += 0.1
-            
-            # Urgency boost
-            if lead.urgency == "urgent":
-                score += 0.15
-            elif lead.urgency == "this_week":
-                score += 0.1
-            
-            # Budget boost
-            if lead.budget_range in ["15000_50000", "over_50000"]:
-                score += 0.15
-            elif lead.budget_range == "5000_15000":
-                score += 0.1
+            score = 0.5 + lead_worth  # Base score plus lead factors
             
             # Provider tier boost
             if provider.subscription_tier == "enterprise":
@@ -1501,20 +1440,6 @@ class LeadAccessControlMLService:
             elif provider.subscription_tier == "pro":
                 score += 0.05
             
-            # Competition boost (less competition = higher worth)
-            if features["competition_level"] < 0.5:
-                score += 0.1
-            
-            # Market demand boost
-            if features["market_demand"] > 0.7:
-                score += 0.1
-            
-            # Time decay (older leads less valuable)
-            if features["lead_age_hours"] > 24:
-                score -= 0.1
-            if features["lead_age_hours"] > 72:
-                score -= 0.2
-            
             return max(0.0, min(1.0, score))
             
         except Exception as e:
@@ -1775,33 +1700,21 @@ class LeadAccessControlMLService:
     
     def _get_market_demand(self, category_slug):
         try:
-            from django.utils import timezone
-            from datetime import timedelta
-            window = timezone.now() - timedelta(days=30)
-            total = Lead.objects.filter(created_at__gte=window).count() or 1
-            cat = ServiceCategory.objects.filter(slug=category_slug).first()
-            if not cat:
+            from .market_stats import market_stats
+            category_id = market_stats.category_id(category_slug)
+            if category_id is None:
                 return 0.5
-            cat_count = Lead.objects.filter(service_category=cat, created_at__gte=window).count()
-            ratio = cat_count / total
+            total = market_stats.get().leads_30d or 1
+            ratio = market_stats.get(category_id).leads_30d / total
             return max(0.3, min(0.9, ratio * 3))
         except Exception:
             return 0.5
     
     def _get_competition_level(self, city):
         try:
-            from backend.users.models import ProviderProfile
-            qs = ProviderProfile.objects.filter(
-                verification_status="verified",
-                is_subscription_active=True
-            )
-            total = qs.count() or 1
-            city_lower = (city or "").lower()
-            in_city = 0
-            for p in qs.only("service_areas"):
-                areas = [a.lower() for a in (p.service_areas or [])]
-                if city_lower and city_lower in areas:
-                    in_city += 1
+            from .market_stats import market_stats
+            total = market_stats.get().active_providers or 1
+            in_city = market_stats.get(None, city).active_providers if city else 0
             ratio = in_city / total
             return max(0.3, min(0.9, ratio * 3))
         except Exception:
@@ -44,6 +44,67 @@ def ml_readiness_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def routing_traces_view(request):
+    """
+    Per-lead routing traces (span timings, DB queries, provider counts) with
+    flow monitor and routing outbox metrics.
+    
+    Query params: limit (default 50), lead_id, source=memory|db
+    """
+    try:
+        from .flow_monitor import flow_monitor
+        from .models import RoutingTrace
+        from .services.routing_pipeline import get_outbox_metrics
+        from .services.routing_trace import get_recent_traces, get_trace_summary
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 500))
+        except ValueError:
+            limit = 50
+        lead_id = request.query_params.get('lead_id')
+        
+        if request.query_params.get('source') == 'db':
+            persisted = RoutingTrace.objects.all()
+            if lead_id:
+                persisted = persisted.filter(lead_id=lead_id)
+            traces = [
+                {
+                    'lead_id': str(t.lead_id),
+                    'root': t.root,
+                    'started_at': t.created_at.isoformat(),
+                    'total_ms': t.total_ms,
+                    'queries': t.queries,
+                    'counts': t.counts,
+                    'spans': t.spans,
+                    'error': t.error,
+                }
+                for t in persisted[:limit]
+            ]
+        else:
+            traces = get_recent_traces(limit=limit, lead_id=lead_id)
+        
+        return Response({
+            'success': True,
+            'data': {
+                'summary': get_trace_summary(),
+                'traces': traces,
+                'flow_monitor': flow_monitor.get_metrics(),
+                'outbox': get_outbox_metrics(),
+            },
+            'timestamp': timezone.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting routing traces: {str(e)}")
+        return Response({
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def hybrid_scoring_view(request):
@@ -150,92 +211,41 @@ def ab_test_analytics_view(request):
 def ml_metrics_view(request):
     """Get ML model performance metrics"""
     try:
-        # Calculate lead quality average
-        quality_service = LeadQualityMLService()
-        recent_leads = Lead.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        )
+        # 30-day totals from the daily rollup (ml_metrics.py): constant cost per request
+        from . import model_store
+        from .lead_pricing import DEFAULT_CREDITS
+        from .ml_metrics import metrics_window
+        window = metrics_window()
+        total_leads = window['leads']
+        total_assignments = window['assignments']
         
-        lead_quality_avg = 0
-        if recent_leads.exists():
-            quality_scores = []
-            for lead in recent_leads:
-                lead_data = {
-                    'title': lead.title,
-                    'description': lead.description,
-                    'location_address': lead.location_address,
-                    'location_suburb': lead.location_suburb,
-                    'location_city': lead.location_city,
-                    'budget_range': lead.budget_range,
-                    'urgency': lead.urgency,
-                    'hiring_intent': lead.hiring_intent,
-                    'hiring_timeline': lead.hiring_timeline,
-                    'additional_requirements': lead.additional_requirements,
-                    'research_purpose': lead.research_purpose,
-                    'contact_phone': getattr(lead.client, 'phone', ''),
-                    'contact_email': getattr(lead.client, 'email', ''),
-                }
-                score = quality_service.predict_lead_quality(lead_data)
-                quality_scores.append(score)
-            
-            lead_quality_avg = sum(quality_scores) / len(quality_scores) if quality_scores else 0
+        lead_quality_avg = window['quality_score_sum'] / total_leads if total_leads else 0
         
         # Calculate conversion rate
-        total_assignments = LeadAssignment.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count()
-        
-        successful_conversions = LeadAssignment.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30),
-            status='won'
-        ).count()
-        
-        conversion_rate = successful_conversions / total_assignments if total_assignments > 0 else 0
+        conversion_rate = window['won_assignments'] / total_assignments if total_assignments > 0 else 0
         
         # Calculate fraud detection rate (simplified)
-        total_leads = Lead.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count()
-        
-        rejected_leads = Lead.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30),
-            status='cancelled'
-        ).count()
-        
-        fraud_detection_rate = rejected_leads / total_leads if total_leads > 0 else 0
+        fraud_detection_rate = window['cancelled_leads'] / total_leads if total_leads > 0 else 0
         
         # Calculate provider matching accuracy (simplified)
-        total_assignments = LeadAssignment.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count()
+        matching_accuracy = window['contacted_assignments'] / total_assignments if total_assignments > 0 else 0
         
-        contacted_assignments = LeadAssignment.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30),
-            status__in=['contacted', 'won', 'lost']
-        ).count()
-        
-        matching_accuracy = contacted_assignments / total_assignments if total_assignments > 0 else 0
-        
-        # Dynamic pricing impact (simplified)
-        dynamic_pricing_impact = 12.5  # Placeholder - would calculate from actual data
+        # Dynamic pricing impact: % the default-tier price of recent leads sits above
+        # the flat base price (priced per day in one vectorized pass, pricing_engine.py)
+        dynamic_pricing_impact = (
+            round((window['price_sum'] / total_leads / DEFAULT_CREDITS - 1) * 100, 1) if total_leads else 0
+        )
         
-        # Model performance (placeholder - would be calculated from actual model evaluation)
         # Model performance info
-        import os
-        from django.conf import settings
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        versions = {
-            'quality_model_versions': [f for f in os.listdir(model_dir) if f.startswith('lead_quality_model_')],
-            'conversion_model_versions': [f for f in os.listdir(model_dir) if f.startswith('conversion_model_')],
-        } if os.path.exists(model_dir) else {'quality_model_versions': [], 'conversion_model_versions': []}
+        quality_version = model_store.current_version('lead_quality')
+        quality_manifest = model_store.read_manifest('lead_quality', quality_version) if quality_version else None
 
         model_performance = {
-            'quality_model_version': max(versions['quality_model_versions'], default='n/a'),
-            'conversion_model_version': max(versions['conversion_model_versions'], default='n/a'),
-            'quality_training_sample_size': recent_leads.count(),
-            'conversion_training_sample_size': LeadAssignment.objects.filter(
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).count(),
+            'quality_model_version': quality_version or 'n/a',
+            'conversion_model_version': model_store.current_version('lead_conversion') or 'n/a',
+            'quality_model_metrics': quality_manifest['metrics'] if quality_manifest else {},
+            'quality_training_sample_size': total_leads,
+            'conversion_training_sample_size': total_assignments,
         }
         
         # Recent predictions (placeholder)
@@ -273,7 +283,8 @@ def ml_metrics_view(request):
             'provider_matching_accuracy': matching_accuracy,
             'dynamic_pricing_impact': dynamic_pricing_impact,
             'model_performance': model_performance,
-            'recent_predictions': recent_predictions
+            'recent_predictions': recent_predictions,
+            'metrics_refreshed_at': window['refreshed_at'].isoformat() if window['refreshed_at'] else None,
         }
         
         return Response(metrics)
@@ -613,10 +624,11 @@ def lead_preview_view(request, lead_id):
         ml_service = LeadAccessControlMLService()
         access_result = ml_service.can_access_lead(provider_profile, lead)
         
-        # Get dynamic pricing
-        from .ml_services import DynamicPricingMLService
-        pricing_service = DynamicPricingMLService()
-        dynamic_pricing = pricing_service.calculate_dynamic_lead_price(lead, request.user)
+        # Stored lead price: the same credits the unlock charges (see lead_pricing.py)
+        from .lead_pricing import DEFAULT_BUCKET, lead_credits, tier_bucket
+        from .ml_registry import ml_registry
+        bucket = tier_bucket(request.user)
+        credits = lead_credits(lead, bucket=bucket)
         
         # Calculate ML compatibility score
         from backend.leads.services import LeadAssignmentService
@@ -624,23 +636,7 @@ def lead_preview_view(request, lead_id):
         compatibility_score = assignment_service.calculate_compatibility_score(lead, request.user)
         
         # Get lead quality prediction
-        quality_ml = LeadQualityMLService()
-        lead_data = {
-            'title': lead.title,
-            'description': lead.description,
-            'location_address': lead.location_address,
-            'location_suburb': lead.location_suburb,
-            'location_city': lead.location_city,
-            'budget_range': lead.budget_range,
-            'urgency': lead.urgency,
-            'hiring_intent': getattr(lead, 'hiring_intent', 'researching'),
-            'hiring_timeline': getattr(lead, 'hiring_timeline', 'flexible'),
-            'additional_requirements': getattr(lead, 'additional_requirements', ''),
-            'research_purpose': getattr(lead, 'research_purpose', ''),
-            'contact_phone': getattr(lead.client, 'phone', ''),
-            'contact_email': getattr(lead.client, 'email', ''),
-        }
-        quality_score = quality_ml.predict_lead_quality(lead_data)
+        quality_score = ml_registry.get('quality').predict_for_lead(lead)
         
         # Calculate estimated value
         budget_values = {
@@ -701,18 +697,10 @@ def lead_preview_view(request, lead_id):
             'access_reason': access_result['reason'],
             'ml_confidence': access_result['ml_confidence'],
             
-            # Dynamic Pricing Information
-            'dynamic_price': dynamic_pricing['price'],
-            'base_price': dynamic_pricing.get('base_price', dynamic_pricing['price']),
-            'pricing_reasoning': dynamic_pricing['reasoning'],
-            'price_multipliers': {
-                'demand': dynamic_pricing['demand_multiplier'],
-                'quality': dynamic_pricing['quality_multiplier'], 
-                'urgency': dynamic_pricing['urgency_multiplier'],
-                'competition': dynamic_pricing['competition_multiplier'],
-                'time': dynamic_pricing.get('time_multiplier', 1.0),
-                'final': dynamic_pricing['final_multiplier']
-            },
+            # Pricing Information
+            'dynamic_price': credits,
+            'base_price': lead_credits(lead, bucket=DEFAULT_BUCKET),
+            'pricing_reasoning': f"Stored lead price ({bucket} tier)",
             
             # Competitive Intelligence
             'estimated_competition': min(3, max(1, round(compatibility_score * 3))),  # 1-3 competitors
@@ -1360,8 +1348,8 @@ def validate_purchase_rules(user, lead):
     
     # Rule 2: ML-based location validation
     if hasattr(user, 'provider_profile'):
-        from .ml_services import GeographicalMLService
-        geo_ml = GeographicalMLService()
+        from .ml_registry import ml_registry
+        geo_ml = ml_registry.get('geographical')
         
         # Extract geographical features
         geo_features = geo_ml.extract_geographical_features(lead, user)
@@ -1442,66 +1430,7 @@ def validate_purchase_rules(user, lead):
 
 def calculate_lead_credit_cost(lead, provider=None):
     """
-    Calculate credit cost using ML-based dynamic pricing
+    Credit cost to unlock a lead: the stored lead price (see lead_pricing.py)
     """
-    try:
-        from .ml_services import DynamicPricingMLService
-        pricing_service = DynamicPricingMLService()
-        
-        if provider:
-            # Use ML-based dynamic pricing
-            pricing_result = pricing_service.calculate_dynamic_lead_price(lead, provider)
-            final_cost = pricing_result['price']
-            logger.info(f"💰 ML Credit cost calculation: {pricing_result['reasoning']}")
-        else:
-            # Fallback to simple pricing - REVENUE OPTIMIZED
-            base_cost = 4  # Base cost: 4 credits (R200) - REALISTIC BASE PRICE
-            
-            # Adjust based on budget range - AGGRESSIVE PRICING
-            budget_multipliers = {
-                'under_1000': 1.0,
-                '1000_5000': 1.5,
-                '5000_15000': 2.0,
-                '15000_50000': 3.0,
-                'over_50000': 4.0
-            }
-            
-            multiplier = budget_multipliers.get(lead.budget_range, 1.0)
-            
-            # Adjust based on urgency - AGGRESSIVE PRICING
-            if hasattr(lead, 'urgency'):
-                if lead.urgency == 'urgent':
-                    multiplier *= 3.0  # Urgent premium
-                elif lead.urgency == 'this_week':
-                    multiplier *= 2.0  # This week premium
-                elif lead.urgency == 'this_month':
-                    multiplier *= 1.5  # This month premium
-            
-            # Adjust based on hiring intent - AGGRESSIVE PRICING
-            if hasattr(lead, 'hiring_intent'):
-                if lead.hiring_intent == 'ready_to_hire':
-                    multiplier += 2.0  # Ready to hire premium
-                elif lead.hiring_intent == 'planning_to_hire':
-                    multiplier += 1.0  # Planning premium
-            
-            final_cost = min(int(base_cost * multiplier), 20)  # Max 20 credits = R1000
-            logger.info(f"💰 Fallback credit cost calculation: base={base_cost}, multiplier={multiplier}, final={final_cost}")
-        
-        return final_cost
-        
-    except Exception as e:
-        logger.error(f"💰 ML pricing failed, using fallback: {str(e)}")
-        # Fallback to simple pricing
-        base_cost = 1
-        multiplier = 1.0
-        
-        if hasattr(lead, 'urgency'):
-            if lead.urgency == 'this_week':
-                multiplier *= 1.3
-            elif lead.urgency == 'this_month':
-                multiplier *= 1.1
-        
-        final_cost = int(base_cost * multiplier)
-        logger.info(f"💰 Error fallback credit cost: base={base_cost}, multiplier={multiplier}, final={final_cost}")
-        return final_cost
-
+    from .lead_pricing import lead_credits
+    return lead_credits(lead, provider)
@@ -0,0 +1,244 @@
+"""
+Versioned store for trained ML model artifacts.
+
+Each model (a named group of artifacts trained together, e.g. the quality
+model with its scaler and TF-IDF vectorizer) lives under ml_models/<name>/:
+
+    ml_models/<name>/CURRENT                  promoted version (one line)
+    ml_models/<name>/<version>/manifest.json  version, created_at, metrics, files + sha256
+    ml_models/<name>/<version>/<artifact>.joblib
+
+publish() writes a new version into a hidden temp directory and renames it
+into place, so a version directory is either complete or absent;
+promote_version() then swaps CURRENT with os.replace (atomic), and versions
+beyond ML_MODEL_RETENTION are pruned (never the promoted one). Rolling back is
+promote_version(name, <older version>), or `manage.py ml_models promote`.
+
+load() memory-maps the NumPy arrays inside each artifact
+(joblib.load(mmap_mode='r')): workers that load the same version share those
+pages through the OS page cache instead of each holding a private copy.
+Artifacts are written uncompressed because compressed joblib files cannot be
+memory-mapped. scikit-learn copies tree nodes into buffers of its own when a
+forest is unpickled, so each tree ensemble is also stored compiled
+(tree_inference.py, '<artifact>.compiled'): plain node arrays that are mapped
+like the rest and serve predictions. The estimators themselves are shared only
+by loading them before the server forks (ML_PRELOAD_SERVICES with gunicorn
+--preload, see wsgi.py).
+
+The ML registry (ml_registry.py) fingerprints CURRENT, so promoting a version
+makes every process rebuild its service on its next check.
+
+Design principles:
+- Readers never see a half-written version: rename, then atomic pointer swap
+- load() returns None on a missing or corrupt version; callers fall back
+- A checksum mismatch is never loaded
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+from django.conf import settings
+
+from . import tree_inference
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+ARTIFACT_SUFFIX = '.joblib'
+COMPILED_SUFFIX = '.compiled'
+
+
+def models_root():
+    return os.path.join(settings.BASE_DIR, 'ml_models')
+
+
+def model_dir(name):
+    return os.path.join(models_root(), name)
+
+
+def pointer_path(name):
+    """Path of the CURRENT pointer (fingerprinted by ml_registry)."""
+    return os.path.join(model_dir(name), POINTER_FILE)
+
+
+def _retention():
+    return max(1, getattr(settings, 'ML_MODEL_RETENTION', 5))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _new_version(name):
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    candidate, n = version, 1
+    while os.path.exists(os.path.join(model_dir(name), candidate)):
+        n += 1
+        candidate = f'{version}-{n}'
+    return candidate
+
+
+def current_version(name):
+    """Promoted version of a model, or None."""
+    try:
+        with open(pointer_path(name)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def read_manifest(name, version):
+    try:
+        with open(os.path.join(model_dir(name), version, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def versions(name):
+    """Manifests of every stored version of a model, newest first."""
+    try:
+        entries = os.listdir(model_dir(name))
+    except OSError:
+        return []
+    manifests = [read_manifest(name, entry) for entry in entries if not entry.startswith('.')]
+    manifests = [m for m in manifests if m]
+    return sorted(manifests, key=lambda m: m['created_at'], reverse=True)
+
+
+def model_names():
+    """Models with at least one stored version."""
+    try:
+        entries = sorted(os.listdir(models_root()))
+    except OSError:
+        return []
+    return [entry for entry in entries if os.path.isdir(model_dir(entry)) and versions(entry)]
+
+
+def publish(name, artifacts, metrics=None, promote=True):
+    """
+    Store {artifact name: object} as a new version of a model and (by default)
+    promote it. Returns the version. Raises on write errors, like the joblib.dump
+    calls it replaces; nothing half-written is left behind.
+    """
+    import joblib
+
+    os.makedirs(model_dir(name), exist_ok=True)
+    version = _new_version(name)
+    staging = os.path.join(model_dir(name), f'.{version}.tmp')
+    os.makedirs(staging)
+    try:
+        files = {}
+        for artifact, obj in artifacts.items():
+            if obj is None:
+                continue
+            filename = f'{artifact}{ARTIFACT_SUFFIX}'
+            path = os.path.join(staging, filename)
+            joblib.dump(obj, path)
+            files[artifact] = {'file': filename, 'sha256': _sha256(path), 'size': os.path.getsize(path)}
+            compiled = tree_inference.compile_model(obj)
+            if compiled is not None:
+                compiled_name = f'{artifact}{COMPILED_SUFFIX}'
+                path = os.path.join(staging, f'{compiled_name}{ARTIFACT_SUFFIX}')
+                joblib.dump(compiled, path)
+                files[compiled_name] = {
+                    'file': os.path.basename(path), 'sha256': _sha256(path), 'size': os.path.getsize(path),
+                }
+        manifest = {
+            'name': name,
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'metrics': metrics or {},
+            'files': files,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.rename(staging, os.path.join(model_dir(name), version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    logger.info(f"[ModelStore] Published {name} {version} ({len(files)} artifact(s), metrics={metrics or {}})")
+    if promote:
+        promote_version(name, version)
+        prune(name)
+    return version
+
+
+def promote_version(name, version):
+    """Atomically point CURRENT at a stored version. Returns False if it is missing or corrupt."""
+    manifest = read_manifest(name, version)
+    if manifest is None or not _verify(name, manifest):
+        logger.error(f"[ModelStore] Refusing to promote {name} {version}: missing or corrupt")
+        return False
+    temp = f'{pointer_path(name)}.{os.getpid()}.tmp'
+    with open(temp, 'w') as f:
+        f.write(version + '\n')
+    os.replace(temp, pointer_path(name))
+    logger.info(f"[ModelStore] Promoted {name} {version}")
+    return True
+
+
+def prune(name, keep=None):
+    """Delete all but the newest `keep` versions (the promoted one is always kept). Returns deleted versions."""
+    keep = keep or _retention()
+    current = current_version(name)
+    stale = [m['version'] for m in versions(name)[keep:] if m['version'] != current]
+    for version in stale:
+        shutil.rmtree(os.path.join(model_dir(name), version), ignore_errors=True)
+    if stale:
+        logger.info(f"[ModelStore] Pruned {len(stale)} old version(s) of {name}")
+    return stale
+
+
+def _verify(name, manifest):
+    base = os.path.join(model_dir(name), manifest['version'])
+    for artifact, entry in manifest['files'].items():
+        try:
+            if _sha256(os.path.join(base, entry['file'])) != entry['sha256']:
+                logger.error(f"[ModelStore] Checksum mismatch for {name} {manifest['version']} {artifact}")
+                return False
+        except OSError as e:
+            logger.error(f"[ModelStore] Missing artifact {artifact} of {name} {manifest['version']}: {e}")
+            return False
+    return True
+
+
+def load(name, version=None):
+    """
+    Artifacts of a model version (default: the promoted one) as
+    ({artifact name: object}, manifest), NumPy arrays memory-mapped read-only.
+    Stored compiled ensembles are registered with tree_inference, not returned.
+    None when there is no such version or it fails its checksum. Never raises.
+    """
+    import joblib
+
+    version = version or current_version(name)
+    if not version:
+        return None
+    try:
+        manifest = read_manifest(name, version)
+        if manifest is None or not _verify(name, manifest):
+            return None
+        base = os.path.join(model_dir(name), version)
+        artifacts = {
+            artifact: joblib.load(os.path.join(base, entry['file']), mmap_mode='r')
+            for artifact, entry in manifest['files'].items()
+        }
+        for artifact in [a for a in artifacts if a.endswith(COMPILED_SUFFIX)]:
+            compiled = artifacts.pop(artifact)
+            model = artifacts.get(artifact[:-len(COMPILED_SUFFIX)])
+            if model is not None:
+                tree_inference.register(model, compiled)
+    except Exception as e:
+        logger.error(f"[ModelStore] Failed to load {name} {version}: {e}")
+        return None
+    logger.info(f"[ModelStore] Loaded {name} {version}")
+    return artifacts, manifest
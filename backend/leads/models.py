@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 from decimal import Decimal
@@ -109,6 +110,13 @@ class Lead(models.Model):
     location_address = models.TextField()
     location_suburb = models.CharField(max_length=100)
     location_city = models.CharField(max_length=100, default='Cape Town')
+    location_gid = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text='Most specific gazetteer id for location_suburb/location_city (see leads/gazetteer.py); set on save.',
+    )
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     
@@ -204,6 +212,12 @@ class Lead(models.Model):
     max_providers = models.IntegerField(default=3, help_text="Maximum number of providers who can claim this lead")
     is_available = models.BooleanField(default=True, help_text="Whether this lead is still available for claiming")
     claimed_at = models.DateTimeField(null=True, blank=True, help_text="When the lead was fully claimed (all slots filled)")
+    is_test = models.BooleanField(
+        default=False,
+        db_index=True,
+        editable=False,
+        help_text="Set on save from test_lead_utils.is_test_lead(); test leads are hidden from providers",
+    )
     
     # Dynamic Pricing
     credit_cost = models.DecimalField(
@@ -213,6 +227,23 @@ class Lead(models.Model):
         blank=True,
         help_text="Credit cost for this lead (R50 base + ML multipliers)"
     )
+    price_map = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Unlock price in credits per tier discount bucket (see lead_pricing.py)",
+    )
+    pricing_version = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="lead_pricing.PRICING_VERSION the price map was computed with",
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Weighted title / category / location / description vector, kept by a trigger on PostgreSQL (see lead_search.py)",
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -236,16 +267,60 @@ class Lead(models.Model):
             models.Index(fields=['client', 'created_at']),
             models.Index(fields=['expires_at']),
             models.Index(fields=['is_available', 'status']),
+            # Live marketplace: every provider feed filters on exactly this predicate
+            models.Index(
+                fields=['service_category', '-verification_score', '-created_at'],
+                name='leads_lead_market_idx',
+                condition=models.Q(is_test=False, is_available=True, status__in=['verified', 'assigned']),
+            ),
         ]
     
     def __str__(self):
         return f"{self.title} - {self.location_suburb} ({self.status})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Loaded pricing inputs: save() only reprices when one of them changed
+        from .lead_pricing import pricing_inputs
+        instance._loaded_pricing_inputs = pricing_inputs(instance)
+        return instance
+    
     def save(self, *args, **kwargs):
-        """Set expiry date if not set"""
+        """Set expiry date if not set, resolve the gazetteer location id, flag test leads and store prices"""
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(days=30)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'location_suburb', 'location_city'} & set(update_fields):
+            from .gazetteer import resolve_location
+            self.location_gid = resolve_location(
+                (self.location_suburb or '').strip().lower(),
+                (self.location_city or '').strip().lower(),
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'location_gid'}
+        from .test_lead_utils import TEST_LEAD_FIELDS, is_test_lead
+        if update_fields is None or TEST_LEAD_FIELDS & set(update_fields):
+            self.is_test = is_test_lead(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'is_test'}
+        from .lead_pricing import PRICING_INPUT_FIELDS, apply_price, is_priced, pricing_inputs
+        current_inputs = pricing_inputs(self)
+        if update_fields is None:
+            reprice = (
+                not is_priced(self)
+                or current_inputs is None
+                or current_inputs != getattr(self, '_loaded_pricing_inputs', None)
+            )
+        else:
+            reprice = bool(PRICING_INPUT_FIELDS & set(update_fields))
+        if reprice:
+            priced_fields = apply_price(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | set(priced_fields)
         super().save(*args, **kwargs)
+        if update_fields is None:
+            self._loaded_pricing_inputs = current_inputs
     
     @property
     def is_expired(self):
@@ -279,20 +354,23 @@ class Lead(models.Model):
         }
         return urgency_map.get(self.urgency, self.urgency)
     
+    def _increment_counter(self, field):
+        # Batched cache increment flushed to the row, or a relative UPDATE (see lead_counters.py)
+        from .lead_counters import record
+        record(self.pk, field)
+        setattr(self, field, getattr(self, field) + 1)
+
     def increment_provider_contacts(self):
         """Increment the total provider contacts counter"""
-        self.total_provider_contacts += 1
-        self.save(update_fields=['total_provider_contacts'])
+        self._increment_counter('total_provider_contacts')
     
     def increment_views_count(self):
         """Increment the views count for Bark-style competition tracking"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        self._increment_counter('views_count')
     
     def increment_responses_count(self):
         """Increment the responses count for Bark-style competition tracking"""
-        self.responses_count += 1
-        self.save(update_fields=['responses_count'])
+        self._increment_counter('responses_count')
     
     def can_be_claimed(self):
         """Check if this lead can still be claimed by providers"""
@@ -324,8 +402,8 @@ class Lead(models.Model):
         
         # Update lead counts
         self.assigned_providers_count += 1
-        self.total_provider_contacts += 1
-        self.responses_count += 1  # Increment Bark-style responses count
+        self.increment_provider_contacts()
+        self.increment_responses_count()  # Bark-style responses count
         
         # Check if lead is now fully claimed
         if self.assigned_providers_count >= self.max_providers:
@@ -335,8 +413,6 @@ class Lead(models.Model):
         
         self.save(update_fields=[
             'assigned_providers_count', 
-            'total_provider_contacts',
-            'responses_count',
             'is_available',
             'claimed_at',
             'status'
@@ -599,3 +675,162 @@ class LeadReservation(models.Model):
     def is_active(self):
         return self.status == 'pending' and timezone.now() < self.expires_at
 
+
+
+class LeadRoutingJob(models.Model):
+    """
+    Durable routing outbox entry for a verified lead.
+    
+    The Lead post_save signal only enqueues; workers run the stages
+    (gate -> match -> assign -> fanout) from backend/leads/services/routing_pipeline.py.
+    """
+    STAGE_CHOICES = [
+        ('gate', 'Quality Gate'),
+        ('match', 'Match Providers'),
+        ('assign', 'Create Assignments'),
+        ('fanout', 'Notify Providers'),
+        ('done', 'Done'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('blocked', 'Blocked by Quality Gate'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lead = models.OneToOneField(Lead, on_delete=models.CASCADE, related_name='routing_job')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='gate')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0, help_text="Failed attempts on the current stage")
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="Worker lease expiry while running")
+    
+    # Hand-off between stages
+    provider_ids = models.JSONField(default=list, blank=True, help_text="Matched provider user ids, in rank order")
+    via_assignments = models.BooleanField(default=False, help_text="Providers came from LeadAssignments (in-app already created)")
+    notify_client = models.BooleanField(default=False, help_text="Send the lead-received email to the client when routing finishes")
+    
+    stage_metrics = models.JSONField(default=dict, blank=True, help_text="Per-stage duration_ms / runs / ok")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"RoutingJob {self.lead_id} [{self.stage}/{self.status}]"
+
+
+class RoutingTrace(models.Model):
+    """
+    Persisted per-lead routing trace (span timings, DB queries, provider counts).
+    
+    Written by backend/leads/services/routing_trace.py when ROUTING_TRACE_PERSIST is on;
+    the in-memory ring buffer there is always kept.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='routing_traces')
+    root = models.CharField(max_length=50, help_text="Entry point: route_lead or routing_job")
+    total_ms = models.FloatField(default=0)
+    queries = models.PositiveIntegerField(default=0)
+    counts = models.JSONField(default=dict, blank=True, help_text="providers_matched / providers_assigned / providers_notified")
+    spans = models.JSONField(default=list, blank=True, help_text="[{name, calls, ms, queries}] keyed by span path")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"RoutingTrace {self.lead_id} [{self.root}] {self.total_ms}ms"
+
+
+class MarketStats(models.Model):
+    """
+    Lead demand / provider supply snapshot per category x city.
+    
+    Rebuilt by backend/leads/market_stats.py (refresh_market_stats command or on
+    read once stale). A null category is the all-categories rollup and city ''
+    the all-cities rollup, so (None, '') holds the market-wide totals.
+    """
+    category = models.ForeignKey(
+        ServiceCategory,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='market_stats'
+    )
+    city = models.CharField(max_length=200, blank=True, default='', help_text="Lowercased lead city / provider service area")
+    leads_7d = models.PositiveIntegerField(default=0)
+    leads_30d = models.PositiveIntegerField(default=0)
+    leads_12w = models.PositiveIntegerField(default=0)
+    active_providers = models.PositiveIntegerField(default=0, help_text="Routable providers covering the category in this city")
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['category', 'city']
+    
+    def __str__(self):
+        return f"MarketStats {self.category_id or '*'} @ {self.city or '*'}"
+
+
+class LeadFeatures(models.Model):
+    """
+    Derived ML / scoring features of a lead, computed when it is created or
+    edited (backend/leads/lead_features.py) and shared by every scorer and
+    training job. Rows with an old schema_version are recomputed in bulk by
+    `manage.py rebuild_lead_features`.
+    """
+    lead = models.OneToOneField(
+        Lead,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='features'
+    )
+    schema_version = models.PositiveSmallIntegerField(db_index=True)
+    vector = models.BinaryField(help_text="float32 values in lead_features.VECTOR_FEATURES order")
+    derived = models.JSONField(default=dict, blank=True, help_text="Feature values by name, plus rule inputs")
+    tfidf_norm = models.FloatField(null=True, blank=True)
+    tfidf_version = models.CharField(max_length=32, blank=True, default='', help_text="Quality model version tfidf_norm was computed with")
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"LeadFeatures v{self.schema_version} for {self.lead_id}"
+    
+    def as_array(self):
+        import numpy as np
+        return np.frombuffer(bytes(self.vector), dtype=np.float32)
+
+
+class MLMetricsDaily(models.Model):
+    """
+    One day (local date) of the inputs behind the admin ML metrics endpoint,
+    rebuilt by backend/leads/ml_metrics.py. The endpoint sums the last 30 rows
+    instead of scoring every recent lead per request.
+    """
+    date = models.DateField(unique=True)
+    leads = models.PositiveIntegerField(default=0)
+    cancelled_leads = models.PositiveIntegerField(default=0)
+    quality_score_sum = models.FloatField(default=0)
+    price_sum = models.FloatField(default=0, help_text="Default-tier credits of the day's leads")
+    assignments = models.PositiveIntegerField(default=0)
+    contacted_assignments = models.PositiveIntegerField(default=0, help_text="Contacted, won or lost")
+    won_assignments = models.PositiveIntegerField(default=0)
+    quality_model_version = models.CharField(max_length=32, blank=True, default='')
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"MLMetricsDaily {self.date}"
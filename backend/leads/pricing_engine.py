@@ -0,0 +1,209 @@
+"""
+Vectorized lead pricing.
+
+Prices many leads in one NumPy pass with the same rules, and the same float
+operations in the same order, as the scalar DynamicPricingMLService paths:
+
+    simple  (_calculate_simple_price)          USE_ML_PRICING off
+    optimal (calculate_optimal_credit_cost)    USE_ML_PRICING on
+
+Lead attributes are encoded as small integer codes (urgency, quality band,
+budget, hiring intent, property type, category, provider tier discount bucket)
+and each rule table is compiled into a lookup array indexed by those codes, so
+a batch is a handful of gathers, adds and multiplies. Both paths therefore give
+bit-identical results; backend/leads/tests/test_pricing_engine.py checks that
+over attribute/category/tier combinations and saved leads.
+
+Used by lead_pricing (stored price maps, reprice_leads, feed backfill),
+DynamicPricingMLService.calculate_batch_pricing and the ML metrics endpoint.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+
+# Category multipliers, shared with the scalar paths in ml_services.py
+SIMPLE_CATEGORY_MULTIPLIERS = {
+    'cleaning': 1.0,      # Base multiplier
+    'electrical': 1.5,    # Electrical is more valuable
+    'plumbing': 1.3,      # Plumbing is valuable
+    'hvac': 1.4,          # HVAC is valuable
+    'carpentry': 1.2,     # Carpentry is moderately valuable
+    'painting': 1.1,      # Painting is slightly more valuable
+    'roofing': 1.6,       # Roofing is very valuable
+    'flooring': 1.3,      # Flooring is valuable
+    'landscaping': 1.1,   # Landscaping is slightly more valuable
+    'moving': 1.2,        # Moving is moderately valuable
+    'appliance-repair': 1.3,  # Appliance repair is valuable
+    'handyman': 1.1,      # Handyman is slightly more valuable
+    'pool-maintenance': 1.4,  # Pool maintenance is valuable
+    'security': 1.5,      # Security is valuable
+    'it-support': 1.3,    # IT support is valuable
+    'web-design': 1.2,    # Web design is moderately valuable
+    'marketing': 1.1,     # Marketing is slightly more valuable
+    'accounting': 1.2,    # Accounting is moderately valuable
+    'legal': 1.8,         # Legal is very valuable
+    'consulting': 1.4,    # Consulting is valuable
+    'other': 1.0          # Other services base multiplier
+}
+
+OPTIMAL_CATEGORY_MULTIPLIERS = {
+    'cleaning': 1.0,      # Cleaning: 1x (base)
+    'electrical': 1.3,    # Electrical: 1.3x (moderate premium)
+    'plumbing': 1.2,      # Plumbing: 1.2x (moderate premium)
+    'hvac': 1.3,          # HVAC: 1.3x (moderate premium)
+    'carpentry': 1.1,     # Carpentry: 1.1x (slight premium)
+    'painting': 1.0,      # Painting: 1x (base)
+    'roofing': 1.4,       # Roofing: 1.4x (moderate premium)
+    'flooring': 1.2,      # Flooring: 1.2x (moderate premium)
+    'landscaping': 1.0,   # Landscaping: 1x (base)
+    'moving': 1.1,        # Moving: 1.1x (slight premium)
+    'appliance-repair': 1.2,  # Appliance repair: 1.2x (moderate premium)
+    'handyman': 1.0,      # Handyman: 1x (base)
+    'pool-maintenance': 1.2,  # Pool maintenance: 1.2x (moderate premium)
+    'security': 1.3,      # Security: 1.3x (moderate premium)
+    'it-support': 1.2,    # IT support: 1.2x (moderate premium)
+    'web-design': 1.1,    # Web design: 1.1x (slight premium)
+    'marketing': 1.0,     # Marketing: 1x (base)
+    'accounting': 1.1,    # Accounting: 1.1x (slight premium)
+    'legal': 1.5,         # Legal: 1.5x (moderate premium)
+    'consulting': 1.2,    # Consulting: 1.2x (moderate premium)
+    'other': 1.0          # Other: 1x (base)
+}
+
+# Code 0 is "anything else" in every table
+URGENCY_CODES = {'this_month': 1, 'this_week': 2, 'urgent': 3}
+BUDGET_CODES = {'5000_15000': 1, '15000_50000': 2, 'over_50000': 3}
+INTENT_CODES = {'planning_to_hire': 1, 'ready_to_hire': 2}
+PROPERTY_CODES = {'commercial': 1, 'industrial': 2}
+TIER_CODES = {'pro': 1, 'enterprise': 2}
+# Category code 0 = unknown slug (multiplier 1.0)
+CATEGORY_CODES = {
+    slug: code
+    for code, slug in enumerate(sorted(set(SIMPLE_CATEGORY_MULTIPLIERS) | set(OPTIMAL_CATEGORY_MULTIPLIERS)), 1)
+}
+
+
+def _category_table(multipliers):
+    table = np.ones(len(CATEGORY_CODES) + 1)
+    for slug, code in CATEGORY_CODES.items():
+        table[code] = multipliers.get(slug, 1.0)
+    return table
+
+
+# Rule tables compiled to lookup arrays (index = code)
+SIMPLE = {
+    'base': 4.0,                                 # 4 credits = R200
+    'urgency': np.array([1.0, 1.5, 2.0, 3.0]),   # flexible / this_month / this_week / urgent
+    'quality': np.array([0.0, 0.5, 1.0]),        # score <= 60 / > 60 / > 80
+    'budget': np.array([0.0, 1.0, 2.0, 3.0]),
+    'intent': np.array([0.0, 1.0, 2.0]),
+    'category': _category_table(SIMPLE_CATEGORY_MULTIPLIERS),
+    'max_credits': 20,
+}
+
+OPTIMAL = {
+    'urgency': np.array([2.0, 2.2, 2.5, 3.0]),
+    'quality': np.array([0.0, 0.2, 0.5]),
+    'budget': np.array([0.0, 0.5, 1.5, 3.0]),
+    'property': np.array([0.0, 1.0, 2.0]),
+    'intent': np.array([0.0, 0.2, 0.5]),
+    'category': _category_table(OPTIMAL_CATEGORY_MULTIPLIERS),
+    'tier': np.array([1.0, 0.9, 0.8]),           # default / pro / enterprise discount
+    'min_credits': 1,
+    'max_credits': 20,
+}
+
+# .values() fields encode() needs
+PRICING_VALUE_FIELDS = (
+    'urgency',
+    'verification_score',
+    'budget_range',
+    'hiring_intent',
+    'property_type',
+    'service_category__slug',
+)
+
+LeadCodes = namedtuple('LeadCodes', ['urgency', 'quality', 'budget', 'intent', 'property', 'category'])
+
+
+def use_ml_pricing():
+    return getattr(settings, 'USE_ML_PRICING', False)
+
+
+def _quality_band(score):
+    score = score or 0
+    if score > 80:
+        return 2
+    if score > 60:
+        return 1
+    return 0
+
+
+def encode(rows):
+    """
+    LeadCodes of int arrays for Lead instances (service_category loaded) or
+    dicts from .values() with a 'service_category__slug' key.
+    """
+    urgency, quality, budget, intent, prop, category = [], [], [], [], [], []
+    for row in rows:
+        if isinstance(row, dict):
+            get = row.get
+            slug = row.get('service_category__slug')
+        else:
+            get = lambda field, row=row: getattr(row, field, None)  # noqa: E731
+            slug = row.service_category.slug
+        urgency.append(URGENCY_CODES.get(get('urgency'), 0))
+        quality.append(_quality_band(get('verification_score')))
+        budget.append(BUDGET_CODES.get(get('budget_range'), 0))
+        intent.append(INTENT_CODES.get(get('hiring_intent'), 0))
+        prop.append(PROPERTY_CODES.get(get('property_type'), 0))
+        category.append(CATEGORY_CODES.get(slug, 0))
+    return LeadCodes(*(np.array(codes, dtype=np.intp) for codes in (urgency, quality, budget, intent, prop, category)))
+
+
+def tier_code(bucket):
+    """Tier code for a lead_pricing discount bucket / subscription tier."""
+    return TIER_CODES.get(bucket, 0)
+
+
+def simple_credits(codes):
+    """Credits per lead, _calculate_simple_price rules."""
+    multiplier = SIMPLE['urgency'][codes.urgency]
+    multiplier = multiplier + SIMPLE['quality'][codes.quality]
+    multiplier = multiplier + SIMPLE['budget'][codes.budget]
+    multiplier = multiplier + SIMPLE['intent'][codes.intent]
+    multiplier = multiplier * SIMPLE['category'][codes.category]
+    credits = np.trunc(SIMPLE['base'] * multiplier).astype(np.int64)
+    return np.minimum(credits, SIMPLE['max_credits'])
+
+
+def optimal_credits(codes, tiers=0):
+    """Credits per lead, calculate_optimal_credit_cost rules. tiers: tier code or array of codes."""
+    cost = OPTIMAL['urgency'][codes.urgency]
+    cost = cost + OPTIMAL['quality'][codes.quality]
+    cost = cost + OPTIMAL['budget'][codes.budget]
+    cost = cost + OPTIMAL['property'][codes.property]
+    cost = cost + OPTIMAL['intent'][codes.intent]
+    cost = cost * OPTIMAL['category'][codes.category]
+    cost = cost * OPTIMAL['tier'][np.asarray(tiers, dtype=np.intp)]
+    # np.rint rounds half to even, like round()
+    credits = np.rint(cost).astype(np.int64)
+    return np.clip(credits, OPTIMAL['min_credits'], OPTIMAL['max_credits'])
+
+
+def price_credits(codes, tiers=0, use_ml=None):
+    """
+    Credits per lead as calculate_dynamic_lead_price would return them. The
+    simple rules ignore the provider tier.
+    """
+    if use_ml is None:
+        use_ml = use_ml_pricing()
+    if use_ml:
+        return optimal_credits(codes, tiers)
+    return simple_credits(codes)
+
+
+def price_leads(rows, bucket=None, use_ml=None):
+    """Credits (int array) for Lead instances or .values() dicts, for one tier bucket."""
+    return price_credits(encode(rows), tier_code(bucket), use_ml=use_ml)
@@ -6,11 +6,15 @@ and identify problematic providers who unlock leads but don't follow through.
 """
 
 import logging
+from itertools import groupby
+from operator import itemgetter
+
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
 from django.contrib.auth import get_user_model
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
@@ -19,6 +23,7 @@ from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 
+from backend.leads import tree_inference
 from backend.leads.models import Lead, LeadAssignment
 from backend.users.models import User, ProviderProfile, LeadUnlock
 
@@ -41,62 +46,64 @@ class ProviderBehaviorML:
         # Create models directory if it doesn't exist
         os.makedirs(self.models_dir, exist_ok=True)
     
-    def collect_provider_behavior_data(self, days_back: int = 90) -> pd.DataFrame:
-        """Collect comprehensive provider behavior data for ML training"""
+    def collect_provider_behavior_data(self, days_back: int = 90, provider_ids=None) -> pd.DataFrame:
+        """
+        Collect comprehensive provider behavior data for ML training: one row per
+        provider with assignments in the last days_back days (or only provider_ids).
+        
+        Built set-based, with the same query count whatever the number of providers:
+        one grouped LeadAssignment aggregate, one profile read and one streamed
+        LeadUnlock read.
+        """
         logger.info(f"Collecting provider behavior data from last {days_back} days")
         
-        cutoff_date = timezone.now() - timedelta(days=days_back)
+        now = timezone.now()
+        cutoff_date = now - timedelta(days=days_back)
+        period_days = (now - cutoff_date).days + 1
+        
+        # Assignments of providers in the period (also selects the providers)
+        assignments = LeadAssignment.objects.filter(
+            provider__user_type='provider',
+            assigned_at__gte=cutoff_date
+        )
+        if provider_ids is not None:
+            assignments = assignments.filter(provider_id__in=list(provider_ids))
+        provider_subquery = assignments.values('provider_id')
         
-        # Get all providers with activity in the period
-        providers = User.objects.filter(
-            user_type='provider',
-            lead_assignments__assigned_at__gte=cutoff_date
-        ).select_related('provider_profile').prefetch_related(
-            'lead_assignments',
-            'leadunlock_set'
-        ).distinct()
+        assignment_stats = {
+            row['provider_id']: row
+            for row in assignments.values('provider_id').annotate(**self._assignment_aggregates(now)).order_by()
+        }
+        unlock_stats = self._unlock_stats(provider_subquery, cutoff_date)
         
         behavior_data = []
+        providers = User.objects.filter(pk__in=provider_subquery).select_related('provider_profile')
         
-        for provider in providers:
-            # Basic provider features
-            provider_features = self._extract_provider_features(provider)
-            
-            # Assignment behavior features
-            assignment_features = self._extract_assignment_features(provider, cutoff_date)
-            
-            # Unlock behavior features
-            unlock_features = self._extract_unlock_features(provider, cutoff_date)
+        for provider in providers.iterator(chunk_size=1000):
+            stats = assignment_stats.get(provider.pk)
+            if stats is None:
+                continue
             
-            # Follow-through behavior features
-            follow_through_features = self._extract_follow_through_features(provider, cutoff_date)
-            
-            # Quality indicators
-            quality_features = self._extract_quality_features(provider, cutoff_date)
-            
-            # Combine all features
-            features = {
-                **provider_features,
-                **assignment_features,
-                **unlock_features,
-                **follow_through_features,
-                **quality_features
-            }
-            
-            behavior_data.append(features)
+            behavior_data.append({
+                **self._extract_provider_features(provider, now),
+                **self._assignment_features(stats, period_days),
+                **self._unlock_features(unlock_stats.get(provider.pk), period_days),
+                **self._follow_through_features(stats),
+                **self._quality_features(stats),
+            })
         
         df = pd.DataFrame(behavior_data)
         logger.info(f"Collected {len(df)} provider behavior samples")
         return df
     
-    def _extract_provider_features(self, provider: User) -> Dict:
+    def _extract_provider_features(self, provider: User, now: datetime = None) -> Dict:
         """Extract basic provider profile features"""
         profile = getattr(provider, 'provider_profile', None)
         
         return {
             'provider_id': str(provider.id),
             'email': provider.email,
-            'registration_days': (timezone.now() - provider.date_joined).days,
+            'registration_days': ((now or timezone.now()) - provider.date_joined).days,
             'has_profile': profile is not None,
             'verification_status': profile.verification_status if profile else 'unverified',
             'subscription_tier': profile.subscription_tier if profile else 'none',
@@ -107,49 +114,63 @@ class ProviderBehaviorML:
             'service_areas_count': len(profile.service_areas) if profile and profile.service_areas else 0,
         }
     
-    def _extract_assignment_features(self, provider: User, cutoff_date: datetime) -> Dict:
-        """Extract lead assignment behavior features"""
-        assignments = LeadAssignment.objects.filter(
-            provider=provider,
-            assigned_at__gte=cutoff_date
-        ).select_related('lead', 'lead__service_category')
-        
-        if not assignments.exists():
-            return {
-                'total_assignments': 0,
-                'avg_response_time_hours': 0,
-                'assignment_frequency': 0,
-                'service_category_diversity': 0,
-                'location_diversity': 0,
-            }
-        
-        # Calculate response times
-        response_times = []
-        for assignment in assignments:
-            if assignment.viewed_at:
-                response_time = (assignment.viewed_at - assignment.assigned_at).total_seconds() / 3600
-                response_times.append(response_time)
-        
-        # Calculate diversity metrics
-        service_categories = set(assignment.lead.service_category.name for assignment in assignments)
-        locations = set(f"{assignment.lead.location_city}" for assignment in assignments)
+    @staticmethod
+    def _assignment_aggregates(now: datetime) -> Dict:
+        """Per-provider LeadAssignment aggregates behind the assignment, follow-through and quality features"""
+        def elapsed(end, start):
+            return ExpressionWrapper(F(end) - F(start), output_field=DurationField())
         
+        purchased_not_contacted = Q(purchased_at__isnull=False, contacted_at__isnull=True)
+        return {
+            'total_assignments': Count('id'),
+            'avg_response_time': Avg(elapsed('viewed_at', 'assigned_at')),
+            'service_category_diversity': Count('lead__service_category__name', distinct=True),
+            'location_diversity': Count('lead__location_city', distinct=True),
+            'contacted': Count('id', filter=Q(status='contacted')),
+            'quoted': Count('id', filter=Q(status='quoted')),
+            'won': Count('id', filter=Q(status='won')),
+            'unlocked': Count('id', filter=Q(purchased_at__isnull=False)),
+            # Null unless both timestamps are set, which Avg skips
+            'avg_time_to_contact': Avg(elapsed('contacted_at', 'purchased_at')),
+            'abandoned': Count('id', filter=purchased_not_contacted),
+            'successful_interactions': Count('id', filter=Q(status__in=['contacted', 'quoted', 'won'])),
+            'high_abandonment': Count(
+                'id', filter=purchased_not_contacted & Q(purchased_at__lt=now - timedelta(days=2))
+            ),
+            'recent_activity': Count('id', filter=Q(assigned_at__gte=now - timedelta(days=7))),
+        }
+    
+    @staticmethod
+    def _hours(duration) -> float:
+        return duration.total_seconds() / 3600 if duration is not None else 0
+    
+    def _assignment_features(self, stats: Dict, period_days: int) -> Dict:
+        """Lead assignment behavior features"""
         return {
-            'total_assignments': assignments.count(),
-            'avg_response_time_hours': np.mean(response_times) if response_times else 0,
-            'assignment_frequency': assignments.count() / ((timezone.now() - cutoff_date).days + 1),
-            'service_category_diversity': len(service_categories),
-            'location_diversity': len(locations),
+            'total_assignments': stats['total_assignments'],
+            'avg_response_time_hours': self._hours(stats['avg_response_time']),
+            'assignment_frequency': stats['total_assignments'] / period_days,
+            'service_category_diversity': stats['service_category_diversity'],
+            'location_diversity': stats['location_diversity'],
         }
     
-    def _extract_unlock_features(self, provider: User, cutoff_date: datetime) -> Dict:
-        """Extract lead unlock behavior features"""
-        unlocks = LeadUnlock.objects.filter(
-            user=provider,
+    @staticmethod
+    def _unlock_stats(provider_subquery, cutoff_date: datetime) -> Dict:
+        """{provider id: (credits spent per unlock, unlock times)}, streamed in (provider, insertion) order"""
+        rows = LeadUnlock.objects.filter(
+            user_id__in=provider_subquery,
             unlocked_at__gte=cutoff_date
-        )
+        ).order_by('user_id', 'id').values_list('user_id', 'credits_spent', 'unlocked_at')
         
-        if not unlocks.exists():
+        stats = {}
+        for provider_id, group in groupby(rows.iterator(chunk_size=2000), key=itemgetter(0)):
+            _, credits, times = zip(*group)
+            stats[provider_id] = (credits, times)
+        return stats
+    
+    def _unlock_features(self, stats, period_days: int) -> Dict:
+        """Lead unlock behavior features"""
+        if not stats:
             return {
                 'total_unlocks': 0,
                 'unlock_frequency': 0,
@@ -158,108 +179,45 @@ class ProviderBehaviorML:
                 'unlock_pattern_score': 0,
             }
         
-        # Analyze unlock patterns
-        unlock_times = [unlock.unlocked_at for unlock in unlocks]
-        unlock_intervals = []
-        for i in range(1, len(unlock_times)):
-            interval = (unlock_times[i] - unlock_times[i-1]).total_seconds() / 3600
-            unlock_intervals.append(interval)
+        credits, unlock_times = stats
+        unlock_intervals = [
+            (unlock_times[i] - unlock_times[i-1]).total_seconds() / 3600
+            for i in range(1, len(unlock_times))
+        ]
         
         # Pattern score based on consistency
         pattern_score = 100 if not unlock_intervals else max(0, 100 - np.std(unlock_intervals))
         
         return {
-            'total_unlocks': unlocks.count(),
-            'unlock_frequency': unlocks.count() / ((timezone.now() - cutoff_date).days + 1),
-            'avg_credits_per_unlock': np.mean([unlock.credits_spent for unlock in unlocks]),
-            'total_credits_spent': sum(unlock.credits_spent for unlock in unlocks),
+            'total_unlocks': len(credits),
+            'unlock_frequency': len(credits) / period_days,
+            'avg_credits_per_unlock': np.mean(credits),
+            'total_credits_spent': sum(credits),
             'unlock_pattern_score': pattern_score,
         }
     
-    def _extract_follow_through_features(self, provider: User, cutoff_date: datetime) -> Dict:
-        """Extract follow-through behavior features"""
-        assignments = LeadAssignment.objects.filter(
-            provider=provider,
-            assigned_at__gte=cutoff_date
-        )
-        
-        if not assignments.exists():
-            return {
-                'follow_through_rate': 0,
-                'contact_rate': 0,
-                'quote_rate': 0,
-                'win_rate': 0,
-                'avg_time_to_contact_hours': 0,
-                'abandonment_rate': 0,
-            }
-        
-        # Calculate follow-through metrics
-        total_purchased = assignments.filter(status='purchased').count()
-        total_contacted = assignments.filter(status='contacted').count()
-        total_quoted = assignments.filter(status='quoted').count()
-        total_won = assignments.filter(status='won').count()
-        total_unlocked = assignments.filter(purchased_at__isnull=False).count()
-        
-        # Calculate time to contact
-        contact_times = []
-        for assignment in assignments.filter(contacted_at__isnull=False):
-            if assignment.purchased_at:
-                time_to_contact = (assignment.contacted_at - assignment.purchased_at).total_seconds() / 3600
-                contact_times.append(time_to_contact)
-        
-        # Calculate abandonment rate (unlocked but never contacted)
-        abandoned = assignments.filter(
-            purchased_at__isnull=False,
-            contacted_at__isnull=True
-        ).count()
+    def _follow_through_features(self, stats: Dict) -> Dict:
+        """Follow-through behavior features"""
+        total = stats['total_assignments']
+        unlocked = stats['unlocked']
         
         return {
-            'follow_through_rate': (total_contacted / total_unlocked * 100) if total_unlocked > 0 else 0,
-            'contact_rate': (total_contacted / assignments.count() * 100) if assignments.count() > 0 else 0,
-            'quote_rate': (total_quoted / assignments.count() * 100) if assignments.count() > 0 else 0,
-            'win_rate': (total_won / assignments.count() * 100) if assignments.count() > 0 else 0,
-            'avg_time_to_contact_hours': np.mean(contact_times) if contact_times else 0,
-            'abandonment_rate': (abandoned / total_unlocked * 100) if total_unlocked > 0 else 0,
+            'follow_through_rate': (stats['contacted'] / unlocked * 100) if unlocked > 0 else 0,
+            'contact_rate': (stats['contacted'] / total * 100) if total > 0 else 0,
+            'quote_rate': (stats['quoted'] / total * 100) if total > 0 else 0,
+            'win_rate': (stats['won'] / total * 100) if total > 0 else 0,
+            'avg_time_to_contact_hours': self._hours(stats['avg_time_to_contact']),
+            'abandonment_rate': (stats['abandoned'] / unlocked * 100) if unlocked > 0 else 0,
         }
     
-    def _extract_quality_features(self, provider: User, cutoff_date: datetime) -> Dict:
-        """Extract quality indicators and risk factors"""
-        assignments = LeadAssignment.objects.filter(
-            provider=provider,
-            assigned_at__gte=cutoff_date
-        )
-        
-        if not assignments.exists():
-            return {
-                'quality_score': 0,
-                'risk_score': 0,
-                'reliability_score': 0,
-                'engagement_score': 0,
-            }
+    def _quality_features(self, stats: Dict) -> Dict:
+        """Quality indicators and risk factors"""
+        total = stats['total_assignments']
         
-        # Calculate quality metrics
-        total_assignments = assignments.count()
-        successful_interactions = assignments.filter(
-            status__in=['contacted', 'quoted', 'won']
-        ).count()
-        
-        # Risk factors
-        high_abandonment = assignments.filter(
-            purchased_at__isnull=False,
-            contacted_at__isnull=True,
-            purchased_at__lt=timezone.now() - timedelta(days=2)
-        ).count()
-        
-        # Engagement metrics
-        recent_activity = assignments.filter(
-            assigned_at__gte=timezone.now() - timedelta(days=7)
-        ).count()
-        
-        # Calculate scores
-        quality_score = (successful_interactions / total_assignments * 100) if total_assignments > 0 else 0
-        risk_score = (high_abandonment / total_assignments * 100) if total_assignments > 0 else 0
+        quality_score = (stats['successful_interactions'] / total * 100) if total > 0 else 0
+        risk_score = (stats['high_abandonment'] / total * 100) if total > 0 else 0
         reliability_score = max(0, 100 - risk_score)
-        engagement_score = min(100, recent_activity * 20)  # Recent activity bonus
+        engagement_score = min(100, stats['recent_activity'] * 20)  # Recent activity bonus
         
         return {
             'quality_score': quality_score,
@@ -418,6 +376,28 @@ class ProviderBehaviorML:
         logger.info("Provider behavior ML models trained successfully")
         return results
     
+    def _risk_predictions(self, provider_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Risk scores, follow-through and quality probabilities for rows of provider behavior data"""
+        feature_columns = [
+            'registration_days', 'credit_balance', 'total_assignments',
+            'assignment_frequency', 'total_unlocks', 'unlock_frequency',
+            'service_category_diversity', 'location_diversity',
+            'unlock_pattern_score', 'avg_response_time_hours'
+        ]
+        
+        X = provider_data[feature_columns].fillna(0)
+        X_scaled = self.scaler.transform(X)
+        
+        follow_through_prob = tree_inference.predict_proba(self.follow_through_model, X_scaled)[:, 1]
+        quality_prob = tree_inference.predict_proba(self.quality_model, X_scaled)[:, 1]
+        
+        # Inverse of good follow-through probability
+        return (1 - follow_through_prob) * 100, follow_through_prob, quality_prob
+    
+    @staticmethod
+    def _recommendation(risk_score: float) -> str:
+        return 'high_risk' if risk_score > 70 else 'medium_risk' if risk_score > 40 else 'low_risk'
+    
     def predict_provider_risk(self, provider_id: str) -> Dict:
         """Predict risk score for a specific provider"""
         if not self.is_trained:
@@ -428,39 +408,22 @@ class ProviderBehaviorML:
         
         try:
             provider = User.objects.get(id=provider_id)
-            provider_data = self.collect_provider_behavior_data(days_back=30)
-            
-            # Find provider in data
-            provider_row = provider_data[provider_data['provider_id'] == provider_id]
+            # Only this provider's row (empty without recent assignments)
+            provider_data = self.collect_provider_behavior_data(days_back=30, provider_ids=[provider.pk])
             
-            if provider_row.empty:
+            if provider_data.empty:
                 return {'error': 'Provider not found in recent data'}
             
-            # Prepare features
-            feature_columns = [
-                'registration_days', 'credit_balance', 'total_assignments',
-                'assignment_frequency', 'total_unlocks', 'unlock_frequency',
-                'service_category_diversity', 'location_diversity',
-                'unlock_pattern_score', 'avg_response_time_hours'
-            ]
-            
-            X = provider_row[feature_columns].fillna(0)
-            X_scaled = self.scaler.transform(X)
-            
-            # Predict
-            follow_through_prob = self.follow_through_model.predict_proba(X_scaled)[0]
-            quality_prob = self.quality_model.predict_proba(X_scaled)[0]
-            
-            # Calculate risk score
-            risk_score = (1 - follow_through_prob[1]) * 100  # Inverse of good follow-through probability
+            risk_scores, follow_through_probs, quality_probs = self._risk_predictions(provider_data)
+            risk_score = risk_scores[0]
             
             return {
                 'provider_id': provider_id,
                 'provider_email': provider.email,
                 'risk_score': risk_score,
-                'follow_through_probability': follow_through_prob[1],
-                'quality_probability': quality_prob[1],
-                'recommendation': 'high_risk' if risk_score > 70 else 'medium_risk' if risk_score > 40 else 'low_risk'
+                'follow_through_probability': follow_through_probs[0],
+                'quality_probability': quality_probs[0],
+                'recommendation': self._recommendation(risk_score)
             }
             
         except Exception as e:
@@ -477,23 +440,32 @@ class ProviderBehaviorML:
         
         # Get recent provider data
         provider_data = self.collect_provider_behavior_data(days_back=30)
+        if provider_data.empty:
+            return []
         provider_data = provider_data[provider_data['total_assignments'] >= min_assignments]
+        if provider_data.empty:
+            return []
+        
+        # One batch prediction over every provider row
+        try:
+            risk_scores, _, _ = self._risk_predictions(provider_data)
+        except Exception as e:
+            logger.error(f"Error predicting provider risk: {str(e)}")
+            return []
         
         problematic_providers = []
         
-        for _, row in provider_data.iterrows():
-            risk_prediction = self.predict_provider_risk(row['provider_id'])
-            
-            if 'error' not in risk_prediction and risk_prediction['risk_score'] >= risk_threshold:
+        for (_, row), risk_score in zip(provider_data.iterrows(), risk_scores):
+            if risk_score >= risk_threshold:
                 problematic_providers.append({
                     'provider_id': row['provider_id'],
                     'provider_email': row['email'],
-                    'risk_score': risk_prediction['risk_score'],
+                    'risk_score': risk_score,
                     'follow_through_rate': row['follow_through_rate'],
                     'abandonment_rate': row['abandonment_rate'],
                     'total_unlocks': row['total_unlocks'],
                     'total_assignments': row['total_assignments'],
-                    'recommendation': risk_prediction['recommendation']
+                    'recommendation': self._recommendation(risk_score)
                 })
         
         # Sort by risk score
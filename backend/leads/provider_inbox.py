@@ -5,7 +5,7 @@ Maps internal LeadAssignment.status (+ Lead expiry + LeadAccess) to: new | activ
 from __future__ import annotations
 
 import math
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
 from django.utils import timezone
 
@@ -25,19 +25,51 @@ def haversine_km(
     return r * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def haversine_km_many(lat: float, lon: float, lats, lons):
+    """Vectorized great-circle distance in km from one point to arrays of points."""
+    import numpy as np
+
+    p1 = math.radians(lat)
+    p2 = np.radians(np.asarray(lats, dtype=float))
+    dp = p2 - p1
+    dl = np.radians(np.asarray(lons, dtype=float)) - math.radians(lon)
+    a = np.sin(dp / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 6371.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
 def distance_km_for_provider(provider: "User", lead) -> Optional[float]:
-    """Distance from provider profile to lead if both have coordinates."""
-    try:
-        profile = provider.provider_profile
-    except Exception:
-        return None
-    lat_p, lon_p = profile.latitude, profile.longitude
+    """Distance from provider base location (User lat/lon) to lead if both have coordinates."""
+    lat_p, lon_p = getattr(provider, "latitude", None), getattr(provider, "longitude", None)
     lat_l, lon_l = lead.latitude, lead.longitude
     if lat_p is None or lon_p is None or lat_l is None or lon_l is None:
         return None
     return round(haversine_km(float(lat_p), float(lon_p), float(lat_l), float(lon_l)), 1)
 
 
+def distances_km_for_leads(provider: "User", leads) -> Dict[str, Optional[float]]:
+    """
+    {str(lead.id): km} for a page of leads in one vectorized pass
+    (None where either side lacks coordinates).
+    """
+    leads = list(leads)
+    result: Dict[str, Optional[float]] = {str(lead.id): None for lead in leads}
+    lat_p, lon_p = getattr(provider, "latitude", None), getattr(provider, "longitude", None)
+    if lat_p is None or lon_p is None:
+        return result
+    located = [l for l in leads if l.latitude is not None and l.longitude is not None]
+    if not located:
+        return result
+    km = haversine_km_many(
+        float(lat_p),
+        float(lon_p),
+        [float(l.latitude) for l in located],
+        [float(l.longitude) for l in located],
+    )
+    for lead, d in zip(located, km):
+        result[str(lead.id)] = round(float(d), 1)
+    return result
+
+
 def compute_display_status(assignment, provider: "User") -> str:
     """
     Provider-facing status (4 labels):
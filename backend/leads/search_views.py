@@ -0,0 +1,64 @@
+"""GET /api/leads/search/?q= — keyword search over leads (lead_search.py) for providers and admins."""
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .lead_search import search_leads
+from .models import Lead
+from .serializers import LeadSerializer
+
+logger = logging.getLogger(__name__)
+
+MIN_QUERY_LENGTH = 2
+
+
+class LeadSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_leads_view(request):
+    """
+    Ranked keyword search. Admins search every lead (full LeadSerializer rows);
+    providers search the leads their marketplace feed may show them (same
+    category / area eligibility, unlocked and test leads excluded) and get feed
+    card rows with contact details masked.
+    """
+    user = request.user
+    text = request.GET.get('q', '').strip()
+    if len(text) < MIN_QUERY_LENGTH:
+        return Response({"detail": f"Search query must be at least {MIN_QUERY_LENGTH} characters."}, status=400)
+
+    paginator = LeadSearchPagination()
+
+    if user.is_admin or user.is_staff:
+        leads = search_leads(
+            Lead.objects.select_related('client', 'service_category').defer('search_vector'),
+            text,
+        )
+        page = paginator.paginate_queryset(leads, request)
+        serializer = LeadSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    if not user.is_provider:
+        return Response({"detail": "Only providers and admins can search leads."}, status=403)
+
+    from .lead_pricing import tier_bucket
+    from .marketplace_feed import card_state, feed_queryset
+    from .wallet_api import _feed_rows
+
+    try:
+        profile = user.provider_profile
+    except ObjectDoesNotExist:
+        leads = Lead.objects.none()
+    else:
+        leads = search_leads(card_state(feed_queryset(user, profile), user), text)
+    page = paginator.paginate_queryset(leads, request)
+    return paginator.get_paginated_response(_feed_rows(page, tier_bucket(user), logger))
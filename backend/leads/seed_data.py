@@ -0,0 +1,34 @@
+"""
+Static data shared by the seed / synthetic data management commands
+(create_seed_leads, benchmark_routing).
+"""
+
+# South African cities and suburbs used for seed leads
+SEED_CITIES = [
+    {'city': 'Cape Town', 'suburbs': ['Camps Bay', 'Sea Point', 'Rondebosch', 'Newlands', 'Constantia', 'Hout Bay', 'Green Point', 'Claremont']},
+    {'city': 'Johannesburg', 'suburbs': ['Sandton', 'Rosebank', 'Parktown', 'Melrose', 'Illovo', 'Bryanston', 'Randburg', 'Midrand']},
+    {'city': 'Durban', 'suburbs': ['Umhlanga', 'Ballito', 'Westville', 'Berea', 'Glenwood', 'Morningside', 'Florida Road']},
+    {'city': 'Pretoria', 'suburbs': ['Hatfield', 'Brooklyn', 'Menlyn', 'Centurion', 'Waterkloof', 'Arcadia']},
+    {'city': 'Port Elizabeth', 'suburbs': ['Summerstrand', 'Richmond Hill', 'Humbleton', 'Greenacres', 'Mill Park']},
+    {'city': 'Bloemfontein', 'suburbs': ['Westdene', 'Fichardt Park', 'Bayswater', 'Langenhoven Park']},
+]
+
+# Approximate city centres (lat, lon) for synthetic coordinates
+SEED_CITY_CENTRES = {
+    'Cape Town': (-33.925, 18.424),
+    'Johannesburg': (-26.204, 28.047),
+    'Durban': (-29.858, 31.029),
+    'Pretoria': (-25.747, 28.229),
+    'Port Elizabeth': (-33.961, 25.614),
+    'Bloemfontein': (-29.085, 26.159),
+}
+
+# Relative share of marketplace activity per city (Gauteng-heavy, as in production)
+SEED_CITY_WEIGHTS = {
+    'Johannesburg': 0.38,
+    'Cape Town': 0.24,
+    'Pretoria': 0.16,
+    'Durban': 0.13,
+    'Port Elizabeth': 0.05,
+    'Bloemfontein': 0.04,
+}
@@ -82,34 +82,18 @@ class LeadSerializer(serializers.ModelSerializer):
         return False
     
     def get_credit_required(self, obj):
-        """Get credit cost required to unlock this lead"""
+        """Get credit cost required to unlock this lead (stored price, see lead_pricing.py)"""
+        from .lead_pricing import lead_credits
+
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
-            # Use stored credit cost or calculate default
-            if hasattr(obj, 'credit_cost') and obj.credit_cost:
-                return int(round(obj.credit_cost / 50))  # Convert Rands to credits
-            return 4  # Default cost: 4 credits (R200)
+            return lead_credits(obj)
         
         # If already unlocked, return 0
         if self.get_contact_details_unlocked(obj):
             return 0
         
-        # Use stored credit cost if available, otherwise calculate dynamic pricing
-        if hasattr(obj, 'credit_cost') and obj.credit_cost:
-            return int(round(obj.credit_cost / 50))  # Convert Rands to credits
-        
-        # Calculate dynamic pricing as fallback
-        try:
-            from .ml_services import DynamicPricingMLService
-            pricing_service = DynamicPricingMLService()
-            pricing_result = pricing_service.calculate_dynamic_lead_price(obj, request.user)
-            # Return credits (the ML service already returns credits)
-            return int(round(pricing_result['price']))
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Dynamic pricing failed: {str(e)}")
-            return 4  # Fallback to 4 credits (R200)
+        return lead_credits(obj, request.user)
     
     def validate_service_category_id(self, value):
         """Validate service category exists and is active"""
@@ -261,6 +245,9 @@ class ProviderForMeAssignmentSerializer(serializers.ModelSerializer):
 
     def get_distance_km(self, obj):
         from .provider_inbox import distance_km_for_provider
+        distances = self.context.get("distances_km")
+        if distances is not None and str(obj.lead_id) in distances:
+            return distances[str(obj.lead_id)]
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return None
@@ -269,10 +256,9 @@ class ProviderForMeAssignmentSerializer(serializers.ModelSerializer):
     def get_credits_required(self, obj):
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            from backend.users.wallet_views import get_lead_credits_cost
+            from .lead_pricing import lead_credits
 
-            n = get_lead_credits_cost(str(obj.lead.id), request.user)
-            return max(1, int(round(float(n))))
+            return lead_credits(obj.lead, request.user)
         c = obj.credit_cost
         if c:
             return max(1, int(round(c / 50)))
@@ -3,10 +3,10 @@ Lead assignment and filtering services
 """
 from django.db.models import Q
 from .models import Lead, LeadAssignment, ServiceCategory
-from .ml_services import LeadQualityMLService, LeadConversionMLService, DynamicPricingMLService, LeadAccessControlMLService
-from .client_behavior_ml import ClientBehaviorML
-from .hybrid_scoring import HybridLeadScorer
-from .ab_testing import ABTestFramework, EnhancedLeadScorer
+from . import gazetteer
+from .ml_registry import ml_registry
+from backend.leads.services.routing_trace import span, traced
+from .ab_testing import ABTestFramework
 import math
 from backend.users.models import User, ProviderProfile
 from .models import PredictionLog
@@ -20,16 +20,23 @@ logger = logging.getLogger(__name__)
 class LeadAssignmentService:
     """Service for assigning leads to providers based on various criteria"""
     
+    SCORE_CACHE_MAX_LEADS = 256
+    
     def __init__(self):
-        self.quality_ml = LeadQualityMLService()
-        self.conversion_ml = LeadConversionMLService()
-        self.pricing_ml = DynamicPricingMLService()
-        self.access_control = LeadAccessControlMLService()
-        self.hybrid_scorer = HybridLeadScorer()
-        self.enhanced_scorer = EnhancedLeadScorer()
-        self.client_behavior_ml = ClientBehaviorML()
+        # ML services are shared per process (models loaded once, see ml_registry);
+        # this object is a lightweight handle around them.
+        self.quality_ml = ml_registry.get('quality')
+        self.conversion_ml = ml_registry.get('conversion')
+        self.pricing_ml = ml_registry.get('pricing')
+        self.access_control = ml_registry.get('access_control')
+        self.hybrid_scorer = ml_registry.get('hybrid')
+        self.enhanced_scorer = ml_registry.get('enhanced')
+        self.client_behavior_ml = ml_registry.get('client_behavior')
+        # lead_id -> {provider_id: compatibility score}, filled by score_providers()
+        self._score_cache = {}
     
-    def _mask_client_name(self, name):
+    @staticmethod
+    def _mask_client_name(name):
         """Mask client name for privacy"""
         if not name or name == 'Anonymous Client':
             return 'Anonymous Client'
@@ -44,13 +51,17 @@ class LeadAssignmentService:
         else:
             return "Anonymous Client"
     
-    def assign_lead_to_providers(self, lead_id, skip_persistent_assignment_notifications=False):
+    @traced('assign_lead_to_providers')
+    def assign_lead_to_providers(self, lead_id, skip_persistent_assignment_notifications=False, providers=None):
         """
         Assign a verified lead to relevant providers based on:
         - Service category matching
         - Geographical service areas
         - Provider availability and credits
         - Lead quality and intent
+        
+        Pass `providers` (already matched, e.g. by the routing pipeline's match
+        stage) to skip find_matching_providers.
         """
         try:
             lead = Lead.objects.get(id=lead_id, status='verified')
@@ -66,7 +77,10 @@ class LeadAssignmentService:
                 return []
             
             # Find matching providers
-            matching_providers = self.find_matching_providers(lead)
+            if providers is None:
+                matching_providers = self.find_matching_providers(lead)
+            else:
+                matching_providers = list(providers)
             
             if not matching_providers:
                 logger.warning(f"No matching providers found for lead {lead_id}")
@@ -78,11 +92,13 @@ class LeadAssignmentService:
             provider_ids = []
             
             for provider in matching_providers:
-                assignment = self.create_assignment(lead, provider)
+                with span('create_assignment'):
+                    assignment = self.create_assignment(lead, provider)
                 if assignment:
                     assignments.append(assignment)
-                    # Calculate ML compatibility score for real-time notification
-                    compatibility_score = self.calculate_compatibility_score(lead, provider)
+                    # Reuse the batch ML compatibility score for real-time notification
+                    with span('compatibility'):
+                        compatibility_score = self.calculate_compatibility_score(lead, provider)
                     compatibility_scores[provider.id] = round(compatibility_score * 100, 1)
                     provider_ids.append(provider.id)
             
@@ -94,9 +110,11 @@ class LeadAssignmentService:
                 logger.info(f"Assigned lead {lead_id} to {len(assignments)} providers")
                 
                 # 🚀 SEND REAL-TIME LEAD ALERTS AND CREATE PERSISTENT NOTIFICATIONS
-                self._send_real_time_lead_alerts(lead, provider_ids, compatibility_scores)
+                with span('realtime_alerts'):
+                    self._send_real_time_lead_alerts(lead, provider_ids, compatibility_scores)
                 if not skip_persistent_assignment_notifications:
-                    self._create_persistent_notifications(lead, assignments)
+                    with span('persistent_notifications'):
+                        self._create_persistent_notifications(lead, assignments)
             
             return assignments
             
@@ -179,6 +197,7 @@ class LeadAssignmentService:
         }
         return budget_mapping.get(budget_range, 'Unknown')
     
+    @traced('find_matching_providers')
     def find_matching_providers(self, lead):
         """
         Find providers that match the lead criteria:
@@ -191,46 +210,63 @@ class LeadAssignmentService:
         logger.info(f"Finding matching providers for lead: {lead.title} (Category: {lead.service_category.slug})")
         
         # Active providers who may receive leads (signed up; not rejected/suspended)
+        # and who cover this category (ProviderCoverage: Service objects + JSON field)
         providers = User.objects.filter(
             user_type='provider',
             is_active=True,
-        ).exclude(
-            provider_profile__isnull=True,
+            provider_profile__coverage__category_id=lead.service_category_id,
         ).exclude(
             provider_profile__verification_status__in=('rejected', 'suspended'),
-        ).select_related('provider_profile')
+        ).select_related('provider_profile').distinct()
+        
+        # Travel-radius coverage for every provider at once (grid index + vectorized Haversine)
+        radius_distances = None
+        if lead.latitude is not None and lead.longitude is not None:
+            try:
+                from backend.leads.services.provider_index import provider_index
+                radius_distances = provider_index.within_radius(lead.latitude, lead.longitude)
+            except Exception as e:
+                logger.warning(f"Provider geo index unavailable for lead {lead.id}: {e}")
         
-        # Enhanced service category matching
-        matching_providers = []
+        candidates = []
         
-        for provider in providers:
-            # Check if provider offers this specific service category
-            if self._provider_offers_service(provider, lead.service_category.slug):
+        with span('eligibility'):
+            in_area = []
+            for provider in providers:
                 logger.info(f"Provider {provider.email} offers {lead.service_category.slug}")
                 
                 # Check geographical match
-                if self.is_geographical_match(lead, provider):
+                if self.is_geographical_match(lead, provider, radius_distances):
                     logger.info(f"Provider {provider.email} is in service area")
+                    in_area.append(provider)
+                else:
+                    logger.info(f"Provider {provider.email} not in service area")
+            
+            # Lead access (ML-based access control) and quality preferences for
+            # every in-area provider at once
+            access_checks = self.access_control.can_access_leads(
+                [provider.provider_profile for provider in in_area], lead
+            )
+            quality_matches = self.lead_quality_matches(lead, in_area)
+            for provider in in_area:
+                access_check = access_checks[provider.provider_profile.id]
+                if access_check['can_access']:
+                    logger.info(f"Provider {provider.email} has access to lead")
                     
-                    # Check lead access using ML-based access control
-                    access_check = self.access_control.can_access_lead(provider.provider_profile, lead)
-                    if access_check['can_access']:
-                        logger.info(f"Provider {provider.email} has access to lead")
-                        
-                        # Check lead quality match
-                        if self.is_lead_quality_match(lead, provider):
-                            # Calculate ML-based compatibility score
-                            compatibility_score = self.calculate_compatibility_score(lead, provider)
-                            matching_providers.append((provider, compatibility_score))
-                            logger.info(f"Provider {provider.email} added with score: {compatibility_score}")
-                        else:
-                            logger.info(f"Provider {provider.email} failed quality match")
+                    # Check lead quality match
+                    if provider.id in quality_matches:
+                        candidates.append(provider)
                     else:
-                        logger.info(f"Provider {provider.email} no access: {access_check.get('reason', 'Unknown')}")
+                        logger.info(f"Provider {provider.email} failed quality match")
                 else:
-                    logger.info(f"Provider {provider.email} not in service area")
-            else:
-                logger.info(f"Provider {provider.email} does not offer {lead.service_category.slug}")
+                    logger.info(f"Provider {provider.email} no access: {access_check.get('reason', 'Unknown')}")
+        
+        # Score all candidates in one batch (one model call per lead)
+        with span('ml_scoring'):
+            scores = self.score_providers(lead, candidates)
+        matching_providers = [(provider, scores[provider.id]) for provider in candidates]
+        for provider, compatibility_score in matching_providers:
+            logger.info(f"Provider {provider.email} added with score: {compatibility_score}")
         
         # Sort by ML compatibility score and traditional factors
         matching_providers.sort(
@@ -261,75 +297,90 @@ class LeadAssignmentService:
     
     def calculate_compatibility_score(self, lead, provider):
         """Calculate ML-based compatibility score between lead and provider"""
-        try:
-            # Get conversion probability from ML model
-            conversion_prob = self.conversion_ml.predict_conversion_probability(lead, provider)
-            
-            # Get client behavior conversion probability
+        cached = self._score_cache.get(lead.id, {})
+        if provider.id in cached:
+            return cached[provider.id]
+        return self.score_providers(lead, [provider]).get(provider.id, 0.5)
+    
+    def score_providers(self, lead, providers):
+        """
+        Batch ML compatibility scoring for one lead against many providers.
+        
+        Lead-level predictions (quality, client behavior) run once, provider
+        conversion probabilities come from a single predict_proba call, and
+        results are cached per lead so ranking and real-time alerts share them.
+        Returns {provider_id: score}.
+        """
+        providers = [p for p in providers if p.id not in self._score_cache.get(lead.id, {})]
+        if providers:
             try:
-                # Try to load and use client behavior ML model
-                model_path = '/home/paas/work_platform/backend/models/client_behavior_model.pkl'
-                self.client_behavior_ml.load_model(model_path)
-                
-                if self.client_behavior_ml.is_trained:
-                    client_conversion_prob = self.client_behavior_ml.predict_conversion_probability(lead)
-                    # Use the higher of the two probabilities
-                    conversion_prob = max(conversion_prob, client_conversion_prob)
-                    logger.info(f"Using client behavior ML: {client_conversion_prob:.3f} vs conversion ML: {conversion_prob:.3f}")
+                scores = self._score_providers_batch(lead, providers)
             except Exception as e:
-                logger.warning(f"Client behavior ML not available: {str(e)}")
-            
-            # Get lead quality score from ML model
-            lead_data = {
-                'title': lead.title,
-                'description': lead.description,
-                'location_address': lead.location_address,
-                'location_suburb': lead.location_suburb,
-                'location_city': lead.location_city,
-                'budget_range': lead.budget_range,
-                'urgency': lead.urgency,
-                'hiring_intent': lead.hiring_intent,
-                'hiring_timeline': lead.hiring_timeline,
-                'additional_requirements': lead.additional_requirements,
-                'research_purpose': lead.research_purpose,
-                'contact_phone': getattr(lead.client, 'phone', ''),
-                'contact_email': getattr(lead.client, 'email', ''),
-            }
-            quality_score = self.quality_ml.predict_lead_quality(lead_data)
+                logger.error(f"Error calculating compatibility score: {str(e)}")
+                scores = {provider.id: 0.5 for provider in providers}  # Default score
+            self._score_cache.setdefault(lead.id, {}).update(scores)
+            while len(self._score_cache) > self.SCORE_CACHE_MAX_LEADS:
+                self._score_cache.pop(next(iter(self._score_cache)))
+        return self._score_cache.get(lead.id, {})
+    
+    def _score_providers_batch(self, lead, providers):
+        # Get conversion probability from ML model (one matrix for all providers)
+        conversion_probs = self.conversion_ml.predict_conversion_probabilities(lead, providers)
+        
+        # Get client behavior conversion probability (lead-only, once per lead)
+        client_conversion_prob = None
+        try:
+            if self.client_behavior_ml.is_trained:
+                client_conversion_prob = self.client_behavior_ml.predict_conversion_probability(lead)
+                logger.info(f"Using client behavior ML: {client_conversion_prob:.3f} for {len(providers)} providers")
+        except Exception as e:
+            logger.warning(f"Client behavior ML not available: {str(e)}")
+        
+        # Get lead quality score from ML model (lead-only, once per lead)
+        quality_score = self.quality_ml.predict_for_lead(lead)
+        
+        scores = {}
+        prediction_logs = []
+        for provider, conversion_prob in zip(providers, conversion_probs):
+            if client_conversion_prob is not None:
+                # Use the higher of the two probabilities
+                conversion_prob = max(conversion_prob, client_conversion_prob)
             
             # Combine scores (weighted average)
-            compatibility_score = (conversion_prob * 0.6) + (quality_score / 100 * 0.4)
-
-            # Log predictions (best-effort)
-            try:
-                PredictionLog.objects.create(
-                    prediction_type='conversion',
-                    model_version=getattr(self.conversion_ml, 'model_version', 'latest'),
-                    lead=lead,
-                    provider=provider,
-                    input_summary={'lead_id': str(lead.id), 'provider_id': str(provider.id)},
-                    output_value=float(conversion_prob),
-                )
-                PredictionLog.objects.create(
-                    prediction_type='quality',
-                    model_version=getattr(self.quality_ml, 'model_version', 'latest'),
-                    lead=lead,
-                    provider=provider,
-                    input_summary={'lead_id': str(lead.id)},
-                    output_value=float(quality_score),
-                )
-            except Exception as log_err:
-                logger.warning(f"Failed to log prediction: {log_err}")
+            scores[provider.id] = (conversion_prob * 0.6) + (quality_score / 100 * 0.4)
             
-            return compatibility_score
-                
-        except Exception as e:
-            logger.error(f"Error calculating compatibility score: {str(e)}")
-            return 0.5  # Default score
+            prediction_logs.append(PredictionLog(
+                prediction_type='conversion',
+                model_version=getattr(self.conversion_ml, 'model_version', 'latest'),
+                lead=lead,
+                provider=provider,
+                input_summary={'lead_id': str(lead.id), 'provider_id': str(provider.id)},
+                output_value=float(conversion_prob),
+            ))
+            prediction_logs.append(PredictionLog(
+                prediction_type='quality',
+                model_version=getattr(self.quality_ml, 'model_version', 'latest'),
+                lead=lead,
+                provider=provider,
+                input_summary={'lead_id': str(lead.id)},
+                output_value=float(quality_score),
+            ))
+        
+        # Log predictions (best-effort)
+        try:
+            PredictionLog.objects.bulk_create(prediction_logs)
+        except Exception as log_err:
+            logger.warning(f"Failed to log prediction: {log_err}")
+        
+        return scores
     
     @staticmethod
-    def is_geographical_match(lead, provider):
-        """Check if provider serves the lead's location based on proximity and service areas"""
+    def is_geographical_match(lead, provider, radius_distances=None):
+        """
+        Check if provider serves the lead's location based on proximity and service areas.
+        radius_distances: optional {profile_id: km} from provider_index.within_radius(),
+        used instead of computing the distance for this provider.
+        """
         try:
             profile = provider.provider_profile
             service_areas_lower = [area.lower() for area in profile.service_areas]
@@ -339,6 +390,14 @@ class LeadAssignmentService:
                 hasattr(profile.user, 'latitude') and profile.user.latitude and 
                 hasattr(profile.user, 'longitude') and profile.user.longitude):
                 
+                if radius_distances is not None:
+                    # Precomputed: present only if within the provider's travel radius
+                    if profile.id in radius_distances:
+                        logger.info(f"Distance match: {radius_distances[profile.id]:.1f}km <= {profile.max_travel_distance}km for {provider.email}")
+                        return True
+                    logger.info(f"Distance too far: outside {profile.max_travel_distance}km for {provider.email}")
+                    return False
+                
                 # Calculate distance using Haversine formula
                 distance = LeadAssignmentService.calculate_distance(
                     lead.latitude, lead.longitude,
@@ -353,28 +412,38 @@ class LeadAssignmentService:
                     logger.info(f"Distance too far: {distance:.1f}km > {profile.max_travel_distance}km for {provider.email}")
                     return False
             
-            # 2. Check if provider serves the specific city
+            # 2. Service area names the lead's suburb, city, metro or province
+            #    (gazetteer ids; aliases such as Port Elizabeth/Gqeberha resolve alike)
+            location_gid = gazetteer.location_id_for_lead(lead)
+            if location_gid is not None:
+                covering = gazetteer.covering_ids(location_gid)
+                for area in service_areas_lower:
+                    if gazetteer.resolve(area) in covering:
+                        logger.info(f"Gazetteer match: '{area}' covers {gazetteer.place_name(location_gid)} for {provider.email}")
+                        return True
+            
+            # 3. Check if provider serves the specific city
             if lead.location_city.lower() in service_areas_lower:
                 logger.info(f"City match: {lead.location_city} in service areas for {provider.email}")
                 return True
             
-            # 3. Check if provider serves the specific suburb
+            # 4. Check if provider serves the specific suburb
             if lead.location_suburb.lower() in service_areas_lower:
                 logger.info(f"Suburb match: {lead.location_suburb} in service areas for {provider.email}")
                 return True
             
-            # 4. Check if provider serves the province (extract province from city)
+            # 5. Check if provider serves the province (extract province from city)
             lead_province = LeadAssignmentService.get_province_from_city(lead.location_city)
             if lead_province and lead_province.lower() in service_areas_lower:
                 logger.info(f"Province match: {lead_province} in service areas for {provider.email}")
                 return True
             
-            # 5. Check for regional matches (e.g., "Cape Town area", "Gauteng region")
+            # 6. Check for regional matches (e.g., "Cape Town area", "Gauteng region")
             if LeadAssignmentService.check_regional_match(lead.location_city, service_areas_lower):
                 logger.info(f"Regional match: {lead.location_city} matches regional service area for {provider.email}")
                 return True
             
-            # 6. If provider has "nationwide" but no coordinates, be more restrictive
+            # 7. If provider has "nationwide" but no coordinates, be more restrictive
             if any(keyword in service_areas_lower for keyword in ['south africa', 'nationwide', 'all', 'countrywide']):
                 # Only allow if it's a major city or if provider is in the same province
                 if LeadAssignmentService.is_major_sa_city(lead.location_city):
@@ -397,23 +466,10 @@ class LeadAssignmentService:
         This is the CRITICAL method that was missing!
         """
         try:
-            profile = provider.provider_profile
-            
-            # Method 1: Check Service objects (most reliable)
-            service_categories_from_objects = set()
-            for service in profile.services.filter(is_active=True):
-                service_categories_from_objects.add(service.category.slug)
-            
-            if service_category_slug in service_categories_from_objects:
-                return True
-            
-            # Method 2: Fallback to JSON field (for backward compatibility)
-            if profile.service_categories:
-                service_categories_from_json = set(profile.service_categories)
-                if service_category_slug in service_categories_from_json:
-                    return True
-            
-            return False
+            # ProviderCoverage holds Service-object and JSON-field categories
+            return provider.provider_profile.coverage.filter(
+                category__slug=service_category_slug
+            ).exists()
             
         except Exception as e:
             logger.error(f"Error checking if provider {provider.email} offers {service_category_slug}: {str(e)}")
@@ -438,25 +494,36 @@ class LeadAssignmentService:
     @staticmethod
     def is_lead_quality_match(lead, provider):
         """Check if lead quality matches provider preferences"""
-        try:
-            profile = provider.provider_profile
-            
-            # Check minimum job value
-            budget_min = LeadAssignmentService.get_budget_minimum(lead.budget_range)
-            if budget_min and budget_min < profile.minimum_job_value:
-                return False
-            
-            # Check if provider wants high-intent leads only
-            if (hasattr(profile, 'prefer_high_intent_leads') and 
-                profile.prefer_high_intent_leads and 
-                lead.hiring_intent not in ['ready_to_hire', 'planning_to_hire']):
-                return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error checking lead quality match: {str(e)}")
-            return True  # Default to allowing the lead
+        return provider.id in LeadAssignmentService.lead_quality_matches(lead, [provider])
+    
+    @staticmethod
+    def lead_quality_matches(lead, providers):
+        """
+        Ids of the providers whose preferences accept the lead (is_lead_quality_match
+        for many providers; the lead-side values are computed once).
+        """
+        budget_min = LeadAssignmentService.get_budget_minimum(lead.budget_range)
+        high_intent = lead.hiring_intent in ['ready_to_hire', 'planning_to_hire']
+        
+        matches = set()
+        for provider in providers:
+            try:
+                profile = provider.provider_profile
+                
+                # Check minimum job value
+                if budget_min and budget_min < profile.minimum_job_value:
+                    continue
+                
+                # Check if provider wants high-intent leads only
+                if (getattr(profile, 'prefer_high_intent_leads', False) and not high_intent):
+                    continue
+                
+                matches.add(provider.id)
+                
+            except Exception as e:
+                logger.error(f"Error checking lead quality match: {str(e)}")
+                matches.add(provider.id)  # Default to allowing the lead
+        return matches
     
     def calculate_lead_quality_score(self, lead, user_id=None):
         """Calculate lead quality score using A/B testing enhanced scoring"""
@@ -569,37 +636,13 @@ class LeadAssignmentService:
     
     @staticmethod
     def get_province_from_city(city):
-        """Get South African province from city name"""
-        city_lower = city.lower()
-        
-        province_mapping = {
-            'western cape': ['cape town', 'george', 'knysna', 'mossel bay', 'oudtshoorn', 'stellenbosch', 'paarl', 'somerset west'],
-            'gauteng': ['johannesburg', 'pretoria', 'soweto', 'sandton', 'randburg', 'centurion', 'midrand', 'benoni', 'kempton park'],
-            'kwazulu-natal': ['durban', 'pietermaritzburg', 'newcastle', 'richards bay', 'empangeni', 'ballito', 'umhlanga'],
-            'eastern cape': ['port elizabeth', 'east london', 'grahamstown', 'gqeberha', 'nelson mandela bay'],
-            'free state': ['bloemfontein', 'welkom', 'bethlehem', 'kroonstad', 'sasolburg'],
-            'mpumalanga': ['nelspruit', 'witbank', 'secunda', 'standerton', 'mbombela'],
-            'limpopo': ['polokwane', 'tzaneen', 'modimolle', 'bela-bela', 'lephalale'],
-            'northern cape': ['kimberley', 'upington', 'springbok', 'de aar', 'kathu'],
-            'north west': ['mahikeng', 'klerksdorp', 'potchefstroom', 'rustenburg', 'mafikeng']
-        }
-        
-        for province, cities in province_mapping.items():
-            if city_lower in cities:
-                return province.title()
-        
-        return None
+        """Get South African province from city name (gazetteer lookup)"""
+        return gazetteer.province_name(city)
     
     @staticmethod
     def is_major_sa_city(city):
-        """Check if city is a major South African city"""
-        major_cities = [
-            'cape town', 'johannesburg', 'durban', 'pretoria', 'port elizabeth',
-            'bloemfontein', 'nelspruit', 'polokwane', 'kimberley', 'mahikeng',
-            'east london', 'george', 'knysna', 'mossel bay', 'oudtshoorn',
-            'soweto', 'sandton', 'randburg', 'centurion', 'midrand'
-        ]
-        return city.lower() in major_cities
+        """Check if city is a major South African city (gazetteer lookup)"""
+        return gazetteer.is_major_city(city)
     
     @staticmethod
     def check_regional_match(lead_city, service_areas):
@@ -653,29 +696,11 @@ class LeadFilteringService:
                 if 'expires_at__gt' in filters:
                     base_filters['expires_at__gt'] = filters['expires_at__gt']
             
-            # Convert service category slugs to IDs
-            # IMPORTANT: Check BOTH Service objects AND service_categories JSON field
-            from backend.leads.models import ServiceCategory
-            from backend.users.models import Service
+            # Service objects AND the service_categories JSON field, resolved
+            # once per provider and cached (users/match_profile.py)
+            from backend.users.match_profile import get_match_profile
             
-            # Method 1: Get categories from Service objects (most reliable)
-            service_category_ids_from_objects = set()
-            service_category_slugs_from_objects = set()
-            for service in profile.services.filter(is_active=True):
-                if service.category:
-                    service_category_ids_from_objects.add(service.category.id)
-                    service_category_slugs_from_objects.add(service.category.slug)
-            
-            # Method 2: Get categories from JSON field (backward compatibility)
-            category_slugs = profile.service_categories if profile.service_categories else []
-            
-            # Combine both sources
-            all_category_ids = list(service_category_ids_from_objects)
-            all_category_slugs = list(category_slugs) + list(service_category_slugs_from_objects)
-            
-            category_ids = ServiceCategory.objects.filter(
-                Q(id__in=all_category_ids) | Q(slug__in=all_category_slugs)
-            ).values_list('id', flat=True)
+            match = get_match_profile(profile)
             
             # Base query
             # IMPORTANT: Exclude test leads - providers should NEVER see test leads
@@ -683,20 +708,15 @@ class LeadFilteringService:
             
             leads = Lead.objects.filter(
                 **base_filters,
-                service_category__id__in=category_ids
+                service_category__id__in=match.category_ids
             ).select_related('service_category', 'client')
             
             # Filter out test leads
             leads = exclude_test_leads(leads)
             
             # Apply geographical filter
-            if profile.service_areas:
-                service_area_filter = Q()
-                for area in profile.service_areas:
-                    service_area_filter |= (
-                        Q(location_suburb__icontains=area) |
-                        Q(location_city__icontains=area)
-                    )
+            service_area_filter = gazetteer.lead_area_q(match.service_areas)
+            if service_area_filter is not None:
                 leads = leads.filter(service_area_filter)
             
             # Exclude already assigned leads
@@ -724,13 +744,9 @@ class LeadFilteringService:
         """Apply geographical filtering based on provider's service areas"""
         try:
             # Filter by service areas
-            service_area_filter = Q()
-            for area in profile.service_areas:
-                service_area_filter |= (
-                    Q(location_suburb__icontains=area) |
-                    Q(location_city__icontains=area)
-                )
-            
+            service_area_filter = gazetteer.lead_area_q(profile.service_areas)
+            if service_area_filter is None:
+                return leads
             return leads.filter(service_area_filter)
             
         except Exception as e:
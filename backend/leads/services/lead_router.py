@@ -13,6 +13,8 @@ import logging
 from django.core.mail import send_mail
 from django.conf import settings
 
+from .routing_trace import set_count, span, trace_lead, traced
+
 logger = logging.getLogger(__name__)
 
 # Primary: Resend. Fallback: Django SMTP/console (when Resend not configured).
@@ -40,24 +42,65 @@ def match_providers(lead):
        active subscription or premium listing (same as before; verification optional)
     2. Provider's service_categories (JSON list of slugs) must include
        the lead's service_category slug
-    3. Provider's service_areas (JSON list of area strings) must include
-       the lead's location_city or location_suburb
+    3. One of the provider's service_areas (JSON list of area strings) covers
+       the lead's suburb or city - the same place, an alias, or a containing
+       city/metro/province per the gazetteer - OR the lead's coordinates
+       fall inside the provider's max_travel_distance from their base location
 
     Ordering (deterministic):
     1. Premium listing active providers first
     2. Then by subscription tier (premium > standard > basic)
     3. Then by provider profile id (stable tiebreaker)
 
+    Candidates come from the in-memory provider eligibility index
+    (see provider_index.py); only the winning profiles are loaded from the DB.
+    Falls back to a full provider scan if the index is unavailable.
+
     Returns:
         QuerySet of User objects (providers), max 10
         (lead.max_providers slots available, but we notify more to ensure fill rate)
     """
     from backend.users.models import ProviderProfile
+    from backend.leads.services.provider_index import provider_index
 
     category_slug = lead.service_category.slug
     city = lead.location_city.strip().lower() if lead.location_city else ''
     suburb = lead.location_suburb.strip().lower() if lead.location_suburb else ''
 
+    try:
+        top_entries, eligible_count = provider_index.match(
+            category_slug, city, suburb, limit=10,
+            latitude=lead.latitude, longitude=lead.longitude,
+        )
+    except Exception as e:
+        logger.warning(f"[LeadRouter] Provider index unavailable for lead {lead.id}, scanning: {e}")
+        return _match_providers_scan(lead, category_slug, city, suburb)
+
+    # Load only the winners, then restore index ordering
+    profiles_by_id = ProviderProfile.objects.select_related('user').in_bulk(
+        [entry.profile_id for entry in top_entries]
+    )
+    providers = [
+        profiles_by_id[entry.profile_id].user
+        for entry in top_entries
+        if entry.profile_id in profiles_by_id
+    ]
+
+    logger.info(
+        f"[LeadRouter] Lead {lead.id} ({lead.service_category.slug}, {lead.location_city}): "
+        f"matched {len(providers)} providers from {eligible_count} eligible"
+    )
+
+    return providers
+
+
+def _match_providers_scan(lead, category_slug, city, suburb):
+    """Per-provider scan used when the eligibility index cannot be consulted."""
+    from backend.users.models import ProviderProfile
+    from backend.leads.gazetteer import area_matches
+    from backend.leads.provider_inbox import haversine_km
+    from backend.leads.services.provider_index import TIER_ORDER
+
     # Step 1: Signed-up providers (pending or verified); exclude rejected/suspended only
     eligible_profiles = ProviderProfile.objects.filter(
         user__user_type='provider',
@@ -80,17 +123,18 @@ def match_providers(lead):
             continue
 
         # Check service category match
-        profile_categories = [c.lower() for c in (profile.service_categories or [])]
+        profile_categories = [c.lower() for c in (profile.service_categories or []) if isinstance(c, str)]
         if category_slug.lower() not in profile_categories:
             continue
 
-        # Check location match (city OR suburb)
-        profile_areas = [a.lower() for a in (profile.service_areas or [])]
-        location_match = any(
-            city in area or area in city or
-            suburb in area or area in suburb
-            for area in profile_areas
-        )
+        # Check location match (gazetteer containment on city/suburb, substring for unknown names)
+        profile_areas = [a.lower() for a in (profile.service_areas or []) if isinstance(a, str)]
+        location_match = any(area_matches(area, city, suburb) for area in profile_areas)
+        if (not location_match and (profile.max_travel_distance or 0) > 0 and
+                None not in (lead.latitude, lead.longitude, profile.user.latitude, profile.user.longitude)):
+            location_match = haversine_km(
+                lead.latitude, lead.longitude, profile.user.latitude, profile.user.longitude
+            ) <= profile.max_travel_distance
         if not location_match:
             continue
 
@@ -98,14 +142,6 @@ def match_providers(lead):
 
     # Step 3: Sort deterministically
     # Premium listing first, then subscription tier, then profile id
-    TIER_ORDER = {
-        'enterprise': 0,
-        'pro': 1,
-        'advanced': 2,
-        'basic': 3,
-        'pay_as_you_go': 4
-    }
-
     matched_profiles.sort(key=lambda p: (
         0 if (hasattr(p, 'is_premium_listing_active') and p.is_premium_listing_active) else 1,
         TIER_ORDER.get(p.subscription_tier, 99),
@@ -113,19 +149,17 @@ def match_providers(lead):
     ))
 
     # Return top 10 providers (more than max_providers to account for non-openers)
-    top_profiles = matched_profiles[:10]
-
-    # Extract User objects
-    providers = [profile.user for profile in top_profiles]
+    providers = [profile.user for profile in matched_profiles[:10]]
 
     logger.info(
         f"[LeadRouter] Lead {lead.id} ({lead.service_category.slug}, {lead.location_city}): "
-        f"matched {len(providers)} providers from {len(matched_profiles)} eligible"
+        f"matched {len(providers)} providers from {len(matched_profiles)} eligible (scan)"
     )
 
     return providers
 
 
+@traced('notify_providers')
 def notify_providers(lead, providers, skip_in_app=False):
     """
     Notify matched providers about a new lead.
@@ -147,12 +181,17 @@ def notify_providers(lead, providers, skip_in_app=False):
 
     lead_url = f"{settings.FRONTEND_URL}/provider/leads/{lead.id}/"
 
+    notified = 0
     for provider in providers:
         try:
-            _send_lead_email(lead, provider, lead_url)
+            with span('email'):
+                _send_lead_email(lead, provider, lead_url)
             if not skip_in_app:
-                _create_notification(lead, provider)
-            _send_push_notification(lead, provider)
+                with span('in_app'):
+                    _create_notification(lead, provider)
+            with span('push'):
+                _send_push_notification(lead, provider)
+            notified += 1
             logger.info(
                 f"[LeadRouter] Notified provider {provider.email} "
                 f"about lead {lead.id}"
@@ -164,6 +203,8 @@ def notify_providers(lead, providers, skip_in_app=False):
                 f"for lead {lead.id}: {e}"
             )
 
+    set_count('providers_notified', notified)
+
 
 def _send_lead_email(lead, provider, lead_url):
     """Send a lead notification email to a single provider. Uses Resend first, then Django backend."""
@@ -299,74 +340,22 @@ def route_lead(lead):
     Full pipeline: quality gate, ML assignments, then email/push/in-app notifications.
     Idempotent per lead via providers_routed_at (set after first successful run).
 
-    Called from signal on verified leads. Fully exception-safe.
+    Runs the routing_pipeline stages synchronously in the caller. The Lead signal
+    uses routing_pipeline.enqueue_lead_routing instead so saves never block on it.
+    Fully exception-safe.
     """
     try:
-        from django.utils import timezone
-        from backend.leads.models import Lead, LeadAssignment
-
-        lead_id = lead.id
-        lead_row = Lead.objects.filter(pk=lead_id).first()
-        if not lead_row:
-            return
-        if lead_row.providers_routed_at:
-            logger.info(f"[LeadRouter] Lead {lead_id} already routed — skipping")
-            return
+        from backend.leads.services.routing_pipeline import enqueue_lead_routing, process_routing_job
 
-        if lead_row.status == 'assigned':
-            assignments = list(
-                LeadAssignment.objects.filter(lead_id=lead_id).select_related('provider')
-            )
-            if assignments:
-                notify_providers(lead_row, [a.provider for a in assignments], skip_in_app=True)
-            Lead.objects.filter(pk=lead_id).update(providers_routed_at=timezone.now())
-            return
-
-        if lead_row.status != 'verified':
-            return
-
-        passed, reason = passes_quality_gate(lead)
-        if not passed:
-            logger.warning(
-                f"[LeadRouter] Lead {lead.id} blocked by quality gate: {reason}"
-            )
-            _flag_for_review(lead, reason)
-            return
-
-        from backend.leads.services import LeadAssignmentService
-
-        assignment_service = LeadAssignmentService()
-        assignments = assignment_service.assign_lead_to_providers(
-            str(lead_id),
-            skip_persistent_assignment_notifications=True,
-        )
-
-        lead_refresh = Lead.objects.filter(pk=lead_id).first()
-        if not lead_refresh:
-            return
-        if lead_refresh.providers_routed_at:
-            return
-
-        if assignments:
-            providers = [a.provider for a in assignments]
-            notify_providers(lead_refresh, providers, skip_in_app=True)
-        else:
-            providers = match_providers(lead_refresh)
-            if providers:
-                notify_providers(lead_refresh, providers, skip_in_app=False)
-            else:
-                logger.warning(
-                    f"[LeadRouter] No matching providers found for lead {lead_id} "
-                    f"(category={lead.service_category.slug}, city={lead.location_city})"
-                )
-
-        Lead.objects.filter(pk=lead_id).update(
-            providers_routed_at=timezone.now(),
-        )
+        with trace_lead(lead.id, 'route_lead'):
+            job = enqueue_lead_routing(lead.id, dispatch=False)
+            if job is not None:
+                process_routing_job(job.pk)
     except Exception as e:
         logger.error(f"[LeadRouter] Routing failed for lead {lead.id}: {e}", exc_info=True)
 
 
+@traced('quality_gate')
 def passes_quality_gate(lead):
     """
     Rule-based quality checks before routing to providers.
@@ -407,29 +396,10 @@ def passes_quality_gate(lead):
     # === LAYER 2: ML Quality Score (If Available) ===
     # Use existing LeadQualityMLService if model is trained
     try:
-        from backend.leads.ml_services import LeadQualityMLService
-        
-        ml_service = LeadQualityMLService()
-        
-        # Prepare lead data for ML
-        lead_data = {
-            'title': lead.title or '',
-            'description': lead.description or '',
-            'location_address': lead.location_address or '',
-            'location_suburb': lead.location_suburb or '',
-            'location_city': lead.location_city or '',
-            'budget_range': lead.budget_range or '',
-            'urgency': lead.urgency or 'flexible',
-            'hiring_intent': getattr(lead, 'hiring_intent', 'researching'),
-            'hiring_timeline': getattr(lead, 'hiring_timeline', 'flexible'),
-            'additional_requirements': getattr(lead, 'additional_requirements', ''),
-            'research_purpose': getattr(lead, 'research_purpose', ''),
-            'verification_score': lead.verification_score,
-            'contact_phone': lead.client.phone if lead.client else '',
-            'client__email': lead.client.email if lead.client else '',
-        }
+        from backend.leads.ml_registry import ml_registry
         
-        ml_score = ml_service.predict_lead_quality(lead_data)
+        # Stored features (lead_features.py); the model is shared per process
+        ml_score = ml_registry.get('quality').predict_for_lead(lead)
         
         # ML threshold: 40/100 (low quality leads blocked)
         if ml_score < 40:
@@ -521,6 +491,8 @@ def _flag_for_review(lead, reason):
         verification_notes=note,
         status='pending'  # Kick back to pending for admin review
     )
+    from backend.leads.feed_version import bump_category
+    bump_category(lead.service_category_id)
     
     logger.warning(f"[QualityGate] Lead {lead.id} flagged for review → {note}")
     
@@ -0,0 +1,461 @@
+"""
+Provider Eligibility Index for ProConnectSA lead routing.
+
+In-memory inverted index used by lead_router.match_providers:
+
+    category slug -> area token -> {ProviderProfile ids}
+    category slug -> gazetteer id -> {ProviderProfile ids}
+
+(area tokens that resolve in the gazetteer, see leads/gazetteer.py, are also
+posted under their location id) plus a uniform lat/lon grid over provider base locations (User.latitude /
+longitude) so "whose max_travel_distance covers this point" needs only the
+providers bucketed in one cell, filtered with vectorized NumPy Haversine.
+
+Only signed-up, active, non-rejected/suspended providers are indexed. Time-based
+checks (subscription end date, premium listing expiry) are evaluated at query
+time against the stored entry, so the index never goes stale on the clock.
+
+Design principles:
+- Maintained incrementally from ProviderProfile / User post_save + post_delete signals,
+  applied on transaction commit
+- Rebuildable at any time (lazy on first use, `rebuild_provider_index` command)
+- Other worker processes notice changes via a version stamp in the shared cache,
+  and every process rebuilds after PROVIDER_INDEX_MAX_AGE_SECONDS as a safety net
+- Matching semantics identical to the original per-provider scan
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from backend.leads import gazetteer
+from backend.leads.provider_inbox import haversine_km_many
+from backend.procompare.tiered_cache import bump_stamp, has_atomic_incr
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'provider_index:version'
+
+# Grid cell size in degrees (~28km north-south); a provider is bucketed in every
+# cell its travel circle's bounding box touches
+GRID_CELL_DEGREES = 0.25
+KM_PER_DEGREE_LAT = 111.32
+
+TIER_ORDER = {
+    'enterprise': 0,
+    'pro': 1,
+    'advanced': 2,
+    'basic': 3,
+    'pay_as_you_go': 4
+}
+
+ProviderEntry = namedtuple('ProviderEntry', [
+    'profile_id',
+    'user_id',
+    'subscription_tier',
+    'subscription_end_date',
+    'is_premium_listing',
+    'premium_listing_started_at',
+    'premium_listing_expires_at',
+    'categories',
+    'areas',
+    'latitude',
+    'longitude',
+    'max_travel_distance',
+])
+
+_PROFILE_FIELDS = (
+    'id',
+    'user_id',
+    'subscription_tier',
+    'subscription_end_date',
+    'is_premium_listing',
+    'premium_listing_started_at',
+    'premium_listing_expires_at',
+    'service_categories',
+    'service_areas',
+    'max_travel_distance',
+    'user__latitude',
+    'user__longitude',
+)
+
+
+# Saves touching none of these (e.g. login's update_fields=['last_login']) leave entries unchanged
+INDEXED_PROFILE_FIELDS = frozenset(
+    field for field in _PROFILE_FIELDS if not field.startswith('user__')
+) | {'user', 'verification_status'}
+INDEXED_USER_FIELDS = frozenset({'user_type', 'is_active', 'latitude', 'longitude'})
+
+
+def _lowered_strings(values):
+    """Lowercased string members of a JSON list (non-strings are ignored)."""
+    return tuple(v.lower() for v in (values or []) if isinstance(v, str))
+
+
+def _entry_from_row(row):
+    return ProviderEntry(
+        profile_id=row['id'],
+        user_id=row['user_id'],
+        subscription_tier=row['subscription_tier'],
+        subscription_end_date=row['subscription_end_date'],
+        is_premium_listing=row['is_premium_listing'],
+        premium_listing_started_at=row['premium_listing_started_at'],
+        premium_listing_expires_at=row['premium_listing_expires_at'],
+        categories=frozenset(_lowered_strings(row['service_categories'])),
+        areas=frozenset(_lowered_strings(row['service_areas'])),
+        latitude=row['user__latitude'],
+        longitude=row['user__longitude'],
+        max_travel_distance=row['max_travel_distance'] or 0,
+    )
+
+
+def has_location(entry):
+    return entry.latitude is not None and entry.longitude is not None
+
+
+def grid_cell(lat, lon):
+    return (int(math.floor(lat / GRID_CELL_DEGREES)), int(math.floor(lon / GRID_CELL_DEGREES)))
+
+
+def grid_cells_for_radius(lat, lon, radius_km):
+    """All grid cells touched by the bounding box of a circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    lat_lo, lon_lo = grid_cell(lat - dlat, lon - dlon)
+    lat_hi, lon_hi = grid_cell(lat + dlat, lon + dlon)
+    return [(i, j) for i in range(lat_lo, lat_hi + 1) for j in range(lon_lo, lon_hi + 1)]
+
+
+def is_premium_active(entry, now):
+    """Mirror of ProviderProfile.is_premium_listing_active for an index entry."""
+    if not entry.is_premium_listing or not entry.premium_listing_started_at:
+        return False
+    if entry.premium_listing_expires_at is None:
+        return True  # Lifetime premium
+    return entry.premium_listing_expires_at > now
+
+
+def is_subscription_active(entry, now):
+    """Mirror of ProviderProfile.is_subscription_active for an index entry."""
+    if not entry.subscription_end_date:
+        return False
+    return entry.subscription_end_date > now
+
+
+def sort_key(entry, now):
+    """Premium listing first, then subscription tier, then profile id (stable tiebreaker)."""
+    return (
+        0 if is_premium_active(entry, now) else 1,
+        TIER_ORDER.get(entry.subscription_tier, 99),
+        str(entry.profile_id),
+    )
+
+
+class ProviderEligibilityIndex:
+    """
+    Thread-safe inverted index of routable providers.
+
+    Area matching follows gazetteer.area_matches (same rule as the scan): areas
+    and lead locations that resolve are matched by id containment - a handful of
+    dict lookups on the lead's covering ids - plus the legacy substring check
+    over the distinct area tokens of one category. The resolution for a
+    (category, city, suburb) triple is memoized until the index changes.
+    """
+
+    AREA_MEMO_SIZE = 2048
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._postings = {}
+        self._gid_postings = {}
+        self._cells = {}
+        self._area_memo = OrderedDict()
+        self._built_at = None
+        self._version = None
+
+    # ------------------------------------------------------------------ build
+
+    def rebuild(self):
+        """Rebuild the whole index from the database."""
+        from backend.users.models import ProviderProfile
+
+        started = time.monotonic()
+        # Read the stamp first: a bump while we scan makes the next lookup rebuild again
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(VERSION_CACHE_KEY, int(time.time() * 1000), timeout=None)
+            version = cache.get(VERSION_CACHE_KEY)
+        rows = ProviderProfile.objects.filter(
+            user__user_type='provider',
+            user__is_active=True,
+        ).exclude(
+            verification_status__in=('rejected', 'suspended'),
+        ).values(*_PROFILE_FIELDS).iterator(chunk_size=2000)
+
+        entries = {}
+        postings = {}
+        gid_postings = {}
+        cells = {}
+        for row in rows:
+            entry = _entry_from_row(row)
+            entries[entry.profile_id] = entry
+            self._post(postings, gid_postings, entry)
+            self._post_location(cells, entry)
+
+        with self._lock:
+            self._entries = entries
+            self._postings = postings
+            self._gid_postings = gid_postings
+            self._cells = cells
+            self._area_memo.clear()
+            self._built_at = time.monotonic()
+            self._version = version
+
+        logger.info(
+            f"[ProviderIndex] Rebuilt with {len(entries)} providers in "
+            f"{(time.monotonic() - started) * 1000:.1f}ms"
+        )
+
+    def _ensure_fresh(self):
+        max_age = getattr(settings, 'PROVIDER_INDEX_MAX_AGE_SECONDS', 600)
+        with self._lock:
+            built_at = self._built_at
+            version = self._version
+        if built_at is None:
+            self.rebuild()
+            return
+        if max_age and time.monotonic() - built_at > max_age:
+            self.rebuild()
+            return
+        if cache.get(VERSION_CACHE_KEY) != version:
+            self.rebuild()
+
+    def invalidate(self):
+        """Drop the local index; the next lookup rebuilds it."""
+        with self._lock:
+            self._built_at = None
+
+    # ---------------------------------------------------------------- updates
+
+    @staticmethod
+    def _post(postings, gid_postings, entry):
+        for category in entry.categories:
+            by_area = postings.setdefault(category, {})
+            for area in entry.areas:
+                by_area.setdefault(area, set()).add(entry.profile_id)
+                place_id = gazetteer.resolve(area)
+                if place_id is not None:
+                    gid_postings.setdefault(category, {}).setdefault(place_id, set()).add(entry.profile_id)
+
+    @staticmethod
+    def _post_location(cells, entry):
+        if not has_location(entry) or entry.max_travel_distance <= 0:
+            return
+        for cell in grid_cells_for_radius(entry.latitude, entry.longitude, entry.max_travel_distance):
+            cells.setdefault(cell, set()).add(entry.profile_id)
+
+    def _unpost_location(self, entry):
+        if not has_location(entry) or entry.max_travel_distance <= 0:
+            return
+        for cell in grid_cells_for_radius(entry.latitude, entry.longitude, entry.max_travel_distance):
+            ids = self._cells.get(cell)
+            if ids is None:
+                continue
+            ids.discard(entry.profile_id)
+            if not ids:
+                del self._cells[cell]
+
+    @staticmethod
+    def _discard(postings, category, key, profile_id):
+        by_key = postings.get(category)
+        if not by_key:
+            return
+        ids = by_key.get(key)
+        if ids is not None:
+            ids.discard(profile_id)
+            if not ids:
+                del by_key[key]
+        if not by_key:
+            del postings[category]
+
+    def _unpost(self, entry):
+        for category in entry.categories:
+            for area in entry.areas:
+                self._discard(self._postings, category, area, entry.profile_id)
+                place_id = gazetteer.resolve(area)
+                if place_id is not None:
+                    self._discard(self._gid_postings, category, place_id, entry.profile_id)
+
+    def update_profile(self, profile):
+        """
+        Re-index one ProviderProfile after save (or drop it if no longer routable).
+        Applied once the surrounding transaction commits.
+        """
+        user = profile.user
+        routable = (
+            user.user_type == 'provider'
+            and user.is_active
+            and profile.verification_status not in ('rejected', 'suspended')
+        )
+        row = {field: getattr(profile, field) for field in _PROFILE_FIELDS if not field.startswith('user__')}
+        row['user__latitude'] = user.latitude
+        row['user__longitude'] = user.longitude
+        entry = _entry_from_row(row) if routable else None
+        self._apply_on_commit(profile.id, entry)
+
+    def remove_profile(self, profile_id):
+        """Drop a ProviderProfile from the index (profile or user deleted), once committed."""
+        self._apply_on_commit(profile_id, None)
+
+    def _apply_on_commit(self, profile_id, entry):
+        # A rolled-back save must not reach the index or the shared version stamp
+        # (outside an atomic block on_commit runs immediately)
+        transaction.on_commit(lambda: self._apply(profile_id, entry))
+
+    def _apply(self, profile_id, entry):
+        try:
+            with self._lock:
+                if (
+                    self._built_at is not None
+                    and self._entries.get(profile_id) == entry
+                    and cache.get(VERSION_CACHE_KEY) == self._version
+                ):
+                    # Our copy is current and already holds this entry: nothing to broadcast
+                    return
+                if self._built_at is not None:
+                    previous = self._entries.pop(profile_id, None)
+                    if previous is not None:
+                        self._unpost(previous)
+                        self._unpost_location(previous)
+                    if entry is not None:
+                        self._entries[profile_id] = entry
+                        self._post(self._postings, self._gid_postings, entry)
+                        self._post_location(self._cells, entry)
+                    self._area_memo.clear()
+                version = _bump_shared_version()
+                if has_atomic_incr(cache) and self._version is not None and version == self._version + 1:
+                    self._version = version
+                else:
+                    # Another process changed providers since our last sync (or the
+                    # stamp was reset, or is not a counter): our copy may lack those
+                    # changes, rebuild on next use
+                    self._built_at = None
+        except Exception as e:
+            logger.error(f"[ProviderIndex] Failed to apply update for profile {profile_id}: {e}")
+            self.invalidate()
+
+    # ---------------------------------------------------------------- queries
+
+    def _matching_areas(self, category, city, suburb):
+        """(covering gazetteer ids, area tokens matched by substring) for a lead location."""
+        memo_key = (category, city, suburb)
+        cached = self._area_memo.get(memo_key)
+        if cached is not None:
+            self._area_memo.move_to_end(memo_key)
+            return cached
+        location_id = gazetteer.resolve_location(suburb, city)
+        covering = gazetteer.covering_ids(location_id)
+        by_area = self._postings.get(category, {})
+        # Substring matches apply to every area, as in gazetteer.area_matches
+        tokens = tuple(
+            a for a in by_area
+            if a.strip() and gazetteer.substring_area_match(a.strip(), city, suburb)
+        )
+        result = (covering, tokens)
+        self._area_memo[memo_key] = result
+        if len(self._area_memo) > self.AREA_MEMO_SIZE:
+            self._area_memo.popitem(last=False)
+        return result
+
+    def candidates(self, category_slug, city, suburb):
+        """Entries whose categories include the slug and whose areas cover the lead's city or suburb."""
+        self._ensure_fresh()
+        category = (category_slug or '').lower()
+        with self._lock:
+            by_area = self._postings.get(category)
+            if not by_area:
+                return []
+            by_gid = self._gid_postings.get(category, {})
+            covering, tokens = self._matching_areas(category, city, suburb)
+            ids = set()
+            for place_id in covering:
+                ids |= by_gid.get(place_id, set())
+            for area in tokens:
+                ids |= by_area[area]
+            return [self._entries[i] for i in ids]
+
+    def within_radius(self, latitude, longitude):
+        """
+        {profile_id: distance_km} for providers whose travel radius covers the point.
+        Only providers bucketed in the point's grid cell are distance-checked.
+        """
+        if latitude is None or longitude is None:
+            return {}
+        self._ensure_fresh()
+        lat, lon = float(latitude), float(longitude)
+        with self._lock:
+            ids = list(self._cells.get(grid_cell(lat, lon), ()))
+            if not ids:
+                return {}
+            entries = [self._entries[i] for i in ids]
+        lats = np.fromiter((e.latitude for e in entries), dtype=float, count=len(entries))
+        lons = np.fromiter((e.longitude for e in entries), dtype=float, count=len(entries))
+        radii = np.fromiter((e.max_travel_distance for e in entries), dtype=float, count=len(entries))
+        distances = haversine_km_many(lat, lon, lats, lons)
+        inside = distances <= radii
+        return {
+            entries[k].profile_id: round(float(distances[k]), 1)
+            for k in np.flatnonzero(inside)
+        }
+
+    def match(self, category_slug, city, suburb, limit=10, now=None, latitude=None, longitude=None):
+        """
+        Ranked routable entries for a lead: area match on city/suburb, or (when the
+        lead has coordinates) the lead lies inside the provider's travel radius.
+
+        Returns (top entries, total eligible count) so callers can log fill rate.
+        """
+        now = now or timezone.now()
+        candidates = {e.profile_id: e for e in self.candidates(category_slug, city, suburb)}
+        if latitude is not None and longitude is not None:
+            category = (category_slug or '').lower()
+            for profile_id in self.within_radius(latitude, longitude):
+                entry = self._entries.get(profile_id)
+                if entry is not None and category in entry.categories:
+                    candidates[profile_id] = entry
+        eligible = [
+            e for e in candidates.values()
+            if is_subscription_active(e, now) or is_premium_active(e, now)
+        ]
+        eligible.sort(key=lambda e: sort_key(e, now))
+        return eligible[:limit], len(eligible)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'providers': len(self._entries),
+                'categories': len(self._postings),
+                'area_tokens': sum(len(a) for a in self._postings.values()),
+                'area_locations': sum(len(g) for g in self._gid_postings.values()),
+                'grid_cells': len(self._cells),
+                'built': self._built_at is not None,
+                'version': self._version,
+            }
+
+
+def _bump_shared_version():
+    """Advance the cross-process version stamp; returns the new value."""
+    return bump_stamp(cache, VERSION_CACHE_KEY)
+
+
+# Global index instance (one per process)
+provider_index = ProviderEligibilityIndex()
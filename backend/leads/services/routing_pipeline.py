@@ -0,0 +1,448 @@
+"""
+Asynchronous Lead Routing Pipeline for ProConnectSA
+
+The Lead post_save signal only writes a LeadRoutingJob (durable outbox) and hands
+the job to a dispatcher; the stages run outside the client's request:
+
+    gate   -> quality gate (blocked leads are flagged for review)
+    match  -> ML provider matching (LeadAssignmentService.find_matching_providers)
+    assign -> LeadAssignment rows, falling back to lead_router.match_providers
+    fanout -> email / push / in-app via notify_providers, then providers_routed_at
+
+Dispatch modes (settings.LEAD_ROUTING_MODE):
+- 'thread': run in a small in-process thread pool after the DB commit (default);
+  each server process also drains due retries and expired leases every
+  LEAD_ROUTING_DRAIN_SECONDS (start_retry_drain, started from wsgi.py)
+- 'worker': only enqueue; `manage.py process_lead_routing --loop` drains the outbox
+- 'inline': run immediately in the caller (old behaviour, useful for debugging)
+
+Design principles:
+- Never raises exceptions (safe for post_save signals)
+- Idempotent per lead via providers_routed_at and the one-job-per-lead outbox
+- Each stage is retried with exponential backoff; stage timings are kept on the job
+- Fan-out is at-least-once: a retried fanout may re-send to some providers
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .routing_trace import set_count, span, trace_lead
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('done', 'blocked', 'failed')
+
+_executor = None
+_executor_lock = threading.Lock()
+_drain_thread = None
+_drain_stop = threading.Event()
+_drain_fork_hook = False
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ------------------------------------------------------------------ enqueue
+
+def enqueue_lead_routing(lead_id, dispatch=True):
+    """
+    Create (or re-arm) the routing job for a lead and hand it to the dispatcher.
+    Terminal jobs are re-armed only when providers_routed_at was cleared (re-review).
+    Returns the job, or None if nothing needs to run.
+    """
+    from backend.leads.models import Lead, LeadRoutingJob
+
+    try:
+        job, created = LeadRoutingJob.objects.get_or_create(lead_id=lead_id)
+        if not created:
+            if job.status not in TERMINAL_STATUSES:
+                return job  # Already queued or running
+            routed = Lead.objects.filter(pk=lead_id, providers_routed_at__isnull=False).exists()
+            if routed:
+                return None
+            LeadRoutingJob.objects.filter(pk=job.pk).update(
+                stage='gate', status='pending', attempts=0, provider_ids=[],
+                via_assignments=False, notify_client=False, last_error='',
+                next_attempt_at=timezone.now(), locked_until=None,
+            )
+            job.refresh_from_db()
+
+        if dispatch:
+            transaction.on_commit(lambda: dispatch_routing_job(job.pk))
+        return job
+    except Exception as e:
+        logger.error(f"[RoutingPipeline] Failed to enqueue lead {lead_id}: {e}", exc_info=True)
+        return None
+
+
+def dispatch_routing_job(job_id):
+    """Run a job according to LEAD_ROUTING_MODE."""
+    mode = _setting('LEAD_ROUTING_MODE', 'thread')
+    if mode == 'inline':
+        process_routing_job(job_id)
+    elif mode == 'thread':
+        start_retry_drain()
+        _get_executor().submit(_process_in_thread, job_id)
+    # 'worker': the outbox is drained by `manage.py process_lead_routing`
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_setting('LEAD_ROUTING_THREADS', 2),
+                thread_name_prefix='lead-routing',
+            )
+        return _executor
+
+
+def _process_in_thread(job_id):
+    close_old_connections()
+    try:
+        process_routing_job(job_id)
+        # Opportunistically pick up retries that came due
+        process_due_jobs(limit=5)
+    finally:
+        close_old_connections()
+
+
+def start_retry_drain():
+    """
+    In 'thread' mode, run drain_due_jobs every LEAD_ROUTING_DRAIN_SECONDS in a
+    daemon thread, so retries and jobs with expired leases run without waiting
+    for the next lead. One thread per process (re-started in forked workers).
+    Returns True if a thread was started.
+    """
+    global _drain_thread, _drain_fork_hook
+    interval = _setting('LEAD_ROUTING_DRAIN_SECONDS', 15)
+    if _setting('LEAD_ROUTING_MODE', 'thread') != 'thread' or not interval:
+        return False
+    with _executor_lock:
+        if _drain_thread is not None and _drain_thread.is_alive():
+            return False
+        if not _drain_fork_hook and hasattr(os, 'register_at_fork'):
+            # Threads do not survive fork (gunicorn --preload): start a fresh one in the child
+            os.register_at_fork(after_in_child=start_retry_drain)
+            _drain_fork_hook = True
+        _drain_stop.clear()
+        _drain_thread = threading.Thread(
+            target=_drain_loop, args=(interval,), name='lead-routing-drain', daemon=True,
+        )
+        _drain_thread.start()
+    logger.info(f"[RoutingPipeline] Retry drain started in process {os.getpid()} (every {interval}s)")
+    return True
+
+
+def stop_retry_drain(timeout=None):
+    """Stop this process's drain thread (waits up to `timeout` seconds for it to exit)."""
+    with _executor_lock:
+        thread = _drain_thread
+        _drain_stop.set()
+    if thread is not None:
+        thread.join(timeout)
+
+
+def _drain_loop(interval):
+    while not _drain_stop.wait(interval):
+        drain_due_jobs()
+
+
+def drain_due_jobs(limit=50):
+    """One drain pass from a background thread: process_due_jobs with fresh DB connections. Never raises."""
+    close_old_connections()
+    try:
+        processed = process_due_jobs(limit=limit)
+        if processed:
+            logger.info(f"[RoutingPipeline] Drained {processed} due routing job(s)")
+        return processed
+    except Exception as e:
+        logger.error(f"[RoutingPipeline] Retry drain failed: {e}", exc_info=True)
+        return 0
+    finally:
+        close_old_connections()
+
+
+# ---------------------------------------------------------------- processing
+
+def claim_job(job_id):
+    """Atomically take the lease on a due job. Returns the job or None."""
+    from backend.leads.models import LeadRoutingJob
+
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('LEAD_ROUTING_LEASE_SECONDS', 300))
+    claimed = LeadRoutingJob.objects.filter(
+        Q(status='pending') | Q(status='running', locked_until__lt=now),
+        pk=job_id,
+        next_attempt_at__lte=now,
+    ).update(status='running', locked_until=now + lease)
+    if not claimed:
+        return None
+    return LeadRoutingJob.objects.select_related('lead').get(pk=job_id)
+
+
+def process_routing_job(job_id):
+    """Run the remaining stages of one job. Never raises."""
+    try:
+        job = claim_job(job_id)
+        if job is None:
+            return None
+        with trace_lead(job.lead_id, 'routing_job'):
+            while job.status == 'running':
+                _run_stage(job)
+        return job
+    except Exception as e:
+        logger.error(f"[RoutingPipeline] Job {job_id} crashed: {e}", exc_info=True)
+        return None
+
+
+def process_due_jobs(limit=50):
+    """Claim and run due jobs (pending, retry-due, or with an expired lease). Returns count processed."""
+    from backend.leads.models import LeadRoutingJob
+
+    now = timezone.now()
+    due_ids = list(
+        LeadRoutingJob.objects.filter(
+            Q(status='pending') | Q(status='running', locked_until__lt=now),
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at').values_list('pk', flat=True)[:limit]
+    )
+    processed = 0
+    for job_id in due_ids:
+        if process_routing_job(job_id) is not None:
+            processed += 1
+    return processed
+
+
+def _run_stage(job):
+    stage = job.stage
+    handler = STAGE_HANDLERS[stage]
+    started = time.monotonic()
+    try:
+        with span(stage):
+            next_stage = handler(job)
+        ok = True
+    except Exception as e:
+        ok = False
+        _record_metrics(job, stage, started, ok)
+        _schedule_retry(job, stage, e)
+        return
+    _record_metrics(job, stage, started, ok)
+
+    job.attempts = 0
+    job.last_error = ''
+    if next_stage in ('done', 'blocked'):
+        job.stage = 'done'
+        job.status = next_stage
+        job.locked_until = None
+        _finish(job)
+    else:
+        job.stage = next_stage
+    job.save()
+
+
+def _record_metrics(job, stage, started, ok):
+    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+    entry = job.stage_metrics.get(stage, {})
+    entry['duration_ms'] = elapsed_ms
+    entry['runs'] = entry.get('runs', 0) + 1
+    entry['ok'] = ok
+    job.stage_metrics[stage] = entry
+    logger.info(f"[RoutingPipeline] Lead {job.lead_id} stage {stage} {'ok' if ok else 'failed'} in {elapsed_ms}ms")
+
+
+def _schedule_retry(job, stage, error):
+    max_attempts = _setting('LEAD_ROUTING_MAX_ATTEMPTS', 5)
+    base_delay = _setting('LEAD_ROUTING_RETRY_BASE_SECONDS', 30)
+
+    job.attempts += 1
+    job.last_error = f"{stage}: {error}"[:2000]
+    job.locked_until = None
+    if job.attempts >= max_attempts:
+        job.status = 'failed'
+        logger.error(f"[RoutingPipeline] Lead {job.lead_id} failed at {stage} after {job.attempts} attempts: {error}")
+    else:
+        job.status = 'pending'
+        job.next_attempt_at = timezone.now() + timedelta(seconds=base_delay * (2 ** (job.attempts - 1)))
+        logger.warning(
+            f"[RoutingPipeline] Lead {job.lead_id} stage {stage} attempt {job.attempts} failed, "
+            f"retrying at {job.next_attempt_at.isoformat()}: {error}"
+        )
+    job.save()
+
+
+def _finish(job):
+    """Client confirmation email, once, for leads that entered routing as verified."""
+    if not job.notify_client:
+        return
+    job.notify_client = False
+    lead = job.lead
+    if getattr(lead, 'client', None) and getattr(lead.client, 'email', None):
+        try:
+            from backend.utils.resend_service import send_lead_received_client_email
+            send_lead_received_client_email(lead)
+        except Exception as email_err:
+            logger.error(f"[RoutingPipeline] Failed to send lead-received email to client: {email_err}", exc_info=True)
+
+
+# -------------------------------------------------------------------- stages
+
+def _stage_gate(job):
+    from backend.leads.models import Lead, LeadAssignment
+    from .lead_router import passes_quality_gate, _flag_for_review
+
+    lead = Lead.objects.filter(pk=job.lead_id).first()
+    if not lead or lead.providers_routed_at:
+        return 'done'
+    job.lead = lead
+
+    if lead.status == 'assigned':
+        # Assigned outside the pipeline (admin / ML batch): only notifications remain
+        job.provider_ids = [
+            str(pid) for pid in LeadAssignment.objects.filter(lead_id=lead.id).values_list('provider_id', flat=True)
+        ]
+        job.via_assignments = True
+        return 'fanout'
+
+    if lead.status != 'verified':
+        return 'done'
+
+    job.notify_client = True
+    passed, reason = passes_quality_gate(lead)
+    if not passed:
+        logger.warning(f"[RoutingPipeline] Lead {lead.id} blocked by quality gate: {reason}")
+        _flag_for_review(lead, reason)
+        return 'blocked'
+    return 'match'
+
+
+def _stage_match(job):
+    from backend.leads.services import LeadAssignmentService
+
+    providers = _assignment_service(job).find_matching_providers(job.lead)
+    job.provider_ids = [str(p.id) for p in providers]
+    set_count('providers_matched', len(job.provider_ids))
+    return 'assign'
+
+
+def _stage_assign(job):
+    from backend.leads.models import Lead, LeadAssignment
+    from backend.users.models import User
+    from .lead_router import match_providers
+
+    lead = Lead.objects.get(pk=job.lead_id)
+
+    assigned_ids = []
+    if lead.status == 'assigned':
+        # Retry after a partial assign: reuse what was created
+        assigned_ids = list(LeadAssignment.objects.filter(lead_id=lead.id).values_list('provider_id', flat=True))
+    elif job.provider_ids:
+        providers = _users_in_order(User, job.provider_ids)
+        assignments = _assignment_service(job).assign_lead_to_providers(
+            str(lead.id),
+            skip_persistent_assignment_notifications=True,
+            providers=providers,
+        )
+        assigned_ids = [a.provider_id for a in assignments]
+
+    if assigned_ids:
+        job.provider_ids = [str(pid) for pid in assigned_ids]
+        job.via_assignments = True
+    else:
+        job.provider_ids = [str(p.id) for p in match_providers(lead)]
+        job.via_assignments = False
+        if not job.provider_ids:
+            logger.warning(
+                f"[RoutingPipeline] No matching providers found for lead {lead.id} "
+                f"(category={lead.service_category.slug}, city={lead.location_city})"
+            )
+    set_count('providers_assigned', len(assigned_ids))
+    return 'fanout'
+
+
+def _stage_fanout(job):
+    from backend.leads.models import Lead
+    from backend.users.models import User
+    from .lead_router import notify_providers
+
+    lead = Lead.objects.get(pk=job.lead_id)
+    if lead.providers_routed_at:
+        return 'done'
+    providers = _users_in_order(User, job.provider_ids)
+    if providers:
+        notify_providers(lead, providers, skip_in_app=job.via_assignments)
+    Lead.objects.filter(pk=lead.pk).update(providers_routed_at=timezone.now())
+    return 'done'
+
+
+STAGE_HANDLERS = {
+    'gate': _stage_gate,
+    'match': _stage_match,
+    'assign': _stage_assign,
+    'fanout': _stage_fanout,
+}
+
+
+def _assignment_service(job):
+    """One LeadAssignmentService per job run, so match-stage ML scores are reused by assign."""
+    service = getattr(job, '_assignment_service', None)
+    if service is None:
+        from backend.leads.services import LeadAssignmentService
+        service = LeadAssignmentService()
+        job._assignment_service = service
+    return service
+
+
+def _users_in_order(user_model, ids):
+    by_id = {str(u.id): u for u in user_model.objects.filter(id__in=ids)}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+# ------------------------------------------------------------------- metrics
+
+def get_outbox_metrics():
+    """Queue depth, oldest due job age and average stage durations (for monitoring)."""
+    from backend.leads.models import LeadRoutingJob
+
+    now = timezone.now()
+    by_status = dict(
+        LeadRoutingJob.objects.values_list('status').annotate(n=Count('pk')).values_list('status', 'n')
+    )
+    oldest_due = LeadRoutingJob.objects.filter(
+        status='pending', next_attempt_at__lte=now,
+    ).aggregate(oldest=Min('next_attempt_at'))['oldest']
+
+    stage_totals = {}
+    recent = LeadRoutingJob.objects.filter(
+        updated_at__gte=now - timedelta(hours=1),
+    ).values_list('stage_metrics', flat=True)
+    for metrics in recent:
+        for stage, entry in (metrics or {}).items():
+            totals = stage_totals.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'failures': 0})
+            totals['count'] += 1
+            totals['total_ms'] += entry.get('duration_ms', 0)
+            if not entry.get('ok', True):
+                totals['failures'] += 1
+
+    return {
+        'by_status': by_status,
+        'oldest_due_seconds': (now - oldest_due).total_seconds() if oldest_due else 0,
+        'stages_last_hour': {
+            stage: {
+                'count': t['count'],
+                'avg_ms': round(t['total_ms'] / t['count'], 1) if t['count'] else 0,
+                'failures': t['failures'],
+            }
+            for stage, t in stage_totals.items()
+        },
+    }
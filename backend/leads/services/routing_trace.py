@@ -0,0 +1,237 @@
+"""
+Routing Trace for ProConnectSA lead routing.
+
+Per-lead timing of the routing path, e.g. for a synchronous route_lead:
+
+    route_lead
+      routing_job
+        gate      -> quality_gate (passes_quality_gate)
+        match     -> LeadAssignmentService.find_matching_providers
+        assign    -> assign_lead_to_providers -> create_assignment / compatibility
+        fanout    -> notify_providers -> email / in_app / push
+
+Every span records wall time and the number of DB queries run on the thread's
+connection; repeated spans under the same parent (one per provider) are folded
+into one entry with a call count. Traces also carry provider counts
+(providers_matched / providers_assigned / providers_notified).
+
+Finished traces go into an in-memory ring buffer of ROUTING_TRACE_BUFFER_SIZE
+entries and, when ROUTING_TRACE_PERSIST is on, a RoutingTrace row. The admin
+endpoint /api/leads/routing-traces/ serves them next to flow_monitor and outbox metrics.
+
+Design principles:
+- Never raises; tracing problems never block routing
+- span() / traced() are no-ops unless a trace is active on the current thread
+- Query counts come from connection.execute_wrapper, so they work with DEBUG=False
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEYS = ('providers_matched', 'providers_assigned', 'providers_notified')
+
+_local = threading.local()
+_buffer_lock = threading.Lock()
+_buffer = deque(maxlen=getattr(settings, 'ROUTING_TRACE_BUFFER_SIZE', 500))
+
+
+class _Trace:
+    """One in-flight trace; also the execute_wrapper that counts its queries."""
+
+    def __init__(self, lead_id, root):
+        self.lead_id = str(lead_id)
+        self.root = root
+        self.started_at = timezone.now()
+        self.queries = 0
+        self.stack = []
+        self.spans = {}
+        self.counts = {}
+        self.error = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def as_dict(self):
+        root = self.spans.get(self.root, {})
+        return {
+            'lead_id': self.lead_id,
+            'root': self.root,
+            'started_at': self.started_at.isoformat(),
+            'total_ms': root.get('ms', 0.0),
+            'queries': self.queries,
+            'counts': dict(self.counts),
+            'spans': [
+                {'name': path, **entry}
+                for path, entry in self.spans.items()
+            ],
+            'error': self.error,
+        }
+
+
+def _current():
+    return getattr(_local, 'trace', None)
+
+
+def is_enabled():
+    return getattr(settings, 'ROUTING_TRACE_ENABLED', True)
+
+
+@contextmanager
+def span(name):
+    """Time a block (wall ms + DB queries) under the active trace; no-op without one."""
+    trace = _current()
+    if trace is None:
+        yield
+        return
+
+    trace.stack.append(name)
+    path = '/'.join(trace.stack)
+    started = time.perf_counter()
+    queries_before = trace.queries
+    try:
+        yield
+    finally:
+        entry = trace.spans.setdefault(path, {'calls': 0, 'ms': 0.0, 'queries': 0})
+        entry['calls'] += 1
+        entry['ms'] = round(entry['ms'] + (time.perf_counter() - started) * 1000, 2)
+        entry['queries'] += trace.queries - queries_before
+        trace.stack.pop()
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_count(key, value):
+    """Record a per-lead counter (e.g. providers_notified) on the active trace."""
+    trace = _current()
+    if trace is not None:
+        trace.counts[key] = value
+
+
+@contextmanager
+def trace_lead(lead_id, name='route_lead'):
+    """
+    Start a trace for one lead. Nested inside an active trace this is just a span,
+    so route_lead -> process_routing_job produces a single trace.
+    """
+    if _current() is not None or not is_enabled():
+        with span(name):
+            yield
+        return
+
+    trace = _Trace(lead_id, name)
+    _local.trace = trace
+    try:
+        with connection.execute_wrapper(trace):
+            with span(name):
+                yield
+    except Exception as e:
+        trace.error = str(e)[:500]
+        raise
+    finally:
+        _local.trace = None
+        _finish(trace)
+
+
+def _finish(trace):
+    try:
+        record = trace.as_dict()
+        with _buffer_lock:
+            _buffer.append(record)
+        logger.debug(
+            f"[RoutingTrace] Lead {trace.lead_id} {trace.root} {record['total_ms']}ms, "
+            f"{trace.queries} queries, counts={trace.counts}"
+        )
+        if getattr(settings, 'ROUTING_TRACE_PERSIST', False):
+            from backend.leads.models import RoutingTrace
+
+            RoutingTrace.objects.create(
+                lead_id=trace.lead_id,
+                root=trace.root,
+                total_ms=record['total_ms'],
+                queries=trace.queries,
+                counts=record['counts'],
+                spans=record['spans'],
+                error=trace.error,
+            )
+    except Exception as e:
+        logger.warning(f"[RoutingTrace] Failed to record trace for lead {trace.lead_id}: {e}")
+
+
+# ------------------------------------------------------------------- reading
+
+def get_recent_traces(limit=50, lead_id=None):
+    """Most recent finished traces from this process, newest first."""
+    with _buffer_lock:
+        traces = list(_buffer)
+    if lead_id is not None:
+        traces = [t for t in traces if t['lead_id'] == str(lead_id)]
+    return traces[::-1][:limit]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def get_trace_summary():
+    """Per-span p50 / p95 latency and mean queries over the ring buffer."""
+    with _buffer_lock:
+        traces = list(_buffer)
+
+    per_span = {}
+    counts = {key: [] for key in COUNT_KEYS}
+    for trace in traces:
+        for entry in trace['spans']:
+            stats = per_span.setdefault(entry['name'], {'ms': [], 'queries': [], 'calls': 0})
+            stats['ms'].append(entry['ms'])
+            stats['queries'].append(entry['queries'])
+            stats['calls'] += entry['calls']
+        for key in COUNT_KEYS:
+            if key in trace['counts']:
+                counts[key].append(trace['counts'][key])
+
+    return {
+        'traces': len(traces),
+        'buffer_size': _buffer.maxlen,
+        'errors': sum(1 for t in traces if t['error']),
+        'spans': {
+            name: {
+                'traces': len(stats['ms']),
+                'calls': stats['calls'],
+                'p50_ms': _percentile(stats['ms'], 50),
+                'p95_ms': _percentile(stats['ms'], 95),
+                'avg_queries': round(sum(stats['queries']) / len(stats['queries']), 1),
+            }
+            for name, stats in per_span.items()
+        },
+        'avg_counts': {
+            key: round(sum(values) / len(values), 1)
+            for key, values in counts.items() if values
+        },
+    }
+
+
+def clear():
+    with _buffer_lock:
+        _buffer.clear()
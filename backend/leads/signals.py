@@ -1,9 +1,9 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 import logging
 
 logger = logging.getLogger(__name__)
 from django.dispatch import receiver
-from .models import Lead, LeadAssignment
+from .models import Lead, LeadAssignment, ServiceCategory
 from backend.notifications.models import Notification
 
 
@@ -24,6 +24,15 @@ def clear_providers_routed_at_on_re_review(sender, instance, **kwargs):
         instance.providers_routed_at = None
 
 
+@receiver(post_save, sender=Lead)
+def refresh_lead_features(sender, instance, created, update_fields=None, **kwargs):
+    """Recompute the stored feature row (lead_features.py) when a lead is created or its content changes."""
+    from backend.leads.lead_features import SOURCE_FIELDS, refresh
+    if update_fields is not None and not SOURCE_FIELDS.intersection(update_fields):
+        return
+    refresh(instance)
+
+
 @receiver(post_save, sender=Lead)
 def create_lead_notification(sender, instance, created, **kwargs):
     """Create notification when lead is created"""
@@ -93,41 +102,162 @@ def auto_verify_new_lead(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Lead)
 def route_verified_lead(sender, instance, created, **kwargs):
     """
-    Route verified leads to matching providers via lead router.
-    This sends notifications to providers (email + in-app) when a lead becomes verified.
+    Queue verified leads for routing to matching providers.
+    The routing pipeline (quality gate, matching, assignments, provider email/push/in-app
+    and the client "request received" email) runs outside this save; see
+    backend/leads/services/routing_pipeline.py.
     
     Fires on:
     - New lead created with status='verified'
     - Existing lead updated to status='verified'
+    - Lead moved to 'assigned' before it was routed (notifications still owed)
     """
     if getattr(instance, 'providers_routed_at', None):
         return
 
-    # Assignment save(nested) can run before outer route_lead finishes; finish email/push here.
-    if instance.status == 'assigned':
-        try:
-            from backend.leads.services.lead_router import route_lead
-            route_lead(instance)
-        except Exception as e:
-            logger.error(f"[Signal] Error finishing routing for assigned lead {instance.id}: {e}", exc_info=True)
+    if instance.status not in ('verified', 'assigned'):
+        return
+
+    try:
+        # Import here to avoid circular imports
+        from backend.leads.services.routing_pipeline import enqueue_lead_routing
+        if enqueue_lead_routing(instance.id):
+            logger.info(f"[Signal] Lead {instance.id} is {instance.status} — queued for routing")
+    except Exception as e:
+        # Belt-and-suspenders: enqueue is already safe, but just in case
+        logger.error(f"[Signal] Unexpected error queueing lead {instance.id}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender='users.ProviderProfile')
+def reindex_provider_profile(sender, instance, update_fields=None, **kwargs):
+    """Keep the routing eligibility index in sync with provider profile edits."""
+    try:
+        from backend.leads.services.provider_index import INDEXED_PROFILE_FIELDS, provider_index
+        if update_fields is not None and not INDEXED_PROFILE_FIELDS.intersection(update_fields):
+            return
+        provider_index.update_profile(instance)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to reindex provider profile {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender='users.ProviderProfile')
+def unindex_provider_profile(sender, instance, **kwargs):
+    """Drop deleted provider profiles from the routing eligibility index."""
+    try:
+        from backend.leads.services.provider_index import provider_index
+        provider_index.remove_profile(instance.pk)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to unindex provider profile {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender='users.User')
+def reindex_provider_user(sender, instance, created, update_fields=None, **kwargs):
+    """Activation / user_type / location changes affect routing eligibility of the user's profile."""
+    if created:
         return
+    try:
+        from backend.leads.services.provider_index import INDEXED_USER_FIELDS, provider_index
+        if update_fields is not None and not INDEXED_USER_FIELDS.intersection(update_fields):
+            return
+        from backend.users.models import ProviderProfile
+        profile = ProviderProfile.objects.filter(user=instance).first()
+        if profile is None:
+            return
+        profile.user = instance
+        provider_index.update_profile(profile)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to reindex provider user {instance.pk}: {e}", exc_info=True)
+
 
-    if instance.status != 'verified':
+@receiver(post_save, sender='users.User')
+def reflag_client_test_leads(sender, instance, created, update_fields=None, **kwargs):
+    """Lead.is_test depends on the client's email; re-check their leads when it may have changed."""
+    if created or (update_fields is not None and 'email' not in update_fields):
         return
+    try:
+        from backend.leads.test_lead_utils import refresh_test_flags
+        refresh_test_flags(Lead.objects.filter(client=instance))
+    except Exception as e:
+        logger.error(f"[Signal] Failed to re-flag test leads for client {instance.pk}: {e}", exc_info=True)
 
-    logger.info(f"[Signal] Lead {instance.id} is verified — starting routing")
 
+@receiver(post_save, sender='users.User')
+def refresh_client_lead_features(sender, instance, created, update_fields=None, **kwargs):
+    """has_phone / has_email features depend on the client's contact details."""
+    if created or (update_fields is not None and not {'email', 'phone'}.intersection(update_fields)):
+        return
     try:
-        # Import here to avoid circular imports
-        from backend.leads.services.lead_router import route_lead
-        route_lead(instance)
-        # Client email (Option B): send "We've received your request" when pros are notified
-        if getattr(instance, 'client', None) and getattr(instance.client, 'email', None):
-            try:
-                from backend.utils.resend_service import send_lead_received_client_email
-                send_lead_received_client_email(instance)
-            except Exception as email_err:
-                logger.error(f"[Signal] Failed to send lead-received email to client: {email_err}", exc_info=True)
+        from backend.leads.lead_features import refresh_many
+        refresh_many(Lead.objects.filter(client=instance))
     except Exception as e:
-        # Belt-and-suspenders: route_lead is already safe, but just in case
-        logger.error(f"[Signal] Unexpected error routing lead {instance.id}: {e}", exc_info=True)
+        logger.error(f"[Signal] Failed to refresh lead features for client {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Lead)
+def bump_lead_feed(sender, instance, created, **kwargs):
+    """New / changed leads change the feeds of their category and of providers they were routed to."""
+    try:
+        from backend.leads.feed_version import bump_category, bump_provider
+        bump_category(instance.service_category_id)
+        if not created:
+            for provider_id in LeadAssignment.objects.filter(lead_id=instance.pk).values_list('provider_id', flat=True):
+                bump_provider(provider_id)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to bump feed version for lead {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=Lead)
+def bump_deleted_lead_feed(sender, instance, **kwargs):
+    try:
+        from backend.leads.feed_version import bump_category
+        bump_category(instance.service_category_id)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to bump feed version for deleted lead {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=LeadAssignment)
+def bump_assignment_feed(sender, instance, **kwargs):
+    """Assignments add routed leads to a provider's feed."""
+    try:
+        from backend.leads.feed_version import bump_provider
+        bump_provider(instance.provider_id)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to bump feed version for assignment {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender='leads.LeadAccess')
+def bump_access_feed(sender, instance, **kwargs):
+    """Unlocks hide a lead from the buyer's feed and change purchase counts for everyone."""
+    try:
+        from backend.leads.feed_version import bump_category, bump_provider
+        bump_provider(instance.provider_id)
+        bump_category(instance.lead.service_category_id)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to bump feed version for lead access {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender='users.Wallet')
+def bump_wallet_feed(sender, instance, **kwargs):
+    """The feed response carries the wallet balance."""
+    try:
+        from backend.leads.feed_version import bump_provider
+        bump_provider(instance.user_id)
+    except Exception as e:
+        logger.error(f"[Signal] Failed to bump feed version for wallet {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(pre_save, sender=ServiceCategory)
+def note_category_rename(sender, instance, **kwargs):
+    """Lead search vectors include the category name; remember whether it changed."""
+    instance._search_name_changed = False
+    if not instance.pk:
+        return
+    previous = ServiceCategory.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    instance._search_name_changed = previous is not None and previous != instance.name
+
+
+@receiver(post_save, sender=ServiceCategory)
+def refresh_category_search_vectors(sender, instance, **kwargs):
+    if getattr(instance, '_search_name_changed', False):
+        from backend.leads.lead_search import refresh_search_vectors
+        refresh_search_vectors(instance.pk)
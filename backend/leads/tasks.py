@@ -345,7 +345,7 @@ def train_support_ml_models():
 def analyze_support_ticket_sentiment():
     """Analyze sentiment of recent support tickets"""
     from backend.support.models import SupportTicket
-    from backend.support.ml_services import SupportTicketMLService
+    from backend.leads.ml_registry import ml_registry
     from django.utils import timezone
     from datetime import timedelta
 
@@ -367,7 +367,7 @@ def analyze_support_ticket_sentiment():
                 'timestamp': timezone.now().isoformat()
             }
 
-        ml_service = SupportTicketMLService()
+        ml_service = ml_registry.get('support')
         analyzed_count = 0
 
         for ticket in recent_tickets:
@@ -407,7 +407,7 @@ def analyze_support_ticket_sentiment():
 def optimize_support_ticket_assignments():
     """Optimize support ticket assignments using ML"""
     from backend.support.models import SupportTicket
-    from backend.support.ml_services import SupportTicketMLService
+    from backend.leads.ml_registry import ml_registry
     from django.contrib.auth import get_user_model
     from django.utils import timezone
 
@@ -430,7 +430,7 @@ def optimize_support_ticket_assignments():
                 'timestamp': timezone.now().isoformat()
             }
 
-        ml_service = SupportTicketMLService()
+        ml_service = ml_registry.get('support')
         optimized_count = 0
 
         for ticket in unassigned_tickets:
@@ -482,7 +482,7 @@ def optimize_support_ticket_assignments():
 def generate_support_ml_insights():
     """Generate ML insights for support tickets"""
     from backend.support.models import SupportTicket, SupportMetrics
-    from backend.support.ml_services import SupportTicketMLService
+    from backend.leads.ml_registry import ml_registry
     from django.utils import timezone
     from datetime import timedelta
     from django.db.models import Count, Avg
@@ -504,7 +504,7 @@ def generate_support_ml_insights():
                 'timestamp': timezone.now().isoformat()
             }
 
-        ml_service = SupportTicketMLService()
+        ml_service = ml_registry.get('support')
         insights = {
             'total_tickets': recent_tickets.count(),
             'category_predictions': {},
@@ -1457,56 +1457,15 @@ def adaptive_ml_threshold_adjustment():
 
 @shared_task
 def sync_redis_counters_to_database():
-    """Sync Redis view counters to database to reduce database lock contention"""
-    from django.core.cache import cache
-    from django.db import transaction
-    from backend.leads.models import Lead
+    """Flush pending lead counter deltas to the database (see lead_counters.py)"""
+    from backend.leads.lead_counters import flush_lead_counters
     
-    try:
-        # Get all Redis keys for lead views
-        synced_count = 0
-        errors = 0
-        
-        # Sync the leads that have been recently accessed
-        recent_leads = Lead.objects.filter(
-            created_at__gte=timezone.now() - timedelta(hours=24)
-        ).values_list('id', flat=True)
-        
-        for lead_id in recent_leads:
-            cache_key = f"lead_views_{lead_id}"
-            redis_count = cache.get(cache_key)
-            
-            if redis_count is not None:
-                try:
-                    with transaction.atomic():
-                        lead = Lead.objects.select_for_update(nowait=True).get(id=lead_id)
-                        if lead.views_count != redis_count:
-                            lead.views_count = redis_count
-                            lead.save(update_fields=['views_count'])
-                            synced_count += 1
-                            logger.info(f"Synced lead {lead_id} views: {redis_count}")
-                except Lead.DoesNotExist:
-                    # Lead was deleted, remove from cache
-                    cache.delete(cache_key)
-                except Exception as e:
-                    errors += 1
-                    logger.warning(f"Failed to sync lead {lead_id}: {str(e)}")
-        
-        logger.info(f"Redis counter sync completed: {synced_count} synced, {errors} errors")
-        return {
-            'success': True,
-            'synced_count': synced_count,
-            'errors': errors,
-            'timestamp': timezone.now().isoformat()
-        }
-        
-    except Exception as e:
-        logger.error(f"Error syncing Redis counters: {str(e)}")
-        return {
-            'success': False,
-            'error': str(e),
-            'timestamp': timezone.now().isoformat()
-        }
+    result = flush_lead_counters()
+    return {
+        'success': result is not None,
+        'synced_count': result['leads'] if result else 0,
+        'timestamp': timezone.now().isoformat()
+    }
 
 
 @shared_task
@@ -2,7 +2,9 @@
 Utility functions to identify and filter test leads.
 Test leads should NEVER be visible to providers in production.
 """
-from django.db.models import Q
+
+# Lead fields is_test_lead() reads (plus client.email)
+TEST_LEAD_FIELDS = {'title', 'description', 'source', 'client'}
 
 
 def is_test_lead(lead):
@@ -68,29 +70,33 @@ def exclude_test_leads(queryset):
     """
     Filter out test leads from a queryset.
     
-    This should be applied to ALL provider-facing lead queries.
+    This should be applied to ALL provider-facing lead queries. Uses the
+    Lead.is_test flag, which Lead.save() sets from is_test_lead() (backfill or
+    re-check with `manage.py flag_test_leads`), so no text scans are needed.
+    """
+    return queryset.filter(is_test=False)
+
+
+def refresh_test_flags(queryset, batch_size=2000):
+    """
+    Re-evaluate is_test_lead() for the leads in a queryset and write the ones
+    whose flag changed. Returns the number of leads updated.
     """
-    return queryset.exclude(
-        Q(description__icontains='test lead') |
-        Q(description__icontains='TEST LEAD') |
-        Q(description__icontains='this is test lead') |
-        Q(description__icontains='test lead number') |
-        Q(description__icontains='test lead #') |
-        Q(description__icontains='location filter test') |
-        Q(description__icontains='premium test') |
-        Q(description__icontains='[test]') |
-        Q(description__icontains='(test)') |
-        Q(title__icontains='test:') |
-        Q(title__icontains='test -') |
-        Q(title__icontains=' #') |
-        Q(title__icontains='test lead') |
-        Q(title__icontains='TEST LEAD') |
-        Q(title__icontains='[test]') |
-        Q(title__icontains='(test)') |
-        Q(source='test') |
-        Q(client__email__icontains='test@') |
-        Q(client__email__icontains='@test.') |
-        Q(client__email__icontains='testuser') |
-        Q(client__email__icontains='test_') |
-        Q(client__email__icontains='_test')
+    changed = []
+    updated = 0
+    leads = queryset.select_related('client').only(
+        'id', 'title', 'description', 'source', 'is_test', 'client__id', 'client__email'
     )
+    for lead in leads.iterator(chunk_size=batch_size):
+        is_test = is_test_lead(lead)
+        if is_test != lead.is_test:
+            lead.is_test = is_test
+            changed.append(lead)
+        if len(changed) >= batch_size:
+            queryset.model.objects.bulk_update(changed, ['is_test'])
+            updated += len(changed)
+            changed = []
+    if changed:
+        queryset.model.objects.bulk_update(changed, ['is_test'])
+        updated += len(changed)
+    return updated
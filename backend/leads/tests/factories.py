@@ -0,0 +1,58 @@
+"""Minimal model builders shared by the leads tests."""
+import uuid
+
+from django.utils.text import slugify
+
+
+def make_category(name='Plumbing'):
+    from backend.leads.models import ServiceCategory
+
+    category, _ = ServiceCategory.objects.get_or_create(slug=slugify(name), defaults={'name': name})
+    return category
+
+
+def make_client(**fields):
+    from backend.users.models import User
+
+    username = fields.pop('username', f"client-{uuid.uuid4().hex[:8]}")
+    return User.objects.create_user(
+        username=username,
+        email=fields.pop('email', f"{username}@example.co.za"),
+        password='secret-pass-123',
+        user_type=fields.pop('user_type', 'client'),
+        **fields,
+    )
+
+
+def make_provider(categories=('plumbing',), areas=('Cape Town',), **fields):
+    from backend.users.models import ProviderProfile
+
+    user = make_client(user_type='provider', username=f"provider-{uuid.uuid4().hex[:8]}")
+    values = {
+        'business_name': 'Acme Plumbing',
+        'business_address': '1 Long Street, Cape Town',
+        'service_categories': list(categories),
+        'service_areas': list(areas),
+    }
+    values.update(fields)
+    return ProviderProfile.objects.create(user=user, **values)
+
+
+def make_lead(client=None, category=None, **fields):
+    from backend.leads.models import Lead
+
+    values = {
+        'title': 'Geyser replacement',
+        'description': 'Our 150 litre geyser burst last night and needs replacing with a new unit.',
+        'location_address': '12 Main Road',
+        'location_suburb': 'Sea Point',
+        'location_city': 'Cape Town',
+        'budget_range': '5000_15000',
+        'urgency': 'this_week',
+    }
+    values.update(fields)
+    return Lead.objects.create(
+        client=client or make_client(),
+        service_category=category or make_category(),
+        **values,
+    )
@@ -0,0 +1,116 @@
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+
+from backend.leads import gazetteer
+from backend.leads.services.provider_index import ProviderEligibilityIndex, ProviderEntry
+from backend.leads.tests.factories import make_category, make_client, make_lead
+
+# (service area, lead city, lead suburb, covered?)
+AREA_CASES = [
+    # Containment on gazetteer ids
+    ('Gauteng', 'Johannesburg', '', True),
+    ('johannesburg', 'Johannesburg', 'Sandton', True),
+    ('Cape Town', 'Cape Town', 'Sea Point', True),
+    ('Port Elizabeth', 'Gqeberha', '', True),
+    ('Nelson Mandela Bay', 'PE', '', True),
+    ('KZN', 'Durban', 'Umhlanga', True),
+    ('Nationwide', 'Durban', '', True),
+    # Substring fallback when containment fails
+    ('Durban North', 'Durban', '', True),
+    ('durban north', 'durban', '', True),
+    ('Westville', 'Durban', 'Westville', True),
+    ('Sandton', 'Johannesburg', 'Sandton City', True),
+    ('Bloemfontein East', 'Bloemfontein', '', True),
+    ('Smallville', 'Greater Smallville', '', True),
+    # No match
+    ('Cape Town', 'Johannesburg', 'Sandton', False),
+    ('Durban North', 'Cape Town', '', False),
+    ('Sandton', 'Johannesburg', 'Soweto', False),
+    ('Nationwide', 'Stellenbosch', '', False),
+    ('Smallville', 'Bigtown', '', False),
+    ('', 'Durban', '', False),
+    ('   ', 'Durban', '', False),
+    ('Durban', '', '', False),
+]
+
+
+class AreaMatchesTests(SimpleTestCase):
+    def test_area_matches(self):
+        for area, city, suburb, expected in AREA_CASES:
+            with self.subTest(area=area, city=city, suburb=suburb):
+                self.assertIs(gazetteer.area_matches(area, city, suburb), expected)
+
+    def test_never_narrower_than_substring_rule(self):
+        for area, city, suburb, _ in AREA_CASES:
+            if not area.strip():
+                continue
+            legacy = gazetteer.substring_area_match(
+                area.strip().lower(), city.strip().lower(), suburb.strip().lower()
+            )
+            with self.subTest(area=area, city=city, suburb=suburb):
+                if legacy:
+                    self.assertTrue(gazetteer.area_matches(area, city, suburb))
+
+
+class ProviderIndexAreaParityTests(SimpleTestCase):
+    """The eligibility index must select exactly the providers area_matches accepts."""
+
+    def test_index_matches_area_matches(self):
+        index = ProviderEligibilityIndex()
+        areas = sorted({area.strip().lower() for area, _, _, _ in AREA_CASES})
+        for profile_id, area in enumerate(areas):
+            entry = ProviderEntry(
+                profile_id=profile_id, user_id=profile_id, subscription_tier='basic',
+                subscription_end_date=None, is_premium_listing=False,
+                premium_listing_started_at=None, premium_listing_expires_at=None,
+                categories=frozenset({'plumbing'}), areas=frozenset({area}),
+                latitude=None, longitude=None, max_travel_distance=0,
+            )
+            index._entries[profile_id] = entry
+            index._post(index._postings, index._gid_postings, entry)
+
+        for _, city, suburb, _ in AREA_CASES:
+            city, suburb = city.strip().lower(), suburb.strip().lower()
+            covering, tokens = index._matching_areas('plumbing', city, suburb)
+            found = set()
+            for place_id in covering:
+                found |= index._gid_postings.get('plumbing', {}).get(place_id, set())
+            for token in tokens:
+                found |= index._postings['plumbing'][token]
+            expected = {i for i, area in enumerate(areas) if gazetteer.area_matches(area, city, suburb)}
+            with self.subTest(city=city, suburb=suburb):
+                self.assertEqual(found, expected)
+
+
+class LeadAreaQTests(TestCase):
+    """Feed filters must keep every lead the pre-gazetteer icontains filter found."""
+
+    @classmethod
+    def setUpTestData(cls):
+        client, category = make_client(), make_category()
+        places = {(city, suburb) for _, city, suburb, _ in AREA_CASES if city}
+        cls.leads = {
+            place: make_lead(client=client, category=category, location_city=place[0], location_suburb=place[1])
+            for place in sorted(places)
+        }
+
+    def _selected(self, areas):
+        from backend.leads.models import Lead
+
+        return set(Lead.objects.filter(gazetteer.lead_area_q(areas)).values_list('id', flat=True))
+
+    def test_resolved_area_keeps_substring_match(self):
+        lead = self.leads[('Johannesburg', 'Sandton City')]
+        self.assertIsNotNone(lead.location_gid)
+        self.assertIn(lead.id, self._selected(['Sandton']))
+        self.assertNotIn(self.leads[('Johannesburg', 'Soweto')].id, self._selected(['Sandton']))
+
+    def test_never_narrower_than_icontains(self):
+        from backend.leads.models import Lead
+
+        for area in sorted({area.strip().lower() for area, _, _, _ in AREA_CASES if area.strip()}):
+            legacy = set(Lead.objects.filter(
+                Q(location_suburb__icontains=area) | Q(location_city__icontains=area)
+            ).values_list('id', flat=True))
+            with self.subTest(area=area):
+                self.assertLessEqual(legacy, self._selected([area]))
@@ -0,0 +1,114 @@
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from backend.leads import lead_counters
+from backend.leads.models import Lead
+
+from .factories import make_lead
+
+DATABASE_SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'backend.procompare.tiered_cache.TieredCache',
+        'OPTIONS': {'SHARED_ALIAS': 'shared'},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'lead_counter_test_cache',
+    },
+}
+
+
+@override_settings(CACHES=DATABASE_SHARED_CACHES)
+class DatabaseCacheCounterTests(TransactionTestCase):
+    """The database cache has no atomic incr: counters must go straight to the row."""
+
+    THREADS = 8
+    INCREMENTS = 25
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+        self.lead = make_lead()
+
+    def tearDown(self):
+        caches['shared'].clear()
+
+    def test_not_batched(self):
+        self.assertFalse(lead_counters.batching())
+        self.assertFalse(lead_counters.start_flush_timer())
+
+    def test_concurrent_increments_are_not_lost(self):
+        start = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                start.wait()
+                for _ in range(self.INCREMENTS):
+                    lead_counters.record(self.lead.pk, 'views_count')
+            except Exception as e:  # pragma: no cover - surfaced below
+                errors.append(e)
+
+        with mock.patch.object(lead_counters.logger, 'error') as logged:
+            threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(logged.call_args_list, [])
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.views_count, self.THREADS * self.INCREMENTS)
+        self.assertEqual(lead_counters.pending_counts(self.lead.pk)['views_count'], 0)
+
+    def test_model_helpers_write_through(self):
+        self.lead.increment_views_count()
+        self.lead.increment_provider_contacts()
+        stored = Lead.objects.values('views_count', 'total_provider_contacts').get(pk=self.lead.pk)
+        self.assertEqual(stored, {'views_count': 1, 'total_provider_contacts': 1})
+
+
+class BatchedCounterTests(TestCase):
+    """With an atomic shared cache, increments wait in the cache until a flush."""
+
+    def setUp(self):
+        patcher = mock.patch.object(lead_counters, 'batching', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(caches['default'].clear)
+        self.leads = [make_lead(), make_lead()]
+
+    def test_flush_writes_pending_deltas(self):
+        first, second = self.leads
+        for _ in range(5):
+            lead_counters.record(first.pk, 'views_count')
+        lead_counters.record(first.pk, 'responses_count', 2)
+        lead_counters.record(second.pk, 'total_provider_contacts')
+
+        self.assertEqual(lead_counters.pending_counts(first.pk)['views_count'], 5)
+        first.refresh_from_db()
+        self.assertEqual(first.views_count, 0)
+
+        result = lead_counters.flush_lead_counters()
+        self.assertEqual(result, {'leads': 2, 'rows': 2, 'increments': 8})
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.views_count, first.responses_count), (5, 2))
+        self.assertEqual(second.total_provider_contacts, 1)
+        self.assertEqual(lead_counters.pending_counts(first.pk), dict.fromkeys(lead_counters.COUNTER_FIELDS, 0))
+
+    def test_failed_write_keeps_deltas(self):
+        lead = self.leads[0]
+        lead_counters.record(lead.pk, 'views_count', 3)
+        with mock.patch.object(lead_counters, '_write', side_effect=RuntimeError('database down')):
+            lead_counters.flush_lead_counters()
+        self.assertEqual(lead_counters.pending_counts(lead.pk)['views_count'], 3)
+
+        lead_counters.flush_lead_counters()
+        lead.refresh_from_db()
+        self.assertEqual(lead.views_count, 3)
@@ -0,0 +1,68 @@
+"""Stored lead prices (backend/leads/lead_pricing.py) are only recomputed when a pricing input changes."""
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.leads import lead_pricing
+from backend.leads.ml_views import lead_preview_view
+from backend.leads.models import Lead
+
+from .factories import make_lead, make_provider
+
+
+class LeadSaveRepricingTests(TestCase):
+    def setUp(self):
+        self.lead = Lead.objects.get(pk=make_lead(urgency='flexible').pk)
+
+    def _save(self, **kwargs):
+        with mock.patch.object(lead_pricing, 'apply_price', wraps=lead_pricing.apply_price) as apply_price:
+            self.lead.save(**kwargs)
+        return apply_price.call_count
+
+    def test_new_lead_is_priced(self):
+        self.assertTrue(lead_pricing.is_priced(self.lead))
+
+    def test_unrelated_full_save_keeps_price(self):
+        self.lead.title = 'Geyser replacement (updated)'
+        self.assertEqual(self._save(), 0)
+        self.assertEqual(self._save(), 0)
+
+    def test_changed_input_reprices(self):
+        before = self.lead.price_map
+        self.lead.urgency = 'urgent'
+        self.assertEqual(self._save(), 1)
+        self.lead.refresh_from_db()
+        self.assertNotEqual(self.lead.price_map, before)
+        self.assertEqual(self.lead.price_map, lead_pricing.compute_price_map(self.lead))
+
+    def test_update_fields_with_input_reprices(self):
+        self.lead.budget_range = 'over_50000'
+        self.assertEqual(self._save(update_fields=['budget_range']), 1)
+        self.assertEqual(Lead.objects.get(pk=self.lead.pk).price_map, lead_pricing.compute_price_map(self.lead))
+
+    def test_outdated_price_reprices(self):
+        self.lead.pricing_version = lead_pricing.PRICING_VERSION - 1
+        self.assertEqual(self._save(), 1)
+
+    def test_deferred_inputs_reprice(self):
+        self.lead = Lead.objects.only('id', 'title', 'price_map', 'pricing_version').get(pk=self.lead.pk)
+        self.assertEqual(self._save(), 1)
+
+
+class LeadPreviewPriceTests(TestCase):
+    def test_preview_shows_stored_price(self):
+        lead = make_lead(status='verified', urgency='urgent', budget_range='over_50000')
+        provider = make_provider(subscription_tier='pro').user
+        # A stored price that no live pricing path would produce
+        Lead.objects.filter(pk=lead.pk).update(price_map={'default': 17, 'pro': 13, 'enterprise': 11})
+        request = APIRequestFactory().get(f'/api/leads/{lead.pk}/preview/')
+        force_authenticate(request, provider)
+
+        response = lead_preview_view(request, lead_id=lead.pk)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        preview = response.data['preview']
+        self.assertEqual(preview['dynamic_price'], 13)
+        self.assertEqual(preview['base_price'], 17)
+        self.assertEqual(preview['dynamic_price'], lead_pricing.lead_credits(Lead.objects.get(pk=lead.pk), provider))
@@ -0,0 +1,139 @@
+"""
+The vectorized pricing engine (backend/leads/pricing_engine.py) must give the
+same credits as the scalar DynamicPricingMLService paths it replaces:
+
+    simple  (_calculate_simple_price)          USE_ML_PRICING off
+    optimal (calculate_optimal_credit_cost)    USE_ML_PRICING on
+
+for every provider tier. Run these after changing either path.
+"""
+import itertools
+from types import SimpleNamespace
+
+from django.test import TestCase, override_settings
+
+from backend.leads import pricing_engine
+from backend.leads.ml_services import DynamicPricingMLService
+from backend.leads.models import Lead, ServiceCategory
+
+from .factories import make_category, make_client, make_lead
+
+URGENCIES = ('flexible', 'this_month', 'this_week', 'urgent', None)
+# Quality band edges (> 60, > 80) plus the extremes
+SCORES = (0, 60, 61, 80, 81, 100)
+BUDGETS = ('under_1000', '1000_5000', '5000_15000', '15000_50000', 'over_50000', 'no_budget')
+INTENTS = ('ready_to_hire', 'planning_to_hire', 'comparing_quotes', 'researching', None)
+PROPERTY_TYPES = ('residential', 'commercial', 'industrial', None)
+TIERS = (None, 'basic', 'pro', 'enterprise')
+
+# Base multiplier, the highest multipliers in both tables, a mid value and an unknown slug
+REPRESENTATIVE_SLUGS = ('cleaning', 'electrical', 'roofing', 'legal', 'not-a-category')
+
+
+def _provider(tier):
+    if tier is None:
+        return None
+    return SimpleNamespace(provider_profile=SimpleNamespace(subscription_tier=tier))
+
+
+def _scalar_credits(service, lead, tier, use_ml):
+    if use_ml:
+        return service.calculate_optimal_credit_cost(lead, _provider(tier))
+    return service._calculate_simple_price(lead, _provider(tier))['price']
+
+
+def _grid_lead(urgency, score, budget, intent, property_type, slug):
+    return Lead(
+        urgency=urgency,
+        verification_score=score,
+        budget_range=budget,
+        hiring_intent=intent,
+        property_type=property_type,
+        service_category=ServiceCategory(slug=slug),
+    )
+
+
+def _grid():
+    """Every attribute combination for representative categories, plus every category."""
+    leads = [
+        _grid_lead(*values)
+        for values in itertools.product(
+            URGENCIES, SCORES, BUDGETS, INTENTS, PROPERTY_TYPES, REPRESENTATIVE_SLUGS,
+        )
+    ]
+    leads += [
+        _grid_lead(urgency, score, budget, 'ready_to_hire', 'commercial', slug)
+        for urgency, score, budget, slug in itertools.product(
+            URGENCIES, SCORES, BUDGETS, sorted(pricing_engine.CATEGORY_CODES),
+        )
+    ]
+    return leads
+
+
+class PricingEngineParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.service = DynamicPricingMLService()
+        client = make_client()
+        cls.fixtures = [
+            make_lead(client, make_category(name), **fields)
+            for name, fields in (
+                ('Plumbing', {'urgency': 'urgent', 'budget_range': 'over_50000',
+                              'hiring_intent': 'ready_to_hire', 'property_type': 'industrial'}),
+                ('Electrical', {'urgency': 'this_week', 'budget_range': '5000_15000',
+                                'hiring_intent': 'planning_to_hire', 'property_type': 'commercial'}),
+                ('Cleaning', {'urgency': 'flexible', 'budget_range': 'under_1000',
+                              'hiring_intent': 'researching', 'property_type': 'residential'}),
+                ('Roofing', {'urgency': 'this_month', 'budget_range': '15000_50000',
+                             'hiring_intent': 'comparing_quotes'}),
+                ('Solar Installation', {'urgency': 'urgent', 'budget_range': 'no_budget'}),
+                ('Pool Maintenance', {'urgency': 'this_week', 'budget_range': '1000_5000',
+                                      'property_type': 'commercial'}),
+            )
+        ]
+        # Quality bands come from the stored verification score
+        for lead, score in zip(cls.fixtures, (95, 81, 80, 61, 60, 0)):
+            lead.verification_score = score
+        Lead.objects.bulk_update(cls.fixtures, ['verification_score'])
+
+    def assertParity(self, leads, use_ml, codes=None):
+        codes = codes or pricing_engine.encode(leads)
+        for tier in TIERS:
+            vectorized = pricing_engine.price_credits(codes, pricing_engine.tier_code(tier), use_ml=use_ml)
+            mismatches = [
+                (lead.urgency, lead.verification_score, lead.budget_range, lead.hiring_intent,
+                 lead.property_type, lead.service_category.slug, int(credits), expected)
+                for lead, credits in zip(leads, vectorized)
+                for expected in [_scalar_credits(self.service, lead, tier, use_ml)]
+                if int(credits) != expected
+            ]
+            with self.subTest(tier=tier, use_ml=use_ml):
+                self.assertEqual(mismatches[:10], [], f"{len(mismatches)} mismatches")
+
+    def test_grid_simple(self):
+        self.assertParity(_grid(), use_ml=False)
+
+    def test_grid_optimal(self):
+        self.assertParity(_grid(), use_ml=True)
+
+    def test_saved_leads(self):
+        leads = list(Lead.objects.select_related('service_category').order_by('created_at'))
+        self.assertEqual(len(leads), len(self.fixtures))
+        for use_ml in (False, True):
+            self.assertParity(leads, use_ml)
+
+    def test_values_rows_encode_like_instances(self):
+        queryset = Lead.objects.select_related('service_category').order_by('created_at')
+        rows = list(queryset.values(*pricing_engine.PRICING_VALUE_FIELDS))
+        leads = list(queryset)
+        for use_ml in (False, True):
+            self.assertParity(leads, use_ml, codes=pricing_engine.encode(rows))
+
+    def test_price_leads_follows_setting(self):
+        leads = list(Lead.objects.select_related('service_category').order_by('created_at'))
+        for use_ml in (False, True):
+            with self.subTest(use_ml=use_ml), override_settings(USE_ML_PRICING=use_ml):
+                self.assertEqual(
+                    [int(c) for c in pricing_engine.price_leads(leads, 'pro')],
+                    [_scalar_credits(self.service, lead, 'pro', use_ml) for lead in leads],
+                )
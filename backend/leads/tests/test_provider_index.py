@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend.leads.services.provider_index import VERSION_CACHE_KEY, provider_index
+from backend.leads.tests.factories import make_provider
+
+
+class ProviderIndexSignalTests(TestCase):
+    """Only saves that change an indexed entry may advance the shared version."""
+
+    def setUp(self):
+        self.profile = make_provider()
+        provider_index.rebuild()
+        self.version = cache.get(VERSION_CACHE_KEY)
+
+    def _save(self, obj, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.save(**kwargs)
+
+    def test_login_save_keeps_version(self):
+        self._save(self.profile.user, update_fields=['last_login'])
+        self.assertEqual(cache.get(VERSION_CACHE_KEY), self.version)
+
+    def test_unindexed_profile_save_keeps_version(self):
+        self.profile.business_name = 'Acme Plumbing & Drains'
+        self._save(self.profile, update_fields=['business_name'])
+        self._save(self.profile)
+        self.assertEqual(cache.get(VERSION_CACHE_KEY), self.version)
+
+    def test_indexed_change_advances_version(self):
+        self.profile.service_areas = ['Durban']
+        self._save(self.profile, update_fields=['service_areas'])
+        self.assertNotEqual(cache.get(VERSION_CACHE_KEY), self.version)
+        ids = {entry.profile_id for entry in provider_index.candidates('plumbing', 'durban', '')}
+        self.assertIn(self.profile.id, ids)
+
+    def test_deactivation_advances_version(self):
+        user = self.profile.user
+        user.is_active = False
+        self._save(user, update_fields=['is_active'])
+        self.assertNotEqual(cache.get(VERSION_CACHE_KEY), self.version)
+        ids = {entry.profile_id for entry in provider_index.candidates('plumbing', 'cape town', '')}
+        self.assertNotIn(self.profile.id, ids)
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from backend.leads.models import LeadRoutingJob
+from backend.leads.services import routing_pipeline
+
+from .factories import make_lead
+
+
+def _failing_once(error='matching backend unavailable'):
+    """Gate handler that fails on its first call, then lets the lead through to 'done'."""
+    calls = []
+
+    def handler(job):
+        calls.append(job.pk)
+        if len(calls) == 1:
+            raise RuntimeError(error)
+        return 'done'
+
+    return handler
+
+
+@override_settings(LEAD_ROUTING_MODE='worker', LEAD_ROUTING_RETRY_BASE_SECONDS=30)
+class RetryDrainTests(TestCase):
+    def setUp(self):
+        self.job = LeadRoutingJob.objects.create(lead=make_lead())
+
+    def test_failed_stage_is_scheduled_for_retry(self):
+        with mock.patch.dict(routing_pipeline.STAGE_HANDLERS, gate=_failing_once()):
+            routing_pipeline.process_routing_job(self.job.pk)
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'pending')
+        self.assertEqual(self.job.attempts, 1)
+        self.assertGreater(self.job.next_attempt_at, timezone.now())
+        self.assertIn('matching backend unavailable', self.job.last_error)
+
+    def test_drain_retries_due_job_without_new_dispatch(self):
+        with mock.patch.dict(routing_pipeline.STAGE_HANDLERS, gate=_failing_once()):
+            routing_pipeline.process_routing_job(self.job.pk)
+            # Not due yet: the drain leaves it alone
+            self.assertEqual(routing_pipeline.drain_due_jobs(), 0)
+
+            LeadRoutingJob.objects.filter(pk=self.job.pk).update(
+                next_attempt_at=timezone.now() - timedelta(seconds=1),
+            )
+            self.assertEqual(routing_pipeline.drain_due_jobs(), 1)
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'done')
+
+    def test_drain_reclaims_expired_lease(self):
+        LeadRoutingJob.objects.filter(pk=self.job.pk).update(
+            status='running', locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        with mock.patch.dict(routing_pipeline.STAGE_HANDLERS, gate=lambda job: 'done'):
+            self.assertEqual(routing_pipeline.drain_due_jobs(), 1)
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'done')
+
+    def test_drain_thread_only_in_thread_mode(self):
+        self.assertFalse(routing_pipeline.start_retry_drain())
+
+
+@override_settings(
+    LEAD_ROUTING_MODE='thread',
+    LEAD_ROUTING_RETRY_BASE_SECONDS=0,
+    LEAD_ROUTING_DRAIN_SECONDS=0.05,
+)
+class RetryDrainThreadTests(TransactionTestCase):
+    def tearDown(self):
+        routing_pipeline.stop_retry_drain(timeout=5)
+
+    def test_background_drain_retries_failed_job(self):
+        job = LeadRoutingJob.objects.create(lead=make_lead())
+        with mock.patch.dict(routing_pipeline.STAGE_HANDLERS, gate=_failing_once()):
+            routing_pipeline.process_routing_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('pending', 1))
+
+            self.assertTrue(routing_pipeline.start_retry_drain())
+            self.assertFalse(routing_pipeline.start_retry_drain())  # One per process
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                job.refresh_from_db()
+                if job.status == 'done':
+                    break
+                time.sleep(0.05)
+
+        self.assertEqual(job.status, 'done')
@@ -0,0 +1,130 @@
+"""
+Compiled tree-ensemble inference (backend/leads/tree_inference.py) must agree
+with scikit-learn, including rows that sit exactly on split thresholds and
+rows with NaN / inf (which fall back to the estimator).
+"""
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import (
+    ExtraTreesClassifier, GradientBoostingClassifier, GradientBoostingRegressor,
+    RandomForestClassifier, RandomForestRegressor,
+)
+
+from backend.leads import tree_inference
+
+N_FEATURES = 6
+
+
+def _training_data():
+    rng = np.random.RandomState(7)
+    # Rounded values give many repeated values and exact-valued thresholds
+    X = np.round(rng.rand(300, N_FEATURES) * 20, 1)
+    y = X[:, 0] + X[:, 1] * 0.5 - X[:, 2] * 0.3 + rng.randn(300)
+    binary = (y > np.median(y)).astype(int)
+    labels = np.array(['low', 'medium', 'high'])[np.digitize(y, np.percentile(y, [33, 66]))]
+    return X, y, binary, labels
+
+
+def _classifiers(X, binary, labels):
+    return [
+        ('random forest', RandomForestClassifier(n_estimators=15, max_depth=6, random_state=1).fit(X, binary)),
+        ('random forest, 3 classes', RandomForestClassifier(n_estimators=15, random_state=1).fit(X, labels)),
+        ('extra trees, 3 classes', ExtraTreesClassifier(n_estimators=15, random_state=1).fit(X, labels)),
+        ('gradient boosting', GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=1).fit(X, binary)),
+        ('gradient boosting, 3 classes', GradientBoostingClassifier(n_estimators=10, random_state=1).fit(X, labels)),
+    ]
+
+
+def _regressors(X, y):
+    return [
+        ('random forest regressor', RandomForestRegressor(n_estimators=15, max_depth=6, random_state=1).fit(X, y)),
+        ('gradient boosting regressor', GradientBoostingRegressor(n_estimators=20, random_state=1).fit(X, y)),
+    ]
+
+
+def _threshold_rows(model, X):
+    """Rows whose split feature equals a node threshold exactly (and its float32 neighbours)."""
+    compiled = tree_inference.compiled_for(model)
+    internal = np.flatnonzero(compiled.left != np.arange(len(compiled.left)))
+    rng = np.random.RandomState(3)
+    rows = []
+    for node in rng.choice(internal, size=min(60, len(internal)), replace=False):
+        threshold = compiled.threshold[node]
+        as_float32 = np.float32(threshold)
+        for value in (threshold, as_float32, np.nextafter(as_float32, np.float32(-np.inf)),
+                      np.nextafter(as_float32, np.float32(np.inf))):
+            row = X[rng.randint(len(X))].copy()
+            row[compiled.feature[node]] = value
+            rows.append(row)
+    return np.array(rows)
+
+
+def _edge_rows(X):
+    """Training rows, rows on training values and unseen extremes."""
+    rng = np.random.RandomState(5)
+    return np.vstack([
+        X[:50],
+        rng.rand(50, N_FEATURES) * 30 - 5,
+        np.full((1, N_FEATURES), X.min()),
+        np.full((1, N_FEATURES), X.max()),
+        np.zeros((1, N_FEATURES)),
+        np.full((1, N_FEATURES), 1e6),
+    ])
+
+
+class CompiledInferenceParityTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.X, y, binary, labels = _training_data()
+        cls.classifiers = _classifiers(cls.X, binary, labels)
+        cls.regressors = _regressors(cls.X, y)
+
+    def test_models_compile(self):
+        for label, model in self.classifiers + self.regressors:
+            with self.subTest(model=label):
+                self.assertIsNotNone(tree_inference.compiled_for(model))
+
+    def test_classifier_probabilities_match(self):
+        for label, model in self.classifiers:
+            rows = np.vstack([_edge_rows(self.X), _threshold_rows(model, self.X)])
+            with self.subTest(model=label):
+                np.testing.assert_allclose(
+                    tree_inference.predict_proba(model, rows), model.predict_proba(rows), rtol=0, atol=1e-9,
+                )
+                np.testing.assert_array_equal(tree_inference.predict(model, rows), model.predict(rows))
+
+    def test_single_rows_match(self):
+        for label, model in self.classifiers:
+            rows = _threshold_rows(model, self.X)[:40]
+            with self.subTest(model=label):
+                for row in rows:
+                    self.assertTrue(np.allclose(
+                        tree_inference.predict_proba(model, row[None, :]), model.predict_proba(row[None, :]),
+                        rtol=0, atol=1e-9,
+                    ))
+
+    def test_regressor_values_match(self):
+        for label, model in self.regressors:
+            rows = np.vstack([_edge_rows(self.X), _threshold_rows(model, self.X)])
+            with self.subTest(model=label):
+                np.testing.assert_allclose(
+                    tree_inference.predict(model, rows), model.predict(rows), rtol=0, atol=1e-9,
+                )
+
+    def test_non_finite_rows_use_scikit_learn(self):
+        rows = _edge_rows(self.X)[:5].copy()
+        rows[1, 0] = np.nan
+        rows[3, 2] = np.inf
+        for label, model in self.classifiers:
+            compiled = tree_inference.compiled_for(model)
+            self.assertIsNone(tree_inference._rows(compiled, rows))
+            with self.subTest(model=label):
+                try:
+                    expected = model.predict_proba(rows)
+                except ValueError:
+                    # Estimators without missing-value support reject NaN the same way
+                    with self.assertRaises(ValueError):
+                        tree_inference.predict_proba(model, rows)
+                    continue
+                np.testing.assert_array_equal(tree_inference.predict_proba(model, rows), expected)
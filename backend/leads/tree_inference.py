@@ -0,0 +1,241 @@
+"""
+Compiled inference for tree-ensemble models.
+
+Production predictions are mostly one row at a time, where scikit-learn's
+predict / predict_proba cost is dominated by input validation and per-tree
+dispatch rather than the tree walks themselves. compile_model() flattens a
+fitted forest or boosted ensemble into contiguous NumPy node arrays
+(CompiledEnsemble), and predict() / predict_proba() evaluate rows by walking
+every tree at once, one level per step:
+
+    nodes = roots
+    repeat depth times:
+        nodes = where(x[feature[nodes]] <= threshold[nodes], left[nodes], right[nodes])
+    output = sum(value[nodes])          (leaves point to themselves)
+
+Supported: RandomForest / ExtraTrees classifiers and regressors (single
+output) and GradientBoosting classifiers and regressors with the default or
+'zero' init. Anything else (dummy models, logistic regression, custom init)
+goes to the estimator's own method, as do rows with NaN / inf.
+
+Inputs are cast to float32 before comparing with the float64 thresholds,
+exactly as scikit-learn's trees do, so the same leaves are reached and the
+outputs match within float rounding. backend/leads/tests/test_tree_inference.py
+pins parity (1e-9) on small fitted ensembles, including rows on split
+thresholds and NaN rows; `manage.py check_tree_inference` also covers the
+promoted models in the store and measures latency.
+
+The model store (model_store.py) saves a compiled copy next to each supported
+artifact and registers it on load, so the node arrays are memory-mapped with
+the rest of the version; models loaded any other way are compiled on first
+use and cached per estimator object.
+
+Design principles:
+- Callers swap model.predict(X) for tree_inference.predict(model, X) and nothing else
+- Never changes a prediction: unsupported models and inputs use scikit-learn
+"""
+import logging
+import threading
+import weakref
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_UNSUPPORTED = object()
+_compiled = weakref.WeakKeyDictionary()  # estimator -> CompiledEnsemble or _UNSUPPORTED
+_lock = threading.Lock()
+
+
+class CompiledEnsemble:
+    """Flattened node arrays of a fitted tree ensemble (see module docstring)."""
+
+    def __init__(self, kind, n_features, feature, threshold, left, right, value, roots, depth,
+                 init=None, classes=None):
+        self.kind = kind              # 'forest_classifier', 'forest_regressor', 'boosting_classifier', 'boosting_regressor'
+        self.n_features = n_features
+        self.feature = feature        # intp (n_nodes,), 0 on leaves
+        self.threshold = threshold    # float64 (n_nodes,)
+        self.left = left              # intp (n_nodes,), leaves point to themselves
+        self.right = right
+        self.value = value            # float64 (n_nodes, n_outputs), pre-scaled so outputs are a plain sum
+        self.roots = roots            # intp (n_trees,)
+        self.depth = depth
+        self.init = init              # float64 (n_outputs,) raw score offset (boosting)
+        self.classes = classes
+
+    def __setstate__(self, state):
+        # Memory-mapped loads (model_store) arrive as np.memmap, whose subclass
+        # hooks would run on every gather; plain views share the same pages
+        self.__dict__.update({
+            key: np.asarray(value) if isinstance(value, np.ndarray) else value
+            for key, value in state.items()
+        })
+
+    def _leaf_sum(self, X):
+        if X.shape[0] == 1:
+            x = X[0]
+            nodes = self.roots
+            for _ in range(self.depth):
+                nodes = np.where(x[self.feature[nodes]] <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+            return self.value[nodes].sum(axis=0)[np.newaxis]
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            nodes = np.where(X[rows, self.feature[nodes]] <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=1)
+
+    def raw(self, X):
+        total = self._leaf_sum(X)
+        return total + self.init if self.init is not None else total
+
+    def predict_proba(self, X):
+        raw = self.raw(X)
+        if self.kind == 'forest_classifier':
+            return raw
+        if raw.shape[1] == 1:
+            from scipy.special import expit
+            positive = expit(raw[:, 0])
+            return np.column_stack([1.0 - positive, positive])
+        from scipy.special import softmax
+        return softmax(raw, axis=1)
+
+    def predict(self, X):
+        if self.classes is not None:
+            return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+        return self.raw(X)[:, 0]
+
+
+def _flatten(trees, n_outputs, leaf_values):
+    """Concatenate sklearn Tree objects; leaf_values(i, tree) -> (n_nodes, n_outputs) values."""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for i, tree in enumerate(trees):
+        n = tree.node_count
+        own = np.arange(offset, offset + n, dtype=np.int64)
+        leaf = tree.children_left == -1
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(leaf, own, tree.children_left + offset))
+        rights.append(np.where(leaf, own, tree.children_right + offset))
+        values.append(leaf_values(i, tree).reshape(n, n_outputs))
+        roots.append(offset)
+        depth = max(depth, tree.max_depth)
+        offset += n
+    # Native index width: gathers with int32 indices pay a conversion on every step
+    return dict(
+        feature=np.concatenate(features).astype(np.intp),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+        left=np.concatenate(lefts).astype(np.intp),
+        right=np.concatenate(rights).astype(np.intp),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=np.asarray(roots, dtype=np.intp),
+        depth=depth,
+    )
+
+
+def _compile_forest(model, classifier):
+    if getattr(model, 'n_outputs_', 1) != 1:
+        return None
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    scale = 1.0 / len(trees)
+    if classifier:
+        def leaf_values(i, tree):
+            value = tree.value[:, 0, :]
+            total = value.sum(axis=1, keepdims=True)
+            return value / np.where(total == 0, 1.0, total) * scale
+        arrays = _flatten(trees, model.n_classes_, leaf_values)
+        return CompiledEnsemble('forest_classifier', model.n_features_in_, classes=model.classes_, **arrays)
+    arrays = _flatten(trees, 1, lambda i, tree: tree.value[:, 0, 0] * scale)
+    return CompiledEnsemble('forest_regressor', model.n_features_in_, **arrays)
+
+
+def _compile_boosting(model, classifier):
+    if model.init not in (None, 'zero'):
+        return None  # Custom init estimators need not give a constant offset
+    stages = model.estimators_
+    n_outputs = stages.shape[1]
+    trees = [stages[i, k].tree_ for i in range(stages.shape[0]) for k in range(n_outputs)]
+
+    def leaf_values(i, tree):
+        value = np.zeros((tree.node_count, n_outputs))
+        value[:, i % n_outputs] = tree.value[:, 0, 0] * model.learning_rate
+        return value
+
+    arrays = _flatten(trees, n_outputs, leaf_values)
+    init = np.asarray(
+        model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0], dtype=np.float64
+    )
+    if classifier:
+        return CompiledEnsemble('boosting_classifier', model.n_features_in_, init=init, classes=model.classes_, **arrays)
+    return CompiledEnsemble('boosting_regressor', model.n_features_in_, init=init, **arrays)
+
+
+def compile_model(model):
+    """CompiledEnsemble for a fitted supported estimator, else None. Never raises."""
+    from sklearn.ensemble import (
+        ExtraTreesClassifier, ExtraTreesRegressor, GradientBoostingClassifier,
+        GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor,
+    )
+
+    try:
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            return _compile_forest(model, classifier=True)
+        if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+            return _compile_forest(model, classifier=False)
+        if isinstance(model, GradientBoostingClassifier):
+            return _compile_boosting(model, classifier=True)
+        if isinstance(model, GradientBoostingRegressor):
+            return _compile_boosting(model, classifier=False)
+    except Exception as e:
+        logger.warning(f"[TreeInference] Could not compile {type(model).__name__}: {e}")
+    return None
+
+
+def register(model, compiled):
+    """Use an already compiled ensemble (e.g. loaded from the model store) for model."""
+    with _lock:
+        _compiled[model] = compiled if compiled is not None else _UNSUPPORTED
+
+
+def compiled_for(model):
+    """Cached CompiledEnsemble for model (compiled on first use), or None."""
+    try:
+        compiled = _compiled.get(model)
+    except TypeError:
+        return None  # Not weak-referenceable
+    if compiled is None:
+        compiled = compile_model(model)
+        register(model, compiled)
+        compiled = compiled or _UNSUPPORTED
+    return None if compiled is _UNSUPPORTED else compiled
+
+
+def _rows(compiled, X):
+    """X as a float32 matrix the compiled ensemble can take, or None."""
+    try:
+        rows = np.asarray(X, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if rows.ndim != 2 or rows.shape[1] != compiled.n_features or not np.isfinite(rows).all():
+        return None
+    return rows
+
+
+def predict(model, X):
+    """model.predict(X), evaluated on the compiled ensemble when possible."""
+    compiled = compiled_for(model)
+    rows = _rows(compiled, X) if compiled is not None else None
+    if rows is None:
+        return model.predict(X)
+    return compiled.predict(rows)
+
+
+def predict_proba(model, X):
+    """model.predict_proba(X), evaluated on the compiled ensemble when possible."""
+    compiled = compiled_for(model)
+    rows = _rows(compiled, X) if compiled is not None else None
+    if rows is None or compiled.kind.endswith('regressor'):
+        return model.predict_proba(X)
+    return compiled.predict_proba(rows)
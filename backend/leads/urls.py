@@ -1,6 +1,7 @@
 from django.urls import path
 from . import views
 from . import for_me_views
+from . import search_views
 from . import assignment_unlock
 from . import ml_views
 # REMOVED: subscription-based access views
@@ -21,6 +22,7 @@ urlpatterns = [
     
     # Leads
     path('for-me/', for_me_views.leads_for_me, name='leads-for-me'),
+    path('search/', search_views.search_leads_view, name='lead-search'),
     path(
         '<uuid:assignment_id>/unlock/',
         assignment_unlock.unlock_lead_by_assignment,
@@ -47,6 +49,7 @@ urlpatterns = [
     
     # ML Analytics
     path('ml-readiness/', ml_views.ml_readiness_view, name='ml-readiness'),
+    path('routing-traces/', ml_views.routing_traces_view, name='routing-traces'),
     path('hybrid-scoring/', ml_views.hybrid_scoring_view, name='hybrid-scoring'),
     path('ab-test-analytics/', ml_views.ab_test_analytics_view, name='ab-test-analytics'),
     path('ml-metrics/', ml_views.ml_metrics_view, name='ml-metrics'),
@@ -75,6 +78,7 @@ urlpatterns = [
     
     # Wallet-based lead system (ONLY system we use)
     path('wallet/available/', wallet_api.available_leads, name='wallet-available-leads'),
+    path('wallet/available/<uuid:lead_id>/', wallet_api.available_lead_detail, name='wallet-available-lead-detail'),
     path('wallet/unlocked/', wallet_api.unlocked_leads, name='wallet-unlocked-leads'),
     
     # Enterprise-grade lead filtering endpoints
@@ -486,19 +486,7 @@ def create_public_lead(request):
         except Exception as e:
             logger.warning(f"Auto-verification failed for lead {lead.id}, will retry via signal: {e}")
         
-        # Calculate and store credit cost for this lead
-        try:
-            from .ml_services import DynamicPricingMLService
-            pricing_service = DynamicPricingMLService()
-            pricing_result = pricing_service.calculate_dynamic_lead_price(lead, None)
-            lead.credit_cost = pricing_result['price'] * 50  # Convert credits to Rands for storage
-            lead.save(update_fields=['credit_cost'])
-            logger.info(f"💰 Lead {lead.id} credit cost calculated: {pricing_result['price']} credits (R{pricing_result['price'] * 50})")
-        except Exception as e:
-            logger.error(f"💰 Failed to calculate credit cost for lead {lead.id}: {str(e)}")
-            # Set default credit cost
-            lead.credit_cost = 200  # Default R200 (4 credits)
-            lead.save(update_fields=['credit_cost'])
+        # Lead.save() stored the price when the lead and its verification score were written (lead_pricing.py)
         
         # Monitor lead creation
         from backend.leads.flow_monitor import flow_monitor
@@ -571,8 +559,8 @@ def available_leads_view(request):
         # - Historical success patterns and conversion rates
         from .services import LeadFilteringService
         
-        from backend.leads.test_lead_utils import exclude_test_leads
-        
+        # Test leads are already excluded by LeadFilteringService (the result is
+        # sliced, so it cannot be filtered again here)
         leads = LeadFilteringService.get_filtered_leads_for_provider(
             provider=request.user,
             filters={
@@ -583,9 +571,6 @@ def available_leads_view(request):
             }
         )
         
-        # IMPORTANT: Filter out test leads - providers should NEVER see test leads
-        leads = exclude_test_leads(leads)
-        
         logger.info(f"ML filtering returned {leads.count()} leads for provider {request.user.id}")
         
         # Serialize and return leads
@@ -635,69 +620,41 @@ def verify_lead_sms(request, lead_id):
 def track_lead_view(request, lead_id):
     """Track when a provider views a lead for Bark-style competition stats"""
     from django.core.cache import cache
-    from django.db import transaction
-    import time
+    from .lead_counters import pending_counts, record
     
     try:
-        # Use Redis to track views with atomic increment
-        cache_key = f"lead_views_{lead_id}"
-        user_view_key = f"lead_view_{lead_id}_{request.user.id}"
+        stored_views = Lead.objects.filter(id=lead_id).values_list('views_count', flat=True).first()
+        if stored_views is None:
+            return Response({'error': 'Lead not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if this user already viewed this lead recently (prevent spam)
-        if cache.get(user_view_key):
+        # Mark user as having viewed (prevent duplicate views for 5 minutes);
+        # add() is atomic in the shared cache, so only one worker counts the view
+        user_view_key = f"lead_view_{lead_id}_{request.user.id}"
+        if not cache.add(user_view_key, True, timeout=300):
             return Response({
                 'success': True,
-                'views_count': cache.get(cache_key, 0),
+                'views_count': stored_views + pending_counts(lead_id)['views_count'],
                 'message': 'View already tracked recently'
             })
         
-        # Atomic increment in Redis (no database locks)
-        views_count = cache.get(cache_key, 0)
-        cache.set(cache_key, views_count + 1, timeout=3600)  # 1 hour cache
-        
-        # Mark user as having viewed (prevent duplicate views for 5 minutes)
-        cache.set(user_view_key, True, timeout=300)
-        
-        # Update database periodically (every 10 views) to reduce contention
-        if (views_count + 1) % 10 == 0:
-            try:
-                with transaction.atomic():
-                    # Use select_for_update to prevent race conditions
-                    lead = Lead.objects.select_for_update(nowait=True).get(id=lead_id)
-                    lead.views_count = views_count + 1
-                    lead.save(update_fields=['views_count'])
-            except Lead.DoesNotExist:
-                pass
-            except Exception as db_error:
-                # Database update failed, but Redis counter still works
-                logger.warning(f"Database update failed for lead {lead_id}: {str(db_error)}")
+        # Sharded cache counter flushed to the lead in batches, or a relative UPDATE
+        record(lead_id, 'views_count')
+        stored_views = Lead.objects.filter(id=lead_id).values_list('views_count', flat=True).first() or 0
         
         logger.info(f"Lead {lead_id} view tracked by user {request.user.id}")
         
         return Response({
             'success': True,
-            'views_count': views_count + 1,
+            'views_count': stored_views + pending_counts(lead_id)['views_count'],
             'message': 'View tracked successfully'
         })
         
     except Exception as e:
         logger.error(f"Error tracking lead view: {str(e)}")
-        # Fallback: try simple database update with timeout
-        try:
-            with transaction.atomic():
-                lead = Lead.objects.select_for_update(nowait=True).get(id=lead_id)
-                lead.increment_views_count()
-                return Response({
-                    'success': True,
-                    'views_count': lead.views_count,
-                    'message': 'View tracked successfully (fallback)'
-                })
-        except Exception as fallback_error:
-            logger.error(f"Fallback tracking failed: {str(fallback_error)}")
-            return Response(
-                {'error': 'Failed to track view'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(
+            {'error': 'Failed to track view'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
 
 # Enterprise Lead Filtering Service
@@ -799,50 +756,14 @@ class EnterpriseLeadFilteringService:
         filtered_query = base_query
         
         # Service category filter
-        # IMPORTANT: Check BOTH Service objects AND service_categories JSON field
+        # Cached match profile: ProviderCoverage holds both Service objects AND service_categories JSON field
+        match = None
         try:
-            from backend.leads.models import ServiceCategory
-            from backend.users.models import Service
-            from django.utils.text import slugify
-
-            # Method 1: Get categories from Service objects (most reliable)
-            service_category_ids_from_objects = set()
-            service_category_slugs_from_objects = set()
-            for service in profile.services.filter(is_active=True):
-                if service.category:
-                    service_category_ids_from_objects.add(service.category.id)
-                    service_category_slugs_from_objects.add(service.category.slug)
-            
-            # Method 2: Get categories from JSON field (backward compatibility)
-            raw = profile.service_categories or []
-            ids = set()
-            slugs = set()
-            for v in raw:
-                if v is None:
-                    continue
-                if isinstance(v, int):
-                    if v > 0:
-                        ids.add(v)
-                    continue
-                s = str(v).strip()
-                if not s:
-                    continue
-                if s.isdigit():
-                    ids.add(int(s))
-                    continue
-                slugs.add(slugify(s))
+            from backend.users.match_profile import get_match_profile
 
-            # Combine both sources
-            all_ids = list(ids) + list(service_category_ids_from_objects)
-            all_slugs = list(slugs) + list(service_category_slugs_from_objects)
-
-            category_ids = list(
-                ServiceCategory.objects.filter(
-                    Q(id__in=all_ids) | Q(slug__in=all_slugs)
-                ).values_list('id', flat=True)
-            )
-            if category_ids:
-                filtered_query = filtered_query.filter(service_category_id__in=category_ids)
+            match = get_match_profile(profile)
+            if match.category_ids:
+                filtered_query = filtered_query.filter(service_category_id__in=match.category_ids)
             else:
                 # Fail closed: no categories => no leads
                 filtered_query = filtered_query.none()
@@ -851,13 +772,9 @@ class EnterpriseLeadFilteringService:
             filtered_query = filtered_query.none()
         
         # Geographic filter
-        if profile.service_areas:
-            service_area_filter = Q()
-            for area in profile.service_areas:
-                service_area_filter |= (
-                    Q(location_city__icontains=area) |
-                    Q(location_suburb__icontains=area)
-                )
+        from .gazetteer import lead_area_q
+        service_area_filter = lead_area_q(match.service_areas if match else profile.service_areas)
+        if service_area_filter is not None:
             filtered_query = filtered_query.filter(service_area_filter)
         
         # Lead quality filter (optional)
@@ -11,48 +11,11 @@ import random
 import re
 
 from ..users.models import Wallet, LeadUnlock
+from ..users.service_category_utils import (
+    PROVIDER_CATEGORY_SLUG_ALIASES as CATEGORY_SLUG_ALIASES,
+)
 from .models import Lead
 
-CATEGORY_SLUG_ALIASES = {
-    # legacy -> canonical
-    "appliance": "appliance-repair",
-    "pool": "pool-maintenance",
-    "renovation": "renovations",
-    "general": "handyman",
-}
-
-
-def _normalize_provider_category_inputs(values):
-    """
-    ProviderProfile.service_categories is supposed to store slugs, but older data
-    sometimes contains IDs or human names. Normalize robustly.
-    Returns (ids: set[int], slugs: set[str])
-    """
-    ids = set()
-    slugs = set()
-    if not values:
-        return ids, slugs
-
-    for v in values:
-        if v is None:
-            continue
-        if isinstance(v, int):
-            if v > 0:
-                ids.add(v)
-            continue
-        s = str(v).strip()
-        if not s:
-            continue
-        if s.isdigit():
-            ids.add(int(s))
-            continue
-        norm = slugify(s)
-        if not norm:
-            continue
-        norm = CATEGORY_SLUG_ALIASES.get(norm, norm)
-        slugs.add(norm)
-
-    return ids, slugs
 
 def mask_text_content(text):
     """Mask sensitive information in text content"""
@@ -83,7 +46,25 @@ def available_leads(request):
     import logging
     
     logger = logging.getLogger(__name__)
-    
+
+    # ?limit=&cursor= keyset paging (marketplace_feed), ?view=card drops the
+    # description fields (fetch them from wallet/available/<lead id>/)
+    from .marketplace_feed import FEED_LIMIT, decode_cursor
+    try:
+        limit = min(max(int(request.GET.get('limit', FEED_LIMIT)), 1), FEED_LIMIT)
+        after = decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    compact = request.GET.get('view') == 'card'
+
+    # Conditional GET: an unchanged feed is answered from cache stamps alone (feed_version)
+    from .feed_version import etag_matches, feed_etag, remember_feed_state
+    variant = request.GET.urlencode()
+    etag = feed_etag(request.user.id, variant)
+    if etag_matches(request, etag):
+        return Response(status=304, headers={'ETag': etag})
+    etag = None
+
     # Get user's wallet
     wallet, created = Wallet.objects.get_or_create(user=request.user)
     wallet_payload = {
@@ -92,6 +73,7 @@ def available_leads(request):
         'customer_code': wallet.customer_code,
     }
 
+    profile = None
     try:
         # Use ML-based filtering instead of hardcoded queries
         # This provides intelligent lead-provider matching based on:
@@ -116,130 +98,16 @@ def available_leads(request):
                 ),
             })
 
-        # Convert provider categories (slugs/ids/names) -> category IDs
-        # IMPORTANT: Check BOTH Service objects AND service_categories JSON field
-        from backend.leads.models import ServiceCategory
-        from backend.users.models import Service
-        
-        # Method 1: Get categories from Service objects (most reliable)
-        service_category_ids_from_objects = set()
-        service_category_slugs_from_objects = set()
-        for service in profile.services.filter(is_active=True):
-            if service.category:
-                service_category_ids_from_objects.add(service.category.id)
-                service_category_slugs_from_objects.add(service.category.slug)
-        
-        # Method 2: Get categories from JSON field (backward compatibility)
-        raw_categories = profile.service_categories if profile.service_categories else []
-        cat_ids, cat_slugs = _normalize_provider_category_inputs(raw_categories)
-        
-        # Combine both sources
-        all_category_ids = list(cat_ids) + list(service_category_ids_from_objects)
-        all_category_slugs = list(cat_slugs) + list(service_category_slugs_from_objects)
-        
-        # Get all matching category IDs
-        category_ids = list(
-            ServiceCategory.objects.filter(
-                Q(id__in=all_category_ids) | Q(slug__in=all_category_slugs)
-            ).values_list('id', flat=True)
-        )
-
-        from backend.leads.models import LeadAssignment as LeadAssignmentModel
+        # Whole feed page in one query (coverage / routed / area / unlock state as
+        # subqueries, see marketplace_feed) so the query count stays constant
+        from backend.users.match_profile import get_match_profile
+        from .marketplace_feed import feed_queryset
 
-        # Any lead ever assigned to this provider must stay visible even if categories drift,
-        # the marketplace window expired, or assignment status changed (contacted, quoted, etc.).
-        # Unlocked/purchased rows are removed later via LeadAccess exclude.
-        routed_to_me = list(
-            LeadAssignmentModel.objects.filter(provider=request.user)
-            .values_list('lead_id', flat=True)
-            .distinct()
-        )
-
-        if not category_ids:
-            if not routed_to_me:
-                logger.warning(
-                    "Provider %s has no resolvable service categories. "
-                    "Service objects: %s, JSON field: %s. Returning 0 available leads",
-                    request.user.id,
-                    list(service_category_slugs_from_objects),
-                    raw_categories,
-                )
-                return Response({
-                    'leads': [],
-                    'wallet': wallet_payload,
-                    'message': 'Please add service categories in your profile to see matching leads. Go to Settings > Services to add your services.'
-                })
-            # Still show leads already assigned to this provider
-            logger.warning(
-                "Provider %s has no category filter but has %s routed lead(s); showing those only",
-                request.user.id,
-                len(routed_to_me),
-            )
-        
-        logger.info(
-            "Provider %s service categories resolved: %s category IDs from %s Service objects and %s JSON entries",
-            request.user.id,
-            len(category_ids),
-            len(service_category_ids_from_objects),
-            len(raw_categories)
-        )
-
-        # Base query
-        # Note: many leads move to `assigned` after distribution, but are still
-        # purchasable/unlockable in the wallet marketplace.
-        # Test leads excluded once below (shared path).
-
-        if category_ids:
-            open_market = (
-                Q(status__in=['verified', 'assigned'])
-                & Q(service_category__id__in=category_ids)
-                & Q(is_available=True)
-                & Q(expires_at__gt=timezone.now())
-            )
-            if routed_to_me:
-                leads = Lead.objects.filter(open_market | Q(id__in=routed_to_me)).select_related(
-                    'service_category', 'client'
-                )
-            else:
-                leads = Lead.objects.filter(open_market).select_related('service_category', 'client')
-        else:
-            leads = Lead.objects.filter(id__in=routed_to_me).select_related('service_category', 'client')
-        
-        # Apply geographical filter (case-insensitive, trimmed)
-        # Smart filtering: If no leads match exact area, show leads from all cities
-        if profile.service_areas:
-            service_area_filter = Q()
-            for area in profile.service_areas:
-                a = str(area or '').strip()
-                if not a:
-                    continue
-                service_area_filter |= (Q(location_suburb__icontains=a) | Q(location_city__icontains=a))
-            
-            if service_area_filter:
-                # First try exact match
-                exact_match_leads = leads.filter(service_area_filter)
-                
-                # If we have exact matches, use them
-                if exact_match_leads.exists():
-                    leads = exact_match_leads
-                else:
-                    # No exact matches - show all matching category leads regardless of location
-                    # This ensures providers always see some leads (better UX than 0 leads)
-                    # The leads list already has category filter applied, so we just don't filter by area
-                    pass
-        
-        # Exclude leads already unlocked by this provider
-        from backend.leads.models import LeadAccess
-        unlocked_lead_ids = LeadAccess.objects.filter(
-            provider=request.user,
-            is_active=True
-        ).values_list('lead_id', flat=True)
-        leads = leads.exclude(id__in=unlocked_lead_ids)
-        
-        # Order by priority and apply limit (was 20 — too few for providers to see older + new)
-        leads = leads.order_by('-verification_score', '-created_at')[:100]
-        
-        logger.info(f"ML filtering returned {leads.count()} leads for provider {request.user.id}")
+        leads = feed_queryset(request.user, profile)
+        # Stamps are read before the feed query, so a change while rendering
+        # yields a new ETag on the next poll
+        remember_feed_state(request.user.id, profile.pk, get_match_profile(profile).category_ids)
+        etag = feed_etag(request.user.id, variant)
         
     except Exception as e:
         logger.error(f"ML filtering failed for provider {request.user.id}: {str(e)}")
@@ -247,38 +115,17 @@ def available_leads(request):
         # Fallback to basic filtering if ML service fails
         logger.info("Falling back to basic filtering")
         
-        # Get provider's service categories and areas
-        provider_service_categories = []
+        # Get provider's service areas
         provider_service_areas = []
         if hasattr(request.user, 'provider_profile'):
-            provider_service_categories = request.user.provider_profile.service_categories or []
             provider_service_areas = request.user.provider_profile.service_areas or []
         
-        # Basic service category filtering - check BOTH Service objects AND JSON field
-        from backend.leads.models import ServiceCategory
-        from backend.users.models import Service
-        
-        # Get categories from Service objects
-        service_category_ids_from_objects = set()
-        service_category_slugs_from_objects = set()
+        # Categories from Service objects AND the JSON field, resolved once per
+        # provider and cached (users/match_profile.py)
+        category_ids = []
         if hasattr(request.user, 'provider_profile'):
-            for service in request.user.provider_profile.services.filter(is_active=True):
-                if service.category:
-                    service_category_ids_from_objects.add(service.category.id)
-                    service_category_slugs_from_objects.add(service.category.slug)
-        
-        # Get categories from JSON field
-        cat_ids, cat_slugs = _normalize_provider_category_inputs(provider_service_categories)
-        
-        # Combine both sources
-        all_category_ids = list(cat_ids) + list(service_category_ids_from_objects)
-        all_category_slugs = list(cat_slugs) + list(service_category_slugs_from_objects)
-        
-        category_ids = list(
-            ServiceCategory.objects.filter(
-                Q(id__in=all_category_ids) | Q(slug__in=all_category_slugs)
-            ).values_list('id', flat=True)
-        )
+            from backend.users.match_profile import get_match_profile
+            category_ids = list(get_match_profile(request.user.provider_profile).category_ids)
 
         from backend.leads.models import LeadAssignment as LeadAssignmentModel
 
@@ -298,107 +145,115 @@ def available_leads(request):
             if routed_to_me:
                 leads = Lead.objects.filter(open_market | Q(id__in=routed_to_me)).select_related(
                     'client', 'service_category'
-                ).order_by('-created_at')[:100]
+                ).order_by('-created_at')
             else:
                 leads = Lead.objects.filter(open_market).select_related(
                     'client', 'service_category'
-                ).order_by('-created_at')[:100]
+                ).order_by('-created_at')
         elif routed_to_me:
             leads = Lead.objects.filter(id__in=routed_to_me).select_related(
                 'client', 'service_category'
-            ).order_by('-created_at')[:100]
+            ).order_by('-created_at')
         else:
             leads = Lead.objects.none()
         
-        # Basic geographical filtering
+        # Basic geographical filtering (gazetteer ids; icontains only for unknown names)
         if provider_service_areas:
-            geographical_filter = Q()
-            for area in provider_service_areas:
-                area_lower = str(area or '').strip().lower()
-                if not area_lower:
-                    continue
-                geographical_filter |= (
-                    Q(location_suburb__icontains=area_lower) |
-                    Q(location_city__icontains=area_lower) |
-                    Q(location_address__icontains=area_lower)
-                )
-            leads = leads.filter(geographical_filter)
-
-        from backend.leads.models import LeadAccess as LeadAccessFB
-
-        _unlocked_fb = LeadAccessFB.objects.filter(
-            provider=request.user,
-            is_active=True,
-        ).values_list('lead_id', flat=True)
-        leads = leads.exclude(id__in=_unlocked_fb)
-
-    from backend.leads.test_lead_utils import exclude_test_leads
-
-    leads = exclude_test_leads(leads)
-
-    # Convert leads to frontend format using integrated ML services
-    # OPTIMIZATION: Batch fetch all LeadAccess data to avoid N+1 queries
-    from .models import LeadAccess
-    from django.db.models import Count
-    
-    # Get all lead IDs
-    lead_ids = [lead.id for lead in leads]
-    
-    # Batch fetch: Get all unlocked leads for this provider in one query
-    unlocked_lead_ids = set(
-        LeadAccess.objects.filter(
-            provider=request.user,
-            lead_id__in=lead_ids,
-            is_active=True
-        ).values_list('lead_id', flat=True)
-    )
-    
-    # Batch fetch: Get current_responses count for all leads in one query
-    responses_counts = dict(
-        LeadAccess.objects.filter(
-            lead_id__in=lead_ids,
-            is_active=True
-        ).values('lead_id').annotate(count=Count('id')).values_list('lead_id', 'count')
-    )
-    
-    # Initialize ML pricing service once (reuse for all leads)
-    from .ml_services import DynamicPricingMLService
-    pricing_service = DynamicPricingMLService()
-    
+            from .gazetteer import lead_area_q
+            geographical_filter = lead_area_q(
+                [str(area or '') for area in provider_service_areas], include_address=True
+            )
+            if geographical_filter is not None:
+                leads = leads.filter(geographical_filter)
+
+    # Unlocked and test leads excluded, is_unlocked / current_responses annotated,
+    # card columns only; limit applied last (was 20 — too few for providers to see older + new)
+    from .marketplace_feed import encode_cursor, has_feed_sources, with_card_state
+
+    leads = list(with_card_state(leads, request.user, limit=limit + 1, after=after, compact=compact))
+    next_cursor = None
+    if len(leads) > limit:
+        leads = leads[:limit]
+        next_cursor = encode_cursor(leads[-1])
+
+    if not leads and profile is not None and not has_feed_sources(request.user, profile):
+        logger.warning(
+            "Provider %s has no resolvable service categories. "
+            "JSON field: %s. Returning 0 available leads",
+            request.user.id,
+            profile.service_categories,
+        )
+        return Response({
+            'leads': [],
+            'wallet': wallet_payload,
+            'message': 'Please add service categories in your profile to see matching leads. Go to Settings > Services to add your services.'
+        })
+
+    # Prices are stored on the lead (lead_pricing.py); only the discount bucket is per provider
+    from .lead_pricing import tier_bucket
+    leads_data = _feed_rows(leads, tier_bucket(request.user), logger, compact=compact)
+
+    payload = {
+        'leads': leads_data,
+        'wallet': wallet_payload,
+        'next_cursor': next_cursor,
+    }
+    if not leads_data:
+        payload['message'] = (
+            'No open leads match your profile right now. Common reasons: (1) there are no '
+            'new verified requests in your service categories yet, (2) posted leads expired, '
+            '(3) your service categories or areas need updating under Settings → Services. '
+            'Assigned leads you have not unlocked may still appear if routing reached you.'
+        )
+    response = Response(payload)
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def available_lead_detail(request, lead_id):
+    """One feed row with its description, for cards listed with ?view=card."""
+    import logging
+    from .lead_pricing import tier_bucket
+    from .marketplace_feed import feed_queryset, with_card_state
+
+    try:
+        profile = request.user.provider_profile
+    except ObjectDoesNotExist:
+        return Response({'error': 'Lead not found'}, status=404)
+    leads = list(with_card_state(feed_queryset(request.user, profile).filter(id=lead_id), request.user, limit=1))
+    rows = _feed_rows(leads, tier_bucket(request.user), logging.getLogger(__name__))
+    if not rows:
+        return Response({'error': 'Lead not found'}, status=404)
+    return Response(rows[0])
+
+
+def _feed_rows(leads, bucket, logger, compact=False):
+    """
+    Feed card rows for leads from marketplace_feed.with_card_state(); compact
+    rows leave out the description fields (not loaded for ?view=card).
+    """
+    from .lead_pricing import lead_credits, price_missing
+    from .services import LeadAssignmentService
+    # Leads priced under older rules are repriced together in one engine pass
+    price_missing(leads)
+
     leads_data = []
     for lead in leads:
         try:
-            # Use integrated ML pricing service (cached/reused service instance)
-            pricing_result = pricing_service.calculate_dynamic_lead_price(lead, request.user)
-            # ML service returns credits directly, not Rands
-            credits_cost = max(1, round(pricing_result.get('price', 4), 1))
+            credits_cost = lead_credits(lead, bucket=bucket)
             
-            # Check if already unlocked (from batch query)
-            is_unlocked = lead.id in unlocked_lead_ids
-            
-            # Get actual count of providers who have purchased this lead (from batch query)
-            current_responses = responses_counts.get(lead.id, 0)
+            # Unlock state and purchase count come from the feed query annotations
+            is_unlocked = lead.is_unlocked
+            current_responses = lead.current_responses
             
             # Get max_providers from lead model (default to 5 if not set)
             max_providers = getattr(lead, 'max_providers', 5)
             
-            # Use LeadAssignmentService for proper data formatting (with error handling)
-            try:
-                from .services import LeadAssignmentService
-                assignment_service = LeadAssignmentService()
-                masked_name = assignment_service._mask_client_name(f"{lead.client.first_name} {lead.client.last_name}".strip() if lead.client else 'Anonymous Client')
-            except Exception as service_error:
-                logger.warning(f"LeadAssignmentService failed for lead {lead.id}: {str(service_error)}")
-                # Simple fallback for masking
-                client_name = f"{lead.client.first_name} {lead.client.last_name}".strip() if lead.client else 'Anonymous Client'
-                if not client_name or client_name == 'Anonymous Client':
-                    masked_name = 'A. C.'
-                else:
-                    parts = client_name.strip().split()
-                    if len(parts) >= 2:
-                        masked_name = f"{parts[0][0]}. {parts[-1][0]}***"
-                    else:
-                        masked_name = f"{parts[0][0]}***"
+            client_name = f"{lead.client.first_name} {lead.client.last_name}".strip() if lead.client else 'Anonymous Client'
+            masked_name = LeadAssignmentService._mask_client_name(client_name)
             
             lead_data = {
                 'id': str(lead.id),
@@ -433,22 +288,22 @@ def available_leads(request):
                 'timeline': get_timeline_display(lead.hiring_timeline),
                 'previousHires': 0,  # Will be calculated by ML
                 'isUnlocked': is_unlocked,
-                'details': lead.description,
-                'masked_details': mask_text_content(lead.description) if not is_unlocked else lead.description,
                 'views_count': getattr(lead, 'views_count', 0),
                 'responses_count': getattr(lead, 'responses_count', 0),
                 'max_providers': max_providers,
                 'current_responses': current_responses,
                 'assigned_providers_count': current_responses  # Alias for compatibility
             }
+            if not compact:
+                lead_data['details'] = lead.description
+                lead_data['masked_details'] = mask_text_content(lead.description) if not is_unlocked else lead.description
             leads_data.append(lead_data)
             
         except Exception as e:
             logger.error(f"Error processing lead {lead.id} with ML services: {str(e)}")
             # Fallback to simple processing - BUT USE REAL CLIENT DATA
             try:
-                # Calculate proper credit cost even in fallback
-                credits_cost = calculate_ml_lead_pricing(lead)
+                credits_cost = lead_credits(lead, bucket=bucket)
                 
                 # Use REAL client data, not hardcoded values
                 client_name = f"{lead.client.first_name} {lead.client.last_name}".strip() if lead.client else 'Anonymous Client'
@@ -492,31 +347,20 @@ def available_leads(request):
                     'timeline': get_timeline_display(lead.hiring_timeline),
                     'previousHires': 0,
                     'isUnlocked': False,
-                    'details': lead.description,
-                    'masked_details': mask_text_content(lead.description) if not False else lead.description,
                     'views_count': getattr(lead, 'views_count', 0),
                     'responses_count': getattr(lead, 'responses_count', 0),
                     'max_providers': getattr(lead, 'max_providers', 5),
-                    'current_responses': responses_counts.get(lead.id, 0),
-                    'assigned_providers_count': responses_counts.get(lead.id, 0)
+                    'current_responses': lead.current_responses,
+                    'assigned_providers_count': lead.current_responses
                 }
+                if not compact:
+                    lead_data['details'] = lead.description
+                    lead_data['masked_details'] = mask_text_content(lead.description)
                 leads_data.append(lead_data)
             except Exception as fallback_error:
                 logger.error(f"Fallback processing also failed for lead {lead.id}: {str(fallback_error)}")
                 continue
-
-    payload = {
-        'leads': leads_data,
-        'wallet': wallet_payload,
-    }
-    if not leads_data:
-        payload['message'] = (
-            'No open leads match your profile right now. Common reasons: (1) there are no '
-            'new verified requests in your service categories yet, (2) posted leads expired, '
-            '(3) your service categories or areas need updating under Settings → Services. '
-            'Assigned leads you have not unlocked may still appear if routing reached you.'
-        )
-    return Response(payload)
+    return leads_data
 
 
 @api_view(['GET'])
@@ -606,96 +450,6 @@ def mask_sensitive_details(text):
     return text
 
 
-def calculate_ml_lead_pricing(lead):
-    """
-    Calculate lead pricing using the actual ML services
-    Uses the DynamicPricingMLService for realistic South African pricing
-    """
-    try:
-        from .ml_services import DynamicPricingMLService
-        
-        # Use the actual ML pricing service
-        pricing_service = DynamicPricingMLService()
-        pricing_result = pricing_service.calculate_dynamic_lead_price(lead, provider=None)
-        
-        # ML service returns credits directly (1 credit = R50)
-        credits = pricing_result.get('price', 4)
-        # Ensure minimum 1 credit
-        credits = max(1, round(credits, 1))
-        
-        return credits
-        
-    except Exception as e:
-        # Fallback to simple pricing if ML service fails
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.warning(f"ML pricing failed, using fallback: {str(e)}")
-        
-        # Simple fallback pricing - REVENUE OPTIMIZED PRICING
-        base_credits = 4  # 4 credits = R200 base - REALISTIC BASE PRICE
-        
-        # Service category multiplier (different services have different values)
-        service_multipliers = {
-            'cleaning': 1.0,      # Base multiplier
-            'electrical': 1.5,    # Electrical is more valuable
-            'plumbing': 1.3,      # Plumbing is valuable
-            'hvac': 1.4,          # HVAC is valuable
-            'carpentry': 1.2,     # Carpentry is moderately valuable
-            'painting': 1.1,      # Painting is slightly more valuable
-            'roofing': 1.6,       # Roofing is very valuable
-            'flooring': 1.3,      # Flooring is valuable
-            'landscaping': 1.1,   # Landscaping is slightly more valuable
-            'moving': 1.2,        # Moving is moderately valuable
-            'appliance-repair': 1.3,  # Appliance repair is valuable
-            'handyman': 1.1,      # Handyman is slightly more valuable
-            'pool-maintenance': 1.4,  # Pool maintenance is valuable
-            'security': 1.5,      # Security is valuable
-            'it-support': 1.3,    # IT support is valuable
-            'web-design': 1.2,    # Web design is moderately valuable
-            'marketing': 1.1,     # Marketing is slightly more valuable
-            'accounting': 1.2,    # Accounting is moderately valuable
-            'legal': 1.8,         # Legal is very valuable
-            'consulting': 1.4,    # Consulting is valuable
-            'other': 1.0          # Other services base multiplier
-        }
-        category_multiplier = service_multipliers.get(lead.service_category.slug, 1.0)
-        
-        # Urgency multiplier (based on lead urgency) - AGGRESSIVE PRICING
-        urgency_multipliers = {
-            'urgent': 3.0,        # 12 credits = R600 (urgent premium)
-            'this_week': 2.0,     # 8 credits = R400 (this week premium)
-            'this_month': 1.5,    # 6 credits = R300 (this month premium)
-            'flexible': 1.0       # 4 credits = R200 (base price)
-        }
-        
-        urgency_multiplier = urgency_multipliers.get(lead.urgency, 1.0)
-        
-        # Quality multiplier (verification score impact) - HIGHER PREMIUMS
-        verification_multiplier = 1 + (lead.verification_score / 50.0)  # More impactful
-        
-        # High intent multiplier - AGGRESSIVE PRICING
-        high_intent_multiplier = 2.0 if lead.hiring_intent == 'ready_to_hire' else 1.5 if lead.hiring_intent == 'planning_to_hire' else 1.0
-        
-        # Budget multiplier - AGGRESSIVE PRICING
-        budget_multipliers = {
-            'under_1000': 1.0,
-            '1000_5000': 1.5,
-            '5000_15000': 2.0,
-            '15000_50000': 3.0,
-            'over_50000': 4.0
-        }
-        budget_multiplier = budget_multipliers.get(lead.budget_range, 1.0)
-        
-        # Calculate final credits - REVENUE OPTIMIZED
-        credits = base_credits * category_multiplier * urgency_multiplier * verification_multiplier * high_intent_multiplier * budget_multiplier
-        
-        # Round to nearest 0.5 credits
-        credits = round(credits * 2) / 2
-        
-        # Ensure reasonable bounds (4-20 credits = R200-R1000) - PROFITABLE PRICING
-        return max(4, min(int(credits), 20))
-
-
 def format_time_ago(created_at):
     """Format datetime as time ago string"""
     from django.utils import timezone
@@ -51,10 +51,8 @@ class PaymentService:
         
         # If lead is provided, calculate actual credit cost
         if lead:
-            from backend.leads.ml_services import DynamicPricingMLService
-            pricing_service = DynamicPricingMLService()
-            pricing_result = pricing_service.calculate_dynamic_lead_price(lead, user)
-            credit_cost = pricing_result['price']
+            from backend.leads.lead_pricing import lead_credits
+            credit_cost = lead_credits(lead, user)
             
             credit_balance = self.get_credit_balance(user)
             if credit_balance < credit_cost:
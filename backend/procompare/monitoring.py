@@ -1,6 +1,7 @@
 """
 Health check endpoints for ProConnectSA.
-Simplified — no Redis dependency.
+The cache check goes through the tiered cache to its shared backend (settings.SHARED_CACHE_BACKEND:
+Redis, the database cache table, or LocMem in single-process development).
 """
 import time
 import logging
@@ -58,7 +59,9 @@ def metrics(request):
         },
         'system': {
             'debug': settings.DEBUG,
-        }
+        },
+        # Two-tier cache hit / miss counters for this worker (procompare/tiered_cache.py)
+        'cache': cache.stats() if hasattr(cache, 'stats') else None,
     })
 
 
@@ -6,6 +6,7 @@ Stripped to essentials — no Redis, Celery, ML, or WebSockets.
 import os
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -125,18 +126,117 @@ else:
 AUTH_USER_MODEL = 'users.User'
 
 # ============================================================
-# CACHE — in-memory, zero setup required
+# CACHE — per-process L1 in front of a shared L2 (backend/procompare/tiered_cache.py)
 # ============================================================
 
-CACHES = {
-    'default': {
+# L2 shared by every worker: Redis when REDIS_URL is set, otherwise the database cache
+# table (`python manage.py createcachetable`); 'locmem' keeps single-process dev zero-setup.
+# Only Redis has an atomic INCR: on the other backends lead counters write straight to
+# the row and the L1 invalidation broadcast claims its log slots with ADD (see
+# tiered_cache.has_atomic_incr).
+REDIS_URL = config('REDIS_URL', default='')
+SHARED_CACHE_BACKEND = config('SHARED_CACHE_BACKEND', default='redis' if REDIS_URL else 'db')
+
+if SHARED_CACHE_BACKEND == 'redis':
+    if not REDIS_URL:
+        raise ImproperlyConfigured("SHARED_CACHE_BACKEND=redis needs REDIS_URL")
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+elif SHARED_CACHE_BACKEND == 'db':
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+elif SHARED_CACHE_BACKEND == 'locmem':
+    SHARED_CACHE = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'proconnectsa-cache',
     }
+else:
+    raise ImproperlyConfigured(
+        f"Unsupported SHARED_CACHE_BACKEND {SHARED_CACHE_BACKEND!r}: use 'redis', 'db' or 'locmem'"
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': 'backend.procompare.tiered_cache.TieredCache',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            # Read-mostly keys served from the in-process L1; counters, locks, verification
+            # codes and rate-limit buckets are not listed and always go to the shared cache
+            'L1_KEY_PREFIXES': [
+                'match_profile:',
+                'provider_index:',
+                'market_stats:version',
+                'lead_feed:',
+                'available_leads_',
+                'lead_flow_health',
+            ],
+            'L1_MAX_ENTRIES': int(config('CACHE_L1_MAX_ENTRIES', default='2000')),
+            'L1_TIMEOUT': int(config('CACHE_L1_TIMEOUT', default='5')),
+            'EPOCH_CHECK_SECONDS': 1,
+        },
+    },
+    'shared': SHARED_CACHE,
 }
 
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
+# Lead routing: in-process provider eligibility index is rebuilt at least this often
+PROVIDER_INDEX_MAX_AGE_SECONDS = int(os.environ.get('PROVIDER_INDEX_MAX_AGE_SECONDS', '600'))
+
+# Cached per-provider match profiles (backend/users/match_profile.py); signals invalidate on change
+MATCH_PROFILE_CACHE_SECONDS = int(os.environ.get('MATCH_PROFILE_CACHE_SECONDS', '3600'))
+
+# Lead routing pipeline (backend/leads/services/routing_pipeline.py):
+# 'thread' = in-process pool after commit, 'worker' = `manage.py process_lead_routing --loop`, 'inline' = synchronous
+LEAD_ROUTING_MODE = os.environ.get('LEAD_ROUTING_MODE', 'thread')
+LEAD_ROUTING_THREADS = int(os.environ.get('LEAD_ROUTING_THREADS', '2'))
+LEAD_ROUTING_MAX_ATTEMPTS = 5
+LEAD_ROUTING_RETRY_BASE_SECONDS = 30
+# 'thread' mode: seconds between background passes over due retries / expired leases (0 = off)
+LEAD_ROUTING_DRAIN_SECONDS = int(os.environ.get('LEAD_ROUTING_DRAIN_SECONDS', '15'))
+# Per-lead routing traces (backend/leads/services/routing_trace.py): in-memory ring buffer,
+# optionally persisted to RoutingTrace rows
+ROUTING_TRACE_ENABLED = os.environ.get('ROUTING_TRACE_ENABLED', 'True').lower() == 'true'
+ROUTING_TRACE_BUFFER_SIZE = int(os.environ.get('ROUTING_TRACE_BUFFER_SIZE', '500'))
+ROUTING_TRACE_PERSIST = os.environ.get('ROUTING_TRACE_PERSIST', 'False').lower() == 'true'
+
+# Market demand / competition stats for pricing (backend/leads/market_stats.py): the MarketStats
+# table is rebuilt at most this often on read (or by `manage.py refresh_market_stats`), and each
+# process reloads its in-memory copy after MARKET_STATS_RELOAD_SECONDS
+MARKET_STATS_REFRESH_SECONDS = int(os.environ.get('MARKET_STATS_REFRESH_SECONDS', '900'))
+MARKET_STATS_RELOAD_SECONDS = int(os.environ.get('MARKET_STATS_RELOAD_SECONDS', '300'))
+
+# Admin ML metrics rollup (backend/leads/ml_metrics.py): today's MLMetricsDaily row is recomputed on
+# read once older than this; `manage.py refresh_ml_metrics` recomputes the whole 30-day window
+ML_METRICS_REFRESH_SECONDS = int(os.environ.get('ML_METRICS_REFRESH_SECONDS', '900'))
+
+# Provider feed ETags (backend/leads/feed_version.py) also change every LEAD_FEED_ETAG_SECONDS,
+# which bounds how long time-derived fields (timeAgo, expiry) can be served as 304
+LEAD_FEED_ETAG_SECONDS = int(os.environ.get('LEAD_FEED_ETAG_SECONDS', '60'))
+
+# Lead view / response / contact counters (backend/leads/lead_counters.py): with Redis, increments
+# go to LEAD_COUNTER_SHARDS cache keys per lead and each server process flushes them to the leads
+# table every LEAD_COUNTER_FLUSH_SECONDS; otherwise each increment is a relative UPDATE
+LEAD_COUNTER_SHARDS = int(os.environ.get('LEAD_COUNTER_SHARDS', '8'))
+LEAD_COUNTER_FLUSH_SECONDS = int(os.environ.get('LEAD_COUNTER_FLUSH_SECONDS', '10'))
+
+# Shared ML services (backend/leads/ml_registry.py): model files are re-checked for changes at most this often
+ML_REGISTRY_CHECK_SECONDS = int(os.environ.get('ML_REGISTRY_CHECK_SECONDS', '60'))
+# Services loaded at startup (wsgi.py); with `gunicorn --preload` workers share them copy-on-write
+ML_PRELOAD_SERVICES = [
+    name for name in os.environ.get('ML_PRELOAD_SERVICES', 'quality,conversion,geographical').split(',') if name
+]
+# Versioned model artifacts (backend/leads/model_store.py): newest versions kept per model (the promoted one is never pruned)
+ML_MODEL_RETENTION = int(os.environ.get('ML_MODEL_RETENTION', '5'))
+CLIENT_BEHAVIOR_MODEL_PATH = os.environ.get(
+    'CLIENT_BEHAVIOR_MODEL_PATH', '/home/paas/work_platform/backend/models/client_behavior_model.pkl'
+)
+
 # ============================================================
 # STATIC & MEDIA
 # ============================================================
@@ -306,7 +406,7 @@ SA_PREMIUM_AREAS = [
 # ============================================================
 
 RATELIMIT_ENABLE = True
-RATELIMIT_USE_CACHE = 'default'
+RATELIMIT_USE_CACHE = 'shared'  # rate-limit buckets skip the in-process tier
 RATELIMIT_VIEW = 'backend.procompare.views.rate_limit_exceeded'
 
 # ============================================================
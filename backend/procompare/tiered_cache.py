@@ -0,0 +1,349 @@
+"""
+Two-tier cache backend: a small in-process LRU (L1) in front of a shared cache
+alias (L2: Redis, or the database cache table when Redis is absent).
+
+Configured per alias in settings.CACHES:
+
+    'default': {
+        'BACKEND': 'backend.procompare.tiered_cache.TieredCache',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',        # L2 cache alias
+            'L1_KEY_PREFIXES': [...],        # keys served from L1; everything else goes straight to L2
+            'L1_MAX_ENTRIES': 2000,
+            'L1_TIMEOUT': 5,                 # seconds an L1 copy is trusted at most
+            'EPOCH_CHECK_SECONDS': 1,
+        },
+    }
+
+Only keys under L1_KEY_PREFIXES are kept in L1: read-mostly data such as the
+versioned match profiles and the version stamps that guard in-process caches.
+Counters, locks, verification codes and rate-limit buckets are not listed, so
+their get / add / incr go to L2 and are shared across workers. Only Redis /
+memcached incr is atomic across processes (has_atomic_incr); callers that
+depend on it fall back when it is not (bump_stamp, leads/lead_counters.py).
+L2 misses are never cached in L1.
+
+Invalidation broadcast: every write of an L1 key (set, incr, delete, ...)
+advances a shared epoch in L2 and logs the key under that epoch. Each process
+reads the epoch at most every EPOCH_CHECK_SECONDS and drops just the logged
+keys from its L1; if it fell too far behind (or a log entry is gone) it drops
+its whole L1. So a write is visible everywhere within EPOCH_CHECK_SECONDS, and
+any L1 copy is at most L1_TIMEOUT old. Without an atomic incr two writers can
+draw the same epoch, so log slots are claimed with add() and a writer that
+loses the slot draws again.
+
+stats() returns hit / miss / invalidation counters for /metrics/.
+
+Design principles:
+- L2 errors propagate exactly as with the plain backend
+- Broadcast failures only shorten L1 lifetimes (the whole L1 is dropped)
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+EPOCH_KEY = 'tiered_cache:epoch'
+# Invalidation log entries outlive any reasonable epoch check interval
+LOG_TIMEOUT = 300
+# Catching up further than this many writes drops the whole L1 instead
+MAX_LOG_CATCH_UP = 200
+CLEAR_ALL = '*'
+# Attempts at claiming an invalidation log slot on a non-atomic L2
+MAX_SLOT_CLAIMS = 5
+
+# Cache backends whose incr / decr are atomic across processes
+ATOMIC_INCR_BACKENDS = (RedisCache, BaseMemcachedCache)
+
+
+def has_atomic_incr(cache):
+    """True when incr on `cache` (or a TieredCache's L2) is atomic across processes."""
+    return isinstance(getattr(cache, 'shared', cache), ATOMIC_INCR_BACKENDS)
+
+
+def bump_stamp(cache, key):
+    """
+    Advance a version stamp and return the new value. On a non-atomic backend
+    two concurrent incr calls can both write the same value, hiding one change,
+    so a fresh time-based value is written instead.
+    """
+    if has_atomic_incr(cache):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # No stamp yet (or evicted)
+            pass
+    version = time.time_ns() // 1000
+    cache.set(key, version, timeout=None)
+    return version
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self._prefixes = tuple(options.get('L1_KEY_PREFIXES', ()))
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 2000))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._epoch_check_seconds = float(options.get('EPOCH_CHECK_SECONDS', 1))
+
+        self._lock = threading.Lock()
+        self._l1 = OrderedDict()  # l1 key -> (expires_at, value)
+        self._epoch = None
+        self._epoch_checked_at = 0.0
+        self._stats = dict.fromkeys(
+            ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses', 'evictions',
+             'invalidations_sent', 'invalidations_received', 'l1_clears'),
+            0,
+        )
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # ------------------------------------------------------------------
+    # L1 bookkeeping
+    # ------------------------------------------------------------------
+
+    def _local(self, key):
+        return key.startswith(self._prefixes) if self._prefixes else False
+
+    def _l1_key(self, key, version):
+        return self.make_key(key, version=version)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def _l1_get(self, l1_key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._l1.get(l1_key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._l1[l1_key]
+                self._stats['l1_misses'] += 1
+                return False, None
+            self._l1.move_to_end(l1_key)
+            self._stats['l1_hits'] += 1
+            return True, entry[1]
+
+    def _l1_set(self, l1_key, value, timeout=DEFAULT_TIMEOUT):
+        ttl = self._l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            self._l1_drop([l1_key])
+            return
+        with self._lock:
+            self._l1[l1_key] = (time.monotonic() + ttl, value)
+            self._l1.move_to_end(l1_key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _l1_drop(self, l1_keys):
+        with self._lock:
+            for l1_key in l1_keys:
+                self._l1.pop(l1_key, None)
+
+    def _l1_clear(self):
+        with self._lock:
+            self._l1.clear()
+            self._stats['l1_clears'] += 1
+
+    # ------------------------------------------------------------------
+    # Invalidation broadcast
+    # ------------------------------------------------------------------
+
+    def _broadcast(self, l1_keys):
+        """Tell other processes to drop these L1 keys (CLEAR_ALL drops everything)."""
+        shared = self.shared
+        atomic = has_atomic_incr(shared)
+        try:
+            for l1_key in l1_keys:
+                for _ in range(MAX_SLOT_CLAIMS):
+                    try:
+                        epoch = shared.incr(EPOCH_KEY)
+                    except ValueError:
+                        shared.add(EPOCH_KEY, 0, timeout=None)
+                        epoch = shared.incr(EPOCH_KEY)
+                    if atomic:
+                        shared.set(f'{EPOCH_KEY}:{epoch}', l1_key, timeout=LOG_TIMEOUT)
+                        break
+                    if shared.add(f'{EPOCH_KEY}:{epoch}', l1_key, timeout=LOG_TIMEOUT):
+                        break
+                else:
+                    logger.warning(f"[TieredCache] No free invalidation slot for {l1_key}")
+            self._count('invalidations_sent', len(l1_keys))
+        except Exception as e:
+            logger.warning(f"[TieredCache] Invalidation broadcast failed: {e}")
+
+    def _sync(self):
+        """Apply invalidations logged by other processes since the last check."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._epoch_checked_at < self._epoch_check_seconds:
+                return
+            self._epoch_checked_at = now
+            seen = self._epoch
+        shared = self.shared
+        try:
+            epoch = shared.get(EPOCH_KEY)
+        except Exception as e:
+            logger.warning(f"[TieredCache] Epoch check failed, dropping L1: {e}")
+            self._l1_clear()
+            return
+        if epoch == seen:
+            return
+        with self._lock:
+            self._epoch = epoch
+        if seen is None or epoch is None or not (0 < epoch - seen <= MAX_LOG_CATCH_UP):
+            if seen is not None:
+                self._l1_clear()
+            return
+        log_keys = [f'{EPOCH_KEY}:{n}' for n in range(seen + 1, epoch + 1)]
+        try:
+            logged = shared.get_many(log_keys)
+        except Exception:
+            logged = {}
+        keys = [logged.get(log_key) for log_key in log_keys]
+        if None in keys or CLEAR_ALL in keys:
+            self._l1_clear()
+            return
+        self._l1_drop(keys)
+        self._count('invalidations_received', len(keys))
+
+    # ------------------------------------------------------------------
+    # Cache API
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        if not self._local(key):
+            return self.shared.get(key, default, version=version)
+        self._sync()
+        l1_key = self._l1_key(key, version)
+        found, value = self._l1_get(l1_key)
+        if found:
+            return value
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._count('l2_misses')
+            return default
+        self._count('l2_hits')
+        self._l1_set(l1_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        result = {}
+        missing = []
+        if any(self._local(key) for key in keys):
+            self._sync()
+        for key in keys:
+            if self._local(key):
+                found, value = self._l1_get(self._l1_key(key, version))
+                if found:
+                    result[key] = value
+                    continue
+            missing.append(key)
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key in missing:
+                if not self._local(key):
+                    continue
+                if key in fetched:
+                    self._count('l2_hits')
+                    self._l1_set(self._l1_key(key, version), fetched[key])
+                else:
+                    self._count('l2_misses')
+            result.update(fetched)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        if self._local(key):
+            l1_key = self._l1_key(key, version)
+            self._l1_set(l1_key, value, timeout)
+            self._broadcast([l1_key])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Only L2 misses were possible before an add succeeds, and those are never in L1
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added and self._local(key):
+            self._l1_set(self._l1_key(key, version), value, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout=timeout, version=version)
+        local = [key for key in data if self._local(key) and key not in failed]
+        for key in local:
+            self._l1_set(self._l1_key(key, version), data[key], timeout)
+        if local:
+            self._broadcast([self._l1_key(key, version) for key in local])
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        if self._local(key):
+            l1_key = self._l1_key(key, version)
+            self._l1_set(l1_key, value)
+            self._broadcast([l1_key])
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        if self._local(key):
+            l1_key = self._l1_key(key, version)
+            self._l1_drop([l1_key])
+            self._broadcast([l1_key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        local = [self._l1_key(key, version) for key in keys if self._local(key)]
+        if local:
+            self._l1_drop(local)
+            self._broadcast(local)
+
+    def has_key(self, key, version=None):
+        if self._local(key):
+            return self.get(key, version=version) is not None
+        return self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self._l1_clear()
+        self._broadcast([CLEAR_ALL])
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['l1_entries'] = len(self._l1)
+        lookups = stats['l1_hits'] + stats['l1_misses']
+        stats['l1_hit_rate'] = round(stats['l1_hits'] / lookups, 4) if lookups else None
+        stats['shared_backend'] = type(self.shared).__name__
+        return stats
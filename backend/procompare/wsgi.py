@@ -9,4 +9,19 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.procompare.settings')
 
 application = get_wsgi_application()
 
+# Load shared ML services now: under `gunicorn --preload` this runs once in the
+# master, and forked workers share the loaded models copy-on-write
+from backend.leads.ml_registry import preload as _preload_ml_services  # noqa: E402
 
+_preload_ml_services()
+
+# Background pass over due lead routing retries ('thread' mode); forked workers
+# start their own
+from backend.leads.services.routing_pipeline import start_retry_drain as _start_retry_drain  # noqa: E402
+
+_start_retry_drain()
+
+# Periodic flush of batched lead counters to the leads table (no-op without Redis)
+from backend.leads.lead_counters import start_flush_timer as _start_lead_counter_flush  # noqa: E402
+
+_start_lead_counter_flush()
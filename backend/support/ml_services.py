@@ -27,6 +27,8 @@ from django.utils import timezone
 from datetime import timedelta
 import re
 
+from backend.leads import tree_inference
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,29 +67,39 @@ class SupportTicketMLService:
             logger.warning(f"Could not load models: {str(e)}. Training new models...")
             self._train_all_models()
     
+    # Attributes stored together as the 'support' model (leads/model_store.py)
+    MODEL_ARTIFACTS = (
+        'category_classifier',
+        'priority_predictor',
+        'response_time_predictor',
+        'satisfaction_predictor',
+        'auto_assigner',
+        'sentiment_analyzer',
+        'duplicate_detector',
+        'tfidf_vectorizer',
+    )
+    
     def _load_models(self):
-        """Load pre-trained models"""
-        self.category_classifier = joblib.load(os.path.join(self.models_dir, 'category_classifier.pkl'))
-        self.priority_predictor = joblib.load(os.path.join(self.models_dir, 'priority_predictor.pkl'))
-        self.response_time_predictor = joblib.load(os.path.join(self.models_dir, 'response_time_predictor.pkl'))
-        self.satisfaction_predictor = joblib.load(os.path.join(self.models_dir, 'satisfaction_predictor.pkl'))
-        self.auto_assigner = joblib.load(os.path.join(self.models_dir, 'auto_assigner.pkl'))
-        self.sentiment_analyzer = joblib.load(os.path.join(self.models_dir, 'sentiment_analyzer.pkl'))
-        self.duplicate_detector = joblib.load(os.path.join(self.models_dir, 'duplicate_detector.pkl'))
-        
-        # Load vectorizer
-        self.tfidf_vectorizer = joblib.load(os.path.join(self.models_dir, 'tfidf_vectorizer.pkl'))
+        """Load the promoted model version (falls back to the flat pickles it replaced)"""
+        from backend.leads import model_store
+        stored = model_store.load('support')
+        if stored is not None:
+            artifacts, manifest = stored
+            for name in self.MODEL_ARTIFACTS:
+                setattr(self, name, artifacts[name])
+            return
+        
+        for name in self.MODEL_ARTIFACTS:
+            setattr(self, name, joblib.load(os.path.join(self.models_dir, f'{name}.pkl')))
     
-    def _save_models(self):
-        """Save trained models"""
-        joblib.dump(self.category_classifier, os.path.join(self.models_dir, 'category_classifier.pkl'))
-        joblib.dump(self.priority_predictor, os.path.join(self.models_dir, 'priority_predictor.pkl'))
-        joblib.dump(self.response_time_predictor, os.path.join(self.models_dir, 'response_time_predictor.pkl'))
-        joblib.dump(self.satisfaction_predictor, os.path.join(self.models_dir, 'satisfaction_predictor.pkl'))
-        joblib.dump(self.auto_assigner, os.path.join(self.models_dir, 'auto_assigner.pkl'))
-        joblib.dump(self.sentiment_analyzer, os.path.join(self.models_dir, 'sentiment_analyzer.pkl'))
-        joblib.dump(self.duplicate_detector, os.path.join(self.models_dir, 'duplicate_detector.pkl'))
-        joblib.dump(self.tfidf_vectorizer, os.path.join(self.models_dir, 'tfidf_vectorizer.pkl'))
+    def _save_models(self, metrics=None):
+        """Save trained models as a new promoted version"""
+        from backend.leads import model_store
+        model_store.publish(
+            'support',
+            {name: getattr(self, name) for name in self.MODEL_ARTIFACTS},
+            metrics=metrics,
+        )
     
     def _train_all_models(self):
         """Train all ML models"""
@@ -124,7 +136,7 @@ class SupportTicketMLService:
         self._train_duplicate_detector(training_data)
         
         # Save models
-        self._save_models()
+        self._save_models(metrics={'samples': len(training_data)})
         logger.info("All support ML models trained and saved successfully")
     
     def _create_dummy_models(self):
@@ -541,8 +553,8 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.category_classifier:
-                prediction = self.category_classifier.predict([features])[0]
-                confidence = self.category_classifier.predict_proba([features]).max()
+                prediction = tree_inference.predict(self.category_classifier, [features])[0]
+                confidence = tree_inference.predict_proba(self.category_classifier, [features]).max()
                 return {
                     'category': prediction,
                     'confidence': float(confidence)
@@ -560,8 +572,8 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.priority_predictor:
-                prediction = self.priority_predictor.predict([features])[0]
-                confidence = self.priority_predictor.predict_proba([features]).max()
+                prediction = tree_inference.predict(self.priority_predictor, [features])[0]
+                confidence = tree_inference.predict_proba(self.priority_predictor, [features]).max()
                 return {
                     'priority': prediction,
                     'confidence': float(confidence)
@@ -579,7 +591,7 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.response_time_predictor:
-                prediction = self.response_time_predictor.predict([features])[0]
+                prediction = tree_inference.predict(self.response_time_predictor, [features])[0]
                 return {
                     'response_time_hours': float(prediction),
                     'confidence': 0.8  # Simplified confidence
@@ -597,7 +609,7 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.satisfaction_predictor:
-                prediction = self.satisfaction_predictor.predict([features])[0]
+                prediction = tree_inference.predict(self.satisfaction_predictor, [features])[0]
                 return {
                     'satisfaction_rating': float(prediction),
                     'confidence': 0.8  # Simplified confidence
@@ -615,8 +627,8 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.sentiment_analyzer:
-                prediction = self.sentiment_analyzer.predict([features])[0]
-                confidence = self.sentiment_analyzer.predict_proba([features]).max()
+                prediction = tree_inference.predict(self.sentiment_analyzer, [features])[0]
+                confidence = tree_inference.predict_proba(self.sentiment_analyzer, [features]).max()
                 return {
                     'sentiment': prediction,
                     'confidence': float(confidence)
@@ -634,8 +646,8 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.auto_assigner:
-                prediction = self.auto_assigner.predict([features])[0]
-                confidence = self.auto_assigner.predict_proba([features]).max()
+                prediction = tree_inference.predict(self.auto_assigner, [features])[0]
+                confidence = tree_inference.predict_proba(self.auto_assigner, [features]).max()
                 return {
                     'suggested_staff_id': int(prediction),
                     'confidence': float(confidence)
@@ -653,8 +665,8 @@ class SupportTicketMLService:
             features = self._extract_prediction_features(combined_text, user_type)
             
             if self.duplicate_detector:
-                prediction = self.duplicate_detector.predict([features])[0]
-                confidence = self.duplicate_detector.predict_proba([features]).max()
+                prediction = tree_inference.predict(self.duplicate_detector, [features])[0]
+                confidence = tree_inference.predict_proba(self.duplicate_detector, [features]).max()
                 return {
                     'is_duplicate': bool(prediction),
                     'confidence': float(confidence)
@@ -26,7 +26,7 @@ from .serializers import (
     TicketTemplateSerializer, SupportMetricsSerializer,
     SupportTicketListSerializer, SupportTicketStatsSerializer
 )
-from .ml_services import SupportTicketMLService
+from backend.leads.ml_registry import ml_registry
 
 User = get_user_model()
 
@@ -523,7 +523,7 @@ def get_ml_recommendations(request):
         )
     
     try:
-        ml_service = SupportTicketMLService()
+        ml_service = ml_registry.get('support')
         recommendations = ml_service.get_ml_recommendations(title, description, user_type)
         
         if recommendations['success']:
@@ -570,7 +570,7 @@ def create_ticket_with_ml(request):
     
     try:
         # Get ML recommendations
-        ml_service = SupportTicketMLService()
+        ml_service = ml_registry.get('support')
         recommendations = ml_service.get_ml_recommendations(title, description, user_type)
         
         # Create ticket data
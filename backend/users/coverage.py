@@ -0,0 +1,133 @@
+"""
+Provider coverage sync and lookups.
+
+ProviderCoverage rows are the normalized form of what a provider covers:
+- categories: active Service objects + ProviderProfile.service_categories
+  (slugs, ids or legacy names), resolved to ServiceCategory ids
+- areas: ProviderProfile.service_areas, lowercased and stripped, plus the
+  gazetteer id each area resolves to (backend/leads/gazetteer.py)
+
+Rows are rewritten from ProviderProfile / Service signals (see users/signals.py)
+and can be rebuilt with `manage.py rebuild_provider_coverage`. Every sync also
+invalidates the provider's cached match profile (users/match_profile.py).
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_area_key(area) -> str:
+    """Canonical area_key for a service area / lead location string."""
+    if area is None:
+        return ''
+    return str(area).strip().lower()[:200]
+
+
+def coverage_area_keys(service_areas) -> list:
+    """Distinct area keys for a provider; '' when no areas are set (category-only coverage)."""
+    keys = []
+    for area in service_areas or []:
+        key = normalize_area_key(area)
+        if key and key not in keys:
+            keys.append(key)
+    return keys or ['']
+
+
+def resolve_category_ids(category_model, raw_categories, extra_ids=()) -> set:
+    """Resolve stored category values (slugs/ids/names) plus known ids to ServiceCategory ids."""
+    from .service_category_utils import split_provider_category_inputs
+
+    ids, slugs = split_provider_category_inputs(raw_categories)
+    ids |= set(extra_ids)
+    if not ids and not slugs:
+        return set()
+    return set(
+        category_model.objects.filter(Q(id__in=ids) | Q(slug__in=slugs)).values_list('id', flat=True)
+    )
+
+
+def sync_provider_coverage(profile):
+    """
+    Rewrite coverage rows for one provider to match its profile and active services.
+    Only the difference is written. Never raises.
+    """
+    from backend.leads.gazetteer import resolve
+    from backend.leads.models import ServiceCategory
+    from .match_profile import invalidate_match_profile
+    from .models import ProviderCoverage, Service
+
+    try:
+        service_category_ids = Service.objects.filter(
+            provider=profile, is_active=True
+        ).values_list('category_id', flat=True)
+        category_ids = resolve_category_ids(
+            ServiceCategory, profile.service_categories, service_category_ids
+        )
+        wanted = {
+            (category_id, area_key)
+            for category_id in category_ids
+            for area_key in coverage_area_keys(profile.service_areas)
+        }
+
+        gids = {area_key: resolve(area_key) if area_key else None for _, area_key in wanted}
+
+        with transaction.atomic():
+            existing = {
+                (row['category_id'], row['area_key']): (row['id'], row['location_gid'])
+                for row in ProviderCoverage.objects.filter(provider=profile).values(
+                    'id', 'category_id', 'area_key', 'location_gid'
+                )
+            }
+            stale_ids = [row_id for key, (row_id, _) in existing.items() if key not in wanted]
+            if stale_ids:
+                ProviderCoverage.objects.filter(id__in=stale_ids).delete()
+            # Gazetteer data changes can re-resolve an unchanged area
+            for (category_id, area_key), (row_id, location_gid) in existing.items():
+                if (category_id, area_key) in wanted and location_gid != gids[area_key]:
+                    ProviderCoverage.objects.filter(id=row_id).update(location_gid=gids[area_key])
+            missing = wanted - existing.keys()
+            if missing:
+                ProviderCoverage.objects.bulk_create(
+                    [
+                        ProviderCoverage(
+                            provider=profile, category_id=category_id, area_key=area_key,
+                            location_gid=gids[area_key],
+                        )
+                        for category_id, area_key in missing
+                    ],
+                    ignore_conflicts=True,
+                )
+        invalidate_match_profile(profile.pk)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to sync coverage for provider profile {profile.pk}: {e}", exc_info=True)
+        invalidate_match_profile(profile.pk)
+        return False
+
+
+def covered_category_ids(profile) -> list:
+    """Category ids a provider covers (single indexed query)."""
+    from .models import ProviderCoverage
+
+    return list(
+        ProviderCoverage.objects.filter(provider=profile).values_list('category_id', flat=True).distinct()
+    )
+
+
+def providers_covering(category_id, area=None, location_gid=None):
+    """
+    ProviderProfile ids covering a category, optionally restricted to one exact
+    area or to areas containing a gazetteer location (suburb, city, metro, province).
+    """
+    from backend.leads.gazetteer import covering_ids
+    from .models import ProviderCoverage
+
+    qs = ProviderCoverage.objects.filter(category_id=category_id)
+    if area is not None:
+        qs = qs.filter(area_key=normalize_area_key(area))
+    if location_gid is not None:
+        qs = qs.filter(location_gid__in=covering_ids(location_gid))
+    return qs.values_list('provider_id', flat=True).distinct()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from backend.users.coverage import sync_provider_coverage
+from backend.users.models import ProviderProfile
+
+
+class Command(BaseCommand):
+    help = "Rebuild ProviderCoverage rows from service_categories / service_areas and active Services. Use after bulk updates that bypass signals."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider-id',
+            type=int,
+            help='Only rebuild coverage for this ProviderProfile id',
+        )
+
+    def handle(self, *args, **options):
+        profiles = ProviderProfile.objects.only('id', 'service_categories', 'service_areas')
+        if options.get('provider_id'):
+            profiles = profiles.filter(id=options['provider_id'])
+
+        synced = failed = 0
+        for profile in profiles.iterator():
+            if sync_provider_coverage(profile):
+                synced += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Coverage rebuilt for {synced} provider(s)"))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"⚠️ {failed} provider(s) failed; see logs"))
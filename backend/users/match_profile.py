@@ -0,0 +1,115 @@
+"""
+Cached per-provider match profile.
+
+ProviderMatchProfile is what the lead feeds (wallet available_leads,
+LeadFilteringService, EnterpriseLeadFilteringService) need to know about a
+provider: resolved category ids (from ProviderCoverage, i.e. Service objects +
+the service_categories JSON field), service areas and their area keys,
+subscription tier and premium listing state.
+
+Profiles are kept in the shared cache under a per-provider version stamp:
+
+    match_profile:<profile id>:version  -> n
+    match_profile:<profile id>:<n>      -> ProviderMatchProfile
+
+Coverage syncs and ProviderProfile / Service signals bump the version (see
+users/signals.py), so every process reads a fresh profile on its next call and
+a profile computed concurrently with a change is never served. Time-based
+state (premium expiry) is evaluated on read, so entries never go stale on the clock.
+"""
+import logging
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from backend.procompare.tiered_cache import bump_stamp
+
+logger = logging.getLogger(__name__)
+
+# Fields outside ProviderCoverage that feed the match profile
+MATCH_PROFILE_FIELDS = {
+    'service_categories',
+    'service_areas',
+    'subscription_tier',
+    'is_premium_listing',
+    'premium_listing_started_at',
+    'premium_listing_expires_at',
+}
+
+
+class ProviderMatchProfile(namedtuple('ProviderMatchProfile', [
+    'profile_id',
+    'user_id',
+    'category_ids',
+    'service_areas',
+    'area_keys',
+    'subscription_tier',
+    'premium_listing',
+    'premium_listing_expires_at',
+])):
+    __slots__ = ()
+
+    @property
+    def is_premium(self):
+        if not self.premium_listing:
+            return False
+        expires_at = self.premium_listing_expires_at
+        return expires_at is None or expires_at > timezone.now()
+
+
+def _version_key(profile_id):
+    return f'match_profile:{profile_id}:version'
+
+
+def _cache_seconds():
+    return getattr(settings, 'MATCH_PROFILE_CACHE_SECONDS', 3600)
+
+
+def compute_match_profile(profile):
+    """Build a ProviderMatchProfile from the database (one ProviderCoverage query)."""
+    from .coverage import coverage_area_keys, covered_category_ids
+
+    service_areas = tuple(area for area in profile.service_areas or [] if isinstance(area, str))
+    return ProviderMatchProfile(
+        profile_id=profile.pk,
+        user_id=profile.user_id,
+        category_ids=frozenset(covered_category_ids(profile)),
+        service_areas=service_areas,
+        area_keys=tuple(key for key in coverage_area_keys(service_areas) if key),
+        subscription_tier=profile.subscription_tier,
+        premium_listing=bool(profile.is_premium_listing and profile.premium_listing_started_at),
+        premium_listing_expires_at=profile.premium_listing_expires_at,
+    )
+
+
+def get_match_profile(profile):
+    """
+    Cached ProviderMatchProfile for a ProviderProfile. Falls back to computing
+    it directly if the cache is unavailable. Never raises for cache problems.
+    """
+    try:
+        version = cache.get(_version_key(profile.pk))
+        if version is None:
+            # Fresh stamps start from the clock so an evicted stamp never revives an old entry
+            cache.add(_version_key(profile.pk), int(time.time() * 1000), timeout=None)
+            version = cache.get(_version_key(profile.pk))
+        data_key = f'match_profile:{profile.pk}:{version}'
+        match = cache.get(data_key)
+        if match is None:
+            match = compute_match_profile(profile)
+            cache.set(data_key, match, timeout=_cache_seconds())
+        return match
+    except Exception as e:
+        logger.warning(f"[MatchProfile] Cache unavailable for provider profile {profile.pk}: {e}")
+        return compute_match_profile(profile)
+
+
+def invalidate_match_profile(profile_id):
+    """Advance a provider's version stamp so the next read recomputes. Never raises."""
+    try:
+        bump_stamp(cache, _version_key(profile_id))
+    except Exception as e:
+        logger.warning(f"[MatchProfile] Failed to invalidate provider profile {profile_id}: {e}")
@@ -0,0 +1,97 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:33
+# Backfills coverage rows from existing ProviderProfile JSON fields and active Services.
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils.text import slugify
+import django.db.models.deletion
+
+
+# Frozen copy of service_category_utils.PROVIDER_CATEGORY_SLUG_ALIASES and the
+# coverage.py normalization at the time of this migration
+PROVIDER_CATEGORY_SLUG_ALIASES = {
+    "appliance": "appliance-repair",
+    "pool": "pool-maintenance",
+    "renovation": "renovations",
+    "general": "handyman",
+}
+
+
+def _category_ids(ServiceCategory, raw_categories, extra_ids):
+    ids, slugs = set(extra_ids), set()
+    for value in raw_categories or []:
+        if value is None:
+            continue
+        if isinstance(value, int):
+            if value > 0:
+                ids.add(value)
+            continue
+        text = str(value).strip()
+        if text.isdigit():
+            ids.add(int(text))
+            continue
+        slug = slugify(text)
+        if slug:
+            slugs.add(PROVIDER_CATEGORY_SLUG_ALIASES.get(slug, slug))
+    if not ids and not slugs:
+        return set()
+    return set(ServiceCategory.objects.filter(Q(id__in=ids) | Q(slug__in=slugs)).values_list("id", flat=True))
+
+
+def _area_keys(service_areas):
+    keys = []
+    for area in service_areas or []:
+        key = str(area).strip().lower()[:200] if area is not None else ""
+        if key and key not in keys:
+            keys.append(key)
+    return keys or [""]
+
+
+def backfill_provider_coverage(apps, schema_editor):
+    ProviderProfile = apps.get_model("users", "ProviderProfile")
+    ProviderCoverage = apps.get_model("users", "ProviderCoverage")
+    Service = apps.get_model("users", "Service")
+    ServiceCategory = apps.get_model("leads", "ServiceCategory")
+
+    service_categories = {}
+    for provider_id, category_id in Service.objects.filter(is_active=True).values_list("provider_id", "category_id"):
+        service_categories.setdefault(provider_id, set()).add(category_id)
+
+    rows = []
+    for profile in ProviderProfile.objects.only("id", "service_categories", "service_areas").iterator():
+        category_ids = _category_ids(
+            ServiceCategory, profile.service_categories, service_categories.get(profile.id, ())
+        )
+        for category_id in category_ids:
+            for area_key in _area_keys(profile.service_areas):
+                rows.append(ProviderCoverage(provider_id=profile.id, category_id=category_id, area_key=area_key))
+        if len(rows) >= 2000:
+            ProviderCoverage.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        ProviderCoverage.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0017_leadreservation_and_more'),
+        ('users', '0016_providerprofile_is_premium_listing_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area_key', models.CharField(blank=True, default='', max_length=200)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='provider_coverage', to='leads.servicecategory')),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverage', to='users.providerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'area_key'], name='users_provi_categor_54f297_idx')],
+                'unique_together': {('provider', 'category', 'area_key')},
+            },
+        ),
+        migrations.RunPython(backfill_provider_coverage, migrations.RunPython.noop),
+    ]
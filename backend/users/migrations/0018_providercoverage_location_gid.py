@@ -0,0 +1,448 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:10
+# Resolves existing coverage area keys to gazetteer ids (frozen copy of backend/leads/gazetteer.py below).
+
+import re
+from functools import lru_cache
+
+from django.db import migrations, models
+
+
+# Frozen copy of backend/leads/gazetteer.py (place table, resolve)
+# at the time of this migration, so later gazetteer edits do not change what it writes
+
+# id | parent id | name | aliases | flags ("major": counts as a major city for nationwide coverage)
+_ROWS = """
+1    |      | South Africa        | nationwide, countrywide, national, all, all areas, all of south africa, sa, rsa |
+10   | 1    | Western Cape        | wc, w cape, western cape province |
+11   | 1    | Eastern Cape        | ec, e cape, eastern cape province |
+12   | 1    | Northern Cape       | nc, n cape, northern cape province |
+13   | 1    | Free State          | fs, orange free state, free state province |
+14   | 1    | KwaZulu-Natal       | kzn, natal, kwazulu natal province |
+15   | 1    | North West          | nw, north west province |
+16   | 1    | Gauteng             | gp, gauteng province |
+17   | 1    | Mpumalanga          | mp, mpumalanga province |
+18   | 1    | Limpopo             | lp, northern province, limpopo province |
+
+100  | 10   | Cape Town           | cpt, city of cape town, kaapstad, mother city, cape town cbd, city bowl | major
+101  | 10   | Stellenbosch        | |
+102  | 10   | Paarl               | |
+104  | 10   | George              | | major
+105  | 10   | Knysna              | | major
+106  | 10   | Mossel Bay          | mosselbaai | major
+107  | 10   | Oudtshoorn          | | major
+108  | 10   | Worcester           | |
+109  | 10   | Hermanus            | |
+110  | 10   | Franschhoek         | |
+111  | 10   | Wellington          | |
+112  | 10   | Plettenberg Bay     | plett |
+113  | 10   | Malmesbury          | |
+114  | 10   | Saldanha            | saldanha bay |
+115  | 10   | Vredenburg          | |
+
+120  | 16   | Johannesburg        | joburg, jozi, jhb, jnb, egoli, city of johannesburg, johannesburg cbd | major
+121  | 16   | Pretoria            | tshwane, city of tshwane, pta, tshwane metro, pretoria cbd | major
+122  | 16   | Ekurhuleni          | east rand, city of ekurhuleni |
+123  | 16   | Vereeniging         | vaal, vaal triangle |
+124  | 16   | Vanderbijlpark      | |
+125  | 16   | Krugersdorp         | mogale city, west rand |
+126  | 16   | Randfontein         | |
+127  | 16   | Meyerton            | |
+128  | 16   | Heidelberg          | |
+
+140  | 14   | Durban              | ethekwini, city of durban, dbn, ethekwini metro, durban central, durban cbd | major
+141  | 14   | Pietermaritzburg    | pmb, maritzburg, msunduzi |
+142  | 14   | Newcastle           | |
+143  | 14   | Richards Bay        | |
+144  | 14   | Empangeni           | |
+145  | 14   | Ballito             | |
+146  | 14   | Port Shepstone      | |
+147  | 14   | Margate             | |
+148  | 14   | Ladysmith           | |
+149  | 14   | Howick              | |
+150  | 14   | Scottburgh          | |
+151  | 14   | KwaDukuza           | stanger |
+152  | 14   | Vryheid             | |
+153  | 14   | Eshowe              | |
+
+160  | 11   | Gqeberha            | port elizabeth, pe, nelson mandela bay, nmb, nelson mandela bay metro | major
+161  | 11   | East London         | buffalo city | major
+162  | 11   | Makhanda            | grahamstown |
+163  | 11   | Mthatha             | umtata |
+164  | 11   | Jeffreys Bay        | j bay, jbay, jeffreysbaai |
+165  | 11   | Komani              | queenstown |
+166  | 11   | Qonce               | king williams town, kwt |
+167  | 11   | Port Alfred         | |
+168  | 11   | Graaff-Reinet       | |
+
+180  | 13   | Bloemfontein        | mangaung, bloem | major
+181  | 13   | Welkom              | |
+182  | 13   | Bethlehem           | |
+183  | 13   | Kroonstad           | |
+184  | 13   | Sasolburg           | |
+185  | 13   | Parys               | |
+186  | 13   | Harrismith          | |
+
+200  | 17   | Mbombela            | nelspruit | major
+201  | 17   | eMalahleni          | witbank, emalahleni |
+202  | 17   | Secunda             | |
+203  | 17   | Standerton          | |
+204  | 17   | Middelburg          | |
+205  | 17   | Ermelo              | |
+206  | 17   | White River         | |
+207  | 17   | Hazyview            | |
+208  | 17   | Barberton           | |
+209  | 17   | Mashishing          | lydenburg |
+
+220  | 18   | Polokwane           | pietersburg | major
+221  | 18   | Tzaneen             | |
+222  | 18   | Modimolle           | nylstroom |
+223  | 18   | Bela-Bela           | warmbaths |
+224  | 18   | Lephalale           | ellisras |
+225  | 18   | Thohoyandou         | |
+226  | 18   | Mokopane            | potgietersrus |
+227  | 18   | Makhado             | louis trichardt |
+228  | 18   | Phalaborwa          | |
+229  | 18   | Musina              | messina |
+
+240  | 12   | Kimberley           | sol plaatje | major
+241  | 12   | Upington            | |
+242  | 12   | Springbok           | |
+243  | 12   | De Aar              | |
+244  | 12   | Kathu               | |
+245  | 12   | Kuruman             | |
+
+260  | 15   | Mahikeng            | mafikeng, mafeking | major
+261  | 15   | Klerksdorp          | |
+262  | 15   | Potchefstroom       | potch |
+263  | 15   | Rustenburg          | |
+264  | 15   | Brits               | |
+265  | 15   | Hartbeespoort       | harties, hartbeespoort dam |
+266  | 15   | Lichtenburg         | |
+267  | 15   | Vryburg             | |
+
+1000 | 100  | Somerset West       | |
+1001 | 100  | Strand              | |
+1002 | 100  | Gordon's Bay        | |
+1003 | 100  | Bellville           | |
+1004 | 100  | Durbanville         | |
+1005 | 100  | Kuils River         | kuilsrivier |
+1006 | 100  | Brackenfell         | |
+1007 | 100  | Parow               | |
+1008 | 100  | Goodwood            | |
+1009 | 100  | Milnerton           | |
+1010 | 100  | Table View          | tableview |
+1011 | 100  | Bloubergstrand      | blouberg |
+1012 | 100  | Mitchells Plain     | |
+1013 | 100  | Khayelitsha         | |
+1014 | 100  | Fish Hoek           | |
+1015 | 100  | Simon's Town        | simonstown |
+1016 | 100  | Hout Bay            | |
+1017 | 100  | Constantia          | |
+1018 | 100  | Claremont           | |
+1019 | 100  | Rondebosch          | |
+1020 | 100  | Newlands            | |
+1021 | 100  | Wynberg             | |
+1022 | 100  | Kenilworth          | |
+1023 | 100  | Observatory         | |
+1024 | 100  | Woodstock           | |
+1025 | 100  | Sea Point           | |
+1026 | 100  | Green Point         | |
+1027 | 100  | Camps Bay           | |
+1028 | 100  | Gardens             | |
+1029 | 100  | Tamboerskloof       | |
+1030 | 100  | Muizenberg          | |
+1031 | 100  | Tokai               | |
+1032 | 100  | Bergvliet           | |
+1033 | 100  | Plumstead           | |
+1034 | 100  | Pinelands           | |
+1035 | 100  | Century City        | |
+1036 | 100  | Parklands           | |
+1037 | 100  | Melkbosstrand       | |
+1038 | 100  | Kraaifontein        | |
+1039 | 100  | Atlantis            | |
+1040 | 100  | Gugulethu           | |
+1041 | 100  | Langa               | |
+1042 | 100  | Philippi            | |
+1043 | 100  | Athlone             | |
+1044 | 100  | Lansdowne           | |
+1045 | 100  | Noordhoek           | |
+1046 | 100  | Kommetjie           | |
+1047 | 100  | Fresnaye            | |
+1048 | 100  | Clifton             | |
+1049 | 100  | Bantry Bay          | |
+1050 | 100  | Vredehoek           | |
+1051 | 100  | Oranjezicht         | |
+1052 | 100  | Mowbray             | |
+1053 | 100  | Rosebank            | |
+
+1100 | 120  | Sandton             | | major
+1101 | 120  | Randburg            | | major
+1102 | 120  | Roodepoort          | |
+1103 | 120  | Soweto              | | major
+1104 | 120  | Midrand             | | major
+1105 | 120  | Fourways            | |
+1106 | 120  | Rosebank            | |
+1107 | 120  | Parktown            | |
+1108 | 120  | Melville            | |
+1109 | 120  | Auckland Park       | |
+1110 | 120  | Braamfontein        | |
+1111 | 120  | Houghton            | houghton estate |
+1112 | 120  | Killarney           | |
+1113 | 120  | Parkhurst           | |
+1114 | 120  | Greenside           | |
+1115 | 120  | Northcliff          | |
+1116 | 120  | Linden              | |
+1117 | 1100 | Bryanston           | |
+1118 | 1100 | Rivonia             | |
+1119 | 1100 | Morningside         | |
+1120 | 1100 | Sunninghill         | |
+1121 | 1100 | Illovo              | |
+1122 | 1100 | Hyde Park           | |
+1123 | 120  | Lonehill            | |
+1124 | 120  | Douglasdale         | |
+1125 | 120  | Alexandra           | alex |
+1126 | 120  | Lenasia             | |
+1127 | 120  | Diepsloot           | |
+1128 | 1104 | Kyalami             | |
+1129 | 1104 | Noordwyk            | |
+1130 | 1104 | Halfway House       | |
+1131 | 120  | Mondeor             | |
+1132 | 120  | Turffontein         | |
+1133 | 120  | Rosettenville       | |
+1134 | 120  | Melrose             | |
+1135 | 120  | Craighall           | |
+1136 | 120  | Dainfern            | |
+1137 | 120  | Johannesburg South  | joburg south, jhb south |
+
+1200 | 121  | Centurion           | | major
+1201 | 121  | Hatfield            | |
+1202 | 121  | Brooklyn            | |
+1203 | 121  | Menlyn              | |
+1204 | 121  | Waterkloof          | |
+1205 | 121  | Arcadia             | |
+1206 | 121  | Sunnyside           | |
+1207 | 121  | Lynnwood            | |
+1208 | 121  | Garsfontein         | |
+1209 | 121  | Faerie Glen         | |
+1210 | 121  | Montana             | |
+1211 | 121  | Mamelodi            | |
+1212 | 121  | Soshanguve          | |
+1213 | 121  | Atteridgeville      | |
+1214 | 1200 | Irene               | |
+1215 | 121  | Akasia              | |
+1216 | 121  | Pretoria East       | |
+1217 | 121  | Pretoria North      | |
+
+1300 | 122  | Benoni              | |
+1301 | 122  | Boksburg            | |
+1302 | 122  | Germiston           | |
+1303 | 122  | Kempton Park        | |
+1304 | 122  | Springs             | |
+1305 | 122  | Alberton            | |
+1306 | 122  | Edenvale            | |
+1307 | 122  | Brakpan             | |
+1308 | 122  | Nigel               | |
+1309 | 122  | Bedfordview         | |
+1310 | 122  | Tembisa             | |
+
+1400 | 140  | Umhlanga            | umhlanga rocks | major
+1401 | 140  | Durban North        | |
+1402 | 140  | Westville           | |
+1403 | 140  | Pinetown            | |
+1404 | 140  | Chatsworth          | |
+1405 | 140  | Amanzimtoti         | toti |
+1406 | 140  | Berea               | |
+1407 | 140  | Morningside         | |
+1408 | 140  | Glenwood            | |
+1409 | 140  | Musgrave            | |
+1410 | 140  | Umlazi              | |
+1411 | 140  | Phoenix             | |
+1412 | 140  | KwaMashu            | |
+1413 | 140  | Hillcrest           | |
+1414 | 140  | Kloof               | |
+1415 | 140  | Gillitts            | |
+1416 | 140  | Queensburgh         | |
+1417 | 140  | Bluff               | |
+1418 | 140  | La Lucia            | |
+1419 | 140  | Umdloti             | |
+
+1500 | 160  | Summerstrand        | |
+1501 | 160  | Walmer              | |
+1502 | 160  | Newton Park         | |
+1503 | 160  | Humewood            | |
+1504 | 160  | Lorraine            | |
+1505 | 160  | Despatch            | |
+1506 | 160  | Kariega             | uitenhage |
+1507 | 160  | Motherwell          | |
+1508 | 160  | Mill Park           | |
+1509 | 160  | Sunridge Park       | |
+1510 | 160  | Blue Water Bay      | bluewater bay |
+
+1600 | 161  | Beacon Bay          | |
+1601 | 161  | Gonubie             | |
+1602 | 161  | Vincent             | |
+1603 | 161  | Nahoon              | |
+1604 | 161  | Mdantsane           | |
+"""
+
+# Decorations stripped from service-area text before lookup ("Greater Cape Town area")
+_PREFIXES = ('greater ', 'city of ', 'metro of ')
+_SUFFIXES = (
+    ' and surrounding areas', ' and surrounds', ' and surrounding', ' surrounding areas', ' surrounds',
+    ' metropole', ' metro', ' municipality', ' region', ' district', ' area', ' areas',
+)
+
+
+class Place:
+    __slots__ = ('id', 'parent_id', 'name', 'depth', 'major')
+
+    def __init__(self, id, parent_id, name, depth, major):
+        self.id = id
+        self.parent_id = parent_id
+        self.name = name
+        self.depth = depth
+        self.major = major
+
+    def __repr__(self):
+        return f"Place({self.id}, {self.name!r})"
+
+
+def normalize_place_name(text) -> str:
+    """Lowercase, drop punctuation/apostrophes, collapse whitespace."""
+    if text is None:
+        return ''
+    value = str(text).lower().replace("'", '').replace('’', '')
+    value = re.sub(r'[^a-z0-9]+', ' ', value)
+    return ' '.join(value.split())
+
+
+def _load():
+    places = {}
+    names = {}
+    raw = []
+    for line in _ROWS.strip().splitlines():
+        if not line.strip():
+            continue
+        id_part, parent_part, name, aliases, flags = [p.strip() for p in line.split('|')]
+        raw.append((int(id_part), int(parent_part) if parent_part else None, name, aliases, flags))
+
+    parents = {row[0]: row[1] for row in raw}
+
+    def depth_of(place_id):
+        depth = 0
+        while parents.get(place_id) is not None:
+            place_id = parents[place_id]
+            depth += 1
+        return depth
+
+    for place_id, parent_id, name, aliases, flags in raw:
+        if place_id in places:
+            raise ValueError(f"Duplicate gazetteer id {place_id}")
+        places[place_id] = Place(place_id, parent_id, name, depth_of(place_id), 'major' in flags.split())
+        for key in [name] + [a for a in aliases.split(',') if a.strip()]:
+            norm = normalize_place_name(key)
+            if norm and place_id not in names.setdefault(norm, []):
+                names[norm].append(place_id)
+
+    children = {}
+    for place in places.values():
+        if place.parent_id is not None:
+            children.setdefault(place.parent_id, []).append(place.id)
+    return places, {k: tuple(v) for k, v in names.items()}, children
+
+
+PLACES, _NAMES, _CHILDREN = _load()
+
+
+# ------------------------------------------------------------------- lookups
+
+def _candidates(text):
+    """Gazetteer ids for one piece of text (exact name/alias, then with decorations stripped)."""
+    norm = normalize_place_name(text)
+    if not norm:
+        return ()
+    if norm in _NAMES:
+        return _NAMES[norm]
+    stripped = norm
+    for prefix in _PREFIXES:
+        if stripped.startswith(prefix):
+            stripped = stripped[len(prefix):]
+    for suffix in _SUFFIXES:
+        if stripped.endswith(suffix):
+            stripped = stripped[:-len(suffix)]
+            break
+    return _NAMES.get(stripped.strip(), ())
+
+
+def _pick(ids, within=None):
+    """Choose among ambiguous ids: prefer one under `within`, else the shallowest (lowest id on ties)."""
+    if not ids:
+        return None
+    if within is not None:
+        inside = [i for i in ids if within in ancestors(i)]
+        if inside:
+            ids = inside
+    return min(ids, key=lambda i: (PLACES[i].depth, i))
+
+
+@lru_cache(maxsize=8192)
+def resolve(text, within=None):
+    """
+    Gazetteer id for a place name, or None.
+
+    "Cape Town, Western Cape" style values are tried whole, then part by part
+    (first resolvable part wins, resolved inside the later parts when possible).
+    """
+    ids = _candidates(text)
+    if ids:
+        return _pick(ids, within)
+    if text is None or ',' not in str(text):
+        return None
+    parts = [p for p in str(text).split(',') if p.strip()]
+    context = within
+    for part in reversed(parts[1:]):
+        context = resolve(part, context) or context
+    for part in parts:
+        found = _candidates(part)
+        if found:
+            return _pick(found, context)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def ancestors(place_id):
+    """(place_id, parent, ..., country) for a gazetteer id; () for unknown ids."""
+    chain = []
+    while place_id is not None and place_id in PLACES:
+        chain.append(place_id)
+        place_id = PLACES[place_id].parent_id
+    return tuple(chain)
+
+
+def backfill_coverage_location_gid(apps, schema_editor):
+    ProviderCoverage = apps.get_model("users", "ProviderCoverage")
+    area_keys = ProviderCoverage.objects.exclude(area_key="").values_list("area_key", flat=True).distinct()
+    for area_key in list(area_keys):
+        location_gid = resolve(area_key)
+        if location_gid is not None:
+            ProviderCoverage.objects.filter(area_key=area_key).update(location_gid=location_gid)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_providercoverage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providercoverage',
+            name='location_gid',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='providercoverage',
+            index=models.Index(fields=['category', 'location_gid'], name='users_provi_categor_8d452d_idx'),
+        ),
+        migrations.RunPython(backfill_coverage_location_gid, migrations.RunPython.noop),
+    ]
@@ -766,5 +766,31 @@ class Service(models.Model):
         return f"Service {self.name} - {self.provider.user.email}"
 
 
+class ProviderCoverage(models.Model):
+    """
+    Denormalized (provider, category, area) coverage rows.
+
+    Derived from ProviderProfile.service_categories / service_areas plus active
+    Service objects (see backend/users/coverage.py) so matching can use indexed
+    lookups instead of re-parsing JSON. area_key is the lowercased, stripped
+    service area; providers without service areas get a single '' row per category.
+    location_gid is the gazetteer id area_key resolves to (None when unknown).
+    """
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='coverage')
+    category = models.ForeignKey('leads.ServiceCategory', on_delete=models.CASCADE, related_name='provider_coverage')
+    area_key = models.CharField(max_length=200, blank=True, default='')
+    location_gid = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['provider', 'category', 'area_key']
+        indexes = [
+            models.Index(fields=['category', 'area_key']),
+            models.Index(fields=['category', 'location_gid']),
+        ]
+
+    def __str__(self):
+        return f"Coverage {self.provider_id} - {self.category_id} @ {self.area_key or '*'}"
+
+
 # SupportTicket and TicketResponse models moved to support app
 
@@ -8,7 +8,7 @@ from django.utils import timezone
 from django.db.models import Case, When, Value, BooleanField
 from django.db.models import Q
 
-from .models import ProviderProfile, User
+from .models import ProviderCoverage, ProviderProfile, User
 from backend.leads.models import ServiceCategory
 
 from .service_category_utils import CATEGORY_SLUG_ALIASES
@@ -137,10 +137,8 @@ def public_providers_list(request):
     if category_slug:
         slugs = _expand_category_slugs_for_filter(category_slug)
         if slugs:
-            cat_q = Q()
-            for s in slugs:
-                cat_q |= Q(service_categories__contains=[s])
-            qs = qs.filter(cat_q)
+            covering = ProviderCoverage.objects.filter(category__slug__in=slugs).values('provider_id')
+            qs = qs.filter(id__in=covering)
     if city:
         # Providers don't always store location consistently (some put the main city in `suburb`).
         # Match either field to make city filters on the frontend behave as users expect.
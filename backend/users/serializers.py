@@ -727,8 +727,8 @@ class LeadCreateSerializer(serializers.ModelSerializer):
         
         # Calculate ML multiplier using existing ML services
         try:
-            from backend.leads.ml_services import DynamicPricingMLService
-            pricing_service = DynamicPricingMLService()
+            from backend.leads.ml_registry import ml_registry
+            pricing_service = ml_registry.get('pricing')
             
             # Create a temporary lead object for ML calculation
             temp_lead = Lead(
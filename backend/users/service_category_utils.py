@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Set
+from typing import Iterable, List, Optional, Set, Tuple
 
 from django.utils.text import slugify
 
@@ -25,6 +25,48 @@ CATEGORY_SLUG_ALIASES = {
 
 SECURITY_PARENT_SLUG = "security"
 
+# ProviderProfile.service_categories may hold legacy values written by older clients.
+# (legacy stored value) -> canonical slug
+PROVIDER_CATEGORY_SLUG_ALIASES = {
+    "appliance": "appliance-repair",
+    "pool": "pool-maintenance",
+    "renovation": "renovations",
+    "general": "handyman",
+}
+
+
+def split_provider_category_inputs(values) -> Tuple[Set[int], Set[str]]:
+    """
+    ProviderProfile.service_categories is supposed to store slugs, but older data
+    sometimes contains IDs or human names. Normalize robustly.
+    Returns (ids: set[int], slugs: set[str])
+    """
+    ids: Set[int] = set()
+    slugs: Set[str] = set()
+    if not values:
+        return ids, slugs
+
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, int):
+            if v > 0:
+                ids.add(v)
+            continue
+        s = str(v).strip()
+        if not s:
+            continue
+        if s.isdigit():
+            ids.add(int(s))
+            continue
+        norm = slugify(s)
+        if not norm:
+            continue
+        norm = PROVIDER_CATEGORY_SLUG_ALIASES.get(norm, norm)
+        slugs.add(norm)
+
+    return ids, slugs
+
 
 def _canonicalize_slug(raw: object) -> str:
     """
@@ -317,6 +317,8 @@ def _sync_service_categories_json_field(provider_profile):
     This ensures that when services are added/removed, the JSON field is updated
     so that lead filtering works correctly.
     """
+    from backend.leads.models import ServiceCategory
+
     try:
         # Get all active service category slugs from Service objects
         active_service_categories = set()
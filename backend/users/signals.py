@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import User, ProviderProfile, Wallet
+from .models import User, ProviderProfile, Service, Wallet
 from backend.payments.models import PaymentAccount
 from backend.notifications.models import Notification
 
@@ -55,3 +56,38 @@ def create_provider_welcome_notification(sender, instance, created, **kwargs):
             import logging
             logging.getLogger(__name__).error(f"Failed to send pro welcome email: {e}", exc_info=True)
 
+
+COVERAGE_SOURCE_FIELDS = {'service_categories', 'service_areas'}
+
+
+@receiver(post_save, sender=ProviderProfile)
+def sync_coverage_on_profile_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep ProviderCoverage rows in sync with service_categories / service_areas"""
+    from .match_profile import MATCH_PROFILE_FIELDS, invalidate_match_profile
+    if update_fields is not None and not COVERAGE_SOURCE_FIELDS.intersection(update_fields):
+        # Tier / premium changes still affect the cached match profile
+        if MATCH_PROFILE_FIELDS.intersection(update_fields):
+            invalidate_match_profile(instance.pk)
+        return
+    from .coverage import sync_provider_coverage
+    sync_provider_coverage(instance)  # also invalidates the match profile
+
+
+@receiver(post_save, sender=Service)
+def sync_coverage_on_service_change(sender, instance, **kwargs):
+    """Active Service objects contribute categories to ProviderCoverage"""
+    from .coverage import sync_provider_coverage
+    try:
+        profile = ProviderProfile.objects.get(pk=instance.provider_id)
+    except ProviderProfile.DoesNotExist:
+        return  # Profile being deleted; coverage rows cascade
+    sync_provider_coverage(profile)
+
+
+@receiver(post_delete, sender=Service)
+def sync_coverage_on_service_delete(sender, instance, origin=None, **kwargs):
+    """Deleting a Service can drop a category; skipped when the provider itself is being deleted"""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (ProviderProfile, User):
+        return  # Cascade delete; coverage rows go with the profile
+    sync_coverage_on_service_change(sender, instance, **kwargs)
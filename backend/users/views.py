@@ -605,11 +605,9 @@ def claim_lead(request, lead_id):
             else:
                 payment_method = 'allocation'
         
-        # Calculate credit cost dynamically
-        from backend.leads.ml_services import DynamicPricingMLService
-        pricing_service = DynamicPricingMLService()
-        pricing_result = pricing_service.calculate_dynamic_lead_price(lead, request.user)
-        credit_cost = int(round(pricing_result['credits']))
+        # Stored lead price (see leads/lead_pricing.py)
+        from backend.leads.lead_pricing import lead_credits
+        credit_cost = lead_credits(lead, request.user)
         
         # Check if provider can afford it - always check credit balance
         if provider_profile.credit_balance < credit_cost:
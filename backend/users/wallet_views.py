@@ -129,14 +129,11 @@ def unlock_lead(request, lead_id):
                     'user_friendly': True
                 }, status=403)
             
-            # Check location match
-            lead_city = lead.location_city.lower()
-            lead_suburb = lead.location_suburb.lower()
-            service_areas = [area.lower() for area in profile.service_areas]
-            
+            # Check location match (gazetteer containment, substring for unknown names)
+            from backend.leads.gazetteer import area_matches
             location_match = any(
-                lead_city in area or lead_suburb in area or area in lead_city 
-                for area in service_areas
+                area_matches(area, lead.location_city, lead.location_suburb)
+                for area in profile.service_areas
             )
             
             if not location_match:
@@ -296,23 +293,14 @@ def unlock_lead(request, lead_id):
 
 def get_lead_credits_cost(lead_id, provider=None):
     """
-    Get credits required for lead unlock using ML pricing
+    Get credits required for lead unlock (stored lead price, see leads/lead_pricing.py)
     """
     try:
+        from backend.leads.lead_pricing import lead_credits
         from backend.leads.models import Lead
-        from backend.leads.ml_services import DynamicPricingMLService
-        
-        lead = Lead.objects.get(id=lead_id)
-        
-        # Use the integrated ML pricing service
-        pricing_service = DynamicPricingMLService()
-        pricing_result = pricing_service.calculate_dynamic_lead_price(lead, provider)
-        
-        # Convert Rands to credits (R50 = 1 credit)
-        price_in_rands = pricing_result.get('price', 50)
-        credits = max(1, round(price_in_rands / 50, 1))
         
-        return credits
+        lead = Lead.objects.select_related('service_category').get(id=lead_id)
+        return lead_credits(lead, provider)
     except Lead.DoesNotExist:
         # Fallback to default pricing
         return 8  # Default 8 credits